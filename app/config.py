@@ -0,0 +1,120 @@
+import os
+
+# "dynamodb" talks to AWS; "memory" keeps the table in-process for local runs,
+# benchmarks and load tests, and starts empty on every boot
+TABLE_BACKEND = os.getenv("TABLE_BACKEND", "dynamodb")
+
+LOGIN_RATE_LIMIT_BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")
+LOGIN_MAX_ATTEMPTS_PER_EMAIL = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_EMAIL", "5"))
+LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "50"))
+LOGIN_ATTEMPT_WINDOW_SECONDS = int(os.getenv("LOGIN_ATTEMPT_WINDOW_SECONDS", "300"))
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# gzip 6 and brotli 4 keep CPU per request low while still shrinking JSON ~5-8x
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# "dynamodb" reads the table's stream, "memory" the in-memory table's changes,
+# "none" leaves other instances to find out when their cache entries expire
+CHANGE_STREAM_SOURCE = os.getenv("CHANGE_STREAM_SOURCE", "none")
+DYNAMODB_STREAM_ARN = os.getenv("DYNAMODB_STREAM_ARN", "")
+CHANGE_STREAM_POLL_SECONDS = float(os.getenv("CHANGE_STREAM_POLL_SECONDS", "1"))
+
+# how long an instance trusts its own copy of an item's version for ETags;
+# with a change stream, writes elsewhere invalidate it so it can live longer
+VERSION_CACHE_TTL_SECONDS = float(
+    os.getenv(
+        "VERSION_CACHE_TTL_SECONDS", "5" if CHANGE_STREAM_SOURCE == "none" else "300"
+    )
+)
+
+# lets catalog reads through without a token so a CDN can cache them
+PUBLIC_CATALOG_ENABLED = os.getenv("PUBLIC_CATALOG_ENABLED", "false").lower() == "true"
+CATALOG_BROWSER_MAX_AGE = int(os.getenv("CATALOG_BROWSER_MAX_AGE", "30"))
+CATALOG_CDN_MAX_AGE = int(os.getenv("CATALOG_CDN_MAX_AGE", "300"))
+CDN_PURGE_URL = os.getenv("CDN_PURGE_URL", "")
+CDN_PURGE_TOKEN = os.getenv("CDN_PURGE_TOKEN", "")
+# purges within this window go out as one request, so a burst of bookings
+# on one show doesn't send one per booking
+CDN_PURGE_BATCH_SECONDS = float(os.getenv("CDN_PURGE_BATCH_SECONDS", "1"))
+
+# asks DynamoDB to report RCU/WCU on every call so costs can be tied to routes
+DYNAMODB_RETURN_CONSUMED_CAPACITY = (
+    os.getenv("DYNAMODB_RETURN_CONSUMED_CAPACITY", "true").lower() == "true"
+)
+
+# "file" writes JSON-lines spans, "otlp" posts them to a collector, "none" is off
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", "traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv(
+    "TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"
+)
+
+# requests slower than this log a per-layer breakdown; 0 turns it off. When
+# on, every request records its spans to build that breakdown
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "0"))
+SLOW_REQUEST_PROFILE = os.getenv("SLOW_REQUEST_PROFILE", "false").lower() == "true"
+PROFILER_INTERVAL_SECONDS = float(os.getenv("PROFILER_INTERVAL_SECONDS", "0.005"))
+PROFILER_MAX_SECONDS = int(os.getenv("PROFILER_MAX_SECONDS", "300"))
+
+# how long an instance remembers the city/host rows it has already written
+SHOW_INDEX_CACHE_TTL_SECONDS = float(os.getenv("SHOW_INDEX_CACHE_TTL_SECONDS", "3600"))
+
+# a bulk schedule is written as transactions of up to 33 shows, this many at once
+SHOW_SCHEDULE_MAX_SHOWS = int(os.getenv("SHOW_SCHEDULE_MAX_SHOWS", "1000"))
+SHOW_SCHEDULE_WRITE_CONCURRENCY = int(os.getenv("SHOW_SCHEDULE_WRITE_CONCURRENCY", "4"))
+
+# seats per show when the host does not give a capacity, and how few
+# remaining seats turn a listing's availability badge to "few_left"
+SHOW_DEFAULT_CAPACITY = int(os.getenv("SHOW_DEFAULT_CAPACITY", "200"))
+SHOW_FEW_SEATS_LEFT = int(os.getenv("SHOW_FEW_SEATS_LEFT", "10"))
+# upper bound on SEATS#<section> items per sectioned show
+SHOW_MAX_SEAT_SECTIONS = int(os.getenv("SHOW_MAX_SEAT_SECTIONS", "1000"))
+
+# idle seat streams get a comment line this often; a listener this many
+# messages behind is dropped and reconnects
+SEAT_STREAM_KEEPALIVE_SECONDS = float(os.getenv("SEAT_STREAM_KEEPALIVE_SECONDS", "15"))
+SEAT_STREAM_MAX_QUEUE = int(os.getenv("SEAT_STREAM_MAX_QUEUE", "100"))
+
+# booking attempts per show are admitted at this rate after an initial burst;
+# the rest wait up to ADMISSION_MAX_WAIT_SECONDS in a queue. With the memory
+# backend the rate applies per instance.
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "memory")
+ADMISSION_RATE_PER_SECOND = float(os.getenv("ADMISSION_RATE_PER_SECOND", "50"))
+ADMISSION_BURST = int(os.getenv("ADMISSION_BURST", "50"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "300"))
+ADMISSION_TOKEN_GRACE_SECONDS = float(os.getenv("ADMISSION_TOKEN_GRACE_SECONDS", "60"))
+
+# batch concurrent bookings per show into shared transactions, collecting
+# for this long before each write
+BOOKING_COALESCE_ENABLED = os.getenv("BOOKING_COALESCE_ENABLED", "false").lower() == "true"
+BOOKING_COALESCE_WINDOW_MS = float(os.getenv("BOOKING_COALESCE_WINDOW_MS", "5"))
+
+# a cart is checked out in one transaction of at most 100 items; a show
+# without sections takes five of them
+CART_MAX_SHOWS = int(os.getenv("CART_MAX_SHOWS", "20"))
+
+# bookings for shows older than this many days are moved, once per interval,
+# into one compressed archive item per user and year
+BOOKING_ARCHIVE_ENABLED = os.getenv("BOOKING_ARCHIVE_ENABLED", "false").lower() == "true"
+BOOKING_ARCHIVE_AFTER_DAYS = int(os.getenv("BOOKING_ARCHIVE_AFTER_DAYS", "90"))
+BOOKING_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("BOOKING_ARCHIVE_INTERVAL_SECONDS", "86400"))
+BOOKING_ARCHIVE_PAGE_SIZE = int(os.getenv("BOOKING_ARCHIVE_PAGE_SIZE", "500"))
+
+# host sales analytics show this many days by default, and at most
+# ANALYTICS_MAX_DAYS per request
+ANALYTICS_DEFAULT_DAYS = int(os.getenv("ANALYTICS_DEFAULT_DAYS", "30"))
+ANALYTICS_MAX_DAYS = int(os.getenv("ANALYTICS_MAX_DAYS", "366"))
+# bookings write their sales to random outbox shards, which a worker folds
+# into counters spread over ANALYTICS_COUNTER_SHARDS partitions per host
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+ANALYTICS_OUTBOX_SHARDS = int(os.getenv("ANALYTICS_OUTBOX_SHARDS", "8"))
+ANALYTICS_COUNTER_SHARDS = int(os.getenv("ANALYTICS_COUNTER_SHARDS", "4"))
+ANALYTICS_POLL_SECONDS = float(os.getenv("ANALYTICS_POLL_SECONDS", "5"))
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "200"))
+
+# copies event block/unblock flips from the outbox to the denormalized rows
+EVENT_FANOUT_ENABLED = os.getenv("EVENT_FANOUT_ENABLED", "true").lower() == "true"
+EVENT_FANOUT_POLL_SECONDS = float(os.getenv("EVENT_FANOUT_POLL_SECONDS", "5"))
+EVENT_FANOUT_BATCH_SIZE = int(os.getenv("EVENT_FANOUT_BATCH_SIZE", "100"))
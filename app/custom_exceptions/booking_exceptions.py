@@ -1,2 +1,12 @@
+from app.custom_exceptions.generic import TooManyRequests
+
+
 class SeatAlreadyBookedException(Exception):
     pass
+
+
+class QueuedForAdmission(TooManyRequests):
+    def __init__(self, message: str, retry_after: int, queue_token: str, position: int):
+        super().__init__(message, retry_after=retry_after)
+        self.queue_token = queue_token
+        self.position = position
@@ -10,3 +10,9 @@ class BlockedResource(Exception):
         self.resource = resource
         self.identifier = identifier
         self.status_code = status_code
+
+
+class TooManyRequests(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
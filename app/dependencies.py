@@ -1,9 +1,16 @@
-from typing import List
+from typing import List, Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from app.utils.jwt_service import decode_access_token
+from app.utils.tracing import traced
+from app.models.users import Role
+from app import config
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
+
+# anonymous catalog readers get exactly what a customer would see
+ANONYMOUS_USER = {"user_id": None, "role": Role.CUSTOMER.value, "anonymous": True}
 
 
 def get_user_service(request: Request):
@@ -30,6 +37,36 @@ def get_booking_service(request: Request):
     return request.app.state.booking_service
 
 
+def get_analytics_service(request: Request):
+    return request.app.state.analytics_service
+
+
+def get_seat_stream(request: Request):
+    return request.app.state.seat_stream
+
+
+def get_outbox_repo(request: Request):
+    return request.app.state.outbox_repo
+
+
+def get_event_fanout_worker(request: Request):
+    return request.app.state.event_fanout_worker
+
+
+def get_profiler(request: Request):
+    return request.app.state.profiler
+
+
+def get_client_ip(request: Request) -> Optional[str]:
+    # behind the ALB the peer address is the load balancer; it appends the
+    # real client address as the last X-Forwarded-For entry
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        return forwarded_for.split(",")[-1].strip()
+    return request.client.host if request.client else None
+
+
+@traced("auth.get_current_user", layer="auth")
 def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = decode_access_token(token)
@@ -40,6 +77,18 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         )
 
 
+def get_public_catalog_user(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    if token is None:
+        return ANONYMOUS_USER
+    return get_current_user(token)
+
+
+# catalog reads accept anonymous callers only when the public mode is on
+get_catalog_user = (
+    get_public_catalog_user if config.PUBLIC_CATALOG_ENABLED else get_current_user
+)
+
+
 def require_roles(allowed_roles: List[str]):
     def role_checker(
         current_user: dict = Depends(get_current_user),
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -12,69 +12,263 @@ from app.routers.hosts import hosts_router
 from app.routers.shows import shows_router
 from app.routers.users import users_router
 from app.routers.bookings import bookings_router
+from app.routers.admin import admin_router
 
 from app.custom_exceptions.user_exceptions import (
     UserAlreadyExists,
     IncorrectCredentials,
     UserBlocked,
 )
-from app.custom_exceptions.generic import NotFoundException, BlockedResource
-from app.custom_exceptions.booking_exceptions import SeatAlreadyBookedException
+from app.custom_exceptions.generic import (
+    NotFoundException,
+    BlockedResource,
+    TooManyRequests,
+)
+from app.custom_exceptions.booking_exceptions import (
+    QueuedForAdmission,
+    SeatAlreadyBookedException,
+)
 from botocore.exceptions import ClientError
 
-from boto3 import resource
+from boto3 import client, resource
 
 from app.repository.user_repository import UserRepository
 from app.repository.event_repository import EventRepository
 from app.repository.artist_repository import ArtistRepository
 from app.repository.venue_repository import VenueRepository
 from app.repository.show_repository import ShowRepository
+from app.repository.analytics_repository import AnalyticsRepository
 from app.repository.booking_repository import BookingRepository
+from app.repository.memory_table import MemoryTable
+from app.repository.outbox_repository import OutboxRepository
 
 from app.services.event_service import EventService
 from app.services.artist_service import ArtistService
 from app.services.user_service import UserService
 from app.services.venue_service import VenuService
 from app.services.show_service import ShowService
+from app.services.analytics_service import AnalyticsService
 from app.services.booking_service import BookingService
 
+from app.utils.admission import (
+    AdmissionController,
+    DynamoDBAdmissionBackend,
+    InMemoryAdmissionBackend,
+)
+from app.utils.booking_coalescer import BookingCoalescer
+from app.utils.cache import TTLCache
+from app.utils.capacity import ConsumedCapacityMiddleware, register_capacity_hooks
+from app.utils.cdn import build_purger
+from app.utils.change_stream import (
+    ChangeStreamConsumer,
+    DynamoDBStreamSource,
+    InvalidationBus,
+    MemoryStreamSource,
+)
+from app.utils.json_response import FastJSONResponse
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.utils.profiling import SamplingProfiler, SlowRequestMiddleware
+from app.utils.rate_limiter import (
+    DynamoDBRateLimitBackend,
+    InMemoryRateLimitBackend,
+    LoginThrottler,
+)
+from app.utils.seat_stream import SeatStreamHub
+from app.utils.tracing import (
+    TracingMiddleware,
+    build_exporter,
+    register_tracing_hooks,
+    tracer,
+)
+from app.workers.booking_archive import BookingArchiveWorker
+from app.workers.event_fanout import EventFanoutWorker
+from app.workers.sales_aggregation import SalesAggregationWorker
+from app import config
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
 
-    dynamodb = resource("dynamodb", region_name="ap-south-1")
-    table = dynamodb.Table("eventro_table")
+def build_services(app: FastAPI, table):
+    """Wires repositories and services onto `app.state` around `table`.
 
+    The load test calls this directly with a table it has already seeded.
+    """
     app.state.user_repo = UserRepository(table=table)
     app.state.event_repo = EventRepository(table=table)
     app.state.artist_repo = ArtistRepository(table=table)
     app.state.venue_repo = VenueRepository(table=table)
-    app.state.show_repo = ShowRepository(table=table)
-    app.state.booking_repo = BookingRepository(table=table)
+    app.state.show_repo = ShowRepository(
+        table=table,
+        index_cache=TTLCache(ttl_seconds=config.SHOW_INDEX_CACHE_TTL_SECONDS),
+    )
+    app.state.booking_repo = BookingRepository(
+        table=table, sales_outbox_shards=config.ANALYTICS_OUTBOX_SHARDS
+    )
+    app.state.analytics_repo = AnalyticsRepository(
+        table=table, counter_shards=config.ANALYTICS_COUNTER_SHARDS
+    )
+    app.state.sales_aggregation_worker = SalesAggregationWorker(
+        analytics_repo=app.state.analytics_repo,
+        outbox_shards=config.ANALYTICS_OUTBOX_SHARDS,
+        batch_size=config.ANALYTICS_BATCH_SIZE,
+        poll_interval=config.ANALYTICS_POLL_SECONDS,
+    )
+    app.state.booking_archive_worker = BookingArchiveWorker(
+        booking_repo=app.state.booking_repo,
+        archive_after_days=config.BOOKING_ARCHIVE_AFTER_DAYS,
+        page_size=config.BOOKING_ARCHIVE_PAGE_SIZE,
+        poll_interval=config.BOOKING_ARCHIVE_INTERVAL_SECONDS,
+    )
+
+    if config.LOGIN_RATE_LIMIT_BACKEND == "dynamodb":
+        rate_limit_backend = DynamoDBRateLimitBackend(table=table)
+    else:
+        rate_limit_backend = InMemoryRateLimitBackend()
+    app.state.login_throttler = LoginThrottler(
+        backend=rate_limit_backend,
+        max_attempts_per_email=config.LOGIN_MAX_ATTEMPTS_PER_EMAIL,
+        max_attempts_per_ip=config.LOGIN_MAX_ATTEMPTS_PER_IP,
+        window_seconds=config.LOGIN_ATTEMPT_WINDOW_SECONDS,
+    )
+
+    app.state.version_cache = TTLCache(ttl_seconds=config.VERSION_CACHE_TTL_SECONDS)
+    app.state.invalidation_bus = InvalidationBus()
+    app.state.invalidation_bus.register_cache(app.state.version_cache)
+    app.state.invalidation_bus.register_cache(app.state.show_repo.index_cache)
+    app.state.cdn_purger = build_purger(
+        url=config.CDN_PURGE_URL,
+        token=config.CDN_PURGE_TOKEN,
+        batch_seconds=config.CDN_PURGE_BATCH_SECONDS,
+    )
 
-    app.state.user_service = UserService(app.state.user_repo)
+    app.state.user_service = UserService(
+        app.state.user_repo, login_throttler=app.state.login_throttler
+    )
     app.state.artist_service = ArtistService(app.state.artist_repo)
-    app.state.venue_service = VenuService(app.state.venue_repo)
+    app.state.venue_service = VenuService(
+        app.state.venue_repo,
+        version_cache=app.state.version_cache,
+        cdn_purger=app.state.cdn_purger,
+    )
     app.state.show_service = ShowService(
         show_repo=app.state.show_repo,
         event_repo=app.state.event_repo,
         venue_repo=app.state.venue_repo,
+        version_cache=app.state.version_cache,
+        cdn_purger=app.state.cdn_purger,
+    )
+    app.state.outbox_repo = OutboxRepository(table=table)
+    app.state.event_fanout_worker = EventFanoutWorker(
+        outbox_repo=app.state.outbox_repo,
+        event_repo=app.state.event_repo,
+        batch_size=config.EVENT_FANOUT_BATCH_SIZE,
+        poll_interval=config.EVENT_FANOUT_POLL_SECONDS,
+        cdn_purger=app.state.cdn_purger,
     )
     app.state.event_service = EventService(
         event_repo=app.state.event_repo,
         artist_service=app.state.artist_service,
+        version_cache=app.state.version_cache,
+        cdn_purger=app.state.cdn_purger,
+        fanout_worker=app.state.event_fanout_worker,
+    )
+    app.state.seat_stream = SeatStreamHub(
+        load_booked_seats=app.state.show_service.get_booked_seats,
+        keepalive_seconds=config.SEAT_STREAM_KEEPALIVE_SECONDS,
+        max_queue=config.SEAT_STREAM_MAX_QUEUE,
     )
+    app.state.admission = None
+    if config.ADMISSION_ENABLED:
+        if config.ADMISSION_BACKEND == "dynamodb":
+            admission_backend = DynamoDBAdmissionBackend(table=table)
+        else:
+            admission_backend = InMemoryAdmissionBackend()
+        app.state.admission = AdmissionController(
+            backend=admission_backend,
+            rate_per_second=config.ADMISSION_RATE_PER_SECOND,
+            burst=config.ADMISSION_BURST,
+            max_wait_seconds=config.ADMISSION_MAX_WAIT_SECONDS,
+            token_grace_seconds=config.ADMISSION_TOKEN_GRACE_SECONDS,
+        )
     app.state.booking_service = BookingService(
         booking_repo=app.state.booking_repo,
         show_repo=app.state.show_repo,
         event_repo=app.state.event_repo,
         venue_repo=app.state.venue_repo,
+        version_cache=app.state.version_cache,
+        seat_stream=app.state.seat_stream,
+        admission=app.state.admission,
+        coalescer=(
+            BookingCoalescer(
+                app.state.booking_repo,
+                window_seconds=config.BOOKING_COALESCE_WINDOW_MS / 1000,
+            )
+            if config.BOOKING_COALESCE_ENABLED
+            else None
+        ),
+        cdn_purger=app.state.cdn_purger,
+    )
+    app.state.analytics_service = AnalyticsService(app.state.analytics_repo)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    if config.TABLE_BACKEND == "memory":
+        table = MemoryTable("eventro_table")
+    else:
+        dynamodb = resource("dynamodb", region_name="ap-south-1")
+        table = dynamodb.Table("eventro_table")
+        register_capacity_hooks(
+            dynamodb.meta.client, enabled=config.DYNAMODB_RETURN_CONSUMED_CAPACITY
+        )
+        register_tracing_hooks(dynamodb.meta.client)
+    tracer.set_exporter(
+        build_exporter(
+            config.TRACING_EXPORTER,
+            file_path=config.TRACING_FILE_PATH,
+            otlp_endpoint=config.TRACING_OTLP_ENDPOINT,
+        )
     )
+    app.state.profiler = SamplingProfiler(interval=config.PROFILER_INTERVAL_SECONDS)
+
+    build_services(app, table)
+    if config.EVENT_FANOUT_ENABLED:
+        app.state.event_fanout_worker.start()
+    if config.BOOKING_ARCHIVE_ENABLED:
+        app.state.booking_archive_worker.start()
+    if config.ANALYTICS_ENABLED:
+        app.state.sales_aggregation_worker.start()
+
+    change_source = None
+    if config.CHANGE_STREAM_SOURCE == "memory":
+        change_source = MemoryStreamSource(table.meta.client)
+    elif config.CHANGE_STREAM_SOURCE == "dynamodb":
+        change_source = DynamoDBStreamSource(
+            client("dynamodbstreams", region_name="ap-south-1"),
+            config.DYNAMODB_STREAM_ARN or table.latest_stream_arn,
+        )
+    app.state.change_stream = None
+    if change_source is not None:
+        app.state.change_stream = ChangeStreamConsumer(
+            change_source,
+            app.state.invalidation_bus,
+            poll_interval=config.CHANGE_STREAM_POLL_SECONDS,
+        )
+        # seats booked through other instances reach this one's seat streams
+        app.state.change_stream.add_record_listener(app.state.seat_stream.on_change)
+        app.state.change_stream.start()
 
     yield
 
+    if app.state.change_stream is not None:
+        app.state.change_stream.stop()
+    app.state.event_fanout_worker.stop()
+    app.state.booking_archive_worker.stop()
+    app.state.sales_aggregation_worker.stop()
+    app.state.profiler.stop()
+    tracer.set_exporter(None)
+
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -83,6 +277,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ConsumedCapacityMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(
+    SlowRequestMiddleware,
+    threshold_ms=config.SLOW_REQUEST_THRESHOLD_MS,
+    profile=config.SLOW_REQUEST_PROFILE,
+    profile_interval=config.PROFILER_INTERVAL_SECONDS,
+)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/health")
@@ -90,6 +293,12 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 app.include_router(router=auth_router)
 app.include_router(router=event_router)
 app.include_router(router=artist_router)
@@ -98,6 +307,7 @@ app.include_router(router=hosts_router)
 app.include_router(router=shows_router)
 app.include_router(router=users_router)
 app.include_router(router=bookings_router)
+app.include_router(router=admin_router)
 
 
 @app.exception_handler(HTTPException)
@@ -199,6 +409,35 @@ def incorrect_credentials_handler(request: Request, exc: IncorrectCredentials):
     )
 
 
+@app.exception_handler(TooManyRequests)
+def too_many_requests_handler(request: Request, exc: TooManyRequests):
+    return JSONResponse(
+        status_code=429,
+        content={
+            "status_code": 429,
+            "message": str(exc),
+        },
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(QueuedForAdmission)
+def queued_for_admission_handler(request: Request, exc: QueuedForAdmission):
+    return JSONResponse(
+        status_code=429,
+        content={
+            "status_code": 429,
+            "message": str(exc),
+            "data": {
+                "queue_token": exc.queue_token,
+                "position": exc.position,
+                "estimated_wait_seconds": exc.retry_after,
+            },
+        },
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.exception_handler(ClientError)
 def client_error_handler(request: Request, exc: ClientError):
     return JSONResponse(
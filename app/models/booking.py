@@ -1,6 +1,10 @@
 from dataclasses import dataclass
 from typing import List
 
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.venue import Venue
+
 
 @dataclass
 class Booking:
@@ -10,3 +14,13 @@ class Booking:
     time_booked: str
     total_booking_price: str
     seats: List[str]
+
+
+@dataclass
+class CartLine:
+    """The bookings of one show in a cart, with what they are written against."""
+
+    show: Show
+    event: Event
+    venue: Venue
+    bookings: List[Booking]
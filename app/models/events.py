@@ -16,6 +16,7 @@ class Event:
     is_blocked: bool
     artist_ids: List[str]
     artist_names: List[str]
+    version: int = 0
 
 @dataclass
 class EventDTO:
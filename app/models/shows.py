@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 import time
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -12,4 +12,17 @@ class Show:
     price: float
     show_date: str
     show_time: str
-    booked_seats: List[str]
+    # None when the show was read from a listing row, which only carries counts
+    booked_seats: Optional[List[str]]
+    version: int = 0
+    # 0 for shows created before seat counters existed
+    capacity: int = 0
+    seats_booked: int = 0
+    seats_held: int = 0
+    # set for shows whose seats are kept per section in `SEATS#<section>`
+    # items instead of on the show item; seat ids are then "<section>-<seat>"
+    seat_sections: Optional[List[str]] = None
+
+
+def seat_section(seat: str) -> str:
+    return seat.split("-", 1)[0]
@@ -10,3 +10,4 @@ class Venue:
     state: str
     is_blocked: bool
     is_seat_layout_required: bool
+    version: int = 0
@@ -0,0 +1,251 @@
+import logging
+import random
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from types_boto3_dynamodb import DynamoDBClient
+from types_boto3_dynamodb.service_resource import Table
+
+from app.models.booking import Booking
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.venue import Venue
+from app.utils.metrics import instrument_repository
+
+logger = logging.getLogger(__name__)
+
+SALES_OUTBOX_PK = "OUTBOX#SALES#"
+# an update per counter and a delete per sale
+MAX_TRANSACT_ITEMS = 100
+
+
+def sale_outbox_put(
+    table_name: str,
+    show: Show,
+    event: Event,
+    venue: Venue,
+    bookings: List[Booking],
+    day: str,
+    shards: int,
+) -> dict:
+    """The outbox half of a booking transaction: one new item per show
+    booked, on a random shard, so it never conflicts with another booking.
+    The aggregation worker folds it into the counters later."""
+    return {
+        "Put": {
+            "TableName": table_name,
+            "Item": {
+                "pk": f"{SALES_OUTBOX_PK}{random.randrange(shards)}",
+                "sk": bookings[0].booking_id,
+                "host_id": venue.host_id,
+                "show_id": show.id,
+                "show_date": show.show_date,
+                "show_time": show.show_time,
+                "event_id": event.id,
+                "event_name": event.name,
+                "day": day,
+                "tickets": sum(len(booking.seats) for booking in bookings),
+                "revenue": sum(
+                    Decimal(str(booking.total_booking_price)) for booking in bookings
+                ),
+                "bookings": len(bookings),
+            },
+        }
+    }
+
+
+@instrument_repository("analytics")
+class AnalyticsRepository:
+    """Sales counters per host, spread over `counter_shards` partitions
+    `ANALYTICS#HOST#<id>#<shard>` that readers add up. Each holds:
+
+    - `TOTAL` and `DAY#<day>` for the host,
+    - `EVENT#<id>` and `EVENT_DAY#<id>#<day>` per event,
+    - `SHOW#<id>` and `SHOW_DAY#<id>#<day>` per show,
+
+    each with `tickets`, `revenue` and `bookings`. Days are the days the
+    bookings were made on.
+    """
+
+    def __init__(
+        self, table: Table, client: DynamoDBClient = None, counter_shards: int = 4
+    ):
+        self.table = table
+        self.client = table.meta.client
+        self.counter_shards = max(1, counter_shards)
+
+    def list_sales(self, outbox_shard: int, limit: int) -> List[dict]:
+        resp = self.table.query(
+            KeyConditionExpression=Key("pk").eq(f"{SALES_OUTBOX_PK}{outbox_shard}"),
+            Limit=limit,
+        )
+        return resp.get("Items", [])
+
+    def apply_sales(self, sales: List[dict], outbox_shard: int) -> int:
+        """Adds outbox sales to the counters and deletes them, in as few
+        transactions as fit; returns how many were applied.
+
+        Sales of one batch that hit the same counter are summed into one
+        update, and every sale is deleted in the transaction that counts
+        it, so none is counted twice. A transaction that loses a race with
+        another worker is dropped; its sales stay for the next poll.
+        """
+        counter_shard = outbox_shard % self.counter_shards
+        applied = 0
+        batch: List[dict] = []
+        deltas: Dict[Tuple[str, str], dict] = {}
+        for sale in sales:
+            counters = self._counters(sale, counter_shard)
+            new_keys = [key for key in counters if key not in deltas]
+            if batch and len(deltas) + len(new_keys) + len(batch) + 1 > MAX_TRANSACT_ITEMS:
+                applied += self._commit(batch, deltas)
+                batch, deltas = [], {}
+            batch.append(sale)
+            for key, labels in counters.items():
+                delta = deltas.setdefault(
+                    key, {"labels": {}, "tickets": 0, "revenue": 0, "bookings": 0}
+                )
+                delta["labels"].update(labels)
+                for name in ("tickets", "revenue", "bookings"):
+                    delta[name] += sale[name]
+        if batch:
+            applied += self._commit(batch, deltas)
+        return applied
+
+    @staticmethod
+    def _counters(sale: dict, shard: int) -> Dict[Tuple[str, str], Dict[str, object]]:
+        pk = f"ANALYTICS#HOST#{sale['host_id']}#{shard}"
+        day, event_id, show_id = sale["day"], sale["event_id"], sale["show_id"]
+        # labels are rewritten on every update, so the latest name wins
+        return {
+            (pk, "TOTAL"): {},
+            (pk, f"DAY#{day}"): {"day": day},
+            (pk, f"EVENT#{event_id}"): {
+                "event_id": event_id,
+                "event_name": sale["event_name"],
+            },
+            (pk, f"EVENT_DAY#{event_id}#{day}"): {"event_id": event_id, "day": day},
+            (pk, f"SHOW#{show_id}"): {
+                "show_id": show_id,
+                "event_id": event_id,
+                "show_date": sale["show_date"],
+                "show_time": sale["show_time"],
+            },
+            (pk, f"SHOW_DAY#{show_id}#{day}"): {"show_id": show_id, "day": day},
+        }
+
+    def _commit(self, sales: List[dict], deltas: Dict[Tuple[str, str], dict]) -> int:
+        items = []
+        for (pk, sk), delta in deltas.items():
+            names = {"#tickets": "tickets", "#revenue": "revenue", "#bookings": "bookings"}
+            values = {
+                ":tickets": delta["tickets"],
+                ":revenue": delta["revenue"],
+                ":bookings": delta["bookings"],
+            }
+            expression = "ADD #tickets :tickets, #revenue :revenue, #bookings :bookings"
+            if delta["labels"]:
+                assignments = []
+                for i, (name, value) in enumerate(delta["labels"].items()):
+                    names[f"#l{i}"] = name
+                    values[f":l{i}"] = value
+                    assignments.append(f"#l{i} = :l{i}")
+                expression = f"SET {', '.join(assignments)} {expression}"
+            items.append(
+                {
+                    "Update": {
+                        "TableName": self.table.name,
+                        "Key": {"pk": pk, "sk": sk},
+                        "UpdateExpression": expression,
+                        "ExpressionAttributeNames": names,
+                        "ExpressionAttributeValues": values,
+                    }
+                }
+            )
+        for sale in sales:
+            items.append(
+                {
+                    "Delete": {
+                        "TableName": self.table.name,
+                        "Key": {"pk": sale["pk"], "sk": sale["sk"]},
+                        # another worker applied it already
+                        "ConditionExpression": "attribute_exists(pk)",
+                    }
+                }
+            )
+        try:
+            self.client.transact_write_items(TransactItems=items)
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            logger.info("skipped %d sales applied concurrently: %s", len(sales), err)
+            return 0
+        return len(sales)
+
+    def get_total(self, host_id: str) -> Optional[dict]:
+        keys = [
+            {"pk": f"ANALYTICS#HOST#{host_id}#{shard}", "sk": "TOTAL"}
+            for shard in range(self.counter_shards)
+        ]
+        request = {self.table.name: {"Keys": keys}}
+        items = []
+        while request:
+            resp = self.client.batch_get_item(RequestItems=request)
+            items.extend(resp.get("Responses", {}).get(self.table.name, []))
+            request = resp.get("UnprocessedKeys")
+        merged = self._merge(items)
+        return merged[0] if merged else None
+
+    def list_totals(self, host_id: str, kind: str) -> List[dict]:
+        """Per-entity totals, `kind` being "EVENT" or "SHOW"."""
+        return self._query(host_id, lambda: Key("sk").begins_with(f"{kind}#"))
+
+    def list_daily(
+        self,
+        host_id: str,
+        from_day: str,
+        to_day: str,
+        event_id: Optional[str] = None,
+        show_id: Optional[str] = None,
+    ) -> List[dict]:
+        """Daily counters from `from_day` to `to_day` inclusive, for the host
+        or one of its events or shows."""
+        if show_id:
+            prefix = f"SHOW_DAY#{show_id}#"
+        elif event_id:
+            prefix = f"EVENT_DAY#{event_id}#"
+        else:
+            prefix = "DAY#"
+        return self._query(
+            host_id, lambda: Key("sk").between(f"{prefix}{from_day}", f"{prefix}{to_day}")
+        )
+
+    def _query(self, host_id: str, sort_key_condition) -> List[dict]:
+        items = []
+        for shard in range(self.counter_shards):
+            kwargs = {
+                "KeyConditionExpression": Key("pk").eq(f"ANALYTICS#HOST#{host_id}#{shard}")
+                & sort_key_condition()
+            }
+            while True:
+                resp = self.table.query(**kwargs)
+                items.extend(resp.get("Items", []))
+                if "LastEvaluatedKey" not in resp:
+                    break
+                kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        return self._merge(items)
+
+    @staticmethod
+    def _merge(items: List[dict]) -> List[dict]:
+        """Adds up the shards of each counter, in sort key order."""
+        merged: Dict[str, dict] = {}
+        for item in items:
+            total = merged.get(item["sk"])
+            if total is None:
+                merged[item["sk"]] = dict(item)
+                continue
+            for name in ("tickets", "revenue", "bookings"):
+                total[name] = total.get(name, 0) + item.get(name, 0)
+        return [merged[sk] for sk in sorted(merged)]
@@ -4,8 +4,10 @@ from typing import Dict, List, Optional
 import time
 from types_boto3_dynamodb.service_resource import Table
 from botocore.exceptions import ClientError
+from app.utils.metrics import instrument_repository
 
 
+@instrument_repository("artist")
 class ArtistRepository:
     def __init__(self, table: Table, client=None):
         self.table = table
@@ -1,19 +1,57 @@
 from botocore.exceptions import ClientError
 from types_boto3_dynamodb.service_resource import Table
 from types_boto3_dynamodb import DynamoDBClient
-from typing import Optional, List
-from boto3.dynamodb.conditions import Key
-from app.models.booking import Booking
-from app.models.shows import Show
+import base64
+import gzip
+import json
+import logging
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Optional, List, Tuple
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer
+from app.models.booking import Booking, CartLine
+from app.models.shows import Show, seat_section
 from app.models.events import Event
 from app.models.venue import Venue
 from app.schemas.booking import BookingResponse
+from app.repository.analytics_repository import sale_outbox_put
+from app.repository.show_repository import ShowRepository
+from app.custom_exceptions.booking_exceptions import SeatAlreadyBookedException
+from app.utils.metrics import instrument_repository
 
+MAX_TRANSACT_ITEMS = 100
+# one update on the show, two on its listing rows and the sale outbox item
+# leave 96 of the 100 items a transaction allows for booking puts
+MAX_BOOKINGS_PER_TRANSACTION = 96
+# keeps the per-seat condition well under the 4 KB expression limit
+MAX_SEATS_PER_TRANSACTION = 100
 
+# past bookings are archived per user and year under
+# SHOW_ARCHIVE#<year>#<part>, which sorts just before the SHOW_DATE# items
+ARCHIVE_PREFIX = "SHOW_ARCHIVE#"
+# compressed, a full part stays well under the 400 KB item limit
+ARCHIVE_PART_SIZE = 500
+
+_deserializer = TypeDeserializer()
+
+
+def _json_number(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+logger = logging.getLogger(__name__)
+
+
+@instrument_repository("booking")
 class BookingRepository:
-    def __init__(self, table: Table, client: DynamoDBClient = None):
+    def __init__(
+        self, table: Table, client: DynamoDBClient = None, sales_outbox_shards: int = 8
+    ):
         self.table = table
         self.client = table.meta.client
+        self.sales_outbox_shards = max(1, sales_outbox_shards)
 
     def add_booking(
         self,
@@ -22,80 +60,519 @@ class BookingRepository:
         event: Event,
         venue: Venue,
     ):
-        booking_item = {
-            "pk": f"USER#{booking.user_id}",
-            "sk": f"SHOW_DATE#{show.show_date}#BOOKING#{booking.booking_id}",
-            "show_id": show.id,
-            "time_booked": booking.time_booked,
-            "total_price": booking.total_booking_price,
-            "seats": booking.seats,
-            "venue_city": venue.city,
-            "venue_id": venue.id,
-            "venue_name": venue.name,
-            "venue_state": venue.state,
-            "event_name": event.name,
-            "event_duration": event.duration,
-            "event_id": event.id,
-        }
-        try:
-            self.client.transact_write_items(
-                TransactItems=[
-                    {
-                        "Update": {
-                            "TableName": self.table.name,
-                            "Key": {"pk": f"SHOW#{show.id}", "sk": f"DETAILS"},
-                            "UpdateExpression": f"SET #l = list_append(if_not_exists(#l, :empty_list), :vals)",
-                            "ExpressionAttributeNames": {"#l": "booked_seats"},
-                            "ExpressionAttributeValues": {
-                                ":empty_list": [],
-                                ":vals": booking.seats,
-                            },
-                        }
-                    },
-                    {
-                        "Put": {
-                            "TableName": self.table.name,
-                            "Item": booking_item,
-                        }
-                    },
-                ]
+        self.add_bookings([booking], show=show, event=event, venue=venue)
+
+    def add_bookings(
+        self,
+        bookings: List[Booking],
+        show: Show,
+        event: Event,
+        venue: Venue,
+    ):
+        """Writes bookings for one show in a single transaction: all of them
+        or none. Their seats must not overlap each other."""
+        self.add_cart([CartLine(show=show, event=event, venue=venue, bookings=bookings)])
+
+    def add_cart(self, lines: List[CartLine]):
+        """Writes the bookings of several shows in a single transaction: all
+        of them or none. Raises ValueError when they don't fit one."""
+        if sum(self.items_needed(line.show, line.bookings) for line in lines) > MAX_TRANSACT_ITEMS:
+            raise ValueError("too many bookings for one transaction")
+        transact_items: List[dict] = []
+        day = datetime.now(timezone.utc).date().isoformat()
+        # (index of the line's first seat update, number of them, line, seats)
+        claims = []
+        for line in lines:
+            seats = [seat for booking in line.bookings for seat in booking.seats]
+            if len(seats) > MAX_SEATS_PER_TRANSACTION:
+                raise ValueError(
+                    f"at most {MAX_SEATS_PER_TRANSACTION} seats of a show fit one transaction"
+                )
+            seat_updates = (
+                self._section_updates(line.show, seats)
+                if line.show.seat_sections
+                else [self._details_update(line.show, seats)]
+            )
+            claims.append((len(transact_items), len(seat_updates), line, seats))
+            transact_items.extend(seat_updates)
+            transact_items.extend(
+                self._booking_put(booking, line) for booking in line.bookings
+            )
+            if not line.show.seat_sections:
+                # the listing rows mirror the show's counters so listings can
+                # show availability without reading the show items
+                transact_items.extend(
+                    self._listing_update(key, len(seats))
+                    for key in ShowRepository.listing_keys(line.show, line.venue.city)
+                )
+            # counted into the host's sales analytics by SalesAggregationWorker
+            transact_items.append(
+                sale_outbox_put(
+                    self.table.name,
+                    line.show,
+                    line.event,
+                    line.venue,
+                    line.bookings,
+                    day,
+                    self.sales_outbox_shards,
+                )
             )
+        try:
+            self.client.transact_write_items(TransactItems=transact_items)
         except ClientError as e:
+            reasons = e.response.get("CancellationReasons") or []
+            for start, count, line, seats in claims:
+                for reason in reasons[start : start + count]:
+                    if reason.get("Code") != "ConditionalCheckFailed":
+                        continue
+                    where = f" for show {line.show.id}" if len(lines) > 1 else ""
+                    conflict = self._conflict(line.show, reason.get("Item"), seats, where)
+                    if conflict:
+                        raise conflict
             raise
+        for _, _, line, seats in claims:
+            if line.show.seat_sections:
+                self._count_sectioned(line.show, line.venue, len(seats))
 
-    def get_bookings(self, user_id: str) -> List[BookingResponse]:
-        try:
-            response = self.table.query(
-                KeyConditionExpression=(
-                    Key("pk").eq(f"USER#{user_id}")
-                    & Key("sk").begins_with("SHOW_DATE#")
-                )
+    @staticmethod
+    def items_needed(show: Show, bookings: List[Booking]) -> int:
+        if not show.seat_sections:
+            return len(bookings) + 4
+        sections = {seat_section(seat) for b in bookings for seat in b.seats}
+        return len(bookings) + len(sections) + 1
+
+    def _booking_put(self, booking: Booking, line: CartLine) -> dict:
+        show, event, venue = line.show, line.event, line.venue
+        return {
+            "Put": {
+                "TableName": self.table.name,
+                "Item": {
+                    "pk": f"USER#{booking.user_id}",
+                    "sk": f"SHOW_DATE#{show.show_date}#BOOKING#{booking.booking_id}",
+                    "show_id": show.id,
+                    "time_booked": booking.time_booked,
+                    "total_price": booking.total_booking_price,
+                    "seats": booking.seats,
+                    "venue_city": venue.city,
+                    "venue_id": venue.id,
+                    "venue_name": venue.name,
+                    "venue_state": venue.state,
+                    "event_name": event.name,
+                    "event_duration": event.duration,
+                    "event_id": event.id,
+                },
+            }
+        }
+
+    def _listing_update(self, key: dict, count: int) -> dict:
+        return {
+            "Update": {
+                "TableName": self.table.name,
+                "Key": key,
+                "UpdateExpression": "ADD #booked :count",
+                "ConditionExpression": "attribute_exists(pk)",
+                "ExpressionAttributeNames": {"#booked": "seats_booked"},
+                "ExpressionAttributeValues": {":count": count},
+            }
+        }
+
+    def _details_update(self, show: Show, seats: List[str]) -> dict:
+        seat_values = {f":seat{i}": seat for i, seat in enumerate(seats)}
+        # shows from before the counters have no capacity; a seat already in
+        # booked_seats fails the whole transaction instead of being sold twice
+        condition = "(attribute_not_exists(#capacity) OR #booked <= :max_booked)"
+        condition += "".join(f" AND NOT contains(#l, {name})" for name in seat_values)
+        return {
+            "Update": {
+                "TableName": self.table.name,
+                "Key": {"pk": f"SHOW#{show.id}", "sk": f"DETAILS"},
+                "UpdateExpression": f"SET #l = list_append(if_not_exists(#l, :empty_list), :vals), "
+                "#version = if_not_exists(#version, :zero) + :one "
+                "ADD #booked :count",
+                "ConditionExpression": condition,
+                "ExpressionAttributeNames": {
+                    "#l": "booked_seats",
+                    "#version": "version",
+                    "#booked": "seats_booked",
+                    "#capacity": "capacity",
+                },
+                "ExpressionAttributeValues": {
+                    ":empty_list": [],
+                    ":vals": seats,
+                    ":zero": 0,
+                    ":one": 1,
+                    ":count": len(seats),
+                    ":max_booked": show.capacity - len(seats),
+                    **seat_values,
+                },
+                "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+            }
+        }
+
+    def _section_updates(self, show: Show, seats: List[str]) -> List[dict]:
+        """Touches only the `SEATS#` items of the sections being booked; the
+        show-wide counters are bumped after the transaction, outside it, so
+        they never make bookings in different sections conflict."""
+        by_section: Dict[str, List[str]] = {}
+        for seat in seats:
+            by_section.setdefault(seat_section(seat), []).append(seat)
+        section_updates = []
+        for section, section_seats in by_section.items():
+            seat_values = {f":seat{i}": seat for i, seat in enumerate(section_seats)}
+            section_updates.append(
+                {
+                    "Update": {
+                        "TableName": self.table.name,
+                        "Key": {"pk": f"SHOW#{show.id}", "sk": f"SEATS#{section}"},
+                        "UpdateExpression": "SET #l = list_append(#l, :vals) "
+                        "ADD #booked :count",
+                        "ConditionExpression": "attribute_exists(pk)"
+                        + "".join(
+                            f" AND NOT contains(#l, {name})" for name in seat_values
+                        ),
+                        "ExpressionAttributeNames": {
+                            "#l": "booked_seats",
+                            "#booked": "seats_booked",
+                        },
+                        "ExpressionAttributeValues": {
+                            ":vals": section_seats,
+                            ":count": len(section_seats),
+                            **seat_values,
+                        },
+                        "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+                    }
+                }
+            )
+        return section_updates
+
+    def _conflict(
+        self, show: Show, item: Optional[dict], seats: List[str], where: str
+    ) -> Optional[SeatAlreadyBookedException]:
+        current = self._deserialize(item or {})
+        taken = set(current.get("booked_seats", [])).intersection(seats)
+        if taken:
+            return SeatAlreadyBookedException(f" {taken} seats already booked{where}")
+        if show.seat_sections:
+            # a missing section item is not a seat conflict
+            return None
+        left = int(current.get("capacity", 0)) - int(current.get("seats_booked", 0))
+        return SeatAlreadyBookedException(f" only {max(left, 0)} seats left{where}")
+
+    def _count_sectioned(self, show: Show, venue: Venue, count: int):
+        updates = [
+            (
+                {"pk": f"SHOW#{show.id}", "sk": "DETAILS"},
+                "ADD #booked :count SET #version = if_not_exists(#version, :zero) + :one",
+                {"#booked": "seats_booked", "#version": "version"},
+                {":count": count, ":zero": 0, ":one": 1},
             )
-            items = response.get("Items", [])
-            if not items:
-                return []
-
-            bookings: List[BookingResponse] = []
-            for item in items:
-                booking = BookingResponse(
-                    booking_id=item["sk"].split("#BOOKING#")[-1],
-                    user_id=user_id,
-                    show_id=item["show_id"],
-                    time_booked=item["time_booked"],
-                    total_price=item["total_price"],
-                    seats=item["seats"],
-                    venue_city=item["venue_city"],
-                    venue_name=item["venue_name"],
-                    venue_state=item["venue_state"],
-                    event_name=item["event_name"],
-                    event_duration=item["event_duration"],
-                    event_id=item["event_id"],
-                    booking_date=item["sk"]
-                    .split("#BOOKING#")[0]
-                    .removeprefix("SHOW_DATE#"),
+        ] + [
+            (key, "ADD #booked :count", {"#booked": "seats_booked"}, {":count": count})
+            for key in ShowRepository.listing_keys(show, venue.city)
+        ]
+        for key, expression, names, values in updates:
+            try:
+                self.table.update_item(
+                    Key=key,
+                    UpdateExpression=expression,
+                    ConditionExpression="attribute_exists(pk)",
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=values,
                 )
-                bookings.append(booking)
-            return bookings
+            except ClientError as err:
+                # the booking is already committed; counters only drive badges
+                logger.error(
+                    "couldn't count %d seats booked on %s: %s", count, key, err
+                )
+
+    @staticmethod
+    def _deserialize(item: dict) -> dict:
+        # cancellation reasons are not converted from wire format like
+        # regular responses are
+        return {name: _deserializer.deserialize(value) for name, value in item.items()}
 
+    def get_bookings(
+        self, user_id: str, from_date: Optional[str] = None
+    ) -> List[BookingResponse]:
+        """Bookings for shows on or after `from_date` (today by default),
+        soonest first. Older ones are read through `query_bookings`."""
+        from_date = from_date or date.today().isoformat()
+        kwargs = {
+            "KeyConditionExpression": Key("pk").eq(f"USER#{user_id}")
+            # "$" sorts right after "#", so this ends after the last booking
+            & Key("sk").between(f"SHOW_DATE#{from_date}", "SHOW_DATE$")
+        }
+        bookings: List[BookingResponse] = []
+        try:
+            while True:
+                response = self.table.query(**kwargs)
+                for item in response.get("Items", []):
+                    bookings.append(self._to_response(user_id, item))
+                if "LastEvaluatedKey" not in response:
+                    return bookings
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
         except ClientError as err:
             raise
+
+    def query_bookings(
+        self,
+        user_id: str,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        descending: bool = False,
+        limit: int = 50,
+        page: Optional[str] = None,
+    ) -> Tuple[List[BookingResponse], Optional[str]]:
+        """One page of bookings for shows from `from_date` to `to_date`, both
+        inclusive and optional, in show date order, with the token for the
+        next page or None after the last.
+
+        Each page is a single query over a sort-key range. Archived bookings
+        live in their own range, SHOW_ARCHIVE# sorting just before
+        SHOW_DATE#, which is read after the rest when descending and before
+        it otherwise; ranges starting today or later skip it. An archive
+        part holds many bookings, so a page may end inside one; its token
+        then carries how many of the part's bookings were already returned.
+        """
+        phases = ["SHOW_DATE#"]
+        if from_date is None or from_date < date.today().isoformat():
+            phases.append(ARCHIVE_PREFIX)
+        if not descending:
+            phases.reverse()
+        phase, start_sk = phases[0], None
+        if page:
+            phase, start_sk = self._decode_page(page, phases)
+
+        if phase == ARCHIVE_PREFIX:
+            bookings, next_sk = self._query_archive(
+                user_id, from_date, to_date, descending, limit, start_sk
+            )
+        else:
+            bookings, next_sk = self._query_hot(
+                user_id, from_date, to_date, descending, limit, start_sk
+            )
+        if next_sk is None and phase != phases[-1]:
+            # a bare prefix starts the next range from its beginning
+            next_sk = phases[-1]
+        if next_sk is None:
+            return bookings, None
+        return bookings, base64.urlsafe_b64encode(next_sk.encode()).decode()
+
+    def _query_hot(
+        self,
+        user_id: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        descending: bool,
+        limit: int,
+        start_sk: Optional[str],
+    ) -> Tuple[List[BookingResponse], Optional[str]]:
+        kwargs = {
+            "KeyConditionExpression": Key("pk").eq(f"USER#{user_id}")
+            # "$" sorts right after "#", so these end after the last booking
+            & Key("sk").between(
+                f"SHOW_DATE#{from_date or ''}",
+                f"SHOW_DATE#{to_date}$" if to_date else "SHOW_DATE$",
+            ),
+            "ScanIndexForward": not descending,
+            "Limit": limit,
+        }
+        if start_sk:
+            kwargs["ExclusiveStartKey"] = {"pk": f"USER#{user_id}", "sk": start_sk}
+        response = self.table.query(**kwargs)
+        bookings = [self._to_response(user_id, item) for item in response.get("Items", [])]
+        last_key = response.get("LastEvaluatedKey")
+        return bookings, last_key["sk"] if last_key else None
+
+    def _query_archive(
+        self,
+        user_id: str,
+        from_date: Optional[str],
+        to_date: Optional[str],
+        descending: bool,
+        limit: int,
+        start_sk: Optional[str],
+    ) -> Tuple[List[BookingResponse], Optional[str]]:
+        """Up to `limit` archived bookings, with the sort key to go on from:
+        a part's own key once it is used up, or `<part key>@<offset>` when
+        the page ends inside it."""
+        # parts are per year, so their bookings are filtered by date below
+        low = f"{ARCHIVE_PREFIX}{from_date[:4]}" if from_date else ARCHIVE_PREFIX
+        high = f"{ARCHIVE_PREFIX}{to_date[:4]}$" if to_date else "SHOW_ARCHIVE$"
+        skip = 0
+        kwargs = {"ScanIndexForward": not descending}
+        if start_sk and "@" in start_sk:
+            part_sk, _, offset = start_sk.rpartition("@")
+            if not offset.isdigit():
+                raise ValueError("invalid page token")
+            skip = int(offset)
+            # read the part the last page ended in again
+            if descending:
+                high = part_sk
+            else:
+                low = part_sk
+        elif start_sk:
+            kwargs["ExclusiveStartKey"] = {"pk": f"USER#{user_id}", "sk": start_sk}
+        kwargs["KeyConditionExpression"] = Key("pk").eq(f"USER#{user_id}") & Key(
+            "sk"
+        ).between(low, high)
+        # a part fills most of a page, so ask for about as many as needed
+        kwargs["Limit"] = max(1, -(-limit // ARCHIVE_PART_SIZE))
+
+        bookings: List[BookingResponse] = []
+        while True:
+            response = self.table.query(**kwargs)
+            for part in response.get("Items", []):
+                archived = self._unpack_archive(part)
+                if descending:
+                    archived.reverse()
+                for index in range(skip, len(archived)):
+                    booking = archived[index]
+                    show_date = booking["sk"].split("#BOOKING#")[0].removeprefix("SHOW_DATE#")
+                    if (from_date or "") <= show_date <= (to_date or "9999"):
+                        bookings.append(self._to_response(user_id, booking))
+                    if len(bookings) == limit:
+                        if index + 1 < len(archived):
+                            return bookings, f"{part['sk']}@{index + 1}"
+                        return bookings, part["sk"]
+                skip = 0
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                return bookings, None
+            kwargs["ExclusiveStartKey"] = last_key
+
+    @staticmethod
+    def _decode_page(page: str, phases: List[str]) -> Tuple[str, Optional[str]]:
+        try:
+            sk = base64.urlsafe_b64decode(page.encode()).decode()
+        except (ValueError, UnicodeDecodeError):
+            sk = ""
+        for phase in phases:
+            if sk == phase:
+                return phase, None
+            if sk.startswith(phase):
+                return phase, sk
+        raise ValueError("invalid page token")
+
+    @staticmethod
+    def _to_response(user_id: str, item: dict) -> BookingResponse:
+        return BookingResponse(
+            booking_id=item["sk"].split("#BOOKING#")[-1],
+            user_id=user_id,
+            show_id=item["show_id"],
+            time_booked=item["time_booked"],
+            total_price=item["total_price"],
+            seats=item["seats"],
+            venue_city=item["venue_city"],
+            venue_name=item["venue_name"],
+            venue_state=item["venue_state"],
+            event_name=item["event_name"],
+            event_duration=item["event_duration"],
+            event_id=item["event_id"],
+            booking_date=item["sk"].split("#BOOKING#")[0].removeprefix("SHOW_DATE#"),
+        )
+
+    def list_archivable(
+        self, before: str, limit: int, start_key: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        """One scan page of booking items for shows before `before`, with the
+        key to continue from or None at the end of the table."""
+        kwargs = {
+            "FilterExpression": Attr("pk").begins_with("USER#")
+            & Attr("sk").between("SHOW_DATE#", f"SHOW_DATE#{before}"),
+            "Limit": limit,
+        }
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        resp = self.table.scan(**kwargs)
+        return resp.get("Items", []), resp.get("LastEvaluatedKey")
+
+    def archive_bookings(self, user_id: str, year: str, items: List[dict]) -> int:
+        """Moves booking items of one user whose shows fall in `year` into
+        the archive items for that year; returns how many were moved, fewer
+        than given if another archiver changed the archive first.
+
+        Each transaction rewrites the year's parts and deletes a batch of
+        the booking items they now hold, so a booking is never both archived
+        and live: readers see it exactly once, whatever fails in between.
+        """
+        prefix = f"{ARCHIVE_PREFIX}{year}#"
+        parts = []
+        kwargs = {
+            "KeyConditionExpression": Key("pk").eq(f"USER#{user_id}")
+            & Key("sk").begins_with(prefix)
+        }
+        while True:
+            resp = self.table.query(**kwargs)
+            parts.extend(resp.get("Items", []))
+            if "LastEvaluatedKey" not in resp:
+                break
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        archived = {
+            booking["sk"]: booking for part in parts for booking in self._unpack_archive(part)
+        }
+        total = len(archived.keys() | {item["sk"] for item in items})
+        part_count = -(-total // ARCHIVE_PART_SIZE)
+        # the parts and the deletes of a batch share one transaction
+        batch_size = MAX_TRANSACT_ITEMS - part_count
+        if batch_size < 1:
+            raise ValueError(f"too many bookings to archive for {user_id} in {year}")
+        version = int(parts[0].get("version", 0)) if parts else 0
+
+        moved = 0
+        for start in range(0, len(items), batch_size):
+            batch = items[start : start + batch_size]
+            for item in batch:
+                archived[item["sk"]] = {
+                    name: value for name, value in item.items() if name != "pk"
+                }
+            ordered = [archived[sk] for sk in sorted(archived)]
+            writes = []
+            for index in range(0, len(ordered), ARCHIVE_PART_SIZE):
+                chunk = ordered[index : index + ARCHIVE_PART_SIZE]
+                put = {
+                    "TableName": self.table.name,
+                    "Item": {
+                        "pk": f"USER#{user_id}",
+                        "sk": f"{prefix}{index // ARCHIVE_PART_SIZE:03d}",
+                        "bookings": gzip.compress(
+                            json.dumps(chunk, default=_json_number).encode()
+                        ),
+                        "count": len(chunk),
+                        "version": version + 1,
+                    },
+                }
+                if index == 0:
+                    # every archiver reads and rewrites the whole year, so
+                    # part 0 carries the version the others are checked against
+                    put["ConditionExpression"] = (
+                        "attribute_not_exists(pk) OR #version = :version"
+                    )
+                    put["ExpressionAttributeNames"] = {"#version": "version"}
+                    put["ExpressionAttributeValues"] = {":version": version}
+                writes.append({"Put": put})
+            for item in batch:
+                writes.append(
+                    {
+                        "Delete": {
+                            "TableName": self.table.name,
+                            "Key": {"pk": item["pk"], "sk": item["sk"]},
+                        }
+                    }
+                )
+            try:
+                self.client.transact_write_items(TransactItems=writes)
+            except ClientError as err:
+                if err.response["Error"]["Code"] in (
+                    "TransactionCanceledException",
+                    "ConditionalCheckFailedException",
+                ):
+                    return moved
+                raise
+            version += 1
+            moved += len(batch)
+        return moved
+
+    @staticmethod
+    def _unpack_archive(item: dict) -> List[dict]:
+        return json.loads(gzip.decompress(bytes(item["bookings"])))
@@ -3,13 +3,16 @@ from botocore.exceptions import ClientError
 import logging
 from types_boto3_dynamodb.service_resource import Table
 from types_boto3_dynamodb import DynamoDBClient
-from typing import Optional, List
-from boto3.dynamodb.conditions import Key
+from typing import Optional, List, Tuple
+from boto3.dynamodb.conditions import Attr, Key
+from app.repository.outbox_repository import event_flag_outbox_update
+from app.utils.metrics import instrument_repository
 
 
 logger = logging.getLogger(__name__)
 
 
+@instrument_repository("event")
 class EventRepository:
     def __init__(self, table: Table, client: DynamoDBClient = None):
         self.table = table
@@ -26,6 +29,7 @@ class EventRepository:
             "is_event_blocked": event.is_blocked,
             "artist_ids": event.artist_ids,
             "artist_names": event.artist_names,
+            "version": 1,
         }
         name_index_item = {
             "pk": "EVENTS",
@@ -36,6 +40,7 @@ class EventRepository:
             "is_event_blocked": event.is_blocked,
             "artist_ids": event.artist_ids,
             "artist_names": event.artist_names,
+            "event_version": 1,
         }
         transact_items = [
             {
@@ -76,8 +81,28 @@ class EventRepository:
             is_blocked=item.get("is_event_blocked", False),
             artist_ids=item.get("artist_ids", []),
             artist_names=item.get("artist_names", []),
+            version=int(item.get("version", 0)),
         )
 
+    def get_version(self, event_id: str) -> Optional[Tuple[int, bool]]:
+        """The event's version and blocked flag, without the rest of it."""
+        try:
+            resp = self.table.get_item(
+                Key={"pk": f"EVENT#{event_id}", "sk": "DETAILS"},
+                ProjectionExpression="#pk, #version, #is_blocked",
+                ExpressionAttributeNames={
+                    "#pk": "pk",
+                    "#version": "version",
+                    "#is_blocked": "is_event_blocked",
+                },
+            )
+        except ClientError as e:
+            raise
+        item = resp.get("Item")
+        if not item:
+            return None
+        return int(item.get("version", 0)), item.get("is_event_blocked", False)
+
     def get_events_by_name(self, name: str) -> List[Event]:
         prefix = f"EVENT_NAME#{name}"
         try:
@@ -88,15 +113,11 @@ class EventRepository:
         except ClientError as e:
             raise
 
-        items = resp.get("Items", [])
-
-        events = []
-        event_ids=[]
-        for item in items:
-            event_id = item["sk"].split("#EVENT_ID#")[-1]
-            event_ids.append(event_id)
-        events = self._batch_get_events(event_ids=event_ids)
-        return events
+        rows = []
+        for item in resp.get("Items", []):
+            name, event_id = item["sk"][len("EVENT_NAME#"):].rsplit("#EVENT_ID#", 1)
+            rows.append((item, name, event_id))
+        return self._from_projections(rows)
 
     def get_events_of_host(self, host_id: str) -> List[Event]:
         prefix = f"EVENT#"
@@ -114,10 +135,10 @@ class EventRepository:
         for item in items:
             event_id = item["sk"].split("#")[-1]
             event_ids.append(event_id)
-        events = self._batch_get_events(event_ids=event_ids)
+        events = self.batch_get_events(event_ids=event_ids)
         return events
 
-    def _batch_get_events(self, event_ids: List[str]) -> List[Event]:
+    def batch_get_events(self, event_ids: List[str]) -> List[Event]:
         if not event_ids:
             return []
         keys = []
@@ -146,6 +167,7 @@ class EventRepository:
                     is_blocked=item.get("is_event_blocked", False),
                     artist_ids=item.get("artist_ids", []),
                     artist_names=item.get("artist_names", []),
+                    version=int(item.get("version", 0)),
                 )
             )
         return events
@@ -159,17 +181,42 @@ class EventRepository:
             )
         except ClientError as e:
             raise
-        items = resp.get("Items", [])
-        if not items:
-            return [] 
-        
-        event_ids=[]
-        for item in items:
-            id=item["sk"].split("ID#")[-1]
-            event_ids.append(id)
-        events = self._batch_get_events(event_ids=event_ids)
+        rows = []
+        for item in resp.get("Items", []):
+            name, event_id = item["sk"][len("NAME#"):].rsplit("#ID#", 1)
+            rows.append((item, name, event_id))
+        return self._from_projections(rows)
+
+    def _from_projections(self, rows: List[Tuple[dict, str, str]]) -> List[Event]:
+        """Builds listed events from their index rows. Rows the fan-out worker
+        keeps current carry `event_version`; rows written before it existed
+        don't, and are read from EVENT#..#DETAILS until they are backfilled."""
+        legacy_ids = [event_id for item, _, event_id in rows if "event_version" not in item]
+        canonical = {}
+        if legacy_ids:
+            canonical = {event.id: event for event in self.batch_get_events(legacy_ids)}
+        events = []
+        for item, name, event_id in rows:
+            if "event_version" in item:
+                events.append(self._from_projection(item, name, event_id))
+            elif event_id in canonical:
+                events.append(canonical[event_id])
         return events
 
+    @staticmethod
+    def _from_projection(item: dict, name: str, event_id: str) -> Event:
+        return Event(
+            id=event_id,
+            name=name,
+            description=item.get("description", ""),
+            duration=item.get("duration", 0),
+            category=item.get("category", ""),
+            is_blocked=item.get("is_event_blocked", False),
+            artist_ids=item.get("artist_ids", []),
+            artist_names=item.get("artist_names", []),
+            version=int(item["event_version"]),
+        )
+
     def update_event(self, event_id: str, is_blocked: bool) -> Event:
         try:
             self.client.transact_write_items(
@@ -178,17 +225,156 @@ class EventRepository:
                         "Update": {
                             "Key": {"pk": f"EVENT#{event_id}", "sk": "DETAILS"},
                             "TableName": self.table.name,
-                            "UpdateExpression": "SET #is_blocked=:new_value",
+                            "UpdateExpression": "SET #is_blocked=:new_value, "
+                            "#version = if_not_exists(#version, :zero) + :one",
                             "ExpressionAttributeNames": {
                                 "#is_blocked": "is_event_blocked",
+                                "#version": "version",
                             },
                             "ExpressionAttributeValues": {
                                 ":new_value": is_blocked,
+                                ":zero": 0,
+                                ":one": 1,
                             },
                             "ConditionExpression": "attribute_exists(pk)",
                         }
                     },
+                    # the denormalized copies are updated by the fan-out worker
+                    event_flag_outbox_update(self.table.name, event_id, is_blocked),
                 ]
             )
         except ClientError as e:
             raise
+
+    # projections for the fan-out worker
+
+    def projection_keys(self, event: Event, cities: List[str]) -> List[dict]:
+        keys = [{"pk": "EVENTS", "sk": f"EVENT_NAME#{event.name}#EVENT_ID#{event.id}"}]
+        keys.extend(
+            {"pk": f"CITY#{city}", "sk": f"NAME#{event.name}#ID#{event.id}"}
+            for city in cities
+        )
+        return keys
+
+    def list_event_cities(self, event_id: str) -> List[str]:
+        kwargs = {
+            "KeyConditionExpression": Key("pk").eq(f"EVENT#{event_id}")
+            & Key("sk").begins_with("CITY#")
+        }
+        cities = []
+        while True:
+            resp = self.table.query(**kwargs)
+            cities.extend(item["sk"][len("CITY#"):] for item in resp.get("Items", []))
+            if "LastEvaluatedKey" not in resp:
+                return cities
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+    def list_city_show_keys(
+        self, event_id: str, city: str, limit: int, start_key: Optional[dict] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        kwargs = {
+            "KeyConditionExpression": Key("pk").eq(f"EVENT#{event_id}#CITY#{city}"),
+            "ProjectionExpression": "#pk, #sk",
+            "ExpressionAttributeNames": {"#pk": "pk", "#sk": "sk"},
+            "Limit": limit,
+        }
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        resp = self.table.query(**kwargs)
+        return resp.get("Items", []), resp.get("LastEvaluatedKey")
+
+    def set_projection_flag(self, keys: List[dict], is_blocked: bool, version: int) -> int:
+        """Sets `is_event_blocked` and `event_version` on existing rows, up to
+        100 per transaction. Rows that have expired in the meantime are
+        skipped. Returns how many rows were written."""
+
+        def update(key: dict) -> dict:
+            return {
+                "TableName": self.table.name,
+                "Key": key,
+                "UpdateExpression": "SET #is_blocked = :value, #version = :version",
+                "ConditionExpression": "attribute_exists(pk)",
+                "ExpressionAttributeNames": {
+                    "#is_blocked": "is_event_blocked",
+                    "#version": "event_version",
+                },
+                "ExpressionAttributeValues": {":value": is_blocked, ":version": version},
+            }
+
+        written = 0
+        for start in range(0, len(keys), 100):
+            chunk = keys[start : start + 100]
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[{"Update": update(key)} for key in chunk]
+                )
+                written += len(chunk)
+                continue
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+            # some row is gone; fall back to row by row for this chunk
+            for key in chunk:
+                try:
+                    self.client.update_item(**update(key))
+                    written += 1
+                except ClientError as err:
+                    if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+        return written
+
+    def backfill_city_rows(
+        self, limit: int, start_key: Optional[dict] = None
+    ) -> Tuple[int, Optional[dict]]:
+        """Gives one scan page of `CITY#..` listing rows written before the
+        fan-out worker existed their `EVENT#..`/`CITY#..` membership row, and
+        copies the canonical flag and version onto them. Returns how many rows
+        were backfilled and the key to continue from.
+
+        The membership row goes first, so a flip committed after the canonical
+        read is fanned out to this row as well; the row write is conditioned
+        on `event_version` still missing, so it never overwrites the worker.
+        """
+        kwargs = {
+            "FilterExpression": Attr("pk").begins_with("CITY#")
+            & Attr("sk").begins_with("NAME#")
+            & Attr("event_version").not_exists(),
+            "Limit": limit,
+        }
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        resp = self.table.scan(**kwargs)
+        rows = []
+        for item in resp.get("Items", []):
+            event_id = item["sk"].rsplit("#ID#", 1)[1]
+            city = item["pk"][len("CITY#"):]
+            self.table.put_item(Item={"pk": f"EVENT#{event_id}", "sk": f"CITY#{city}"})
+            rows.append((item, event_id))
+        canonical = {
+            event.id: event
+            for event in self.batch_get_events(list({event_id for _, event_id in rows}))
+        }
+        backfilled = 0
+        for item, event_id in rows:
+            event = canonical.get(event_id)
+            if event is None:
+                continue
+            try:
+                self.table.update_item(
+                    Key={"pk": item["pk"], "sk": item["sk"]},
+                    UpdateExpression="SET #is_blocked = :value, #version = :version",
+                    ConditionExpression="attribute_exists(pk) AND attribute_not_exists(#version)",
+                    ExpressionAttributeNames={
+                        "#is_blocked": "is_event_blocked",
+                        "#version": "event_version",
+                    },
+                    ExpressionAttributeValues={
+                        ":value": event.is_blocked,
+                        ":version": event.version,
+                    },
+                )
+                backfilled += 1
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        return backfilled, resp.get("LastEvaluatedKey")
@@ -0,0 +1,1403 @@
+"""An in-memory stand-in for the subset of DynamoDB the repositories use.
+
+`MemoryTable` mimics a boto3 `Table` resource and `MemoryClient` the
+resource's low-level client (`table.meta.client`), both taking and returning
+plain Python values the way the resource layer does. Items are kept per
+partition with sorted sort keys, so key conditions are bisected instead of
+scanned, and expressions (key, condition, filter, update and projection) are
+parsed once and cached.
+
+Errors are raised as botocore `ClientError`s with DynamoDB's error codes, so
+repository error handling runs unchanged. The app runs on it with
+`TABLE_BACKEND=memory`.
+"""
+
+import bisect
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+MAX_TRANSACT_ITEMS = 100
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_WRITE_ITEMS = 25
+MAX_PAGE_BYTES = 1024 * 1024
+
+_MISSING = object()
+
+
+_SERIALIZER = TypeSerializer()
+
+
+def _client_error(operation: str, code: str, message: str, **extra) -> ClientError:
+    response = {
+        "Error": {"Code": code, "Message": message},
+        "ResponseMetadata": {"HTTPStatusCode": 400},
+        **extra,
+    }
+    return ClientError(response, operation)
+
+
+def _validation_error(operation: str, message: str) -> ClientError:
+    return _client_error(operation, "ValidationException", message)
+
+
+# values -------------------------------------------------------------------
+
+
+def _normalize(value: Any) -> Any:
+    """Coerces a written value the way the boto3 serializer would."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, (str, bytes, Decimal)):
+        return value
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {_normalize(v) for v in value}
+    raise TypeError(f"Unsupported type {type(value)} for value {value!r}")
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def _size(value: Any) -> int:
+    # DynamoDB's item size rules, close enough for page limits
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, Decimal):
+        return 1 + (len(value.as_tuple().digits) + 1) // 2
+    if isinstance(value, dict):
+        return 3 + sum(len(k) + _size(v) for k, v in value.items())
+    if isinstance(value, (list, set)):
+        return 3 + sum(1 + _size(v) for v in value)
+    return 1
+
+
+def _type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return "BOOL"
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "S"
+    if isinstance(value, Decimal):
+        return "N"
+    if isinstance(value, bytes):
+        return "B"
+    if isinstance(value, dict):
+        return "M"
+    if isinstance(value, list):
+        return "L"
+    if isinstance(value, set):
+        if all(isinstance(v, str) for v in value):
+            return "SS"
+        if all(isinstance(v, Decimal) for v in value):
+            return "NS"
+        return "BS"
+    return "?"
+
+
+def _comparable(left: Any, right: Any) -> bool:
+    return (
+        left is not _MISSING
+        and right is not _MISSING
+        and not isinstance(left, bool)
+        and not isinstance(right, bool)
+        and (
+            (isinstance(left, Decimal) and isinstance(right, Decimal))
+            or (isinstance(left, str) and isinstance(right, str))
+            or (isinstance(left, bytes) and isinstance(right, bytes))
+        )
+    )
+
+
+def _equal(left: Any, right: Any) -> bool:
+    if left is _MISSING or right is _MISSING:
+        return False
+    if isinstance(left, bool) != isinstance(right, bool):
+        return False
+    return left == right
+
+
+# expression parsing ---------------------------------------------------------
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<name>#[A-Za-z0-9_]+)|(?P<value>:[A-Za-z0-9_]+)"
+    r"|(?P<number>\d+)|(?P<ident>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op><>|<=|>=|=|<|>|\(|\)|,|\.|\[|\]|\+|-))"
+)
+_COMPARATORS = {"=", "<>", "<", "<=", ">", ">="}
+_FUNCTIONS = {
+    "attribute_exists",
+    "attribute_not_exists",
+    "attribute_type",
+    "begins_with",
+    "contains",
+}
+_UPDATE_CLAUSES = {"SET", "REMOVE", "ADD", "DELETE"}
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens, pos = [], 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Invalid expression near: {expression[pos:]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression: str, names: Dict[str, str]):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+        self.names = names
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def keyword(self, *words: str) -> bool:
+        kind, text = self.peek()
+        return kind == "ident" and text.upper() in words
+
+    def take(self, expected: Optional[str] = None) -> Tuple[str, str]:
+        kind, text = self.peek()
+        if kind is None:
+            raise ValueError("Unexpected end of expression")
+        if expected is not None and text != expected and (
+            kind != "ident" or text.upper() != expected
+        ):
+            raise ValueError(f"Expected {expected!r}, got {text!r}")
+        self.pos += 1
+        return kind, text
+
+    def done(self) -> bool:
+        return self.pos >= len(self.tokens)
+
+    # paths and operands
+
+    def path(self) -> tuple:
+        kind, text = self.take()
+        parts: List[Any] = [self._name(kind, text)]
+        while True:
+            _, nxt = self.peek()
+            if nxt == ".":
+                self.take()
+                parts.append(self._name(*self.take()))
+            elif nxt == "[":
+                self.take()
+                kind, index = self.take()
+                if kind != "number":
+                    raise ValueError("List index must be a number")
+                self.take("]")
+                parts.append(int(index))
+            else:
+                return ("path", tuple(parts))
+
+    def _name(self, kind: str, text: str) -> str:
+        if kind == "name":
+            if text not in self.names:
+                raise ValueError(
+                    f"An expression attribute name used in the document path "
+                    f"is not defined; attribute name: {text}"
+                )
+            return self.names[text]
+        if kind == "ident":
+            return text
+        raise ValueError(f"Invalid attribute name {text!r}")
+
+    def operand(self) -> tuple:
+        kind, text = self.peek()
+        if kind == "value":
+            self.take()
+            return ("value", text)
+        if kind == "ident" and text == "size" and self.peek(1)[1] == "(":
+            self.take()
+            self.take("(")
+            path = self.path()
+            self.take(")")
+            return ("size", path)
+        return self.path()
+
+    # conditions
+
+    def condition(self) -> tuple:
+        node = self._and()
+        while self.keyword("OR"):
+            self.take()
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self) -> tuple:
+        node = self._not()
+        while self.keyword("AND"):
+            self.take()
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self) -> tuple:
+        if self.keyword("NOT"):
+            self.take()
+            return ("not", self._not())
+        return self._primary()
+
+    def _primary(self) -> tuple:
+        kind, text = self.peek()
+        if text == "(":
+            self.take()
+            node = self.condition()
+            self.take(")")
+            return node
+        if kind == "ident" and text in _FUNCTIONS and self.peek(1)[1] == "(":
+            self.take()
+            self.take("(")
+            args = [self.operand()]
+            while self.peek()[1] == ",":
+                self.take()
+                args.append(self.operand())
+            self.take(")")
+            return ("func", text, tuple(args))
+
+        left = self.operand()
+        kind, text = self.peek()
+        if text in _COMPARATORS:
+            self.take()
+            return ("cmp", text, left, self.operand())
+        if self.keyword("BETWEEN"):
+            self.take()
+            low = self.operand()
+            self.take("AND")
+            return ("between", left, low, self.operand())
+        if self.keyword("IN"):
+            self.take()
+            self.take("(")
+            options = [self.operand()]
+            while self.peek()[1] == ",":
+                self.take()
+                options.append(self.operand())
+            self.take(")")
+            return ("in", left, tuple(options))
+        raise ValueError(f"Invalid condition near {text!r}")
+
+    # updates
+
+    def update(self) -> List[tuple]:
+        actions = []
+        seen = set()
+        while not self.done():
+            _, clause = self.take()
+            clause = clause.upper()
+            if clause not in _UPDATE_CLAUSES or clause in seen:
+                raise ValueError(f"Invalid UpdateExpression clause {clause!r}")
+            seen.add(clause)
+            while True:
+                actions.append(self._update_action(clause))
+                if self.peek()[1] != ",":
+                    break
+                self.take()
+        return actions
+
+    def _update_action(self, clause: str) -> tuple:
+        path = self.path()
+        if clause == "SET":
+            self.take("=")
+            return ("set", path, self._set_value())
+        if clause == "REMOVE":
+            return ("remove", path)
+        return (clause.lower(), path, self.operand())
+
+    def _set_value(self) -> tuple:
+        node = self._set_term()
+        _, text = self.peek()
+        if text in ("+", "-"):
+            self.take()
+            return ("arith", text, node, self._set_term())
+        return node
+
+    def _set_term(self) -> tuple:
+        kind, text = self.peek()
+        if kind == "ident" and text in ("if_not_exists", "list_append"):
+            self.take()
+            self.take("(")
+            first = self.path() if text == "if_not_exists" else self._set_value()
+            self.take(",")
+            second = self._set_value()
+            self.take(")")
+            return (text, first, second)
+        return self.operand()
+
+    def projection(self) -> List[tuple]:
+        paths = [self.path()]
+        while self.peek()[1] == ",":
+            self.take()
+            paths.append(self.path())
+        return paths
+
+
+def _freeze(names: Optional[Dict[str, str]]) -> tuple:
+    return tuple(sorted((names or {}).items()))
+
+
+@lru_cache(maxsize=4096)
+def _parse_condition(expression: str, names: tuple) -> tuple:
+    parser = _Parser(expression, dict(names))
+    node = parser.condition()
+    if not parser.done():
+        raise ValueError(f"Unexpected token {parser.peek()[1]!r}")
+    return node
+
+
+@lru_cache(maxsize=4096)
+def _parse_update(expression: str, names: tuple) -> List[tuple]:
+    return _Parser(expression, dict(names)).update()
+
+
+@lru_cache(maxsize=4096)
+def _parse_projection(expression: str, names: tuple) -> List[tuple]:
+    parser = _Parser(expression, dict(names))
+    paths = parser.projection()
+    if not parser.done():
+        raise ValueError(f"Unexpected token {parser.peek()[1]!r}")
+    return paths
+
+
+# evaluation -----------------------------------------------------------------
+
+
+def _resolve(item: Any, parts: tuple) -> Any:
+    value = item
+    for part in parts:
+        if isinstance(part, int):
+            if not isinstance(value, list) or part >= len(value):
+                return _MISSING
+            value = value[part]
+        else:
+            if not isinstance(value, dict) or part not in value:
+                return _MISSING
+            value = value[part]
+    return value
+
+
+def _value(values: Dict[str, Any], name: str) -> Any:
+    try:
+        return values[name]
+    except KeyError:
+        raise ValueError(
+            f"An expression attribute value used in expression is not defined; "
+            f"attribute value: {name}"
+        )
+
+
+def _operand(node: tuple, item: dict, values: Dict[str, Any]) -> Any:
+    kind = node[0]
+    if kind == "path":
+        return _resolve(item, node[1])
+    if kind == "value":
+        return _value(values, node[1])
+    if kind == "size":
+        target = _resolve(item, node[1][1])
+        if isinstance(target, (str, bytes, list, dict, set)):
+            return Decimal(len(target))
+        return _MISSING
+    raise ValueError(f"Invalid operand {node!r}")
+
+
+def _evaluate(node: tuple, item: dict, values: Dict[str, Any]) -> bool:
+    kind = node[0]
+    if kind == "and":
+        return _evaluate(node[1], item, values) and _evaluate(node[2], item, values)
+    if kind == "or":
+        return _evaluate(node[1], item, values) or _evaluate(node[2], item, values)
+    if kind == "not":
+        return not _evaluate(node[1], item, values)
+    if kind == "cmp":
+        op = node[1]
+        left = _operand(node[2], item, values)
+        right = _operand(node[3], item, values)
+        if op == "=":
+            return _equal(left, right)
+        if op == "<>":
+            return left is not _MISSING and right is not _MISSING and not _equal(
+                left, right
+            )
+        if not _comparable(left, right):
+            return False
+        if op == "<":
+            return left < right
+        if op == "<=":
+            return left <= right
+        if op == ">":
+            return left > right
+        return left >= right
+    if kind == "between":
+        target = _operand(node[1], item, values)
+        low = _operand(node[2], item, values)
+        high = _operand(node[3], item, values)
+        return (
+            _comparable(target, low)
+            and _comparable(target, high)
+            and low <= target <= high
+        )
+    if kind == "in":
+        target = _operand(node[1], item, values)
+        return any(_equal(target, _operand(o, item, values)) for o in node[2])
+    if kind == "func":
+        return _function(node[1], node[2], item, values)
+    raise ValueError(f"Invalid condition {node!r}")
+
+
+def _function(name: str, args: tuple, item: dict, values: Dict[str, Any]) -> bool:
+    if name in ("attribute_exists", "attribute_not_exists"):
+        if len(args) != 1 or args[0][0] != "path":
+            raise ValueError(f"Invalid number of operands for {name}")
+        exists = _resolve(item, args[0][1]) is not _MISSING
+        return exists if name == "attribute_exists" else not exists
+    if len(args) != 2:
+        raise ValueError(f"Invalid number of operands for {name}")
+    target = _operand(args[0], item, values)
+    operand = _operand(args[1], item, values)
+    if target is _MISSING or operand is _MISSING:
+        return False
+    if name == "attribute_type":
+        return _type_name(target) == operand
+    if name == "begins_with":
+        return (
+            isinstance(target, (str, bytes))
+            and type(target) is type(operand)
+            and target.startswith(operand)
+        )
+    # contains
+    if isinstance(target, str):
+        return isinstance(operand, str) and operand in target
+    if isinstance(target, (set, list)):
+        return any(_equal(element, operand) for element in target)
+    return False
+
+
+def _set_operand(node: tuple, item: dict, values: Dict[str, Any]) -> Any:
+    kind = node[0]
+    if kind == "if_not_exists":
+        current = _resolve(item, node[1][1])
+        return current if current is not _MISSING else _set_operand(node[2], item, values)
+    if kind == "list_append":
+        first = _set_operand(node[1], item, values)
+        second = _set_operand(node[2], item, values)
+        if not isinstance(first, list) or not isinstance(second, list):
+            raise ValueError("Incorrect operand type for operator or function; operator or function: list_append")
+        return first + second
+    if kind == "arith":
+        left = _set_operand(node[2], item, values)
+        right = _set_operand(node[3], item, values)
+        if not isinstance(left, Decimal) or not isinstance(right, Decimal):
+            if left is _MISSING or right is _MISSING:
+                raise ValueError(
+                    "The provided expression refers to an attribute that does "
+                    "not exist in the item"
+                )
+            raise ValueError(f"Incorrect operand type for operator or function; operator: {node[1]}")
+        return left + right if node[1] == "+" else left - right
+    value = _operand(node, item, values)
+    if value is _MISSING:
+        raise ValueError(
+            "The provided expression refers to an attribute that does not exist "
+            "in the item"
+        )
+    return value
+
+
+def _parent(item: dict, parts: tuple):
+    parent = _resolve(item, parts[:-1]) if len(parts) > 1 else item
+    if parent is _MISSING or not isinstance(parent, (dict, list)):
+        raise ValueError(
+            "The document path provided in the update expression is invalid for update"
+        )
+    return parent, parts[-1]
+
+
+def _assign(item: dict, parts: tuple, value: Any):
+    parent, last = _parent(item, parts)
+    if isinstance(parent, list):
+        if last >= len(parent):
+            parent.append(value)
+        else:
+            parent[last] = value
+    else:
+        parent[last] = value
+
+
+def _apply_update(actions: List[tuple], item: dict, values: Dict[str, Any]) -> dict:
+    # every operand is read from the item as it was before the update
+    original = item
+    updated = _copy(item)
+    removals = []
+    for action in actions:
+        kind, path = action[0], action[1][1]
+        if kind == "set":
+            _assign(updated, path, _copy(_set_operand(action[2], original, values)))
+        elif kind == "remove":
+            removals.append(path)
+        elif kind == "add":
+            delta = _operand(action[2], original, values)
+            current = _resolve(original, path)
+            if isinstance(delta, Decimal) and not isinstance(delta, bool):
+                if current is _MISSING:
+                    current = Decimal(0)
+                if not isinstance(current, Decimal):
+                    raise ValueError("An operand in the update expression has an incorrect data type")
+                _assign(updated, path, current + delta)
+            elif isinstance(delta, set):
+                if current is _MISSING:
+                    current = set()
+                if not isinstance(current, set):
+                    raise ValueError("An operand in the update expression has an incorrect data type")
+                _assign(updated, path, current | delta)
+            else:
+                raise ValueError("Incorrect operand type for operator or function; operator: ADD")
+        elif kind == "delete":
+            delta = _operand(action[2], original, values)
+            current = _resolve(original, path)
+            if not isinstance(delta, set):
+                raise ValueError("Incorrect operand type for operator or function; operator: DELETE")
+            if current is _MISSING:
+                continue
+            if not isinstance(current, set):
+                raise ValueError("An operand in the update expression has an incorrect data type")
+            remaining = current - delta
+            if remaining:
+                _assign(updated, path, remaining)
+            else:
+                removals.append(path)
+    # remove list elements from the back so earlier indexes stay valid
+    for path in sorted(removals, key=lambda p: [str(x) for x in p], reverse=True):
+        parent = _resolve(updated, path[:-1]) if len(path) > 1 else updated
+        last = path[-1]
+        if isinstance(parent, dict):
+            parent.pop(last, None)
+        elif isinstance(parent, list) and isinstance(last, int) and last < len(parent):
+            del parent[last]
+    return updated
+
+
+def _project(item: dict, paths: Optional[List[tuple]]) -> dict:
+    if paths is None:
+        return _copy(item)
+    projected: dict = {}
+    for node in paths:
+        parts = node[1]
+        value = _resolve(item, parts)
+        if value is _MISSING:
+            continue
+        target = projected
+        for index, part in enumerate(parts[:-1]):
+            if isinstance(part, int) or isinstance(parts[index + 1], int):
+                # list elements are projected as a whole top-level attribute
+                target[parts[0]] = _copy(item[parts[0]])
+                break
+            target = target.setdefault(part, {})
+        else:
+            target[parts[-1]] = _copy(value)
+    return projected
+
+
+def _changed_attributes(old: dict, new: dict) -> Tuple[dict, dict]:
+    old_changed = {k: v for k, v in old.items() if new.get(k, _MISSING) != v}
+    new_changed = {k: v for k, v in new.items() if old.get(k, _MISSING) != v}
+    return old_changed, new_changed
+
+
+# the table ------------------------------------------------------------------
+
+
+class _Partition:
+    __slots__ = ("sort_keys", "items")
+
+    def __init__(self):
+        self.sort_keys: List[Any] = []
+        self.items: Dict[Any, dict] = {}
+
+    def put(self, sort_key: Any, item: dict):
+        if sort_key not in self.items:
+            bisect.insort(self.sort_keys, sort_key)
+        self.items[sort_key] = item
+
+    def delete(self, sort_key: Any) -> Optional[dict]:
+        item = self.items.pop(sort_key, None)
+        if item is not None:
+            index = bisect.bisect_left(self.sort_keys, sort_key)
+            del self.sort_keys[index]
+        return item
+
+
+def _prefix_end(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else "\U0010ffff"
+
+
+class MemoryTable:
+    def __init__(
+        self,
+        name: str = "eventro_table",
+        hash_key: str = "pk",
+        range_key: str = "sk",
+        client: Optional["MemoryClient"] = None,
+    ):
+        self.name = self.table_name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self._partitions: Dict[Any, _Partition] = {}
+        self.client = client or MemoryClient()
+        self.client.register(self)
+        self._lock = self.client.lock
+        self.meta = SimpleNamespace(client=self.client)
+
+    # keys and conditions
+
+    def _key(self, operation: str, key: dict) -> Tuple[Any, Any]:
+        expected = {self.hash_key, self.range_key}
+        if set(key) != expected:
+            raise _validation_error(
+                operation, "The provided key element does not match the schema"
+            )
+        return _normalize(key[self.hash_key]), _normalize(key[self.range_key])
+
+    def _item_key(self, operation: str, item: dict) -> Tuple[Any, Any]:
+        for attribute in (self.hash_key, self.range_key):
+            if item.get(attribute) is None:
+                raise _validation_error(
+                    operation,
+                    "One or more parameter values were invalid: Missing the key "
+                    f"{attribute} in the item",
+                )
+        return item[self.hash_key], item[self.range_key]
+
+    def _get(self, pk: Any, sk: Any) -> Optional[dict]:
+        partition = self._partitions.get(pk)
+        return partition.items.get(sk) if partition else None
+
+    def _store(self, item: dict):
+        pk, sk = item[self.hash_key], item[self.range_key]
+        partition = self._partitions.get(pk)
+        if partition is None:
+            partition = self._partitions[pk] = _Partition()
+        partition.put(sk, item)
+
+    def _remove(self, pk: Any, sk: Any) -> Optional[dict]:
+        partition = self._partitions.get(pk)
+        if partition is None:
+            return None
+        removed = partition.delete(sk)
+        if not partition.items:
+            del self._partitions[pk]
+        return removed
+
+    @staticmethod
+    def _expression(
+        expression,
+        names: Optional[dict],
+        values: Optional[dict],
+        is_key: bool = False,
+        builder: Optional[ConditionExpressionBuilder] = None,
+    ) -> Tuple[Optional[str], dict, dict]:
+        names, values = dict(names or {}), dict(values or {})
+        if isinstance(expression, ConditionBase):
+            # one builder per request, as boto3 does, keeps placeholders unique
+            # across the key condition and the filter
+            built = (builder or ConditionExpressionBuilder()).build_expression(
+                expression, is_key_condition=is_key
+            )
+            names.update(built.attribute_name_placeholders)
+            values.update(built.attribute_value_placeholders)
+            expression = built.condition_expression
+        return expression, names, {k: _normalize(v) for k, v in values.items()}
+
+    def _check(
+        self,
+        operation: str,
+        condition,
+        names: Optional[dict],
+        values: Optional[dict],
+        current: Optional[dict],
+    ) -> bool:
+        if condition is None:
+            return True
+        expression, names, values = self._expression(condition, names, values)
+        try:
+            node = _parse_condition(expression, _freeze(names))
+            return _evaluate(node, current or {}, values)
+        except ValueError as err:
+            raise _validation_error(operation, str(err))
+
+    def _conditional_failure(
+        self, operation: str, current: Optional[dict] = None, mode: str = "NONE"
+    ) -> ClientError:
+        extra = {}
+        if mode == "ALL_OLD" and current is not None:
+            # in wire format, as DynamoDB returns it in the error body
+            extra["Item"] = {
+                name: _SERIALIZER.serialize(value) for name, value in current.items()
+            }
+        return _client_error(
+            operation,
+            "ConditionalCheckFailedException",
+            "The conditional request failed",
+            **extra,
+        )
+
+    # single item operations
+
+    def get_item(
+        self,
+        Key: dict,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ConsistentRead: bool = False,
+        **kwargs,
+    ) -> dict:
+        pk, sk = self._key("GetItem", Key)
+        paths = self._projection("GetItem", ProjectionExpression, ExpressionAttributeNames)
+        with self._lock:
+            item = self._get(pk, sk)
+            return {"Item": _project(item, paths)} if item is not None else {}
+
+    def put_item(
+        self,
+        Item: dict,
+        ConditionExpression=None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ExpressionAttributeValues: Optional[dict] = None,
+        ReturnValues: str = "NONE",
+        ReturnValuesOnConditionCheckFailure: str = "NONE",
+        **kwargs,
+    ) -> dict:
+        item = _normalize(Item)
+        pk, sk = self._item_key("PutItem", item)
+        with self._lock:
+            current = self._get(pk, sk)
+            if not self._check(
+                "PutItem",
+                ConditionExpression,
+                ExpressionAttributeNames,
+                ExpressionAttributeValues,
+                current,
+            ):
+                raise self._conditional_failure(
+                    "PutItem", current, ReturnValuesOnConditionCheckFailure
+                )
+            self._store(item)
+            self.client.notify(
+                self, "INSERT" if current is None else "MODIFY", current, item
+            )
+        if ReturnValues == "ALL_OLD" and current is not None:
+            return {"Attributes": _copy(current)}
+        return {}
+
+    def update_item(
+        self,
+        Key: dict,
+        UpdateExpression: Optional[str] = None,
+        ConditionExpression=None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ExpressionAttributeValues: Optional[dict] = None,
+        ReturnValues: str = "NONE",
+        ReturnValuesOnConditionCheckFailure: str = "NONE",
+        **kwargs,
+    ) -> dict:
+        pk, sk = self._key("UpdateItem", Key)
+        _, names, values = self._expression(
+            None, ExpressionAttributeNames, ExpressionAttributeValues
+        )
+        with self._lock:
+            current = self._get(pk, sk)
+            if not self._check(
+                "UpdateItem", ConditionExpression, names, values, current
+            ):
+                raise self._conditional_failure(
+                    "UpdateItem", current, ReturnValuesOnConditionCheckFailure
+                )
+            updated = self._updated("UpdateItem", UpdateExpression, names, values, current, pk, sk)
+            self._store(updated)
+            self.client.notify(
+                self, "INSERT" if current is None else "MODIFY", current, updated
+            )
+        return self._return_values(ReturnValues, current or {}, updated)
+
+    def _updated(self, operation, expression, names, values, current, pk, sk) -> dict:
+        base = current if current is not None else {self.hash_key: pk, self.range_key: sk}
+        if expression is None:
+            return _copy(base)
+        try:
+            actions = _parse_update(expression, _freeze(names))
+            updated = _apply_update(actions, base, values)
+        except ValueError as err:
+            raise _validation_error(operation, str(err))
+        if updated.get(self.hash_key) != pk or updated.get(self.range_key) != sk:
+            raise _validation_error(
+                operation,
+                "One or more parameter values were invalid: Cannot update attribute "
+                "that is part of the key",
+            )
+        return updated
+
+    @staticmethod
+    def _return_values(mode: str, old: dict, new: dict) -> dict:
+        if mode == "ALL_NEW":
+            return {"Attributes": _copy(new)}
+        if mode == "ALL_OLD":
+            return {"Attributes": _copy(old)} if old else {}
+        if mode in ("UPDATED_NEW", "UPDATED_OLD"):
+            old_changed, new_changed = _changed_attributes(old, new)
+            changed = new_changed if mode == "UPDATED_NEW" else old_changed
+            return {"Attributes": _copy(changed)} if changed else {}
+        return {}
+
+    def delete_item(
+        self,
+        Key: dict,
+        ConditionExpression=None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ExpressionAttributeValues: Optional[dict] = None,
+        ReturnValues: str = "NONE",
+        **kwargs,
+    ) -> dict:
+        pk, sk = self._key("DeleteItem", Key)
+        with self._lock:
+            current = self._get(pk, sk)
+            if not self._check(
+                "DeleteItem",
+                ConditionExpression,
+                ExpressionAttributeNames,
+                ExpressionAttributeValues,
+                current,
+            ):
+                raise self._conditional_failure("DeleteItem")
+            if self._remove(pk, sk) is not None:
+                self.client.notify(self, "REMOVE", current, None)
+        if ReturnValues == "ALL_OLD" and current is not None:
+            return {"Attributes": _copy(current)}
+        return {}
+
+    # reads over many items
+
+    def _projection(self, operation: str, expression: Optional[str], names) -> Optional[List[tuple]]:
+        if not expression:
+            return None
+        try:
+            return _parse_projection(expression, _freeze(names))
+        except ValueError as err:
+            raise _validation_error(operation, str(err))
+
+    def _key_range(self, operation: str, node: tuple) -> Tuple[Any, Optional[tuple]]:
+        conditions = []
+
+        def flatten(n):
+            if n[0] == "and":
+                flatten(n[1])
+                flatten(n[2])
+            else:
+                conditions.append(n)
+
+        flatten(node)
+        partition_value, sort_condition = _MISSING, None
+        for condition in conditions:
+            kind = condition[0]
+            if kind == "cmp" and condition[1] != "<>":
+                target = condition[2]
+            elif kind == "between":
+                target = condition[1]
+            elif kind == "func" and condition[1] == "begins_with":
+                target = condition[2][0]
+            else:
+                raise _validation_error(operation, "Query key condition not supported")
+            attribute = target[1] if target[0] == "path" else None
+            if attribute == (self.hash_key,) and kind == "cmp" and condition[1] == "=":
+                partition_value = condition[3]
+            elif attribute == (self.range_key,) and sort_condition is None:
+                sort_condition = condition
+            else:
+                raise _validation_error(operation, "Query key condition not supported")
+        if partition_value is _MISSING:
+            raise _validation_error(
+                operation, "Query condition missed key schema element: " + self.hash_key
+            )
+        return partition_value, sort_condition
+
+    def _sort_slice(self, keys: List[Any], condition: Optional[tuple], values: dict) -> Tuple[int, int]:
+        if condition is None:
+            return 0, len(keys)
+        if condition[0] == "between":
+            low = _operand(condition[2], {}, values)
+            high = _operand(condition[3], {}, values)
+            return bisect.bisect_left(keys, low), bisect.bisect_right(keys, high)
+        if condition[0] == "func":
+            prefix = _operand(condition[2][1], {}, values)
+            return (
+                bisect.bisect_left(keys, prefix),
+                bisect.bisect_left(keys, _prefix_end(prefix)),
+            )
+        op, value = condition[1], _operand(condition[3], {}, values)
+        if op == "=":
+            return bisect.bisect_left(keys, value), bisect.bisect_right(keys, value)
+        if op == "<":
+            return 0, bisect.bisect_left(keys, value)
+        if op == "<=":
+            return 0, bisect.bisect_right(keys, value)
+        if op == ">":
+            return bisect.bisect_right(keys, value), len(keys)
+        return bisect.bisect_left(keys, value), len(keys)
+
+    def query(
+        self,
+        KeyConditionExpression,
+        FilterExpression=None,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ExpressionAttributeValues: Optional[dict] = None,
+        ScanIndexForward: bool = True,
+        Limit: Optional[int] = None,
+        ExclusiveStartKey: Optional[dict] = None,
+        Select: str = "ALL_ATTRIBUTES",
+        IndexName: Optional[str] = None,
+        ConsistentRead: bool = False,
+        **kwargs,
+    ) -> dict:
+        if IndexName is not None:
+            raise _validation_error("Query", f"The table does not have the specified index: {IndexName}")
+        builder = ConditionExpressionBuilder()
+        key_expression, names, values = self._expression(
+            KeyConditionExpression,
+            ExpressionAttributeNames,
+            ExpressionAttributeValues,
+            is_key=True,
+            builder=builder,
+        )
+        filter_expression, names, values = self._expression(
+            FilterExpression, names, values, builder=builder
+        )
+        try:
+            key_node = _parse_condition(key_expression, _freeze(names))
+            filter_node = (
+                _parse_condition(filter_expression, _freeze(names))
+                if filter_expression
+                else None
+            )
+        except ValueError as err:
+            raise _validation_error("Query", str(err))
+        partition_operand, sort_condition = self._key_range("Query", key_node)
+        try:
+            partition_value = _operand(partition_operand, {}, values)
+        except ValueError as err:
+            raise _validation_error("Query", str(err))
+        paths = self._projection("Query", ProjectionExpression, names)
+
+        with self._lock:
+            partition = self._partitions.get(partition_value)
+            if partition is None:
+                return {"Items": [], "Count": 0, "ScannedCount": 0} if Select != "COUNT" else {"Count": 0, "ScannedCount": 0}
+            keys = partition.sort_keys
+            try:
+                start, end = self._sort_slice(keys, sort_condition, values)
+            except (ValueError, TypeError) as err:
+                raise _validation_error("Query", str(err))
+            if ExclusiveStartKey is not None:
+                last = _normalize(ExclusiveStartKey[self.range_key])
+                if ScanIndexForward:
+                    start = max(start, bisect.bisect_right(keys, last))
+                else:
+                    end = min(end, bisect.bisect_left(keys, last))
+            order = range(start, end) if ScanIndexForward else range(end - 1, start - 1, -1)
+            candidates = (partition.items[keys[i]] for i in order)
+            return self._page(
+                "Query", candidates, len(order), filter_node, values, paths, Limit, Select
+            )
+
+    def _page(self, operation, candidates, available, filter_node, values, paths, limit, select) -> dict:
+        items, scanned, size, last = [], 0, 0, None
+        try:
+            for item in candidates:
+                if limit is not None and scanned >= limit:
+                    break
+                if size >= MAX_PAGE_BYTES:
+                    break
+                scanned += 1
+                size += _size(item)
+                last = item
+                if filter_node is not None and not _evaluate(filter_node, item, values):
+                    continue
+                items.append(item)
+        except ValueError as err:
+            raise _validation_error(operation, str(err))
+        response: Dict[str, Any] = {"Count": len(items), "ScannedCount": scanned}
+        if select != "COUNT":
+            response["Items"] = [_project(item, paths) for item in items]
+        if last is not None and scanned < available:
+            response["LastEvaluatedKey"] = {
+                self.hash_key: last[self.hash_key],
+                self.range_key: last[self.range_key],
+            }
+        return response
+
+    def scan(
+        self,
+        FilterExpression=None,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict] = None,
+        ExpressionAttributeValues: Optional[dict] = None,
+        Limit: Optional[int] = None,
+        ExclusiveStartKey: Optional[dict] = None,
+        Select: str = "ALL_ATTRIBUTES",
+        Segment: Optional[int] = None,
+        TotalSegments: Optional[int] = None,
+        ConsistentRead: bool = False,
+        **kwargs,
+    ) -> dict:
+        filter_expression, names, values = self._expression(
+            FilterExpression, ExpressionAttributeNames, ExpressionAttributeValues
+        )
+        try:
+            filter_node = (
+                _parse_condition(filter_expression, _freeze(names))
+                if filter_expression
+                else None
+            )
+        except ValueError as err:
+            raise _validation_error("Scan", str(err))
+        paths = self._projection("Scan", ProjectionExpression, names)
+
+        with self._lock:
+            partition_keys = [
+                pk
+                for pk in self._partitions
+                if TotalSegments is None
+                or zlib.crc32(str(pk).encode()) % TotalSegments == Segment
+            ]
+            start_pk, start_sk = _MISSING, _MISSING
+            if ExclusiveStartKey is not None:
+                start_pk = _normalize(ExclusiveStartKey[self.hash_key])
+                start_sk = _normalize(ExclusiveStartKey[self.range_key])
+
+            def candidates():
+                started = start_pk is _MISSING
+                for pk in partition_keys:
+                    partition = self._partitions[pk]
+                    first = 0
+                    if not started:
+                        if pk != start_pk:
+                            continue
+                        started = True
+                        first = bisect.bisect_right(partition.sort_keys, start_sk)
+                    for sk in partition.sort_keys[first:]:
+                        yield partition.items[sk]
+
+            available = sum(len(self._partitions[pk].items) for pk in partition_keys)
+            # items before the start key count as already scanned
+            if start_pk is not _MISSING:
+                seen = 0
+                for pk in partition_keys:
+                    partition = self._partitions[pk]
+                    if pk == start_pk:
+                        seen += bisect.bisect_right(partition.sort_keys, start_sk)
+                        break
+                    seen += len(partition.items)
+                available -= seen
+            return self._page(
+                "Scan", candidates(), available, filter_node, values, paths, Limit, Select
+            )
+
+    @contextmanager
+    def batch_writer(self, overwrite_by_pkeys: Optional[List[str]] = None):
+        yield _BatchWriter(self)
+
+    def load(self, items: List[dict]):
+        """Bulk-loads items without conditions or change notifications, for
+        seeding."""
+        with self._lock:
+            for item in items:
+                self._store(_normalize(item))
+
+    def __len__(self) -> int:
+        return sum(len(partition.items) for partition in self._partitions.values())
+
+
+class _BatchWriter:
+    def __init__(self, table: MemoryTable):
+        self.table = table
+
+    def put_item(self, Item: dict):
+        self.table.put_item(Item=Item)
+
+    def delete_item(self, Key: dict):
+        self.table.delete_item(Key=Key)
+
+
+class MemoryClient:
+    """The low-level client shared by every MemoryTable created from it.
+
+    One lock covers all tables, so transactions are atomic across them.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._tables: Dict[str, MemoryTable] = {}
+        self._listeners: List[Callable[[str, str, Optional[dict], Optional[dict]], None]] = []
+        self.exceptions = SimpleNamespace(
+            **{
+                code: type(code, (ClientError,), {})
+                for code in (
+                    "ConditionalCheckFailedException",
+                    "TransactionCanceledException",
+                    "ValidationException",
+                    "ResourceNotFoundException",
+                )
+            }
+        )
+
+    def register(self, table: MemoryTable):
+        self._tables[table.name] = table
+
+    def subscribe(self, listener: Callable[[str, str, Optional[dict], Optional[dict]], None]):
+        """Calls `listener(table_name, event_name, old_image, new_image)` for
+        every committed write, in commit order and under the write lock, so
+        listeners must only hand the change off."""
+        self._listeners.append(listener)
+
+    def notify(self, table: MemoryTable, event_name: str, old: Optional[dict], new: Optional[dict]):
+        if not self._listeners:
+            return
+        for listener in self._listeners:
+            listener(table.name, event_name, _copy(old) if old else None, _copy(new) if new else None)
+
+    def _table(self, operation: str, name: str) -> MemoryTable:
+        table = self._tables.get(name)
+        if table is None:
+            raise _client_error(
+                operation, "ResourceNotFoundException", f"Requested resource not found: {name}"
+            )
+        return table
+
+    def _raise(self, error: ClientError):
+        code = error.response["Error"]["Code"]
+        modeled = getattr(self.exceptions, code, None)
+        if modeled is not None:
+            raise modeled(error.response, error.operation_name)
+        raise error
+
+    # single item operations, routed by TableName
+
+    def get_item(self, TableName: str, **kwargs) -> dict:
+        return self._table("GetItem", TableName).get_item(**kwargs)
+
+    def put_item(self, TableName: str, **kwargs) -> dict:
+        return self._call("PutItem", TableName, "put_item", kwargs)
+
+    def update_item(self, TableName: str, **kwargs) -> dict:
+        return self._call("UpdateItem", TableName, "update_item", kwargs)
+
+    def delete_item(self, TableName: str, **kwargs) -> dict:
+        return self._call("DeleteItem", TableName, "delete_item", kwargs)
+
+    def query(self, TableName: str, **kwargs) -> dict:
+        return self._call("Query", TableName, "query", kwargs)
+
+    def scan(self, TableName: str, **kwargs) -> dict:
+        return self._call("Scan", TableName, "scan", kwargs)
+
+    def _call(self, operation: str, table_name: str, method: str, kwargs: dict) -> dict:
+        try:
+            return getattr(self._table(operation, table_name), method)(**kwargs)
+        except ClientError as err:
+            self._raise(err)
+
+    # multi item operations
+
+    def batch_get_item(self, RequestItems: dict, **kwargs) -> dict:
+        total = sum(len(spec["Keys"]) for spec in RequestItems.values())
+        if total > MAX_BATCH_GET_KEYS:
+            self._raise(
+                _validation_error(
+                    "BatchGetItem",
+                    "Too many items requested for the BatchGetItem call",
+                )
+            )
+        if total == 0:
+            self._raise(_validation_error("BatchGetItem", "RequestItems must not be empty"))
+        responses: Dict[str, List[dict]] = {}
+        with self.lock:
+            for table_name, spec in RequestItems.items():
+                table = self._table("BatchGetItem", table_name)
+                keys = [table._key("BatchGetItem", key) for key in spec["Keys"]]
+                if len(set(keys)) != len(keys):
+                    self._raise(
+                        _validation_error(
+                            "BatchGetItem", "Provided list of item keys contains duplicates"
+                        )
+                    )
+                paths = table._projection(
+                    "BatchGetItem",
+                    spec.get("ProjectionExpression"),
+                    spec.get("ExpressionAttributeNames"),
+                )
+                found = responses.setdefault(table_name, [])
+                for pk, sk in keys:
+                    item = table._get(pk, sk)
+                    if item is not None:
+                        found.append(_project(item, paths))
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems: dict, **kwargs) -> dict:
+        total = sum(len(requests) for requests in RequestItems.values())
+        if total > MAX_BATCH_WRITE_ITEMS:
+            self._raise(
+                _validation_error(
+                    "BatchWriteItem",
+                    "Too many items requested for the BatchWriteItem call",
+                )
+            )
+        with self.lock:
+            for table_name, requests in RequestItems.items():
+                table = self._table("BatchWriteItem", table_name)
+                for request in requests:
+                    if "PutRequest" in request:
+                        table.put_item(Item=request["PutRequest"]["Item"])
+                    else:
+                        table.delete_item(Key=request["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": {}}
+
+    def transact_get_items(self, TransactItems: List[dict], **kwargs) -> dict:
+        if len(TransactItems) > MAX_TRANSACT_ITEMS:
+            self._raise(
+                _validation_error(
+                    "TransactGetItems",
+                    f"Member must have length less than or equal to {MAX_TRANSACT_ITEMS}",
+                )
+            )
+        responses = []
+        with self.lock:
+            for entry in TransactItems:
+                get = entry["Get"]
+                table = self._table("TransactGetItems", get["TableName"])
+                result = table.get_item(
+                    Key=get["Key"],
+                    ProjectionExpression=get.get("ProjectionExpression"),
+                    ExpressionAttributeNames=get.get("ExpressionAttributeNames"),
+                )
+                responses.append(result)
+        return {"Responses": responses}
+
+    def transact_write_items(self, TransactItems: List[dict], **kwargs) -> dict:
+        operation = "TransactWriteItems"
+        if not TransactItems or len(TransactItems) > MAX_TRANSACT_ITEMS:
+            self._raise(
+                _validation_error(
+                    operation,
+                    f"Member must have length less than or equal to {MAX_TRANSACT_ITEMS}",
+                )
+            )
+        with self.lock:
+            planned = []
+            reasons = []
+            seen = set()
+            for entry in TransactItems:
+                (action, spec), = entry.items()
+                table = self._table(operation, spec["TableName"])
+                if action == "Put":
+                    item = _normalize(spec["Item"])
+                    key = table._item_key(operation, item)
+                else:
+                    key = table._key(operation, spec["Key"])
+                if (table.name, key) in seen:
+                    self._raise(
+                        _validation_error(
+                            operation,
+                            "Transaction request cannot include multiple operations "
+                            "on one item",
+                        )
+                    )
+                seen.add((table.name, key))
+
+                _, names, values = table._expression(
+                    None,
+                    spec.get("ExpressionAttributeNames"),
+                    spec.get("ExpressionAttributeValues"),
+                )
+                current = table._get(*key)
+                try:
+                    ok = table._check(
+                        operation, spec.get("ConditionExpression"), names, values, current
+                    )
+                    new = None
+                    if ok and action == "Put":
+                        new = item
+                    elif ok and action == "Update":
+                        new = table._updated(
+                            operation, spec.get("UpdateExpression"), names, values, current, *key
+                        )
+                except ClientError as err:
+                    self._raise(err)
+                if ok:
+                    reasons.append({"Code": "None"})
+                else:
+                    reason = {
+                        "Code": "ConditionalCheckFailed",
+                        "Message": "The conditional request failed",
+                    }
+                    if (
+                        spec.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD"
+                        and current is not None
+                    ):
+                        # error bodies skip boto3's type transformation, so
+                        # this stays in wire format as it does against DynamoDB
+                        reason["Item"] = {
+                            name: _SERIALIZER.serialize(value)
+                            for name, value in current.items()
+                        }
+                    reasons.append(reason)
+                planned.append((table, action, key, current, new))
+
+            if any(reason["Code"] != "None" for reason in reasons):
+                codes = ", ".join(reason["Code"] for reason in reasons)
+                self._raise(
+                    _client_error(
+                        operation,
+                        "TransactionCanceledException",
+                        "Transaction cancelled, please refer cancellation reasons "
+                        f"for specific reasons [{codes}]",
+                        CancellationReasons=reasons,
+                    )
+                )
+
+            for table, action, key, current, new in planned:
+                if action in ("Put", "Update"):
+                    table._store(new)
+                    self.notify(
+                        table, "INSERT" if current is None else "MODIFY", current, new
+                    )
+                elif action == "Delete" and table._remove(*key) is not None:
+                    self.notify(table, "REMOVE", current, None)
+        return {}
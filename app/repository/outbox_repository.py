@@ -0,0 +1,223 @@
+from types_boto3_dynamodb.service_resource import Table
+from types_boto3_dynamodb import DynamoDBClient
+from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Attr, Key
+from typing import List, Optional
+import logging
+import time
+from app.utils.metrics import instrument_repository
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PK = "OUTBOX"
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+# finished jobs stay readable for a day, then DynamoDB's TTL drops them
+DONE_RETENTION_SECONDS = 24 * 60 * 60
+
+
+def event_flag_outbox_update(table_name: str, event_id: str, is_blocked: bool) -> dict:
+    """The outbox half of an event block/unblock transaction.
+
+    There is one job per event: a flip while a job is pending or running
+    bumps `seq` and resets its progress, so the worker that holds the older
+    `seq` loses its lease and the job restarts with the latest value.
+    """
+    return {
+        "Update": {
+            "TableName": table_name,
+            "Key": {"pk": OUTBOX_PK, "sk": f"EVENT_FLAG#{event_id}"},
+            "UpdateExpression": "SET #event_id = :event_id, #is_blocked = :is_blocked, "
+            "#status = :pending, #phase = :phase, #rows_done = :zero, "
+            "#attempts = :zero, #updated_at = :now "
+            "REMOVE #cursor, #lease_owner, #lease_until, #last_error, #expires_at "
+            "ADD #seq :one",
+            "ExpressionAttributeNames": {
+                "#event_id": "event_id",
+                "#is_blocked": "is_blocked",
+                "#status": "status",
+                "#phase": "phase",
+                "#rows_done": "rows_done",
+                "#attempts": "attempts",
+                "#updated_at": "updated_at",
+                "#cursor": "cursor",
+                "#lease_owner": "lease_owner",
+                "#lease_until": "lease_until",
+                "#last_error": "last_error",
+                "#expires_at": "expires_at",
+                "#seq": "seq",
+            },
+            "ExpressionAttributeValues": {
+                ":event_id": event_id,
+                ":is_blocked": is_blocked,
+                ":pending": PENDING,
+                ":phase": "names",
+                ":zero": 0,
+                ":now": int(time.time()),
+                ":one": 1,
+            },
+        }
+    }
+
+
+@instrument_repository("outbox")
+class OutboxRepository:
+    """Durable work queue for the event fan-out worker, kept in the table.
+
+    Jobs are claimed with a lease; every write a worker makes is conditioned
+    on its lease and on the job's `seq`, so a crashed worker's job is picked
+    up again once the lease runs out and a superseded job is abandoned.
+    """
+
+    def __init__(self, table: Table, client: DynamoDBClient = None):
+        self.table = table
+        self.client = client if client else table.meta.client
+
+    def list_jobs(self, include_done: bool = True) -> List[dict]:
+        kwargs = {"KeyConditionExpression": Key("pk").eq(OUTBOX_PK)}
+        if not include_done:
+            kwargs["FilterExpression"] = Attr("status").is_in([PENDING, RUNNING])
+        jobs = []
+        try:
+            while True:
+                resp = self.table.query(**kwargs)
+                jobs.extend(resp.get("Items", []))
+                if "LastEvaluatedKey" not in resp:
+                    break
+                kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+        except ClientError as err:
+            logger.error("couldn't list outbox jobs: %s", err)
+            raise
+        return jobs
+
+    def claim(self, job: dict, worker_id: str, lease_seconds: int) -> Optional[dict]:
+        now = int(time.time())
+        try:
+            resp = self.table.update_item(
+                Key={"pk": OUTBOX_PK, "sk": job["sk"]},
+                UpdateExpression="SET #status = :running, #lease_owner = :worker, "
+                "#lease_until = :until, #updated_at = :now ADD #attempts :one",
+                ConditionExpression="#seq = :seq AND (#status = :pending "
+                "OR (#status = :running AND #lease_until < :now))",
+                ExpressionAttributeNames={
+                    "#status": "status",
+                    "#lease_owner": "lease_owner",
+                    "#lease_until": "lease_until",
+                    "#updated_at": "updated_at",
+                    "#attempts": "attempts",
+                    "#seq": "seq",
+                },
+                ExpressionAttributeValues={
+                    ":running": RUNNING,
+                    ":pending": PENDING,
+                    ":worker": worker_id,
+                    ":until": now + lease_seconds,
+                    ":now": now,
+                    ":one": 1,
+                    ":seq": job["seq"],
+                },
+                ReturnValues="ALL_NEW",
+            )
+        except ClientError as err:
+            if err.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                # another worker got it first, or it was re-queued meanwhile
+                return None
+            raise
+        return resp["Attributes"]
+
+    def save_progress(
+        self,
+        job: dict,
+        phase: str,
+        cursor: Optional[dict],
+        rows_done: int,
+        lease_seconds: int,
+    ) -> bool:
+        now = int(time.time())
+        names = {
+            "#phase": "phase",
+            "#rows_done": "rows_done",
+            "#lease_until": "lease_until",
+            "#updated_at": "updated_at",
+            "#cursor": "cursor",
+        }
+        values = {
+            ":phase": phase,
+            ":rows_done": rows_done,
+            ":until": now + lease_seconds,
+            ":now": now,
+        }
+        if cursor is None:
+            expression = (
+                "SET #phase = :phase, #rows_done = :rows_done, "
+                "#lease_until = :until, #updated_at = :now REMOVE #cursor"
+            )
+        else:
+            expression = (
+                "SET #phase = :phase, #rows_done = :rows_done, "
+                "#lease_until = :until, #updated_at = :now, #cursor = :cursor"
+            )
+            values[":cursor"] = cursor
+        return self._update_owned(job, expression, names, values)
+
+    def complete(self, job: dict) -> bool:
+        now = int(time.time())
+        return self._update_owned(
+            job,
+            "SET #status = :done, #updated_at = :now, #expires_at = :expires "
+            "REMOVE #cursor, #lease_owner, #lease_until",
+            {
+                "#status": "status",
+                "#updated_at": "updated_at",
+                "#expires_at": "expires_at",
+                "#cursor": "cursor",
+                "#lease_owner": "lease_owner",
+                "#lease_until": "lease_until",
+            },
+            {":done": DONE, ":now": now, ":expires": now + DONE_RETENTION_SECONDS},
+        )
+
+    def release(self, job: dict, error: str, give_up: bool) -> bool:
+        # progress is kept, so a retry resumes where this attempt stopped
+        return self._update_owned(
+            job,
+            "SET #status = :status, #last_error = :error, #updated_at = :now "
+            "REMOVE #lease_owner, #lease_until",
+            {
+                "#status": "status",
+                "#last_error": "last_error",
+                "#updated_at": "updated_at",
+                "#lease_owner": "lease_owner",
+                "#lease_until": "lease_until",
+            },
+            {
+                ":status": FAILED if give_up else PENDING,
+                ":error": error[:500],
+                ":now": int(time.time()),
+            },
+        )
+
+    def _update_owned(self, job: dict, expression: str, names: dict, values: dict) -> bool:
+        try:
+            self.table.update_item(
+                Key={"pk": OUTBOX_PK, "sk": job["sk"]},
+                UpdateExpression=expression,
+                ConditionExpression="#seq = :seq AND #owner = :owner",
+                ExpressionAttributeNames={
+                    **names,
+                    "#seq": "seq",
+                    "#owner": "lease_owner",
+                },
+                ExpressionAttributeValues={
+                    **values,
+                    ":seq": job["seq"],
+                    ":owner": job["lease_owner"],
+                },
+            )
+        except ClientError as err:
+            if err.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False
+            raise
+        return True
@@ -6,17 +6,33 @@ from app.models.venue import Venue
 from app.models.events import Event
 import logging
 from boto3.dynamodb.conditions import Key
-from typing import List, Optional
+from boto3.dynamodb.types import TypeDeserializer
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from app.utils.cache import TTLCache
+from app.utils.metrics import instrument_repository
 
 logger = logging.getLogger(__name__)
+# condition failures carry the current item in wire format
+_deserializer = TypeDeserializer()
 
 
+@instrument_repository("show")
 class ShowRepository:
-    def __init__(self, table: Table, client: DynamoDBClient = None):
+    def __init__(
+        self,
+        table: Table,
+        client: DynamoDBClient = None,
+        index_cache: Optional[TTLCache] = None,
+    ):
         self.table = table
         self.client = client if client else table.meta.client
+        # (pk, sk) of city/host rows this process wrote -> the expires_at it
+        # knows they reach, so repeat shows of an event skip those writes
+        self.index_cache = index_cache
 
     @staticmethod
     def _to_ddb_ttl(date_str: str, time_str: str, tz="Asia/Kolkata") -> int:
@@ -27,12 +43,15 @@ class ShowRepository:
         aware = naive.replace(tzinfo=ZoneInfo(tz))
         return int(aware.timestamp())
 
-    def create_show(self, show: Show, venue: Venue, event: Event):
-        if event.is_blocked:
-            raise Exception("cant add show to blocked event")
-
-        ttl = self._to_ddb_ttl(show.show_date, show.show_time)
-        # ttl = 1
+    @staticmethod
+    def _show_items(show: Show, venue: Venue, event: Event, ttl: int) -> Tuple[dict, dict, dict]:
+        counters = {}
+        if show.capacity:
+            counters = {
+                "capacity": show.capacity,
+                "seats_booked": show.seats_booked,
+                "seats_held": show.seats_held,
+            }
         show_item = {
             "pk": f"SHOW#{show.id}",
             "sk": f"DETAILS",
@@ -45,40 +64,196 @@ class ShowRepository:
             "booked_seats": [],
             "is_show_blocked": False,
             "expires_at": ttl,
+            "version": 1,
+            **counters,
         }
-        host_event = {
-            "pk": f"HOST#{venue.host_id}",
-            "sk": f"EVENT#{show.event_id}",
-            "expires_at": ttl,
-        }
-        city_event = {
-            "pk": f"CITY#{venue.city}",
-            "sk": f"NAME#{event.name}#ID#{event.id}",
-            "description": event.description,
-            "duration": event.duration,
-            "category": event.category,
-            "is_event_blocked": event.is_blocked,
-            "artist_ids": event.artist_ids,
-            "artist_names": event.artist_names,
-            "expires_at": ttl,
-        }
+        if show.seat_sections:
+            show_item["seat_sections"] = show.seat_sections
+        # the listing rows carry everything a listing shows, so listing
+        # queries never have to fetch the show items
         event_date_shows = {
             "pk": f"EVENT#{event.id}#CITY#{venue.city}",
             "sk": f"DATE#{show.show_date}#VENUE#{venue.id}#SHOW#{show.id}",
             "is_event_blocked": event.is_blocked,
+            "is_show_blocked": False,
             "price": show.price,
             "show_time": show.show_time,
+            "show_date": show.show_date,
             "expires_at": ttl,
+            **counters,
         }
         event_city_shows = {
             "pk": f"EVENT#{event.id}#CITY#{venue.city}",
             "sk": f"VENUE#{venue.id}#SHOW#{show.id}",
             "is_event_blocked": event.is_blocked,
+            "is_show_blocked": False,
             "price": show.price,
             "show_time": show.show_time,
             "show_date":show.show_date,
             "expires_at": ttl,
+            **counters,
         }
+        return show_item, event_date_shows, event_city_shows
+
+    @staticmethod
+    def listing_keys(show: Show, city: str) -> List[dict]:
+        """Keys of the two `EVENT#..#CITY#..` rows that mirror `show`."""
+        pk = f"EVENT#{show.event_id}#CITY#{city}"
+        return [
+            {"pk": pk, "sk": f"DATE#{show.show_date}#VENUE#{show.venue_id}#SHOW#{show.id}"},
+            {"pk": pk, "sk": f"VENUE#{show.venue_id}#SHOW#{show.id}"},
+        ]
+
+    @staticmethod
+    def _from_item(show_id: str, item: dict) -> Show:
+        return Show(
+            id=show_id,
+            venue_id=item["venue_id"],
+            event_id=item["event_id"],
+            is_blocked=item["is_show_blocked"],
+            price=item["price"],
+            show_date=item["show_date"],
+            show_time=item["show_time"],
+            booked_seats=item["booked_seats"],
+            version=int(item.get("version", 0)),
+            capacity=int(item.get("capacity", 0)),
+            seats_booked=int(item.get("seats_booked", 0)),
+            seats_held=int(item.get("seats_held", 0)),
+            seat_sections=item.get("seat_sections"),
+        )
+
+    def _from_listing_rows(self, event_id: str, items: List[dict]) -> List[Show]:
+        shows: List[Show] = []
+        legacy_ids = []
+        for item in items:
+            show_id = item["sk"].split("SHOW#", 1)[1]
+            if "capacity" not in item:
+                # written before listing rows carried counters
+                legacy_ids.append(show_id)
+                continue
+            shows.append(
+                Show(
+                    id=show_id,
+                    venue_id=item["sk"].split("VENUE#", 1)[1].split("#", 1)[0],
+                    event_id=event_id,
+                    is_blocked=item["is_show_blocked"],
+                    price=item["price"],
+                    show_date=item["show_date"],
+                    show_time=item["show_time"],
+                    booked_seats=None,
+                    capacity=int(item["capacity"]),
+                    seats_booked=int(item.get("seats_booked", 0)),
+                    seats_held=int(item.get("seats_held", 0)),
+                )
+            )
+        if legacy_ids:
+            shows.extend(self.batch_get_shows_by_ids(show_ids=legacy_ids))
+        return shows
+
+    @staticmethod
+    def _listing_items(venue: Venue, event: Event, ttl: int) -> Tuple[dict, dict]:
+        city_event = {
+            "pk": f"CITY#{venue.city}",
+            "sk": f"NAME#{event.name}#ID#{event.id}",
+            "description": event.description,
+            "duration": event.duration,
+            "category": event.category,
+            "is_event_blocked": event.is_blocked,
+            "artist_ids": event.artist_ids,
+            "artist_names": event.artist_names,
+            "event_version": event.version,
+            "expires_at": ttl,
+        }
+        host_event = {
+            "pk": f"HOST#{venue.host_id}",
+            "sk": f"EVENT#{event.id}",
+            "expires_at": ttl,
+        }
+        return city_event, host_event
+
+    def _upsert_listing_items(self, venue: Venue, event: Event, ttl: int):
+        for item in self._listing_items(venue, event, ttl):
+            self._upsert_listing_item(item, event)
+
+    def _upsert_listing_item(self, item: dict, event: Event):
+        """Writes a city or host row only if it is missing or expires before
+        the item's `expires_at`, so it never loses lifetime and usually costs
+        nothing. A city row the fan-out worker already moved to a newer
+        event version only has its lifetime extended, so a block applied
+        meanwhile is not undone by this older snapshot."""
+        ttl = item["expires_at"]
+        key = (item["pk"], item["sk"])
+        if self.index_cache is not None:
+            known_ttl = self.index_cache.get(key)
+            if known_ttl is not None and known_ttl >= ttl:
+                return
+        attributes = [name for name in item if name not in ("pk", "sk")]
+        condition = "(attribute_not_exists(#expires_at) OR #expires_at < :expires_at)"
+        if "event_version" in item:
+            condition += (
+                " AND (attribute_not_exists(#event_version)"
+                " OR #event_version <= :event_version)"
+            )
+        try:
+            resp = self.table.update_item(
+                Key={"pk": item["pk"], "sk": item["sk"]},
+                UpdateExpression="SET "
+                + ", ".join(f"#{name} = :{name}" for name in attributes),
+                ConditionExpression=condition,
+                ExpressionAttributeNames={f"#{name}": name for name in attributes},
+                ExpressionAttributeValues={
+                    f":{name}": item[name] for name in attributes
+                },
+                ReturnValues="UPDATED_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            current = err.response.get("Item", {})
+            if "expires_at" in current and (
+                _deserializer.deserialize(current["expires_at"]) < ttl
+            ):
+                self._extend_listing_item(key, ttl)
+            # otherwise the row already outlives this show
+        else:
+            # no old values means the row is new; older rows got their
+            # pointer when created, or from the fan-out backfill
+            if item["pk"].startswith("CITY#") and not resp.get("Attributes"):
+                # lets the event fan-out worker find every city the event is in
+                self.table.put_item(
+                    Item={"pk": f"EVENT#{event.id}", "sk": item["pk"]}
+                )
+        if self.index_cache is not None:
+            self.index_cache.set(key, ttl)
+
+    def _extend_listing_item(self, key: Tuple[str, str], ttl: int):
+        try:
+            self.table.update_item(
+                Key={"pk": key[0], "sk": key[1]},
+                UpdateExpression="SET #expires_at = :expires_at",
+                ConditionExpression="#expires_at < :expires_at",
+                ExpressionAttributeNames={"#expires_at": "expires_at"},
+                ExpressionAttributeValues={":expires_at": ttl},
+            )
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+    def create_show(self, show: Show, venue: Venue, event: Event):
+        if event.is_blocked:
+            raise Exception("cant add show to blocked event")
+
+        ttl = self._to_ddb_ttl(show.show_date, show.show_time)
+        # ttl = 1
+        show_item, event_date_shows, event_city_shows = self._show_items(
+            show, venue, event, ttl
+        )
+        # listing rows go first: a failed show write then leaves at most an
+        # event listed in a city, never a show that no listing points to
+        self._upsert_listing_items(venue, event, ttl)
+        if show.seat_sections:
+            self._put_seat_sections(show, ttl)
 
         try:
             self.client.transact_write_items(
@@ -86,40 +261,162 @@ class ShowRepository:
                     {
                         "Put": {
                             "TableName": self.table.name,
-                            "Item": show_item,
+                            "Item": item,
                         },
-                    },
-                    {
-                        "Put": {
-                            "TableName": self.table.name,
-                            "Item": event_date_shows,
-                        },
-                    },
-                    
-                    {
-                        "Put": {
-                            "TableName": self.table.name,
-                            "Item": event_city_shows,
-                        },
-                    },
-                    {
-                        "Put": {
-                            "TableName": self.table.name,
-                            "Item": city_event,
-                        },
-                    },
-                    {
-                        "Put": {
-                            "TableName": self.table.name,
-                            "Item": host_event,
-                        },
-                    },
+                    }
+                    for item in (show_item, event_date_shows, event_city_shows)
                 ]
             )
         except ClientError as e:
             raise
 
-    def get_show_by_id(self, show_id: str) -> Optional[Show]:
+    def _put_seat_sections(self, show: Show, ttl: int):
+        with self.table.batch_writer() as batch:
+            for section in show.seat_sections:
+                batch.put_item(
+                    Item={
+                        "pk": f"SHOW#{show.id}",
+                        "sk": f"SEATS#{section}",
+                        "booked_seats": [],
+                        "seats_booked": 0,
+                        "expires_at": ttl,
+                    }
+                )
+
+    def get_section_seats(
+        self, show_id: str, sections: List[str], max_workers: int = 8
+    ) -> List[str]:
+        """Booked seats of a sectioned show, read 100 sections per request
+        with the requests in parallel."""
+        keys = [{"pk": f"SHOW#{show_id}", "sk": f"SEATS#{section}"} for section in sections]
+        chunks = [keys[i : i + 100] for i in range(0, len(keys), 100)]
+
+        def read(chunk: List[dict]) -> List[dict]:
+            items = []
+            request = {self.table.name: {"Keys": chunk}}
+            while request:
+                resp = self.client.batch_get_item(RequestItems=request)
+                items.extend(resp.get("Responses", {}).get(self.table.name, []))
+                request = resp.get("UnprocessedKeys")
+            return items
+
+        try:
+            if len(chunks) == 1:
+                results = [read(chunks[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+                    results = list(
+                        pool.map(
+                            lambda chunk: contextvars.copy_context().run(read, chunk),
+                            chunks,
+                        )
+                    )
+        except ClientError as err:
+            logger.error(f"Error retrieving seat sections of show {show_id}: {err}")
+            raise
+        order = {section: i for i, section in enumerate(sections)}
+        items = sorted(
+            (item for chunk in results for item in chunk),
+            key=lambda item: order[item["sk"].split("#", 1)[1]],
+        )
+        return [seat for item in items for seat in item.get("booked_seats", [])]
+
+    # 33 shows x 3 items stays under the 100-item transaction limit
+    SHOWS_PER_TRANSACTION = 33
+
+    def create_shows(
+        self, shows: List[Show], venues: Dict[str, Venue], event: Event, max_workers: int = 4
+    ) -> List[Tuple[Show, str]]:
+        """Writes many shows of one event as a few transactions, run in
+        parallel. Each city and host row is upserted once, with the latest
+        TTL of the shows that need it, before any show is written. Returns
+        the shows that failed, with the reason; the others are committed."""
+        if event.is_blocked:
+            raise Exception("cant add show to blocked event")
+
+        by_venue: Dict[str, List[Show]] = {}
+        for show in shows:
+            by_venue.setdefault(show.venue_id, []).append(show)
+        ttls = {
+            venue_id: [self._to_ddb_ttl(s.show_date, s.show_time) for s in venue_shows]
+            for venue_id, venue_shows in by_venue.items()
+        }
+
+        # venues in one city, or of one host, share a listing row
+        listings: Dict[Tuple[str, str], Tuple[dict, List[str]]] = {}
+        for venue_id, venue_ttls in ttls.items():
+            for item in self._listing_items(venues[venue_id], event, max(venue_ttls)):
+                key = (item["pk"], item["sk"])
+                latest, venue_ids = listings.get(key, (item, []))
+                if item["expires_at"] > latest["expires_at"]:
+                    latest = item
+                listings[key] = (latest, venue_ids + [venue_id])
+        failed_venues: Dict[str, str] = {}
+        for item, venue_ids in listings.values():
+            try:
+                self._upsert_listing_item(item, event)
+            except ClientError as err:
+                logger.error(
+                    "couldn't write listing %s of event %s. Error: %s",
+                    item["pk"],
+                    event.id,
+                    err.response["Error"]["Message"],
+                )
+                for venue_id in venue_ids:
+                    failed_venues.setdefault(venue_id, err.response["Error"]["Code"])
+
+        chunks = []
+        failures = []
+        for venue_id, venue_shows in by_venue.items():
+            if venue_id in failed_venues:
+                failures.extend((show, failed_venues[venue_id]) for show in venue_shows)
+                continue
+            venue = venues[venue_id]
+            for start in range(0, len(venue_shows), self.SHOWS_PER_TRANSACTION):
+                chunk = venue_shows[start : start + self.SHOWS_PER_TRANSACTION]
+                items = [
+                    item
+                    for show, ttl in zip(
+                        chunk, ttls[venue_id][start : start + self.SHOWS_PER_TRANSACTION]
+                    )
+                    for item in self._show_items(show, venue, event, ttl)
+                ]
+                chunks.append((chunk, items))
+
+        def write(chunk: List[Show], items: List[dict]) -> List[Tuple[Show, str]]:
+            try:
+                self.client.transact_write_items(
+                    TransactItems=[
+                        {"Put": {"TableName": self.table.name, "Item": item}}
+                        for item in items
+                    ]
+                )
+            except ClientError as err:
+                logger.error(
+                    "couldn't create %d shows of event %s. Error: %s",
+                    len(chunk),
+                    event.id,
+                    err.response["Error"]["Message"],
+                )
+                return [(show, err.response["Error"]["Code"]) for show in chunk]
+            return []
+
+        if len(chunks) <= 1:
+            return failures + [f for chunk, items in chunks for f in write(chunk, items)]
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            # each write runs in a copy of the request context so its
+            # DynamoDB calls are still traced and capacity-accounted
+            futures = [
+                pool.submit(contextvars.copy_context().run, write, chunk, items)
+                for chunk, items in chunks
+            ]
+            return failures + [
+                failure for future in futures for failure in future.result()
+            ]
+
+    def get_show_by_id(self, show_id: str, include_seats: bool = True) -> Optional[Show]:
+        """`include_seats=False` skips reading the sections of a sectioned
+        show and leaves its `booked_seats` None."""
         try:
             response = self.table.get_item(
                 Key={"pk": f"SHOW#{show_id}", "sk": "DETAILS"}
@@ -131,16 +428,40 @@ class ShowRepository:
         if not item:
             return None
 
-        return Show(
-            id=show_id,
-            venue_id=item["venue_id"],
-            event_id=item["event_id"],
-            is_blocked=item["is_show_blocked"],
-            price=item["price"],
-            show_date=item["show_date"],
-            show_time=item["show_time"],
-            booked_seats=item["booked_seats"],
+        show = self._from_item(show_id, item)
+        if show.seat_sections:
+            show.booked_seats = (
+                self.get_section_seats(show_id, show.seat_sections)
+                if include_seats
+                else None
+            )
+        return show
+
+    def get_version(self, show_id: str) -> Optional[Tuple[int, str, bool]]:
+        """The show's version, venue and blocked flag. A projected read, so
+        it skips the booked_seats list entirely."""
+        try:
+            response = self.table.get_item(
+                Key={"pk": f"SHOW#{show_id}", "sk": "DETAILS"},
+                ProjectionExpression="#version, #venue_id, #is_blocked",
+                ExpressionAttributeNames={
+                    "#version": "version",
+                    "#venue_id": "venue_id",
+                    "#is_blocked": "is_show_blocked",
+                },
+            )
+        except ClientError as err:
+            logger.error(f"Error retrieving show version {show_id}: {err}")
+            raise
+        item = response.get("Item")
+        if not item:
+            return None
+        return (
+            int(item.get("version", 0)),
+            item["venue_id"],
+            item.get("is_show_blocked", False),
         )
+
     def batch_get_shows_by_ids(self, show_ids: List[str]) -> List[Show]:
         try:
             keys = [{"pk": f"SHOW#{show_id}", "sk": "DETAILS"} for show_id in show_ids]
@@ -156,20 +477,14 @@ class ShowRepository:
             raise
 
         items = response.get("Responses", {}).get(self.table.name, [])
+        while response.get("UnprocessedKeys"):
+            response = self.client.batch_get_item(RequestItems=response["UnprocessedKeys"])
+            items.extend(response.get("Responses", {}).get(self.table.name, []))
         shows: List[Show] = []
         for item in items:
-            show = Show(
-                id=item["pk"].split("#", 1)[1],
-                venue_id=item["venue_id"],
-                event_id=item["event_id"],
-                is_blocked=item["is_show_blocked"],
-                price=item["price"],
-                show_date=item["show_date"],
-                show_time=item["show_time"],
-                booked_seats=item["booked_seats"],
-            )
-            shows.append(show)
+            shows.append(self._from_item(item["pk"].split("#", 1)[1], item))
         return shows
+
     def list_by_event_city(self, event_id: str, city: str) -> List[Show]:
         try:
             response = self.table.query(
@@ -186,21 +501,14 @@ class ShowRepository:
         if not items:
             return []
 
-        shows: List[Show] = []
-        show_ids=[]
-
-        for item in items:
-            id=item["sk"].split("SHOW#", 1)[1]
-            show_ids.append(id)
-        shows= self.batch_get_shows_by_ids(show_ids=show_ids)
-        return shows
+        return self._from_listing_rows(event_id, items)
 
     def list_by_event_date(self, event_id: str, city: str, date: str) -> List[Show]:
         try:
             response = self.table.query(
                 KeyConditionExpression=(
                     Key("pk").eq(f"EVENT#{event_id}#CITY#{city}")
-                    & Key("sk").begins_with(f"DATE{date}")
+                    & Key("sk").begins_with(f"DATE#{date}#")
                 )
             )
         except ClientError as err:
@@ -211,25 +519,11 @@ class ShowRepository:
         if not items:
             return None
 
-        shows: List[Show] = []
         if items[0].get("is_event_blocked"):
             return []
 
-        for item in items:
-            show = Show(
-                id=item["sk"].split("SHOW#", 1)[1],
-                venue_id=item["sk"].split("#")[3],
-                event_id=event_id,
-                is_blocked=item["is_show_blocked"],
-                price=item["price"],
-                booked_seats=item["booked_seats"],
-                show_date=item["show_date"],
-                show_time=item["show_time"],
-            )
-            if show.is_blocked:
-                continue
-            shows.append(show)
-        return shows
+        shows = self._from_listing_rows(event_id, items)
+        return [show for show in shows if not show.is_blocked]
 
     def update_show(self, show_id: str, is_blocked, venue: Venue, show: Show):
 
@@ -240,12 +534,16 @@ class ShowRepository:
                         "Update": {
                             "Key": {"pk": f"SHOW#{show_id}", "sk": "DETAILS"},
                             "TableName": self.table.name,
-                            "UpdateExpression": "SET #is_blocked=:new_value",
+                            "UpdateExpression": "SET #is_blocked=:new_value, "
+                            "#version = if_not_exists(#version, :zero) + :one",
                             "ExpressionAttributeNames": {
                                 "#is_blocked": "is_show_blocked",
+                                "#version": "version",
                             },
                             "ExpressionAttributeValues": {
                                 ":new_value": is_blocked,
+                                ":zero": 0,
+                                ":one": 1,
                             },
                             "ConditionExpression":"attribute_exists(pk)"
                         },
@@ -267,6 +565,23 @@ class ShowRepository:
                             "ConditionExpression":"attribute_exists(pk)"
                         },
                     },
+                    {
+                        "Update": {
+                            "Key": {
+                                "pk": f"EVENT#{show.event_id}#CITY#{venue.city}",
+                                "sk": f"VENUE#{show.venue_id}#SHOW#{show_id}",
+                            },
+                            "TableName": self.table.name,
+                            "UpdateExpression": "SET #is_blocked=:new_value",
+                            "ExpressionAttributeNames": {
+                                "#is_blocked": "is_show_blocked",
+                            },
+                            "ExpressionAttributeValues": {
+                                ":new_value": is_blocked,
+                            },
+                            "ConditionExpression":"attribute_exists(pk)"
+                        },
+                    },
                 ]
             )
         except ClientError as e:
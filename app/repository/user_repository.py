@@ -5,10 +5,12 @@ from types_boto3_dynamodb.service_resource import Table
 from types_boto3_dynamodb import DynamoDBClient
 from typing import Optional
 from boto3.dynamodb.conditions import Key
+from app.utils.metrics import instrument_repository
 
 logger = logging.getLogger(__name__)
 
 
+@instrument_repository("user")
 class UserRepository:
     def __init__(self, table: Table, client: DynamoDBClient = None):
         self.table = table
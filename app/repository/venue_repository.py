@@ -3,10 +3,12 @@ from botocore.exceptions import ClientError
 import logging
 from types_boto3_dynamodb.service_resource import Table
 from types_boto3_dynamodb import DynamoDBClient
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from boto3.dynamodb.conditions import Key
+from app.utils.metrics import instrument_repository
 
 
+@instrument_repository("venue")
 class VenueRepository:
     def __init__(self, table: Table, client: DynamoDBClient = None):
         self.table = table
@@ -31,6 +33,7 @@ class VenueRepository:
             "venue_city": venue.city,
             "venue_state": venue.state,
             "is_seat_layout_required": venue.is_seat_layout_required,
+            "version": 1,
         }
         try:
             self.client.transact_write_items(
@@ -70,8 +73,28 @@ class VenueRepository:
             state=item["venue_state"],
             is_blocked=item["is_venue_blocked"],
             is_seat_layout_required=item["is_seat_layout_required"],
+            version=int(item.get("version", 0)),
         )
 
+    def get_version(self, venue_id: str) -> Optional[Tuple[int, bool]]:
+        """The venue's version and blocked flag, without the rest of it."""
+        try:
+            resp = self.table.get_item(
+                Key={"pk": f"VENUE#{venue_id}", "sk": "DETAILS"},
+                ProjectionExpression="#pk, #version, #is_blocked",
+                ExpressionAttributeNames={
+                    "#pk": "pk",
+                    "#version": "version",
+                    "#is_blocked": "is_venue_blocked",
+                },
+            )
+        except ClientError as e:
+            raise
+        item = resp.get("Item")
+        if not item:
+            return None
+        return int(item.get("version", 0)), item.get("is_venue_blocked", False)
+
     def get_host_venues(self, host_id: str) -> List[Venue]:
         try:
             response = self.table.query(
@@ -94,6 +117,7 @@ class VenueRepository:
                 state=item["venue_state"],
                 is_blocked=item["is_venue_blocked"],
                 is_seat_layout_required=item["is_seat_layout_required"],
+                version=int(item.get("version", 0)),
             )
             venues.append(venue)
         return venues
@@ -106,14 +130,18 @@ class VenueRepository:
                         "Update": {
                             "TableName": self.table.name,
                             "Key": {"pk": f"VENUE#{venue_id}", "sk": "DETAILS"},
-                            "UpdateExpression": "SET #is_blocked=:new_value",
+                            "UpdateExpression": "SET #is_blocked=:new_value, "
+                            "#version = if_not_exists(#version, :zero) + :one",
                             "ExpressionAttributeNames": {
                                 "#is_blocked": "is_venue_blocked",
                                 "#host_id": "host_id",
+                                "#version": "version",
                             },
                             "ExpressionAttributeValues": {
                                 ":new_value": is_blocked,
                                 ":host_id": host_id,
+                                ":zero": 0,
+                                ":one": 1,
                             },
                             "ConditionExpression": "attribute_exists(pk) AND #host_id = :host_id",
                         }
@@ -180,6 +208,9 @@ class VenueRepository:
             raise
 
         items = response.get("Responses", {}).get(self.table.name, [])
+        while response.get("UnprocessedKeys"):
+            response = self.client.batch_get_item(RequestItems=response["UnprocessedKeys"])
+            items.extend(response.get("Responses", {}).get(self.table.name, []))
         venues = []
         for item in items:
             venue = Venue(
@@ -190,6 +221,7 @@ class VenueRepository:
                 state=item["venue_state"],
                 is_blocked=item["is_venue_blocked"],
                 is_seat_layout_required=item["is_seat_layout_required"],
+                version=int(item.get("version", 0)),
             )
             venues.append(venue)
         return venues
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.dependencies import (
+    get_event_fanout_worker,
+    get_outbox_repo,
+    get_profiler,
+    require_roles,
+)
+from app.repository.outbox_repository import OutboxRepository
+from app.schemas.response import APIResponse
+from app.utils.profiling import SamplingProfiler
+from app.workers.event_fanout import EventFanoutWorker
+from app import config
+
+admin_router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_roles(["admin"]))],
+)
+
+
+@admin_router.post("/profiler/start")
+def start_profiler(
+    seconds: int = Query(30, ge=1, le=config.PROFILER_MAX_SECONDS),
+    profiler: SamplingProfiler = Depends(get_profiler),
+):
+    try:
+        profiler.start(duration=seconds)
+    except RuntimeError as err:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(err))
+    return APIResponse(
+        status_code=200,
+        message=f"profiling for {seconds} seconds",
+        data=profiler.summary(),
+    )
+
+
+@admin_router.post("/profiler/stop")
+def stop_profiler(profiler: SamplingProfiler = Depends(get_profiler)):
+    profiler.stop()
+    return APIResponse(
+        status_code=200, message="profiler stopped", data=profiler.summary()
+    )
+
+
+@admin_router.get("/profiler/profile")
+def download_profile(profiler: SamplingProfiler = Depends(get_profiler)):
+    if profiler.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="profiler is still running"
+        )
+    if not profiler.samples:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="no profile recorded yet"
+        )
+    return PlainTextResponse(
+        profiler.folded(),
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="profile-{int(profiler.started_at)}.folded"'
+            )
+        },
+    )
+
+
+@admin_router.get("/outbox")
+def list_outbox_jobs(
+    include_done: bool = False,
+    outbox_repo: OutboxRepository = Depends(get_outbox_repo),
+):
+    jobs = outbox_repo.list_jobs(include_done=include_done)
+    return APIResponse(
+        status_code=200,
+        message=f"{len(jobs)} outbox jobs",
+        data=[{k: v for k, v in job.items() if k not in ("pk", "cursor")} for job in jobs],
+    )
+
+
+@admin_router.post("/outbox/backfill", status_code=status.HTTP_202_ACCEPTED)
+def backfill_event_cities(
+    worker: EventFanoutWorker = Depends(get_event_fanout_worker),
+):
+    """Has the fan-out worker pick up city listing rows written before it
+    existed; progress is logged."""
+    worker.request_backfill()
+    return APIResponse(status_code=202, message="backfill requested", data=None)
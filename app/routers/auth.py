@@ -3,7 +3,7 @@ from app.schemas.auth import SignupRequest, LoginRequest
 from app.schemas.response import APIResponse
 from app.services.user_service import UserService
 from typing import Annotated
-from app.dependencies import get_user_service
+from app.dependencies import get_user_service, get_client_ip
 
 auth_router = APIRouter(tags=["auth"])
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
@@ -36,9 +36,11 @@ def signup(
 def login(
     payload: LoginRequest,
     service: UserServiceDep,
+    client_ip: str = Depends(get_client_ip),
 ):
     token = service.login(
         email=payload.email,
         password=payload.password,
+        client_ip=client_ip,
     )
     return APIResponse(status_code=200, message="login successful", data=token)
@@ -4,8 +4,9 @@ from app.dependencies import (
     require_roles,
     get_user_service,
 )
-from fastapi import APIRouter, Depends
-from app.schemas.booking import BookingReq
+from fastapi import APIRouter, Depends, Header
+from typing import Annotated, Optional
+from app.schemas.booking import BookingReq, CartCheckoutReq
 from app.schemas.response import APIResponse
 from app.services.booking_service import BookingService
 from app.models.users import Role
@@ -20,13 +21,33 @@ def create_bookings(
     current_user=Depends(get_current_user),
     booking_service: BookingService = Depends(get_booking_service),
     user_service: UserService = Depends(get_user_service),
+    x_queue_token: Annotated[Optional[str], Header()] = None,
 ):
     if current_user["role"] == Role.ADMIN.value:
         user = user_service.get_user_by_mail(mail=req.user_id)
         user_id = user.user_id
     else:
         user_id = current_user["user_id"]
-    booking = booking_service.create_booking(req, user_id)
+    booking = booking_service.create_booking(req, user_id, queue_token=x_queue_token)
     return APIResponse(
         status_code=201, message="succesfully made booking", data=booking
     )
+
+
+@bookings_router.post("/checkout", status_code=201)
+def checkout_cart(
+    req: CartCheckoutReq,
+    current_user=Depends(get_current_user),
+    booking_service: BookingService = Depends(get_booking_service),
+    user_service: UserService = Depends(get_user_service),
+    x_queue_token: Annotated[Optional[str], Header()] = None,
+):
+    if current_user["role"] == Role.ADMIN.value:
+        user = user_service.get_user_by_mail(mail=req.user_id)
+        user_id = user.user_id
+    else:
+        user_id = current_user["user_id"]
+    cart = booking_service.checkout(req, user_id, queue_token=x_queue_token)
+    return APIResponse(
+        status_code=201, message="succesfully checked out cart", data=cart
+    )
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, Header, status, Query
 from app.schemas.event import CreateEventRequest, UpdateEventRequest
 from app.schemas.response import APIResponse
+from app.utils.compression import compressed_route
 from app.services.event_service import EventService
-from app.dependencies import require_roles, get_event_service, get_current_user
+from app.dependencies import require_roles, get_event_service, get_catalog_user
+from app.utils.cdn import catalog_cache_headers
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.json_response import FastJSONResponse
 from typing import Optional, Annotated
 
 event_router = APIRouter(
-    prefix="/events", tags=["events"], dependencies=[Depends(get_current_user)]
+    prefix="/events",
+    tags=["events"],
+    route_class=compressed_route(),
 )
 
 
@@ -34,11 +40,21 @@ async def create_event(
 async def get_event_by_id(
     event_id: str,
     event_service: EventService = Depends(get_event_service),
-    
-    user=Depends(get_current_user),
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    user=Depends(get_catalog_user),
 ):
+    cache_headers = catalog_cache_headers(user, [f"event:{event_id}"])
+    if if_none_match:
+        version = event_service.get_event_version(event_id, user["role"])
+        if version is not None:
+            etag = make_etag("event", event_id, version)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, cache_headers)
     event = event_service.get_event_by_id(event_id, user["role"])
-    return APIResponse(status_code=200, message="successfully retrieved", data=event)
+    return FastJSONResponse(
+        APIResponse(status_code=200, message="successfully retrieved", data=event),
+        headers={"ETag": make_etag("event", event_id, event.version), **cache_headers},
+    )
 
 
 @event_router.get("")
@@ -46,7 +62,7 @@ async def browse_events(
     name: Annotated[Optional[str], Query(description="Event name to search")] = None,
     city: Annotated[Optional[str], Query(description="Event city to search")] = None,
     is_blocked: Optional[bool] = Query(None, description="Filter by blocked status"),
-    user=Depends(get_current_user),
+    user=Depends(get_catalog_user),
     event_service: EventService = Depends(get_event_service),
 ):
     #if both are not present error
@@ -62,7 +78,11 @@ async def browse_events(
         events = event_service.browse_events_by_name(
                     event_name=name, city=city, user_role=user["role"]
                 )
-    return APIResponse(status_code=200, message="successfully retrieved", data=events)
+    surrogate_keys = ["events"] + ([f"city:{city.lower()}"] if city else [])
+    return FastJSONResponse(
+        APIResponse(status_code=200, message="successfully retrieved", data=events),
+        headers=catalog_cache_headers(user, surrogate_keys),
+    )
 
 
 @event_router.patch("/{event_id}")
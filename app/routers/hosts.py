@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.services.venue_service import VenuService
 from app.services.event_service import EventService
+from app.services.analytics_service import AnalyticsService
 from app.dependencies import (
+    get_analytics_service,
     get_venue_service,
     require_roles,
     get_event_service,
 )
 from app.schemas.response import APIResponse
+from datetime import date
 from typing import Optional
 
 
@@ -50,3 +53,32 @@ async def get_host_shows(
         message=f"successfully retrieved {host_id}'s events",
         data=events,
     )
+
+
+@hosts_router.get("/{host_id}/analytics")
+def get_host_analytics(
+    host_id: str,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    event_id: Optional[str] = None,
+    show_id: Optional[str] = None,
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+    user=Depends(require_roles(["host", "admin"])),
+):
+    if user["role"] != "admin":
+        if user["user_id"] != host_id:
+            raise HTTPException(
+                status_code=401, detail=f"not authorised to see host: {host_id} analytics"
+            )
+    analytics = analytics_service.get_host_analytics(
+        host_id=host_id,
+        from_date=from_date,
+        to_date=to_date,
+        event_id=event_id,
+        show_id=show_id,
+    )
+    return APIResponse(
+        status_code=200,
+        message=f"successfully retrieved {host_id}'s analytics",
+        data=analytics,
+    )
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends, status
-from app.dependencies import get_current_user, get_show_service, require_roles
+import asyncio
+from fastapi import APIRouter, Depends, Header, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.custom_exceptions.generic import NotFoundException
+from app.dependencies import (
+    get_catalog_user,
+    get_seat_stream,
+    get_show_service,
+    require_roles,
+)
 from app.services.show_service import ShowService
 from typing import Annotated, Optional
-from app.schemas.shows import ShowCreateReq, ShowUpdateReq
+from app.schemas.shows import ShowCreateReq, ShowScheduleReq, ShowUpdateReq
 from app.schemas.response import APIResponse
+from app.utils.compression import compressed_route
+from app.utils.cdn import catalog_cache_headers
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.json_response import FastJSONResponse
+from app.utils.seat_stream import SeatStreamHub
 
 shows_router = APIRouter(
-    prefix="/shows", tags=["shows"], dependencies=[Depends(get_current_user)]
+    prefix="/shows",
+    tags=["shows"],
+    route_class=compressed_route(),
 )
 
 ShowServiceDep = Annotated[ShowService, Depends(get_show_service)]
@@ -24,11 +40,78 @@ async def create_show(
     )
 
 
+@shows_router.post("/schedule", status_code=status.HTTP_201_CREATED)
+def schedule_shows(
+    req: ShowScheduleReq,
+    current_user: dict = Depends(require_roles(["host"])),
+    show_service: ShowService = Depends(get_show_service),
+):
+    result = show_service.schedule_shows(req=req, host_id=current_user["user_id"])
+    if not result.failed:
+        return APIResponse(
+            status_code=status.HTTP_201_CREATED,
+            message=f"created {len(result.created)} shows",
+            data=result,
+        )
+    # some slots were not written; the body says which and why
+    status_code = (
+        status.HTTP_207_MULTI_STATUS if result.created else status.HTTP_400_BAD_REQUEST
+    )
+    return FastJSONResponse(
+        APIResponse(
+            status_code=status_code,
+            message=f"created {len(result.created)} shows, {len(result.failed)} failed",
+            data=result,
+        ),
+        status_code=status_code,
+    )
+
+
 @shows_router.get("/{show_id}", status_code=status.HTTP_200_OK)
-def get_show_by_id(show_id: str, show_service: ShowService = Depends(get_show_service)):
-    show_response = show_service.get_show_by_id(show_id)
-    return APIResponse(
-        status_code=200, message=f"successfully retrieved show", data=show_response
+def get_show_by_id(
+    show_id: str,
+    show_service: ShowService = Depends(get_show_service),
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    user=Depends(get_catalog_user),
+):
+    cache_headers = catalog_cache_headers(user, [f"show:{show_id}"])
+    if if_none_match:
+        version = show_service.get_show_version(show_id)
+        if version is not None:
+            etag = make_etag("show", show_id, version)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, cache_headers)
+    show_response, version = show_service.get_show_by_id(show_id)
+    # the response embeds the venue, so blocking it purges the show too
+    cache_headers = catalog_cache_headers(
+        user, [f"show:{show_id}", f"venue:{show_response.venue.venue_id}"]
+    )
+    return FastJSONResponse(
+        APIResponse(
+            status_code=200, message=f"successfully retrieved show", data=show_response
+        ),
+        headers={"ETag": make_etag("show", show_id, version), **cache_headers},
+    )
+
+
+@shows_router.get("/{show_id}/seats/stream", status_code=status.HTTP_200_OK)
+async def stream_seats(
+    show_id: str,
+    request: Request,
+    seat_stream: SeatStreamHub = Depends(get_seat_stream),
+    user=Depends(get_catalog_user),
+):
+    """Server-sent events: a `snapshot` of the booked seats, then a `booked`
+    event with the new seats after every booking."""
+    listener = await run_in_threadpool(
+        seat_stream.subscribe, show_id, asyncio.get_running_loop()
+    )
+    if listener is None:
+        raise NotFoundException(resource="show", identifier=show_id, status_code=404)
+    return StreamingResponse(
+        seat_stream.events(show_id, listener, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -39,7 +122,7 @@ def event_shows(
     date: Optional[str] = None,
     host_id: Optional[str] = None,
     show_service: ShowService = Depends(get_show_service),
-    user=Depends(get_current_user),
+    user=Depends(get_catalog_user),
 ):
     if host_id != None:
         if user["role"] != "host" or user["user_id"] != host_id:
@@ -48,8 +131,25 @@ def event_shows(
                 message="forbidden: only host can access their shows",
             )
     show_responses = show_service.get_event_shows(event_id, city.lower(), user, date)
-    return APIResponse(
-        status_code=200, message=f"successfully retrieved shows", data=show_responses
+    return FastJSONResponse(
+        APIResponse(
+            status_code=200,
+            message=f"successfully retrieved shows",
+            data=show_responses,
+        ),
+        headers=catalog_cache_headers(
+            user,
+            [f"event-shows:{event_id}", f"city:{city.lower()}"]
+            # so blocking a venue purges the lists its shows appear in
+            + sorted(
+                {
+                    f"venue:{show.venue.venue_id}"
+                    for show in show_responses
+                    # admins also see shows whose venue is hidden
+                    if show.venue is not None
+                }
+            ),
+        ),
     )
 
 
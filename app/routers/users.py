@@ -1,12 +1,20 @@
 from app.dependencies import get_user_service, get_current_user, require_roles
-from fastapi import APIRouter, Depends, status, HTTPException
+from datetime import date
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from typing import Literal, Optional
 from app.schemas.response import APIResponse
+from app.utils.compression import compressed_route
 from app.services.user_service import UserService
 from app.services.booking_service import BookingService
 from app.dependencies import get_booking_service
 
 
-users_router = APIRouter(prefix="/users", tags=["users"])
+# booking histories are read on mobile, so favour smaller payloads here
+users_router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+    route_class=compressed_route(minimum_size=512, brotli_quality=5),
+)
 
 
 @users_router.get("/{user_id}", status_code=200)
@@ -29,6 +37,12 @@ def get_user_profile(
 @users_router.get("/{user_id}/bookings", status_code=200)
 def get_bookings(
     user_id: str,
+    when: Optional[Literal["upcoming", "past"]] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    order: Optional[Literal["asc", "desc"]] = None,
+    limit: int = Query(50, ge=1, le=100),
+    page: Optional[str] = None,
     user=Depends(get_current_user),
     booking_service: BookingService = Depends(get_booking_service),
 ):
@@ -37,12 +51,39 @@ def get_bookings(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not allowed to access this user bookings",
         )
-    bookings = booking_service.get_user_bookings(user_id)
+    bookings = booking_service.get_user_bookings(
+        user_id,
+        when=when,
+        from_date=from_date,
+        to_date=to_date,
+        order=order,
+        limit=limit,
+        page=page,
+    )
     return APIResponse(
         status_code=200, message="succesfully retrieved user bookings", data=bookings
     )
 
 
+@users_router.get("/{user_id}/bookings/history", status_code=200)
+def get_booking_history(
+    user_id: str,
+    page: Optional[str] = None,
+    user=Depends(get_current_user),
+    booking_service: BookingService = Depends(get_booking_service),
+):
+    """Same as `/bookings?when=past`."""
+    if user["user_id"] != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to access this user bookings",
+        )
+    history = booking_service.get_user_bookings(user_id, when="past", page=page)
+    return APIResponse(
+        status_code=200, message="succesfully retrieved user bookings", data=history
+    )
+
+
 @users_router.get("/email/{mail_id}", status_code=200)
 def get_user_by_mail(
     mail_id: str,
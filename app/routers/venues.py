@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, status
-from typing import Annotated
+from fastapi import APIRouter, Depends, Header, status
+from typing import Annotated, Optional
 from app.services.venue_service import VenuService
 from app.schemas.venues import VenueCreateReq, VenueUpdateReq
-from app.dependencies import get_venue_service, require_roles, get_current_user
+from app.dependencies import (
+    get_venue_service,
+    require_roles,
+    get_current_user,
+    get_catalog_user,
+)
 from app.schemas.response import APIResponse
+from app.utils.cdn import catalog_cache_headers
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.json_response import FastJSONResponse
 
 
-venue_router = APIRouter(
-    prefix="/venues", tags=["venue"], dependencies=[Depends(get_current_user)]
-)
+venue_router = APIRouter(prefix="/venues", tags=["venue"])
 VenueServiceDep = Annotated[VenuService, Depends(get_venue_service)]
 
 
@@ -31,9 +37,21 @@ async def add_venue(
 async def get_venue_by_id(
     venue_id: str,
     venue_service: VenuService = Depends(get_venue_service),
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    user=Depends(get_catalog_user),
 ):
+    cache_headers = catalog_cache_headers(user, [f"venue:{venue_id}"])
+    if if_none_match:
+        version = venue_service.get_venue_version(venue_id)
+        if version is not None:
+            etag = make_etag("venue", venue_id, version)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, cache_headers)
     venue = venue_service.get_venue_by_id(venue_id=venue_id)
-    return APIResponse(status_code=200, message="successfully retrieved", data=venue)
+    return FastJSONResponse(
+        APIResponse(status_code=200, message="successfully retrieved", data=venue),
+        headers={"ETag": make_etag("venue", venue_id, venue.version), **cache_headers},
+    )
 
 
 @venue_router.patch("/{venue_id}")
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class SalesTotals(BaseModel):
+    tickets: int = 0
+    revenue: int = 0
+    bookings: int = 0
+
+
+class DailySales(SalesTotals):
+    day: str
+
+
+class EventSales(SalesTotals):
+    event_id: str
+    event_name: str
+
+
+class ShowSales(SalesTotals):
+    show_id: str
+    event_id: str
+    show_date: str
+    show_time: str
+
+
+class HostAnalytics(BaseModel):
+    host_id: str
+    totals: SalesTotals
+    # for the host, or for `event_id` / `show_id` when one was asked for
+    daily: List[DailySales]
+    events: List[EventSales]
+    shows: List[ShowSales]
+    event_id: Optional[str] = None
+    show_id: Optional[str] = None
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
+from app import config
 
 
 class BookingReq(BaseModel):
@@ -22,3 +23,32 @@ class BookingResponse(BaseModel):
     event_name: str
     event_duration: int
     event_id: str
+
+
+class CartItem(BaseModel):
+    show_id: str
+    seats: List[str] = Field(min_length=1)
+
+
+class CartCheckoutReq(BaseModel):
+    items: List[CartItem] = Field(min_length=1, max_length=config.CART_MAX_SHOWS)
+    user_id: Optional[str] = None
+
+    @field_validator("items")
+    @classmethod
+    def validate_items(cls, v: List[CartItem]):
+        show_ids = [item.show_id for item in v]
+        if len(set(show_ids)) != len(show_ids):
+            raise ValueError("each show may appear only once in a cart")
+        return v
+
+
+class CartCheckoutResponse(BaseModel):
+    bookings: List[BookingResponse]
+    total_price: int
+
+
+class BookingPage(BaseModel):
+    bookings: List[BookingResponse]
+    # pass back as `page` for the next, older page; None after the last
+    next_page: Optional[str] = None
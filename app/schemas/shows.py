@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional, List, Dict, Literal
+from datetime import date, datetime, timedelta
+from app import config
 
 
 class ShowCreateReq(BaseModel):
@@ -8,6 +10,87 @@ class ShowCreateReq(BaseModel):
     price: int
     show_date: str
     show_time: str
+    capacity: int = Field(default=config.SHOW_DEFAULT_CAPACITY, gt=0)
+    # keeps seats per section for very large venues; seat ids then have to
+    # look like "<section>-<seat>"
+    seat_sections: Optional[List[str]] = Field(
+        default=None, min_length=1, max_length=config.SHOW_MAX_SEAT_SECTIONS
+    )
+
+    @field_validator("seat_sections")
+    @classmethod
+    def validate_seat_sections(cls, v: Optional[List[str]]):
+        if v is None:
+            return v
+        for section in v:
+            if not section or "-" in section or "#" in section:
+                raise ValueError(
+                    f"invalid section {section!r}: must be non-empty, without '-' or '#'"
+                )
+        return list(dict.fromkeys(v))
+
+
+class ShowScheduleReq(BaseModel):
+    """Every combination of date in [start_date, end_date] (optionally only
+    on `weekdays`, 0 = Monday), time in `show_times` and venue in
+    `venue_ids` becomes one show."""
+
+    event_id: str
+    venue_ids: List[str] = Field(min_length=1, max_length=25)
+    price: int
+    start_date: date
+    end_date: date
+    show_times: List[str] = Field(min_length=1, max_length=24)
+    weekdays: Optional[List[int]] = None
+    capacity: int = Field(default=config.SHOW_DEFAULT_CAPACITY, gt=0)
+
+    @field_validator("show_times")
+    @classmethod
+    def validate_show_times(cls, v: List[str]):
+        for show_time in v:
+            datetime.strptime(show_time, "%H:%M")
+        return list(dict.fromkeys(v))
+
+    @field_validator("weekdays")
+    @classmethod
+    def validate_weekdays(cls, v: Optional[List[int]]):
+        if v is not None and any(day < 0 or day > 6 for day in v):
+            raise ValueError("weekdays must be between 0 (Monday) and 6 (Sunday)")
+        return v
+
+    @model_validator(mode="after")
+    def validate_size(self):
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        total = len(self.dates()) * len(self.show_times) * len(set(self.venue_ids))
+        if total > config.SHOW_SCHEDULE_MAX_SHOWS:
+            raise ValueError(
+                f"schedule expands to {total} shows, "
+                f"at most {config.SHOW_SCHEDULE_MAX_SHOWS} are allowed"
+            )
+        return self
+
+    def dates(self) -> List[str]:
+        days = (self.end_date - self.start_date).days + 1
+        candidates = (self.start_date + timedelta(days=i) for i in range(days))
+        return [
+            day.isoformat()
+            for day in candidates
+            if self.weekdays is None or day.weekday() in self.weekdays
+        ]
+
+
+class ScheduledShow(BaseModel):
+    id: Optional[str] = None
+    venue_id: str
+    show_date: str
+    show_time: str
+    reason: Optional[str] = None
+
+
+class ShowScheduleResponse(BaseModel):
+    created: List[ScheduledShow]
+    failed: List[ScheduledShow]
 
 
 class ShowUpdateReq(BaseModel):
@@ -21,13 +104,40 @@ class VenuDTO(BaseModel):
     state: str
 
 
+class SeatAvailability(BaseModel):
+    capacity: int
+    booked: int
+    held: int
+    available: int
+    status: Literal["available", "few_left", "sold_out"]
+
+    @classmethod
+    def of(cls, capacity: int, booked: int, held: int) -> "SeatAvailability":
+        available = max(capacity - booked - held, 0)
+        if available == 0:
+            status = "sold_out"
+        elif available <= config.SHOW_FEW_SEATS_LEFT:
+            status = "few_left"
+        else:
+            status = "available"
+        return cls.model_construct(
+            capacity=capacity,
+            booked=booked,
+            held=held,
+            available=available,
+            status=status,
+        )
+
+
 class ShowResponse(BaseModel):
     id: str
     event_id: str
     price: int
     show_date: str
     show_time: str
-    booked_seats: List
+    # listings leave this out and give `availability` instead
+    booked_seats: Optional[List] = None
     venue: VenuDTO
     is_blocked: bool
     host_id: str
+    availability: Optional[SeatAvailability] = None
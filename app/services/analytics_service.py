@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from app import config
+from app.repository.analytics_repository import AnalyticsRepository
+from app.schemas.analytics import (
+    DailySales,
+    EventSales,
+    HostAnalytics,
+    SalesTotals,
+    ShowSales,
+)
+from app.utils.tracing import trace_methods
+
+
+def _totals(item: Optional[dict]) -> dict:
+    item = item or {}
+    return {
+        "tickets": int(item.get("tickets", 0)),
+        "revenue": int(item.get("revenue", 0)),
+        "bookings": int(item.get("bookings", 0)),
+    }
+
+
+@trace_methods("AnalyticsService")
+class AnalyticsService:
+    def __init__(self, analytics_repo: AnalyticsRepository):
+        self.analytics_repo = analytics_repo
+
+    def get_host_analytics(
+        self,
+        host_id: str,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        event_id: Optional[str] = None,
+        show_id: Optional[str] = None,
+    ) -> HostAnalytics:
+        """Totals per host, event and show, plus daily sales from
+        `from_date` to `to_date` (the last ANALYTICS_DEFAULT_DAYS by default)
+        for the host or one of its events or shows."""
+        to_date = to_date or date.today()
+        from_date = from_date or to_date - timedelta(days=config.ANALYTICS_DEFAULT_DAYS - 1)
+        if from_date > to_date:
+            raise ValueError("from_date must not be after to_date")
+        if (to_date - from_date).days >= config.ANALYTICS_MAX_DAYS:
+            raise ValueError(f"at most {config.ANALYTICS_MAX_DAYS} days at a time")
+        daily = self.analytics_repo.list_daily(
+            host_id,
+            from_date.isoformat(),
+            to_date.isoformat(),
+            event_id=event_id,
+            show_id=show_id,
+        )
+        return HostAnalytics(
+            host_id=host_id,
+            totals=SalesTotals(**_totals(self.analytics_repo.get_total(host_id))),
+            daily=[DailySales(day=item["day"], **_totals(item)) for item in daily],
+            events=[
+                EventSales(
+                    event_id=item["event_id"],
+                    event_name=item["event_name"],
+                    **_totals(item),
+                )
+                for item in self.analytics_repo.list_totals(host_id, "EVENT")
+            ],
+            shows=[
+                ShowSales(
+                    show_id=item["show_id"],
+                    event_id=item["event_id"],
+                    show_date=item["show_date"],
+                    show_time=item["show_time"],
+                    **_totals(item),
+                )
+                for item in self.analytics_repo.list_totals(host_id, "SHOW")
+            ],
+            event_id=event_id,
+            show_id=show_id,
+        )
@@ -3,8 +3,10 @@ from app.models.artists import Artist
 from typing import Optional, List
 from app.custom_exceptions.generic import NotFoundException
 import uuid
+from app.utils.tracing import trace_methods
 
 
+@trace_methods("ArtistService")
 class ArtistService:
     def __init__(self, artist_repo: ArtistRepository):
         self.artist_repo = artist_repo
@@ -2,14 +2,31 @@ from app.repository.booking_repository import BookingRepository
 from app.repository.show_repository import ShowRepository
 from app.repository.event_repository import EventRepository
 from app.repository.venue_repository import VenueRepository
+from datetime import date, timedelta
 from uuid import uuid4
-from app.schemas.booking import BookingReq, BookingResponse
-from app.models.booking import Booking
-from typing import List
-from app.custom_exceptions.generic import BlockedResource
+from app.schemas.booking import (
+    BookingPage,
+    BookingReq,
+    BookingResponse,
+    CartCheckoutReq,
+    CartCheckoutResponse,
+)
+from app.models.booking import Booking, CartLine
+from app.models.events import Event
+from app.models.shows import Show, seat_section
+from app.models.venue import Venue
+from typing import List, Optional
+from app.custom_exceptions.generic import BlockedResource, NotFoundException
 from app.custom_exceptions.booking_exceptions import SeatAlreadyBookedException
+from app.utils.admission import AdmissionController
+from app.utils.booking_coalescer import BookingCoalescer
+from app.utils.cache import TTLCache
+from app.utils.cdn import CDNPurger
+from app.utils.seat_stream import SeatStreamHub
+from app.utils.tracing import trace_methods
 
 
+@trace_methods("BookingService")
 class BookingService:
     def __init__(
         self,
@@ -17,23 +34,34 @@ class BookingService:
         show_repo: ShowRepository,
         event_repo: EventRepository,
         venue_repo: VenueRepository,
+        version_cache: Optional[TTLCache] = None,
+        seat_stream: Optional[SeatStreamHub] = None,
+        admission: Optional[AdmissionController] = None,
+        coalescer: Optional[BookingCoalescer] = None,
+        cdn_purger: Optional[CDNPurger] = None,
     ):
+        self.admission = admission
+        self.cdn_purger = cdn_purger
+        # both take the same add_booking call
+        self.booking_writer = coalescer or booking_repo
+        self.version_cache = version_cache
+        self.seat_stream = seat_stream
         self.booking_repo = booking_repo
         self.event_repo = event_repo
         self.show_repo = show_repo
         self.venue_repo = venue_repo
 
-    def create_booking(self, req: BookingReq, user_id: str) -> BookingResponse:
+    def create_booking(
+        self, req: BookingReq, user_id: str, queue_token: Optional[str] = None
+    ) -> BookingResponse:
+        if self.admission:
+            # before any read, so queued attempts never reach the show item
+            self.admission.admit(req.show_id, user_id, queue_token)
 
-        show = self.show_repo.get_show_by_id(show_id=req.show_id)
-        if show.is_blocked:
-            raise BlockedResource(resource="show", identifier=show.id, status_code=403)
-        booked_seats = set(show.booked_seats)
-        requested_seats = set(req.seats)
-        if booked_seats.intersection(requested_seats):
-            raise SeatAlreadyBookedException(
-                f" {booked_seats.intersection(requested_seats)} seats already booked"
-            )
+        # sectioned shows are checked seat by seat in the transaction, so
+        # their sections are not read here
+        show = self.show_repo.get_show_by_id(show_id=req.show_id, include_seats=False)
+        self._check_show(show, req.seats)
         event = self.event_repo.get_by_id(event_id=show.event_id)
         if event.is_blocked:
             raise BlockedResource(
@@ -44,28 +72,128 @@ class BookingService:
             raise BlockedResource(
                 resource="venue", identifier=venue.id, status_code=403
             )
-        booking_id = str(uuid4())
-        current_time = ""
-        total_price = len(req.seats) * show.price
-        booking = Booking(
-            booking_id=booking_id,
-            user_id=user_id,
-            show_id=req.show_id,
-            time_booked=current_time,
-            total_booking_price=total_price,
-            seats=req.seats,
-        )
-        self.booking_repo.add_booking(
+        booking = self._new_booking(show, user_id, req.seats)
+        self.booking_writer.add_booking(
             venue=venue, event=event, show=show, booking=booking
         )
-        booking_dto = BookingResponse(
+        self._booked(booking, show, event, venue)
+        return self._booking_response(booking, show, event, venue)
+
+    def checkout(
+        self, req: CartCheckoutReq, user_id: str, queue_token: Optional[str] = None
+    ) -> CartCheckoutResponse:
+        """Books seats on several shows at once: every booking is written or
+        none is."""
+        show_ids = [item.show_id for item in req.items]
+        if self.admission:
+            self.admission.admit_cart(show_ids, user_id, queue_token)
+
+        # one batched read per kind of item, however many shows the cart holds
+        shows = {
+            show.id: show
+            for show in self.show_repo.batch_get_shows_by_ids(show_ids=show_ids)
+        }
+        missing = [show_id for show_id in show_ids if show_id not in shows]
+        if missing:
+            raise NotFoundException("show", ", ".join(missing), status_code=404)
+        for item in req.items:
+            self._check_show(shows[item.show_id], item.seats)
+        events = {
+            event.id: event
+            for event in self.event_repo.batch_get_events(
+                event_ids=list({show.event_id for show in shows.values()})
+            )
+        }
+        venues = {
+            venue.id: venue
+            for venue in self.venue_repo.batch_get_venues(
+                venue_ids=list({show.venue_id for show in shows.values()})
+            )
+        }
+        lines: List[CartLine] = []
+        for item in req.items:
+            show = shows[item.show_id]
+            event = events.get(show.event_id)
+            if event is None:
+                raise NotFoundException("event", show.event_id, status_code=404)
+            if event.is_blocked:
+                raise BlockedResource(
+                    resource="event", identifier=event.id, status_code=403
+                )
+            venue = venues.get(show.venue_id)
+            if venue is None:
+                raise NotFoundException("venue", show.venue_id, status_code=404)
+            if venue.is_blocked:
+                raise BlockedResource(
+                    resource="venue", identifier=venue.id, status_code=403
+                )
+            lines.append(
+                CartLine(
+                    show=show,
+                    event=event,
+                    venue=venue,
+                    bookings=[self._new_booking(show, user_id, item.seats)],
+                )
+            )
+        self.booking_repo.add_cart(lines)
+        bookings = []
+        for line in lines:
+            self._booked(line.bookings[0], line.show, line.event, line.venue)
+            bookings.append(
+                self._booking_response(line.bookings[0], line.show, line.event, line.venue)
+            )
+        return CartCheckoutResponse(
+            bookings=bookings,
+            total_price=sum(booking.total_price for booking in bookings),
+        )
+
+    def _check_show(self, show: Show, seats: List[str]):
+        if show.is_blocked:
+            raise BlockedResource(resource="show", identifier=show.id, status_code=403)
+        if show.seat_sections:
+            sections = set(show.seat_sections)
+            unknown = [seat for seat in seats if seat_section(seat) not in sections]
+            if unknown:
+                raise ValueError(f"seats {unknown} are not in any section of this show")
+        booked_seats = set(show.booked_seats or [])
+        requested_seats = set(seats)
+        if booked_seats.intersection(requested_seats):
+            raise SeatAlreadyBookedException(
+                f" {booked_seats.intersection(requested_seats)} seats already booked"
+            )
+
+    @staticmethod
+    def _new_booking(show: Show, user_id: str, seats: List[str]) -> Booking:
+        return Booking(
+            booking_id=str(uuid4()),
             user_id=user_id,
+            show_id=show.id,
+            time_booked="",
+            total_booking_price=len(seats) * show.price,
+            seats=seats,
+        )
+
+    def _booked(self, booking: Booking, show: Show, event: Event, venue: Venue):
+        if self.version_cache:
+            self.version_cache.invalidate(f"show:{show.id}")
+        if self.seat_stream:
+            self.seat_stream.publish_booked(show.id, booking.seats)
+        if self.cdn_purger:
+            # both carry the show's booked seats and availability
+            self.cdn_purger.purge([f"show:{show.id}", f"event-shows:{show.event_id}"])
+
+    @staticmethod
+    def _booking_response(
+        booking: Booking, show: Show, event: Event, venue: Venue
+    ) -> BookingResponse:
+        return BookingResponse(
+            user_id=booking.user_id,
             booking_date=show.show_date,
-            booking_id=booking_id,
+            booking_id=booking.booking_id,
             show_id=show.id,
-            time_booked=current_time,
-            total_price=total_price,
-            seats=req.seats,
+            time_booked=booking.time_booked,
+            total_price=booking.total_booking_price,
+            seats=booking.seats,
             venue_city=venue.city,
             venue_name=venue.name,
             venue_state=venue.state,
@@ -73,8 +201,42 @@ class BookingService:
             event_duration=event.duration,
             event_id=event.id,
         )
-        return booking_dto
 
-    def get_user_bookings(self, user_id: str) -> List[BookingResponse]:
-        bookings = self.booking_repo.get_bookings(user_id=user_id)
-        return bookings
+    def get_user_bookings(
+        self,
+        user_id: str,
+        when: Optional[str] = None,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        order: Optional[str] = None,
+        limit: int = 50,
+        page: Optional[str] = None,
+    ) -> BookingPage:
+        """`when="upcoming"`, the default without dates, starts today and is
+        soonest first; `when="past"` ends yesterday and is latest first.
+        Dates narrow either one and `order` ("asc"/"desc") overrides it."""
+        if from_date and to_date and from_date > to_date:
+            raise ValueError("from_date must not be after to_date")
+        today = date.today()
+        if when is None and from_date is None and to_date is None:
+            when = "upcoming"
+        descending = False
+        if when == "upcoming":
+            from_date = max(from_date or today, today)
+        elif when == "past":
+            yesterday = today - timedelta(days=1)
+            to_date = min(to_date or yesterday, yesterday)
+            descending = True
+        if order:
+            descending = order == "desc"
+        if from_date and to_date and from_date > to_date:
+            return BookingPage(bookings=[])
+        bookings, next_page = self.booking_repo.query_bookings(
+            user_id=user_id,
+            from_date=from_date.isoformat() if from_date else None,
+            to_date=to_date.isoformat() if to_date else None,
+            descending=descending,
+            limit=limit,
+            page=page,
+        )
+        return BookingPage(bookings=bookings, next_page=next_page)
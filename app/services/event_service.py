@@ -6,12 +6,27 @@ import uuid
 from typing import List, Optional
 from app.schemas.event import UpdateEventRequest
 from app.models.users import Role
+from app.utils.cache import TTLCache, cached
+from app.utils.cdn import CDNPurger
+from app.utils.tracing import trace_methods
+from app.workers.event_fanout import EventFanoutWorker
 
 
+@trace_methods("EventService")
 class EventService:
-    def __init__(self, event_repo: EventRepository, artist_service: ArtistService):
+    def __init__(
+        self,
+        event_repo: EventRepository,
+        artist_service: ArtistService,
+        version_cache: Optional[TTLCache] = None,
+        cdn_purger: Optional[CDNPurger] = None,
+        fanout_worker: Optional[EventFanoutWorker] = None,
+    ):
         self.event_repo = event_repo
         self.artist_service = artist_service
+        self.version_cache = version_cache
+        self.cdn_purger = cdn_purger
+        self.fanout_worker = fanout_worker
 
     def create_event(
         self,
@@ -45,8 +60,25 @@ class EventService:
         if event.is_blocked:
             if user_role != Role.ADMIN.value:
                 raise NotFoundException("event", event_id, status_code=404)
+        if self.version_cache:
+            self.version_cache.set(f"event:{event_id}", (event.version, event.is_blocked))
         return event
 
+    def get_event_version(self, event_id: str, user_role: str) -> Optional[int]:
+        """None when the event is missing or hidden from `user_role`, like
+        get_event_by_id."""
+        state = cached(
+            self.version_cache,
+            f"event:{event_id}",
+            lambda: self.event_repo.get_version(event_id),
+        )
+        if state is None:
+            return None
+        version, is_blocked = state
+        if is_blocked and user_role != Role.ADMIN.value:
+            return None
+        return version
+
     def browse_events_by_city(
         self,
         city: Optional[str] = None,
@@ -84,3 +116,9 @@ class EventService:
         self.event_repo.update_event(
             event_id=event_id, is_blocked=update_req.is_blocked
         )
+        if self.version_cache:
+            self.version_cache.invalidate(f"event:{event_id}")
+        if self.cdn_purger:
+            self.cdn_purger.purge([f"event:{event_id}", "events"])
+        if self.fanout_worker:
+            self.fanout_worker.wake()
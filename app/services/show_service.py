@@ -1,24 +1,48 @@
 from app.repository.show_repository import ShowRepository
 from app.repository.venue_repository import VenueRepository
 from app.repository.event_repository import EventRepository
-from app.custom_exceptions.generic import NotFoundException
-from app.schemas.shows import ShowCreateReq, ShowUpdateReq, ShowResponse, VenuDTO
+from app.custom_exceptions.generic import BlockedResource, NotFoundException
+from app.schemas.shows import (
+    ScheduledShow,
+    ShowCreateReq,
+    ShowScheduleReq,
+    ShowScheduleResponse,
+    ShowUpdateReq,
+    ShowResponse,
+    SeatAvailability,
+    VenuDTO,
+)
 from app.models.shows import Show
 from uuid import uuid4
-from typing import Optional
+from typing import List, Optional, Tuple
 from app.models.users import Role
+from app.utils.cache import TTLCache, cached
+from app.utils.cdn import CDNPurger
+from app.utils.tracing import trace_methods
+from app import config
 
 
+def availability(show: Show) -> Optional[SeatAvailability]:
+    if not show.capacity:
+        return None
+    return SeatAvailability.of(show.capacity, show.seats_booked, show.seats_held)
+
+
+@trace_methods("ShowService")
 class ShowService:
     def __init__(
         self,
         show_repo: ShowRepository,
         venue_repo: VenueRepository,
         event_repo: EventRepository,
+        version_cache: Optional[TTLCache] = None,
+        cdn_purger: Optional[CDNPurger] = None,
     ):
         self.show_repo = show_repo
         self.venue_repo = venue_repo
         self.event_repo = event_repo
+        self.version_cache = version_cache
+        self.cdn_purger = cdn_purger
 
     def create_show(self, show_dto: ShowCreateReq):
         show_id = uuid4()
@@ -31,6 +55,8 @@ class ShowService:
             show_date=show_dto.show_date,
             show_time=show_dto.show_time,
             booked_seats=[],
+            capacity=show_dto.capacity,
+            seat_sections=show_dto.seat_sections,
         )
         venue = self.venue_repo.get_venue_by_id(venue_id=show_dto.venue_id)
         if not venue:
@@ -41,7 +67,98 @@ class ShowService:
 
         self.show_repo.create_show(show=show, venue=venue, event=event)
 
-    def get_show_by_id(self, show_id: str):
+    def schedule_shows(self, req: ShowScheduleReq, host_id: str) -> ShowScheduleResponse:
+        event = self.event_repo.get_by_id(req.event_id)
+        if not event:
+            raise NotFoundException(
+                resource="event", identifier=req.event_id, status_code=404
+            )
+        if event.is_blocked:
+            raise BlockedResource(
+                resource="event", identifier=event.id, status_code=403
+            )
+        venue_ids = list(dict.fromkeys(req.venue_ids))
+        venues = {
+            venue.id: venue
+            for venue in self.venue_repo.batch_get_venues(venue_ids=venue_ids)
+        }
+
+        failed = []
+        shows = []
+        dates = req.dates()
+        for venue_id in venue_ids:
+            venue = venues.get(venue_id)
+            reason = None
+            if venue is None:
+                reason = "venue not found"
+            elif venue.host_id != host_id:
+                reason = "venue belongs to another host"
+            elif venue.is_blocked:
+                reason = "venue is blocked"
+            for show_date in dates:
+                for show_time in req.show_times:
+                    if reason:
+                        failed.append(
+                            ScheduledShow(
+                                venue_id=venue_id,
+                                show_date=show_date,
+                                show_time=show_time,
+                                reason=reason,
+                            )
+                        )
+                        continue
+                    shows.append(
+                        Show(
+                            id=str(uuid4()),
+                            venue_id=venue_id,
+                            event_id=event.id,
+                            is_blocked=False,
+                            price=req.price,
+                            show_date=show_date,
+                            show_time=show_time,
+                            booked_seats=[],
+                            capacity=req.capacity,
+                        )
+                    )
+
+        write_failures = []
+        if shows:
+            write_failures = self.show_repo.create_shows(
+                shows=shows,
+                venues=venues,
+                event=event,
+                max_workers=config.SHOW_SCHEDULE_WRITE_CONCURRENCY,
+            )
+        failed_ids = {show.id for show, _ in write_failures}
+        failed.extend(
+            ScheduledShow(
+                venue_id=show.venue_id,
+                show_date=show.show_date,
+                show_time=show.show_time,
+                reason=reason,
+            )
+            for show, reason in write_failures
+        )
+        created = [
+            ScheduledShow(
+                id=show.id,
+                venue_id=show.venue_id,
+                show_date=show.show_date,
+                show_time=show.show_time,
+            )
+            for show in shows
+            if show.id not in failed_ids
+        ]
+        if created and self.cdn_purger:
+            cities = {venues[show.venue_id].city for show in created}
+            self.cdn_purger.purge(
+                [f"event-shows:{event.id}", *(f"city:{city}" for city in sorted(cities))]
+            )
+        return ShowScheduleResponse(created=created, failed=failed)
+
+    def get_show_by_id(self, show_id: str) -> Tuple[ShowResponse, str]:
+        """The show with the version of what it was built from, the show's
+        and its venue's, for its ETag."""
         show = self.show_repo.get_show_by_id(show_id)
         if not show:
             raise NotFoundException(
@@ -56,10 +173,15 @@ class ShowService:
             raise NotFoundException(
                 resource="show", identifier=show_id, status_code=404
             )
+        if self.version_cache:
+            self.version_cache.set(
+                f"show:{show_id}", (show.version, show.venue_id, show.is_blocked)
+            )
+            self.version_cache.set(f"venue:{venue.id}", (venue.version, venue.is_blocked))
         venue_dto = VenuDTO(
             venue_id=venue.id, venue_name=venue.name, city=venue.city, state=venue.state
         )
-        return ShowResponse(
+        show_response = ShowResponse(
             id=show.id,
             event_id=show.event_id,
             price=show.price,
@@ -69,7 +191,36 @@ class ShowService:
             venue=venue_dto,
             is_blocked=show.is_blocked,
             host_id=venue.host_id,
+            availability=availability(show),
         )
+        return show_response, f"{show.version}.{venue.version}"
+
+    def get_booked_seats(self, show_id: str) -> Optional[List[str]]:
+        """None for shows a customer can't see."""
+        show = self.show_repo.get_show_by_id(show_id)
+        if not show or show.is_blocked:
+            return None
+        return show.booked_seats
+
+    def get_show_version(self, show_id: str) -> Optional[str]:
+        """None when the show is missing or hidden, like get_show_by_id."""
+        # the show response embeds venue data, so both versions make up its tag
+        show_state = cached(
+            self.version_cache,
+            f"show:{show_id}",
+            lambda: self.show_repo.get_version(show_id),
+        )
+        if show_state is None:
+            return None
+        show_version, venue_id, show_blocked = show_state
+        venue_state = cached(
+            self.version_cache,
+            f"venue:{venue_id}",
+            lambda: self.venue_repo.get_version(venue_id),
+        )
+        if show_blocked or venue_state is None or venue_state[1]:
+            return None
+        return f"{show_version}.{venue_state[0]}"
 
     def update_show(self, show_id: str, req: ShowUpdateReq):
         show = self.show_repo.get_show_by_id(show_id)
@@ -82,9 +233,14 @@ class ShowService:
             raise NotFoundException(
                 resource="venue", identifier=show_id, status_code=404
             )
-        return self.show_repo.update_show(
+        result = self.show_repo.update_show(
             show_id=show_id, is_blocked=req.is_blocked, venue=venue, show=show
         )
+        if self.version_cache:
+            self.version_cache.invalidate(f"show:{show_id}")
+        if self.cdn_purger:
+            self.cdn_purger.purge([f"show:{show_id}", f"event-shows:{show.event_id}"])
+        return result
 
     def get_event_shows(self, event_id: str, city: str, user, date: Optional[str]=None):
         city=city.lower()
@@ -104,23 +260,24 @@ class ShowService:
         if not venue_ids:
             return []
         venues=self.venue_repo.batch_get_venues(venue_ids=venue_ids)
-        #batchget venues for shows
+        venues_by_id = {venue.id: venue for venue in venues}
+        # shows and venues are already typed by the repository, so the
+        # response models are built without re-running validation
         show_dtos=[]
         for show in shows:
-            venue_dto=None
-            for venue in venues:
-                if venue.is_blocked:
-                    continue
-                if venue.id==show.venue_id:
-                    venue_dto= VenuDTO(
-                        venue_id=venue.id,
-                        venue_name=venue.name,
-                        city=venue.city,
-                        state=venue.state,
-                    )
-                    break
-                
-            show_dto=ShowResponse(
+            venue = venues_by_id.get(show.venue_id)
+            venue_dto = None
+            if venue and not venue.is_blocked:
+                venue_dto = VenuDTO.model_construct(
+                    venue_id=venue.id,
+                    venue_name=venue.name,
+                    city=venue.city,
+                    state=venue.state,
+                )
+            elif user["role"]==Role.CUSTOMER.value:
+                # like get_show_by_id, a hidden venue hides its shows
+                continue
+            show_dto=ShowResponse.model_construct(
                 id=show.id,
                 event_id=show.event_id,
                 price=show.price,
@@ -129,10 +286,11 @@ class ShowService:
                 booked_seats=show.booked_seats,
                 venue=venue_dto,
                 is_blocked=show.is_blocked,
-                host_id=venue.host_id,               
+                host_id=venue.host_id if venue else None,
+                availability=availability(show),
             )
             if user["role"]==Role.HOST.value:
-                if venue.host_id!=user["user_id"]:
+                if show_dto.host_id!=user["user_id"]:
                     continue
             show_dtos.append(show_dto)
         return show_dtos
@@ -11,14 +11,22 @@ import bcrypt
 import re
 import uuid
 from app.utils.jwt_service import create_jwt
+from app.utils.rate_limiter import LoginThrottler
 from app.schemas.users import UserProfile
+from app.utils.tracing import trace_methods
 
 PASSWORD_REGEX = re.compile(r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[^A-Za-z0-9]).{12,}$")
 
 
+@trace_methods("UserService")
 class UserService:
-    def __init__(self, user_repo: UserRepository):
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        login_throttler: Optional[LoginThrottler] = None,
+    ):
         self.user_repo = user_repo
+        self.login_throttler = login_throttler
 
     def get_user_by_id(self, user_id: str):
         user = self.user_repo.get_by_id(user_id=user_id)
@@ -38,7 +46,9 @@ class UserService:
             raise NotFoundException(resource="user", identifier=mail, status_code=404)
         return user
 
-    def login(self, email: str, password: str) -> str:
+    def login(self, email: str, password: str, client_ip: Optional[str] = None) -> str:
+        if self.login_throttler:
+            self.login_throttler.check(email=email, client_ip=client_ip)
         user = self.get_user_by_mail(email)
         if user.is_blocked:
             raise UserBlocked("user has been blocked, contact admin")
@@ -49,6 +59,8 @@ class UserService:
         ):
             raise IncorrectCredentials("Invalid email or password")
 
+        if self.login_throttler:
+            self.login_throttler.reset(email)
         return create_jwt(user.user_id, email, user.role.value)
 
     def signup(self, email: str, username: str, password: str, phone: str) -> str:
@@ -4,11 +4,22 @@ from app.schemas.venues import VenueCreateReq
 from app.custom_exceptions.generic import NotFoundException
 from uuid import uuid4
 from typing import List,Optional
+from app.utils.cache import TTLCache, cached
+from app.utils.cdn import CDNPurger
+from app.utils.tracing import trace_methods
 
 
+@trace_methods("VenuService")
 class VenuService:
-    def __init__(self, venue_repo: VenueRepository):
+    def __init__(
+        self,
+        venue_repo: VenueRepository,
+        version_cache: Optional[TTLCache] = None,
+        cdn_purger: Optional[CDNPurger] = None,
+    ):
         self.venue_repo = venue_repo
+        self.version_cache = version_cache
+        self.cdn_purger = cdn_purger
 
     def add_venue(self, venue: VenueCreateReq, host_id: str) -> Venue:
         city=venue.city.lower()
@@ -32,8 +43,20 @@ class VenuService:
             raise NotFoundException(
                 resource="venue", identifier=venue_id, status_code=404
             )
+        if self.version_cache:
+            self.version_cache.set(f"venue:{venue_id}", (venue.version, venue.is_blocked))
         return venue
 
+    def get_venue_version(self, venue_id: str) -> Optional[int]:
+        """None when the venue is missing. Blocked venues stay readable, as
+        in get_venue_by_id."""
+        state = cached(
+            self.version_cache,
+            f"venue:{venue_id}",
+            lambda: self.venue_repo.get_version(venue_id),
+        )
+        return state[0] if state else None
+
     def get_host_venues(self, host_id: str,is_blocked:Optional[bool]=None) -> List[Venue]:
         venues = self.venue_repo.get_host_venues(host_id=host_id)
         if is_blocked==True:
@@ -44,7 +67,15 @@ class VenuService:
 
     def update_venue(self, venue_id: str, host_id: str, is_blocked: bool):
         self.venue_repo.update_venue(venue_id, host_id, is_blocked)
+        self._venue_changed(venue_id)
 
     def delete_venue(self, venue_id: str, host_id: str):
         self.venue_repo.delete_venue(venue_id, host_id)
+        self._venue_changed(venue_id)
+
+    def _venue_changed(self, venue_id: str):
+        if self.version_cache:
+            self.version_cache.invalidate(f"venue:{venue_id}")
+        if self.cdn_purger:
+            self.cdn_purger.purge([f"venue:{venue_id}"])
     
@@ -0,0 +1,278 @@
+"""Waiting room in front of `POST /bookings`.
+
+Bookings for one show all write the same `SHOW#..` item, so past a point
+extra concurrency only turns into transaction conflicts and throttling.
+Every booking attempt reserves a slot on its show's timeline, spaced
+`1 / rate` apart (GCRA); the first `burst` slots are free, later ones are
+handed a signed queue token that becomes valid when the slot comes up and
+admits exactly once.
+"""
+
+import math
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Protocol
+
+from botocore.exceptions import ClientError
+from jose import JWTError, jwt
+from prometheus_client import Counter
+from types_boto3_dynamodb.service_resource import Table
+
+from app.custom_exceptions.booking_exceptions import QueuedForAdmission
+from app.custom_exceptions.generic import TooManyRequests
+from app.utils.jwt_service import ALGORITHM, SECRET_KEY
+from app.utils.metrics import REGISTRY
+
+ADMISSION_DECISIONS = Counter(
+    "booking_admission_decisions_total",
+    "Booking attempts by waiting room outcome.",
+    ["outcome"],
+    registry=REGISTRY,
+)
+
+
+class AdmissionBackend(Protocol):
+    def reserve(
+        self, key: str, interval: float, burst: int, max_wait: float
+    ) -> Optional[float]:
+        """Takes the next slot for `key`.
+
+        Returns the seconds until that slot, 0 for an immediate one, or None
+        without taking a slot when it would be more than `max_wait` away.
+        """
+        ...
+
+    def consume(self, key: str, expires_at: float) -> bool:
+        """Marks `key` used until `expires_at`; False if it already was."""
+        ...
+
+
+class InMemoryAdmissionBackend:
+    """Slot timeline per key, local to the process: each instance admits
+    `rate` bookings per show on its own."""
+
+    def __init__(self, clock: Callable[[], float] = time.time, max_keys: int = 100_000):
+        self._clock = clock
+        self._max_keys = max_keys
+        # key -> time the next slot after the burst allowance starts
+        self._next_slot: Dict[str, float] = {}
+        # used token key -> when it expires anyway
+        self._used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(
+        self, key: str, interval: float, burst: int, max_wait: float
+    ) -> Optional[float]:
+        now = self._clock()
+        with self._lock:
+            next_slot = max(self._next_slot.get(key, now), now)
+            wait = max(0.0, next_slot - now - (burst - 1) * interval)
+            if wait > max_wait:
+                return None
+            self._next_slot[key] = next_slot + interval
+            if len(self._next_slot) > self._max_keys:
+                # a timeline that has caught up with now is the same as none
+                for stale in [k for k, slot in self._next_slot.items() if slot <= now]:
+                    del self._next_slot[stale]
+        return wait
+
+    def consume(self, key: str, expires_at: float) -> bool:
+        now = self._clock()
+        with self._lock:
+            if self._used.get(key, now) > now:
+                return False
+            self._used[key] = expires_at
+            if len(self._used) > self._max_keys:
+                for stale in [k for k, expiry in self._used.items() if expiry <= now]:
+                    del self._used[stale]
+        return True
+
+
+class DynamoDBAdmissionBackend:
+    """Slot timeline per key shared by every instance through the table.
+
+    The timeline lives on its own `ADMISSION#..` item, so queueing never
+    touches the show's partition. A busy queue advances with one
+    conditional `ADD`; an idle one is restarted from now.
+    """
+
+    def __init__(self, table: Table, clock: Callable[[], float] = time.time):
+        self.table = table
+        self._clock = clock
+
+    def reserve(
+        self, key: str, interval: float, burst: int, max_wait: float
+    ) -> Optional[float]:
+        now = int(self._clock() * 1000)
+        interval_ms = max(1, int(interval * 1000))
+        slack = (burst - 1) * interval_ms
+        limit = now + slack + int(max_wait * 1000)
+        item_key = {"pk": f"ADMISSION#{key}", "sk": "QUEUE"}
+        names = {"#next": "next_slot", "#expires_at": "expires_at"}
+        expires_at = limit // 1000 + 3600
+        for _ in range(3):
+            try:
+                resp = self.table.update_item(
+                    Key=item_key,
+                    UpdateExpression="ADD #next :interval SET #expires_at = :expires_at",
+                    ConditionExpression="#next BETWEEN :now AND :limit",
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues={
+                        ":interval": interval_ms,
+                        ":now": now,
+                        ":limit": limit,
+                        ":expires_at": expires_at,
+                    },
+                    ReturnValues="UPDATED_NEW",
+                )
+                next_slot = int(resp["Attributes"]["next_slot"]) - interval_ms
+                return max(0, next_slot - now - slack) / 1000
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+            try:
+                self.table.update_item(
+                    Key=item_key,
+                    UpdateExpression="SET #next = :next, #expires_at = :expires_at",
+                    ConditionExpression="attribute_not_exists(#next) OR #next < :now",
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues={
+                        ":next": now + interval_ms,
+                        ":now": now,
+                        ":expires_at": expires_at,
+                    },
+                )
+                return 0.0
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+            # neither idle nor within the limit: either the queue is full or
+            # another instance restarted it between the two writes
+        return None
+
+    def consume(self, key: str, expires_at: float) -> bool:
+        try:
+            self.table.put_item(
+                Item={
+                    "pk": f"ADMISSION#{key}",
+                    "sk": "USED",
+                    # TTL sweeps it once the token has expired anyway
+                    "expires_at": math.ceil(expires_at),
+                },
+                ConditionExpression="attribute_not_exists(pk)",
+            )
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+
+class AdmissionController:
+    """Admits booking attempts per show at `rate_per_second`, queueing the
+    excess for up to `max_wait_seconds` and turning away the rest."""
+
+    def __init__(
+        self,
+        backend: AdmissionBackend,
+        rate_per_second: float,
+        burst: int,
+        max_wait_seconds: float,
+        token_grace_seconds: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self.max_wait_seconds = max_wait_seconds
+        self.token_grace_seconds = token_grace_seconds
+        self._clock = clock
+
+    def admit(self, show_id: str, user_id: str, queue_token: Optional[str] = None):
+        self.admit_cart([show_id], user_id, queue_token)
+
+    def admit_cart(
+        self, show_ids: List[str], user_id: str, queue_token: Optional[str] = None
+    ):
+        """Admits an attempt that books every show in `show_ids` at once.
+
+        It takes a slot on each show's timeline and waits for the latest of
+        them, so one token holds its place in all the queues.
+        """
+        now = self._clock()
+        cart = ",".join(sorted(set(show_ids)))
+        claims = self._decode(queue_token, now) if queue_token else None
+        if claims and claims.get("show_id") == cart and claims.get("user_id") == user_id:
+            wait = claims["admit_at"] - now
+            if wait > 0:
+                # still waiting: same token, same place in the queue
+                self._queued(queue_token, wait)
+            if self.backend.consume(f"TOKEN#{claims['jti']}", claims["exp"]):
+                ADMISSION_DECISIONS.labels(outcome="admitted").inc()
+                return
+            # a token replayed after it admitted joins the back again, like
+            # one left unused past its grace period (which _decode drops)
+        wait = 0.0
+        for show_id in cart.split(","):
+            slot = self.backend.reserve(
+                f"SHOW#{show_id}",
+                1 / self.rate_per_second,
+                self.burst,
+                self.max_wait_seconds,
+            )
+            if slot is None:
+                # slots already taken on the other shows just go unused
+                ADMISSION_DECISIONS.labels(outcome="rejected").inc()
+                raise TooManyRequests(
+                    "too many people are booking this show, try again later",
+                    retry_after=math.ceil(self.max_wait_seconds),
+                )
+            wait = max(wait, slot)
+        if wait == 0:
+            ADMISSION_DECISIONS.labels(outcome="admitted").inc()
+            return
+        admit_at = now + wait
+        token = jwt.encode(
+            {
+                "typ": "queue",
+                "jti": uuid.uuid4().hex,
+                "show_id": cart,
+                "user_id": user_id,
+                "admit_at": admit_at,
+                # both are checked with the controller's clock
+                "exp": admit_at + self.token_grace_seconds,
+            },
+            SECRET_KEY,
+            algorithm=ALGORITHM,
+        )
+        self._queued(token, wait)
+
+    def _queued(self, token: str, wait: float):
+        ADMISSION_DECISIONS.labels(outcome="queued").inc()
+        raise QueuedForAdmission(
+            "you are in the queue for this show, retry with the queue token",
+            retry_after=math.ceil(wait),
+            queue_token=token,
+            position=math.ceil(wait * self.rate_per_second),
+        )
+
+    @staticmethod
+    def _decode(token: str, now: float) -> Optional[dict]:
+        """The claims of a queue token that has not expired, else None: the
+        caller then joins the back of the queue."""
+        try:
+            claims = jwt.decode(
+                token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False}
+            )
+        except JWTError:
+            return None
+        # any other token signed with the same key, e.g. an access token
+        if claims.get("typ") != "queue" or not isinstance(claims.get("jti"), str):
+            return None
+        admit_at, expires_at = claims.get("admit_at"), claims.get("exp")
+        if not isinstance(admit_at, (int, float)) or not isinstance(expires_at, (int, float)):
+            return None
+        if expires_at < now:
+            return None
+        return claims
@@ -0,0 +1,157 @@
+"""Batches concurrent bookings for the same show into shared transactions.
+
+Every booking for a show updates its `SHOW#..#DETAILS` item, so concurrent
+bookings conflict with each other. The first booking for a show opens a
+batch and becomes its leader. It waits `window_seconds` for others to join,
+and longer if the show's previous batch is still committing. It then turns
+away bookings whose seats clash with earlier ones in the batch and writes
+the rest in one transaction.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from prometheus_client import Histogram
+
+from app.custom_exceptions.booking_exceptions import SeatAlreadyBookedException
+from app.models.booking import Booking
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.venue import Venue
+from app.repository.booking_repository import (
+    MAX_SEATS_PER_TRANSACTION,
+    MAX_TRANSACT_ITEMS,
+    BookingRepository,
+)
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+BOOKING_BATCH_SIZE = Histogram(
+    "booking_batch_size",
+    "Bookings written per coalesced transaction.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 97),
+    registry=REGISTRY,
+)
+
+
+@dataclass
+class _Entry:
+    booking: Booking
+    future: Future = field(default_factory=Future)
+
+
+@dataclass
+class _Batch:
+    show: Show
+    event: Event
+    venue: Venue
+    previous: Optional["_Batch"]
+    entries: List[_Entry] = field(default_factory=list)
+    seats: int = 0
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def fits(self, booking: Booking) -> bool:
+        bookings = [entry.booking for entry in self.entries] + [booking]
+        return (
+            BookingRepository.items_needed(self.show, bookings) <= MAX_TRANSACT_ITEMS
+            and self.seats + len(booking.seats) <= MAX_SEATS_PER_TRANSACTION
+        )
+
+
+class BookingCoalescer:
+    def __init__(self, booking_repo: BookingRepository, window_seconds: float = 0.005):
+        self.booking_repo = booking_repo
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        # show id -> batch still accepting bookings
+        self._open: Dict[str, _Batch] = {}
+        # show id -> newest batch, so the next one commits after it
+        self._last: Dict[str, _Batch] = {}
+
+    def add_booking(self, booking: Booking, show: Show, event: Event, venue: Venue):
+        """Same contract as `BookingRepository.add_booking`: returns once the
+        booking is written, raises if it is not."""
+        if len(booking.seats) > MAX_SEATS_PER_TRANSACTION:
+            return self.booking_repo.add_booking(booking, show, event, venue)
+        entry = _Entry(booking)
+        with self._lock:
+            batch = self._open.get(show.id)
+            leader = batch is None or not batch.fits(booking)
+            if leader:
+                batch = _Batch(show, event, venue, previous=self._last.get(show.id))
+                self._open[show.id] = batch
+                self._last[show.id] = batch
+            batch.entries.append(entry)
+            batch.seats += len(booking.seats)
+        if leader:
+            self._lead(batch)
+        return entry.future.result()
+
+    def _lead(self, batch: _Batch):
+        show_id = batch.show.id
+        time.sleep(self.window_seconds)
+        if batch.previous is not None:
+            # bookings keep joining while the previous batch commits
+            batch.previous.done.wait()
+        with self._lock:
+            if self._open.get(show_id) is batch:
+                del self._open[show_id]
+        try:
+            self._commit(batch)
+        finally:
+            batch.done.set()
+            with self._lock:
+                if self._last.get(show_id) is batch:
+                    del self._last[show_id]
+
+    def _commit(self, batch: _Batch):
+        taken = set(batch.show.booked_seats or [])
+        accepted: List[_Entry] = []
+        for entry in batch.entries:
+            clash = taken.intersection(entry.booking.seats)
+            if clash:
+                entry.future.set_exception(
+                    SeatAlreadyBookedException(f" {clash} seats already booked")
+                )
+                continue
+            taken.update(entry.booking.seats)
+            accepted.append(entry)
+        if not accepted:
+            return
+        BOOKING_BATCH_SIZE.observe(len(accepted))
+        try:
+            self.booking_repo.add_bookings(
+                [entry.booking for entry in accepted],
+                show=batch.show,
+                event=batch.event,
+                venue=batch.venue,
+            )
+        except Exception as err:
+            if len(accepted) == 1:
+                accepted[0].future.set_exception(err)
+                return
+            # one stale seat or a capacity limit sinks the whole transaction;
+            # find out which bookings can still go through on their own
+            logger.info(
+                "batch of %d bookings for show %s failed (%s), writing them one by one",
+                len(accepted),
+                batch.show.id,
+                err,
+            )
+            for entry in accepted:
+                try:
+                    self.booking_repo.add_booking(
+                        entry.booking, batch.show, batch.event, batch.venue
+                    )
+                except Exception as single_err:
+                    entry.future.set_exception(single_err)
+                else:
+                    entry.future.set_result(None)
+            return
+        for entry in accepted:
+            entry.future.set_result(None)
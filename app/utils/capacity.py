@@ -0,0 +1,133 @@
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from prometheus_client import Counter
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import REGISTRY, UNMATCHED_ROUTE
+
+logger = logging.getLogger(__name__)
+
+READ_OPERATIONS = {"GetItem", "Query", "Scan", "BatchGetItem", "TransactGetItems"}
+WRITE_OPERATIONS = {
+    "PutItem",
+    "UpdateItem",
+    "DeleteItem",
+    "BatchWriteItem",
+    "TransactWriteItems",
+}
+
+CONSUMED_CAPACITY = Counter(
+    "dynamodb_consumed_capacity_units_total",
+    "DynamoDB capacity units consumed while serving a route.",
+    ["route", "kind"],
+    registry=REGISTRY,
+)
+
+
+@dataclass
+class CapacityAccumulator:
+    read_units: float = 0.0
+    write_units: float = 0.0
+    calls: int = 0
+    by_operation: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, operation: str, consumed) -> None:
+        # batch and transaction calls report one entry per table
+        entries = consumed if isinstance(consumed, list) else [consumed]
+        units = 0.0
+        for entry in entries:
+            read = entry.get("ReadCapacityUnits")
+            write = entry.get("WriteCapacityUnits")
+            total = float(entry.get("CapacityUnits", 0))
+            if read is None and write is None:
+                if operation in READ_OPERATIONS:
+                    read = total
+                else:
+                    write = total
+            self.read_units += float(read or 0)
+            self.write_units += float(write or 0)
+            units += total
+        self.calls += 1
+        self.by_operation[operation] = self.by_operation.get(operation, 0.0) + units
+
+    def header_value(self) -> str:
+        return f"read={self.read_units:g}, write={self.write_units:g}, calls={self.calls}"
+
+
+_current: ContextVar[Optional[CapacityAccumulator]] = ContextVar(
+    "consumed_capacity", default=None
+)
+
+
+def current_capacity() -> Optional[CapacityAccumulator]:
+    return _current.get()
+
+
+def _request_capacity(params: dict, **kwargs):
+    params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _record_capacity(parsed: dict, model, **kwargs):
+    accumulator = _current.get()
+    consumed = parsed.get("ConsumedCapacity") if isinstance(parsed, dict) else None
+    if accumulator is not None and consumed:
+        accumulator.add(model.name, consumed)
+
+
+def register_capacity_hooks(client, enabled: bool = True):
+    """Makes every DynamoDB call on `client` report consumed capacity into the
+    accumulator of the request that issued it."""
+    if not enabled:
+        return
+    for operation in READ_OPERATIONS | WRITE_OPERATIONS:
+        client.meta.events.register(
+            f"provide-client-params.dynamodb.{operation}", _request_capacity
+        )
+        client.meta.events.register(
+            f"after-call.dynamodb.{operation}", _record_capacity
+        )
+
+
+class ConsumedCapacityMiddleware:
+    header_name = b"x-dynamodb-consumed-capacity"
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accumulator = CapacityAccumulator()
+        token = _current.set(accumulator)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start" and accumulator.calls:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (self.header_name, accumulator.header_value().encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if accumulator.calls:
+                route = scope.get("route_template", UNMATCHED_ROUTE)
+                CONSUMED_CAPACITY.labels(route, "read").inc(accumulator.read_units)
+                CONSUMED_CAPACITY.labels(route, "write").inc(accumulator.write_units)
+                logger.info(
+                    "dynamodb capacity method=%s route=%s read_units=%g "
+                    "write_units=%g calls=%d operations=%s",
+                    scope["method"],
+                    route,
+                    accumulator.read_units,
+                    accumulator.write_units,
+                    accumulator.calls,
+                    accumulator.by_operation,
+                )
@@ -0,0 +1,90 @@
+import json
+import logging
+import threading
+import urllib.request
+from typing import Dict, List, Optional, Protocol, Set
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+
+class CDNPurger(Protocol):
+    def purge(self, surrogate_keys: List[str]) -> None: ...
+
+
+class NoopPurger:
+    def purge(self, surrogate_keys: List[str]) -> None:
+        logger.debug("cdn purge skipped, no purge url configured: %s", surrogate_keys)
+
+
+class WebhookPurger:
+    """Posts surrogate keys to the CDN's purge API from a background thread,
+    so updates never wait on the CDN. Keys purged within `batch_seconds` of
+    each other are sent together, once each."""
+
+    def __init__(
+        self, url: str, token: str = "", timeout: float = 5.0, batch_seconds: float = 1.0
+    ):
+        self.url = url
+        self.token = token
+        self.timeout = timeout
+        self.batch_seconds = batch_seconds
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._scheduled = False
+
+    def purge(self, surrogate_keys: List[str]) -> None:
+        with self._lock:
+            self._pending.update(surrogate_keys)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        timer = threading.Timer(self.batch_seconds, self._flush)
+        timer.daemon = True
+        timer.start()
+
+    def _flush(self):
+        with self._lock:
+            surrogate_keys = sorted(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+        self._send(surrogate_keys)
+
+    def _send(self, surrogate_keys: List[str]):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps({"surrogate_keys": surrogate_keys}).encode(),
+            headers=headers,
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout):
+                pass
+        except Exception as err:
+            logger.error("cdn purge failed for %s: %s", surrogate_keys, err)
+
+
+def catalog_cache_headers(user: dict, surrogate_keys: List[str]) -> Dict[str, str]:
+    # anonymous responses are identical for everyone and may sit in the CDN;
+    # anything tied to a token must only be revalidated by the browser. The
+    # same URL serves both, so caches must key on the Authorization header
+    if user.get("anonymous"):
+        return {
+            "Cache-Control": (
+                f"public, max-age={config.CATALOG_BROWSER_MAX_AGE}, "
+                f"s-maxage={config.CATALOG_CDN_MAX_AGE}"
+            ),
+            "Surrogate-Key": " ".join(surrogate_keys),
+            "Vary": "Authorization",
+        }
+    return {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+def build_purger(url: Optional[str] = None, token: str = "", batch_seconds: float = 1.0) -> CDNPurger:
+    if url:
+        return WebhookPurger(url=url, token=token, batch_seconds=batch_seconds)
+    return NoopPurger()
@@ -0,0 +1,297 @@
+"""Cross-instance cache invalidation from the table's change stream.
+
+Every instance reads every change and drops the matching entries from its own
+caches, so a write on one instance is seen by the others within the stream
+lag instead of the cache TTL.
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Protocol
+
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from prometheus_client import Counter, Gauge
+
+from app.utils.cache import TTLCache
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CHANGE_RECORDS = Counter(
+    "change_stream_records_total",
+    "Item changes read from the change stream, by event name.",
+    ["event"],
+    registry=REGISTRY,
+)
+CHANGE_STREAM_LAG = Gauge(
+    "change_stream_lag_seconds",
+    "Age of the newest change when this instance applied it.",
+    registry=REGISTRY,
+)
+CACHE_INVALIDATIONS = Counter(
+    "cache_invalidations_total",
+    "Cache keys invalidated from the change stream, by kind.",
+    ["kind"],
+    registry=REGISTRY,
+)
+
+
+@dataclass
+class ChangeRecord:
+    event_name: str
+    keys: dict
+    old_image: Optional[dict]
+    new_image: Optional[dict]
+    created_at: float
+
+
+# pk prefix of a canonical item -> cache key prefix
+_ENTITY_PREFIXES = {
+    "VENUE#": "venue",
+    "EVENT#": "event",
+    "SHOW#": "show",
+    "USER#": "user",
+}
+_INDEX_PREFIXES = ("CITY#", "HOST#")
+
+
+def invalidation_keys(record: ChangeRecord) -> List[Hashable]:
+    pk, sk = record.keys.get("pk", ""), record.keys.get("sk", "")
+    if pk.startswith(_INDEX_PREFIXES):
+        # the show index cache only ever remembers rows that exist
+        return [(pk, sk)] if record.event_name == "REMOVE" else []
+    if sk != "DETAILS":
+        return []
+    for prefix, kind in _ENTITY_PREFIXES.items():
+        # EVENT#<id>#CITY#.. rows are show projections, not the event
+        if pk.startswith(prefix) and "#" not in pk[len(prefix):]:
+            return [f"{kind}:{pk[len(prefix):]}"]
+    return []
+
+
+class InvalidationBus:
+    """Fans invalidated keys out to every registered in-process cache."""
+
+    def __init__(self):
+        self._listeners: List[Callable[[Hashable], None]] = []
+
+    def register_cache(self, cache: Optional[TTLCache]):
+        if cache is not None:
+            self._listeners.append(cache.invalidate)
+
+    def subscribe(self, listener: Callable[[Hashable], None]):
+        self._listeners.append(listener)
+
+    def publish(self, key: Hashable):
+        kind = key.split(":", 1)[0] if isinstance(key, str) else "index"
+        CACHE_INVALIDATIONS.labels(kind=kind).inc()
+        for listener in self._listeners:
+            listener(key)
+
+
+class ChangeSource(Protocol):
+    def read(self, timeout: float) -> List[ChangeRecord]: ...
+
+    def close(self) -> None: ...
+
+
+class MemoryStreamSource:
+    """Change records from a MemoryClient, in commit order."""
+
+    def __init__(self, client):
+        self._queue: "queue.Queue[ChangeRecord]" = queue.Queue()
+        client.subscribe(self._on_change)
+
+    def _on_change(self, table_name, event_name, old, new):
+        image = new if new is not None else old
+        self._queue.put(
+            ChangeRecord(
+                event_name=event_name,
+                keys={"pk": image["pk"], "sk": image["sk"]},
+                old_image=old,
+                new_image=new,
+                created_at=time.time(),
+            )
+        )
+
+    def read(self, timeout: float) -> List[ChangeRecord]:
+        try:
+            records = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                return records
+
+    def close(self):
+        pass
+
+
+class DynamoDBStreamSource:
+    """Reads every shard of a DynamoDB stream from LATEST.
+
+    The stream must be enabled with at least KEYS_ONLY. DynamoDB Streams
+    serves at most two readers per shard without throttling, so past a
+    handful of instances the stream should be relayed to a fan-out topic
+    and read from there instead.
+    """
+
+    def __init__(self, streams_client, stream_arn: str):
+        self.client = streams_client
+        self.stream_arn = stream_arn
+        self._deserializer = TypeDeserializer()
+        # shard id -> next iterator; None once a closed shard is drained
+        self._iterators: Dict[str, Optional[str]] = {}
+        # shard id -> sequence number of the last record read from it
+        self._positions: Dict[str, str] = {}
+        self._refresh_shards(initial=True)
+
+    def _refresh_shards(self, initial: bool = False):
+        kwargs = {"StreamArn": self.stream_arn}
+        while True:
+            description = self.client.describe_stream(**kwargs)["StreamDescription"]
+            for shard in description["Shards"]:
+                shard_id = shard["ShardId"]
+                if shard_id in self._iterators:
+                    continue
+                closed = "EndingSequenceNumber" in shard["SequenceNumberRange"]
+                if initial and closed:
+                    # history from before start-up is irrelevant to the caches
+                    self._iterators[shard_id] = None
+                    continue
+                self._iterators[shard_id] = self.client.get_shard_iterator(
+                    StreamArn=self.stream_arn,
+                    ShardId=shard_id,
+                    # shards that appear later are children of ones we read
+                    ShardIteratorType="LATEST" if initial else "TRIM_HORIZON",
+                )["ShardIterator"]
+            last = description.get("LastEvaluatedShardId")
+            if not last:
+                return
+            kwargs["ExclusiveStartShardId"] = last
+
+    def read(self, timeout: float) -> List[ChangeRecord]:
+        records: List[ChangeRecord] = []
+        shards_closed = False
+        for shard_id, iterator in list(self._iterators.items()):
+            if iterator is None:
+                continue
+            try:
+                resp = self.client.get_records(ShardIterator=iterator, Limit=1000)
+            except ClientError as err:
+                if err.response["Error"]["Code"] == "ExpiredIteratorException":
+                    self._iterators[shard_id] = self._resume(shard_id)
+                    continue
+                raise
+            self._iterators[shard_id] = resp.get("NextShardIterator")
+            shards_closed |= self._iterators[shard_id] is None
+            for raw in resp.get("Records", []):
+                records.append(self._decode(raw))
+                self._positions[shard_id] = raw["dynamodb"]["SequenceNumber"]
+        if shards_closed:
+            self._refresh_shards()
+        if not records:
+            time.sleep(timeout)
+        return records
+
+    def _resume(self, shard_id: str) -> str:
+        """A fresh iterator right after the last record read, so no change
+        made while the old one sat unused is skipped. Replaying changes is
+        harmless to the listeners; missing one leaves a cache stale."""
+        kwargs = {"StreamArn": self.stream_arn, "ShardId": shard_id}
+        position = self._positions.get(shard_id)
+        if position is not None:
+            try:
+                return self.client.get_shard_iterator(
+                    ShardIteratorType="AFTER_SEQUENCE_NUMBER",
+                    SequenceNumber=position,
+                    **kwargs,
+                )["ShardIterator"]
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "TrimmedDataAccessException":
+                    raise
+        # nothing read yet, or the position is past retention: start from
+        # the oldest record still in the shard
+        return self.client.get_shard_iterator(
+            ShardIteratorType="TRIM_HORIZON", **kwargs
+        )["ShardIterator"]
+
+    def _decode(self, raw: dict) -> ChangeRecord:
+        change = raw["dynamodb"]
+
+        def image(name: str) -> Optional[dict]:
+            if name not in change:
+                return None
+            return {k: self._deserializer.deserialize(v) for k, v in change[name].items()}
+
+        return ChangeRecord(
+            event_name=raw["eventName"],
+            keys=image("Keys"),
+            old_image=image("OldImage"),
+            new_image=image("NewImage"),
+            # botocore parses this into a datetime
+            created_at=change["ApproximateCreationDateTime"].timestamp(),
+        )
+
+    def close(self):
+        pass
+
+
+class ChangeStreamConsumer:
+    """Applies a change source to an invalidation bus on a daemon thread."""
+
+    def __init__(
+        self, source: ChangeSource, bus: InvalidationBus, poll_interval: float = 1.0
+    ):
+        self.source = source
+        self.bus = bus
+        self.poll_interval = poll_interval
+        self._record_listeners: List[Callable[[ChangeRecord], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_record_listener(self, listener: Callable[[ChangeRecord], None]):
+        """For consumers that need the records themselves, not cache keys."""
+        self._record_listeners.append(listener)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.source.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.apply(self.source.read(timeout=self.poll_interval))
+            except Exception:
+                logger.exception("change stream read failed")
+                self._stop.wait(self.poll_interval)
+
+    def apply(self, records: List[ChangeRecord]) -> int:
+        invalidated = 0
+        for record in records:
+            CHANGE_RECORDS.labels(event=record.event_name).inc()
+            for key in invalidation_keys(record):
+                self.bus.publish(key)
+                invalidated += 1
+            for listener in self._record_listeners:
+                try:
+                    listener(record)
+                except Exception:
+                    logger.exception("change record listener failed")
+        if records:
+            CHANGE_STREAM_LAG.set(max(0.0, time.time() - records[-1].created_at))
+        return invalidated
@@ -0,0 +1,105 @@
+import gzip
+from typing import Callable, Optional, Type
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from app import config
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip still works
+    brotli = None
+
+# compressing bigger bodies than this is moved off the event loop
+_THREADPOOL_THRESHOLD = 64 * 1024
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Picks the best encoding we support from an Accept-Encoding header."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for coding in candidates:
+        quality = offered.get(coding, offered.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def _vary_on_accept_encoding(response: Response):
+    vary = response.headers.get("vary")
+    if not vary:
+        response.headers["vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in [v.strip().lower() for v in vary.split(",")]:
+        response.headers["vary"] = f"{vary}, Accept-Encoding"
+
+
+def compressed_route(
+    minimum_size: int = config.COMPRESSION_MINIMUM_SIZE,
+    gzip_level: int = config.COMPRESSION_GZIP_LEVEL,
+    brotli_quality: int = config.COMPRESSION_BROTLI_QUALITY,
+) -> Type[APIRoute]:
+    """Builds a route class that compresses response bodies.
+
+    Pass it as `route_class` to an APIRouter so each router can pick its own
+    size threshold and CPU/bandwidth trade-off.
+    """
+
+    class CompressedRoute(APIRoute):
+        def get_route_handler(self) -> Callable:
+            handler = super().get_route_handler()
+
+            async def compressed_handler(request: Request) -> Response:
+                response = await handler(request)
+                # the same URL may come back compressed for another caller,
+                # so caches must key every response of the route on it
+                _vary_on_accept_encoding(response)
+                body = getattr(response, "body", None)
+                if (
+                    not body
+                    or len(body) < minimum_size
+                    or "content-encoding" in response.headers
+                ):
+                    return response
+                encoding = negotiate_encoding(
+                    request.headers.get("accept-encoding", "")
+                )
+                if encoding is None:
+                    return response
+
+                if len(body) >= _THREADPOOL_THRESHOLD:
+                    compressed = await run_in_threadpool(
+                        compress, body, encoding, gzip_level, brotli_quality
+                    )
+                else:
+                    compressed = compress(body, encoding, gzip_level, brotli_quality)
+                response.body = compressed
+                response.headers["content-encoding"] = encoding
+                response.headers["content-length"] = str(len(compressed))
+                return response
+
+            return compressed_handler
+
+    return CompressedRoute
@@ -0,0 +1,49 @@
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.utils.tracing import tracer
+
+
+def _default(obj: Any) -> Any:
+    # orjson handles dataclasses, dicts, lists and primitives natively and
+    # only calls back here for the types it does not know about
+    if isinstance(obj, Decimal):
+        # DynamoDB hands every number back as Decimal
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, BaseModel):
+        # shallow dump so nested dataclasses and Decimals stay on orjson's
+        # fast path instead of going through pydantic's serializer
+        return {
+            field.serialization_alias or name: getattr(obj, name)
+            for name, field in type(obj).model_fields.items()
+        }
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # anything else keeps FastAPI's encoding rules
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Handlers can return it with domain dataclasses and pydantic models as
+    content, which skips FastAPI's `jsonable_encoder` pass entirely.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if not tracer.enabled:
+            return dumps(content)
+        with tracer.start_span("serialize", attributes={"layer": "serialization"}):
+            return dumps(content)
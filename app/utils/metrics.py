@@ -0,0 +1,151 @@
+import functools
+import time
+from typing import Callable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REGISTRY = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled, by route template and status.",
+    ["method", "route", "status"],
+    registry=REGISTRY,
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests, by route template and status.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=REGISTRY,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled, by route template.",
+    ["method", "route"],
+    registry=REGISTRY,
+)
+REPOSITORY_CALLS = Counter(
+    "repository_calls_total",
+    "Repository method calls, by repository, method and outcome.",
+    ["repository", "method", "outcome"],
+    registry=REGISTRY,
+)
+REPOSITORY_CALL_DURATION = Histogram(
+    "repository_call_duration_seconds",
+    "Time spent in repository methods, including every DynamoDB round trip.",
+    ["repository", "method"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=REGISTRY,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def render_metrics() -> tuple:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def _flatten_routes(routes) -> list:
+    # newer FastAPI keeps included routers nested instead of copying their
+    # routes onto the app, so walk down to the routes that carry a path
+    flat = []
+    for route in routes:
+        included = getattr(route, "original_router", None)
+        if included is not None:
+            flat.extend(_flatten_routes(included.routes))
+        else:
+            flat.append(route)
+    return flat
+
+
+def route_template(scope: Scope, routes: list) -> str:
+    # labels must use the template (/shows/{show_id}), never the raw path,
+    # or every id would create a new time series
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._routes is None:
+            self._routes = _flatten_routes(scope["app"].router.routes)
+        method = scope["method"]
+        route = route_template(scope, self._routes)
+        # inner middleware reuse the label instead of matching routes again
+        scope["route_template"] = route
+        status = "500"
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_REQUEST_DURATION.labels(method, route, status).observe(elapsed)
+
+
+def instrument_repository(repository: str) -> Callable[[type], type]:
+    """Class decorator recording call counts and latency for every public
+    method of a repository."""
+
+    def decorate(cls: type) -> type:
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_") or not callable(attr):
+                continue
+            if isinstance(attr, (staticmethod, classmethod)):
+                continue
+            setattr(cls, name, _timed(repository, name, attr))
+        return cls
+
+    return decorate
+
+
+def _timed(repository: str, method: str, func: Callable) -> Callable:
+    duration = REPOSITORY_CALL_DURATION.labels(repository, method)
+    succeeded = REPOSITORY_CALLS.labels(repository, method, "success")
+    failed = REPOSITORY_CALLS.labels(repository, method, "error")
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            failed.inc()
+            raise
+        finally:
+            duration.observe(time.perf_counter() - start)
+        succeeded.inc()
+        return result
+
+    return wrapper
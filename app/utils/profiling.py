@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.metrics import UNMATCHED_ROUTE
+from app.utils.tracing import KIND_SERVER, Span, tracer
+
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """Samples the stacks of every other thread at a fixed interval, or only
+    of the threads in `thread_ids`, a set that may grow while it runs.
+
+    The result is in the folded format ("frame;frame;frame count" per line)
+    that flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        max_depth: int = 64,
+        thread_ids: Optional[Set[int]] = None,
+    ):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.thread_ids = thread_ids
+        self.samples: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: Optional[float] = None):
+        with self._lock:
+            if self.running:
+                raise RuntimeError("profiler is already running")
+            self.samples = Counter()
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(duration,), daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self, duration: Optional[float]):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration if duration else None
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_ids is not None:
+                # copy() is atomic, iterating a set another thread grows is not
+                thread_ids = self.thread_ids.copy()
+                frames = {i: frames[i] for i in thread_ids if i in frames}
+            for thread_id, frame in frames.items():
+                if thread_id != own_id:
+                    self.samples[self._fold(frame)] += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.stopped_at = time.time()
+
+    def _fold(self, frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def folded(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+    def summary(self) -> dict:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "samples": sum(self.samples.values()),
+            "unique_stacks": len(self.samples),
+        }
+
+
+def request_breakdown(spans: List[Span], total_ms: float) -> dict:
+    by_id = {span.span_id: span for span in spans}
+
+    def layer_of(span: Optional[Span]) -> Optional[str]:
+        return span.attributes.get("layer") if span is not None else None
+
+    breakdown = {
+        "total_ms": round(total_ms, 3),
+        "auth_ms": 0.0,
+        "service_ms": 0.0,
+        "dynamodb_ms": 0.0,
+        "serialization_ms": 0.0,
+        "dynamodb_calls": [],
+    }
+    for span in spans:
+        layer = layer_of(span)
+        if layer == "service":
+            # nested service calls are already inside their caller's time
+            if layer_of(by_id.get(span.parent_id)) != "service":
+                breakdown["service_ms"] += span.duration_ms
+        elif layer in ("auth", "serialization"):
+            breakdown[f"{layer}_ms"] += span.duration_ms
+        elif layer == "dynamodb":
+            breakdown["dynamodb_ms"] += span.duration_ms
+            breakdown["dynamodb_calls"].append(
+                {
+                    "operation": span.attributes.get("db.operation"),
+                    "key_prefix": span.attributes.get("db.dynamodb.key_prefix"),
+                    "duration_ms": round(span.duration_ms, 3),
+                    "status": span.status,
+                }
+            )
+    for key in ("auth_ms", "service_ms", "dynamodb_ms", "serialization_ms"):
+        breakdown[key] = round(breakdown[key], 3)
+    breakdown["dynamodb_calls"].sort(key=lambda call: call["duration_ms"], reverse=True)
+    return breakdown
+
+
+class SlowRequestMiddleware:
+    """Logs a per-layer breakdown of requests slower than `threshold_ms`.
+
+    With `profile` on, a sampling profiler is started once a request crosses
+    the threshold and its hottest stacks are added to the log line. It only
+    samples the threads the request has run spans on: the event loop and the
+    worker threads of sync endpoints and dependencies.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        threshold_ms: float = 0,
+        profile: bool = False,
+        profile_interval: float = 0.005,
+        profile_top_stacks: int = 20,
+    ):
+        self.app = app
+        self.threshold_ms = threshold_ms
+        self.profile = profile
+        self.profile_interval = profile_interval
+        self.profile_top_stacks = profile_top_stacks
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self.threshold_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        profiler: Optional[SamplingProfiler] = None
+        timer = None
+        start = time.perf_counter()
+        status: Dict[str, int] = {}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                # event streams stay open by design
+                status["streaming"] = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", [])
+                )
+            await send(message)
+
+        try:
+            with tracer.record() as spans:
+                if self.profile:
+                    profiler = SamplingProfiler(
+                        interval=self.profile_interval,
+                        thread_ids=tracer.recorded_threads(),
+                    )
+                    timer = asyncio.get_running_loop().call_later(
+                        self.threshold_ms / 1000, profiler.start
+                    )
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            total_ms = (time.perf_counter() - start) * 1000
+            if timer is not None:
+                timer.cancel()
+                if profiler.running:
+                    # joining waits up to one interval; not on the event loop
+                    await run_in_threadpool(profiler.stop)
+            if total_ms >= self.threshold_ms and not status.get("streaming"):
+                self._log(scope, status.get("code", 500), spans, total_ms, profiler)
+
+    def _log(self, scope, status_code, spans, total_ms, profiler):
+        record = {
+            "method": scope["method"],
+            "route": scope.get("route_template", UNMATCHED_ROUTE),
+            "path": scope["path"],
+            "status": status_code,
+            **request_breakdown(
+                [span for span in spans if span.kind != KIND_SERVER], total_ms
+            ),
+        }
+        if profiler is not None and profiler.samples:
+            record["profile"] = [
+                {"stack": stack, "samples": count}
+                for stack, count in profiler.samples.most_common(
+                    self.profile_top_stacks
+                )
+            ]
+        logger.warning("slow request %s", json.dumps(record, default=str))
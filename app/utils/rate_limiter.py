@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Protocol, Tuple
+
+from botocore.exceptions import ClientError
+from types_boto3_dynamodb.service_resource import Table
+
+from app.custom_exceptions.generic import TooManyRequests
+
+
+class RateLimitBackend(Protocol):
+    def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        """Records one attempt for `key`.
+
+        Returns 0 when the attempt is allowed, otherwise the number of seconds
+        the caller should wait before trying again.
+        """
+        ...
+
+    def reset(self, key: str, window_seconds: int) -> None: ...
+
+
+class InMemoryRateLimitBackend:
+    """Token bucket per key, refilling `limit` tokens evenly over the window.
+
+    State is local to the process, so each instance enforces its own limit.
+    """
+
+    def __init__(
+        self, clock: Callable[[], float] = time.monotonic, max_keys: int = 100_000
+    ):
+        self._clock = clock
+        self._max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        rate = limit / window_seconds
+        now = self._clock()
+        with self._lock:
+            tokens, last, _ = self._buckets.get(key, (float(limit), now, rate))
+            tokens = min(float(limit), tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, rate)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now, rate)
+                retry_after = (1 - tokens) / rate
+            if len(self._buckets) > self._max_keys:
+                self._evict_refilled(now, limit)
+        return retry_after
+
+    def reset(self, key: str, window_seconds: int) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _evict_refilled(self, now: float, limit: int):
+        # a bucket that has refilled completely behaves exactly like a missing one
+        for key, (tokens, last, rate) in list(self._buckets.items()):
+            if tokens + (now - last) * rate >= limit:
+                del self._buckets[key]
+
+
+class DynamoDBRateLimitBackend:
+    """Sliding-window counter shared by every instance through the table.
+
+    Each key keeps one counter item per fixed window; the previous window's
+    count is weighted by how much of it still overlaps the sliding window.
+    """
+
+    def __init__(self, table: Table, clock: Callable[[], float] = time.time):
+        self.table = table
+        self._clock = clock
+
+    def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        now = self._clock()
+        window_start = int(now // window_seconds) * window_seconds
+        try:
+            resp = self.table.update_item(
+                Key={"pk": f"RATE_LIMIT#{key}", "sk": f"WINDOW#{window_start}"},
+                UpdateExpression="ADD #hits :one SET #expires_at = :expires_at",
+                ExpressionAttributeNames={
+                    "#hits": "hits",
+                    "#expires_at": "expires_at",
+                },
+                ExpressionAttributeValues={
+                    ":one": 1,
+                    ":expires_at": window_start + 2 * window_seconds,
+                },
+                ReturnValues="UPDATED_NEW",
+            )
+            previous = self.table.get_item(
+                Key={
+                    "pk": f"RATE_LIMIT#{key}",
+                    "sk": f"WINDOW#{window_start - window_seconds}",
+                }
+            ).get("Item", {})
+        except ClientError:
+            raise
+        current_hits = int(resp["Attributes"]["hits"])
+        previous_hits = int(previous.get("hits", 0))
+        elapsed = now - window_start
+        overlap = (window_seconds - elapsed) / window_seconds
+        if previous_hits * overlap + current_hits <= limit:
+            return 0.0
+        return window_seconds - elapsed
+
+    def reset(self, key: str, window_seconds: int) -> None:
+        window_start = int(self._clock() // window_seconds) * window_seconds
+        try:
+            for start in (window_start, window_start - window_seconds):
+                self.table.delete_item(
+                    Key={"pk": f"RATE_LIMIT#{key}", "sk": f"WINDOW#{start}"}
+                )
+        except ClientError:
+            raise
+
+
+class LoginThrottler:
+    """Sheds login attempts per email and per client IP before any lookup
+    or password verification happens."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        max_attempts_per_email: int,
+        max_attempts_per_ip: int,
+        window_seconds: int,
+    ):
+        self.backend = backend
+        self.max_attempts_per_email = max_attempts_per_email
+        self.max_attempts_per_ip = max_attempts_per_ip
+        self.window_seconds = window_seconds
+
+    def check(self, email: str, client_ip: Optional[str] = None):
+        retry_after = 0.0
+        if client_ip:
+            retry_after = self.backend.hit(
+                f"LOGIN_IP#{client_ip}", self.max_attempts_per_ip, self.window_seconds
+            )
+        if not retry_after:
+            retry_after = self.backend.hit(
+                self._email_key(email),
+                self.max_attempts_per_email,
+                self.window_seconds,
+            )
+        if retry_after:
+            raise TooManyRequests(
+                "too many login attempts, try again later",
+                retry_after=math.ceil(retry_after),
+            )
+
+    def reset(self, email: str):
+        self.backend.reset(self._email_key(email), self.window_seconds)
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return f"LOGIN_EMAIL#{email.strip().lower()}"
@@ -0,0 +1,186 @@
+"""Live seat state for the seat-selection page, pushed over server-sent events.
+
+Each show that has at least one local listener gets one topic. The topic keeps
+the seats it knows are booked and turns every write it hears about, from the
+local booking path or from the change stream, into a delta of newly booked
+seats, so listeners see each seat once however many paths report it.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+
+from prometheus_client import Gauge
+
+from app.utils.change_stream import ChangeRecord
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SEAT_STREAM_LISTENERS = Gauge(
+    "seat_stream_listeners",
+    "Open seat availability streams on this instance.",
+    registry=REGISTRY,
+)
+SEAT_STREAM_TOPICS = Gauge(
+    "seat_stream_topics",
+    "Shows with at least one open seat availability stream on this instance.",
+    registry=REGISTRY,
+)
+
+# a listener that falls this far behind is closed; EventSource reconnects and
+# starts again from a snapshot
+_CLOSE = object()
+
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class _Listener:
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.loop = loop
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=max_queue)
+
+    def send(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSE)
+
+
+class _Topic:
+    def __init__(self, booked: Set[str]):
+        self.booked = booked
+        self.listeners: List[_Listener] = []
+
+
+class SeatStreamHub:
+    """Shares one upstream view per show between all of its local listeners.
+
+    `load_booked_seats(show_id)` returns the show's booked seats, or None if
+    the show does not exist; it is called once when a show's first listener
+    arrives, and again when a change record carries no item image.
+    """
+
+    def __init__(
+        self,
+        load_booked_seats: Callable[[str], Optional[List[str]]],
+        keepalive_seconds: float = 15.0,
+        max_queue: int = 100,
+    ):
+        self.load_booked_seats = load_booked_seats
+        self.keepalive_seconds = keepalive_seconds
+        self.max_queue = max_queue
+        self._topics: Dict[str, _Topic] = {}
+        self._lock = threading.Lock()
+
+    def watching(self, show_id: str) -> bool:
+        return show_id in self._topics
+
+    def subscribe(
+        self, show_id: str, loop: asyncio.AbstractEventLoop
+    ) -> Optional[_Listener]:
+        """Returns None when the show does not exist. May read the table, so
+        call it off the event loop that will consume the listener."""
+        listener = _Listener(loop, self.max_queue)
+        booked = None
+        while True:
+            with self._lock:
+                # the topic is looked up again with the listener added in the
+                # same critical section, so its last listener can't remove it
+                # in between and leave this one on an orphaned topic
+                topic = self._topics.get(show_id)
+                if topic is None and booked is not None:
+                    topic = self._topics[show_id] = _Topic(set(booked))
+                if topic is not None:
+                    topic.listeners.append(listener)
+                    snapshot = sorted(topic.booked)
+                    SEAT_STREAM_TOPICS.set(len(self._topics))
+                    break
+            booked = self.load_booked_seats(show_id)
+            if booked is None:
+                return None
+        SEAT_STREAM_LISTENERS.inc()
+        listener.send(
+            format_event("snapshot", {"show_id": show_id, "booked_seats": snapshot})
+        )
+        return listener
+
+    def unsubscribe(self, show_id: str, listener: _Listener):
+        with self._lock:
+            topic = self._topics.get(show_id)
+            if topic is None or listener not in topic.listeners:
+                return
+            topic.listeners.remove(listener)
+            if not topic.listeners:
+                del self._topics[show_id]
+            SEAT_STREAM_TOPICS.set(len(self._topics))
+        SEAT_STREAM_LISTENERS.dec()
+
+    def publish_booked(self, show_id: str, seats: Iterable[str]):
+        """Called from any thread once seats are known to be booked."""
+        with self._lock:
+            topic = self._topics.get(show_id)
+            if topic is None:
+                return
+            new_seats = sorted(set(seats) - topic.booked)
+            if not new_seats:
+                return
+            topic.booked.update(new_seats)
+            listeners = list(topic.listeners)
+        message = format_event("booked", {"show_id": show_id, "seats": new_seats})
+        for listener in listeners:
+            listener.send(message)
+
+    def on_change(self, record: ChangeRecord):
+        """Change stream listener: applies writes made by other instances."""
+        pk, sk = record.keys.get("pk", ""), record.keys.get("sk", "")
+        # sectioned shows keep their seats on SEATS#<section> items
+        if not pk.startswith("SHOW#") or not (
+            sk == "DETAILS" or sk.startswith("SEATS#")
+        ):
+            return
+        show_id = pk[len("SHOW#"):]
+        if not self.watching(show_id):
+            return
+        if record.new_image is not None:
+            booked = record.new_image.get("booked_seats") or []
+        elif record.event_name == "REMOVE":
+            return
+        else:
+            # KEYS_ONLY streams: one read per change, shared by every listener
+            booked = self.load_booked_seats(show_id) or []
+        self.publish_booked(show_id, booked)
+
+    async def events(
+        self,
+        show_id: str,
+        listener: _Listener,
+        is_disconnected: Callable[[], "asyncio.Future"],
+    ) -> AsyncIterator[str]:
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        listener.queue.get(), timeout=self.keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    # comment line: keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                if message is _CLOSE:
+                    logger.info("closing a slow seat stream listener for %s", show_id)
+                    return
+                yield message
+        finally:
+            self.unsubscribe(show_id, listener)
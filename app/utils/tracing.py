@@ -0,0 +1,560 @@
+import functools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol, Set
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import UNMATCHED_ROUTE
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "eventro"
+
+KIND_INTERNAL = "internal"
+KIND_SERVER = "server"
+KIND_CLIENT = "client"
+# OTLP SpanKind values
+_OTLP_KINDS = {KIND_INTERNAL: 1, KIND_SERVER: 2, KIND_CLIENT: 3}
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    kind: str = KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, err: BaseException):
+        self.status = "error"
+        self.error = f"{type(err).__name__}: {err}"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class InMemorySpanExporter:
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileSpanExporter:
+    """Appends finished spans to a JSON-lines file for offline analysis."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_SHUTDOWN = object()
+
+
+class OTLPHttpExporter:
+    """Ships spans to an OpenTelemetry collector as OTLP/HTTP JSON.
+
+    Spans are queued and posted in batches from a background thread so a slow
+    or missing collector never adds latency to requests; when the queue is
+    full new spans are dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+        max_queue_size: int = 10000,
+        timeout: float = 5.0,
+    ):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self._queue: queue.Queue = queue.Queue(max_queue_size)
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            logger.debug("span queue full, dropping %s", span.name)
+
+    def shutdown(self) -> None:
+        self._queue.put(_SHUTDOWN)
+        self._worker.join(timeout=self.timeout)
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _SHUTDOWN:
+                self._send(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._send(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _send(self, spans: List[Span]):
+        if not spans:
+            return
+        req = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(otlp_payload(spans), default=str).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout):
+                pass
+        except Exception as err:
+            logger.error("exporting %d spans failed: %s", len(spans), err)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: List[Span]) -> dict:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": _otlp_value(SERVICE_NAME)}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [
+                            {
+                                "traceId": span.trace_id,
+                                "spanId": span.span_id,
+                                "parentSpanId": span.parent_id or "",
+                                "name": span.name,
+                                "kind": _OTLP_KINDS[span.kind],
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)}
+                                    for key, value in span.attributes.items()
+                                ],
+                                "status": (
+                                    {"code": 2, "message": span.error or ""}
+                                    if span.status == "error"
+                                    else {"code": 1}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# spans finished while a request is being recorded, see Tracer.record
+_recorded_spans: ContextVar[Optional[List[Span]]] = ContextVar(
+    "recorded_spans", default=None
+)
+# threads that started a span while the request is being recorded
+_recorded_threads: ContextVar[Optional[Set[int]]] = ContextVar(
+    "recorded_threads", default=None
+)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None or _recorded_spans.get() is not None
+
+    def set_exporter(self, exporter: Optional[SpanExporter]):
+        if self.exporter is not None:
+            self.exporter.shutdown()
+        self.exporter = exporter
+
+    def begin(
+        self,
+        name: str,
+        kind: str = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+    ) -> Span:
+        """Creates a span without making it current, for work that is started
+        and finished in different callbacks."""
+        threads = _recorded_threads.get()
+        if threads is not None:
+            threads.add(threading.get_ident())
+        parent = parent if parent is not None else _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        return Span(
+            name=name,
+            trace_id=trace_id or _new_id(16),
+            span_id=_new_id(8),
+            parent_id=parent_id,
+            kind=kind,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes or {}),
+        )
+
+    def end(self, span: Span):
+        span.end_ns = time.time_ns()
+        recorded = _recorded_spans.get()
+        if recorded is not None:
+            recorded.append(span)
+        if self.exporter is not None:
+            try:
+                self.exporter.export(span)
+            except Exception as err:
+                logger.error("exporting span %s failed: %s", span.name, err)
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        kind: str = KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+    ) -> Iterator[Optional[Span]]:
+        if not self.enabled:
+            yield None
+            return
+        span = self.begin(
+            name, kind, attributes, trace_id=trace_id, parent_id=parent_id
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as err:
+            span.record_error(err)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+    @contextmanager
+    def record(self) -> Iterator[List[Span]]:
+        """Collects every span finished in this context, even with no exporter
+        configured, so a caller can inspect where a request spent its time."""
+        spans: List[Span] = []
+        token = _recorded_spans.set(spans)
+        threads_token = _recorded_threads.set({threading.get_ident()})
+        try:
+            yield spans
+        finally:
+            _recorded_spans.reset(token)
+            _recorded_threads.reset(threads_token)
+
+    def recorded_threads(self) -> Set[int]:
+        """Ids of the threads the recording context has run spans on so far,
+        starting with the one that opened it; it keeps growing."""
+        return _recorded_threads.get() or set()
+
+
+tracer = Tracer()
+
+
+def build_exporter(
+    kind: str, file_path: str = "", otlp_endpoint: str = ""
+) -> Optional[SpanExporter]:
+    if kind == "file":
+        return FileSpanExporter(file_path)
+    if kind == "otlp":
+        return OTLPHttpExporter(otlp_endpoint)
+    return None
+
+
+def trace_methods(component: str) -> Callable[[type], type]:
+    """Class decorator opening a `<component>.<method>` span around every
+    public method of a service."""
+
+    def decorate(cls: type) -> type:
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_") or not callable(attr):
+                continue
+            if isinstance(attr, (staticmethod, classmethod)):
+                continue
+            setattr(cls, name, _traced(f"{component}.{name}", "service", attr))
+        return cls
+
+    return decorate
+
+
+def _traced(span_name: str, layer: str, func: Callable) -> Callable:
+    attributes = {"layer": layer}
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not tracer.enabled:
+            return func(*args, **kwargs)
+        with tracer.start_span(span_name, attributes=attributes):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def traced(span_name: str, layer: str) -> Callable[[Callable], Callable]:
+    """Decorator for single functions, such as auth dependencies."""
+
+    def decorate(func: Callable) -> Callable:
+        return _traced(span_name, layer, func)
+
+    return decorate
+
+
+def _parse_traceparent(value: str):
+    # W3C trace context: version-traceid-parentid-flags
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = None, None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                trace_id, parent_id = _parse_traceparent(value.decode("latin-1"))
+                break
+        route = scope.get("route_template", UNMATCHED_ROUTE)
+        attributes = {
+            "http.method": scope["method"],
+            "http.route": route,
+            "http.target": scope["path"],
+        }
+
+        with tracer.start_span(
+            f"{scope['method']} {route}",
+            kind=KIND_SERVER,
+            attributes=attributes,
+            trace_id=trace_id,
+            parent_id=parent_id,
+        ) as span:
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+# DynamoDB spans are opened and closed from botocore event hooks, so they are
+# never made current; they only hang off whatever span issued the call
+
+_SPAN_CONTEXT_KEY = "tracing_span"
+
+
+def _plain(value: Any) -> Any:
+    # the client API uses typed values ({"S": "SHOW#1"}), the resource API
+    # plain ones, depending on when the hook runs
+    if isinstance(value, dict) and len(value) == 1:
+        return next(iter(value.values()))
+    return value
+
+
+def _key_prefix(params: dict) -> Optional[str]:
+    key = params.get("Key") or params.get("Item")
+    pk = key.get("pk") if isinstance(key, dict) else None
+    if pk is None:
+        values = params.get("ExpressionAttributeValues") or {}
+        pk = values.get(":pk")
+    pk = _plain(pk)
+    if not isinstance(pk, str):
+        return None
+    prefix, sep, _ = pk.partition("#")
+    return f"{prefix}{sep}" if sep else prefix
+
+
+def _request_attributes(operation: str, params: dict) -> dict:
+    attributes = {
+        "layer": "dynamodb",
+        "db.system": "dynamodb",
+        "db.operation": operation,
+    }
+    if "TableName" in params:
+        attributes["aws.dynamodb.table_names"] = [params["TableName"]]
+    prefix = _key_prefix(params)
+    if prefix is not None:
+        attributes["db.dynamodb.key_prefix"] = prefix
+    if "RequestItems" in params:
+        request_items = params["RequestItems"]
+        attributes["aws.dynamodb.table_names"] = sorted(request_items)
+        attributes["db.dynamodb.request_items"] = sum(
+            len(spec.get("Keys", [])) if isinstance(spec, dict) else len(spec)
+            for spec in request_items.values()
+        )
+    if "TransactItems" in params:
+        items = params["TransactItems"]
+        attributes["db.dynamodb.request_items"] = len(items)
+        attributes["aws.dynamodb.table_names"] = sorted(
+            {
+                body.get("TableName")
+                for item in items
+                for body in item.values()
+                if body.get("TableName")
+            }
+        )
+    return attributes
+
+
+def _response_attributes(parsed: dict) -> dict:
+    attributes = {}
+    if "Count" in parsed:
+        attributes["aws.dynamodb.count"] = parsed["Count"]
+    if "ScannedCount" in parsed:
+        attributes["aws.dynamodb.scanned_count"] = parsed["ScannedCount"]
+    if "Responses" in parsed and isinstance(parsed["Responses"], dict):
+        attributes["db.dynamodb.returned_items"] = sum(
+            len(items) for items in parsed["Responses"].values()
+        )
+    if parsed.get("UnprocessedKeys"):
+        attributes["db.dynamodb.unprocessed_keys"] = sum(
+            len(spec.get("Keys", [])) for spec in parsed["UnprocessedKeys"].values()
+        )
+    consumed = parsed.get("ConsumedCapacity")
+    if consumed:
+        entries = consumed if isinstance(consumed, list) else [consumed]
+        attributes["aws.dynamodb.consumed_capacity"] = sum(
+            float(entry.get("CapacityUnits", 0)) for entry in entries
+        )
+    return attributes
+
+
+def _start_dynamodb_span(params: dict, model, context: dict, **kwargs):
+    if not tracer.enabled or context is None:
+        return
+    context[_SPAN_CONTEXT_KEY] = tracer.begin(
+        f"DynamoDB.{model.name}",
+        kind=KIND_CLIENT,
+        attributes=_request_attributes(model.name, params),
+    )
+
+
+def _end_dynamodb_span(parsed: dict, context: dict, **kwargs):
+    span = context.pop(_SPAN_CONTEXT_KEY, None) if context else None
+    if span is None:
+        return
+    if isinstance(parsed, dict):
+        span.attributes.update(_response_attributes(parsed))
+        error = parsed.get("Error")
+        if error:
+            span.status = "error"
+            span.error = error.get("Code")
+    tracer.end(span)
+
+
+def _fail_dynamodb_span(exception: Exception, context: dict, **kwargs):
+    span = context.pop(_SPAN_CONTEXT_KEY, None) if context else None
+    if span is None:
+        return
+    span.record_error(exception)
+    tracer.end(span)
+
+
+def register_tracing_hooks(client):
+    client.meta.events.register(
+        "before-parameter-build.dynamodb", _start_dynamodb_span
+    )
+    client.meta.events.register("after-call.dynamodb", _end_dynamodb_span)
+    client.meta.events.register("after-call-error.dynamodb", _fail_dynamodb_span)
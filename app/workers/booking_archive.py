@@ -0,0 +1,80 @@
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.repository.booking_repository import BookingRepository
+
+logger = logging.getLogger(__name__)
+
+
+class BookingArchiveWorker:
+    """Moves bookings for shows more than `archive_after_days` old out of
+    their own `USER#..#SHOW_DATE#..` items into one compressed archive item
+    per user and year, so reading a user's upcoming bookings never touches
+    their history.
+
+    Each sweep scans the table page by page. Archiving is idempotent, so
+    several instances may sweep at once; a user-year another instance is
+    archiving at the same moment is picked up by the next sweep.
+    """
+
+    def __init__(
+        self,
+        booking_repo: BookingRepository,
+        archive_after_days: int = 90,
+        page_size: int = 500,
+        poll_interval: float = 86400.0,
+        today: Callable[[], date] = date.today,
+    ):
+        self.booking_repo = booking_repo
+        # never less than a day, so no upcoming booking is archived
+        self.archive_after_days = max(1, archive_after_days)
+        self.page_size = page_size
+        self.poll_interval = poll_interval
+        self._today = today
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        # the first sweep waits a full interval so restarts don't pile up scans
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("booking archive sweep failed")
+
+    def run_once(self) -> int:
+        """Runs one full sweep; returns how many bookings were archived."""
+        before = (self._today() - timedelta(days=self.archive_after_days)).isoformat()
+        archived = 0
+        start_key = None
+        while not self._stop.is_set():
+            items, start_key = self.booking_repo.list_archivable(
+                before, self.page_size, start_key
+            )
+            groups: Dict[Tuple[str, str], List[dict]] = {}
+            for item in items:
+                user_id = item["pk"].split("#", 1)[1]
+                year = item["sk"].removeprefix("SHOW_DATE#")[:4]
+                groups.setdefault((user_id, year), []).append(item)
+            for (user_id, year), group in groups.items():
+                archived += self.booking_repo.archive_bookings(user_id, year, group)
+            if start_key is None:
+                break
+        if archived:
+            logger.info("archived %d bookings for shows before %s", archived, before)
+        return archived
@@ -0,0 +1,177 @@
+import logging
+import os
+import socket
+import threading
+from typing import Optional
+
+from app.repository.event_repository import EventRepository
+from app.repository.outbox_repository import OutboxRepository
+from app.utils.cdn import CDNPurger
+
+logger = logging.getLogger(__name__)
+
+
+class EventFanoutWorker:
+    """Copies an event's blocked flag from `EVENT#..#DETAILS` to its
+    denormalized rows: the `EVENTS` name index, every `CITY#..` listing row
+    and every `EVENT#..#CITY#..` show row.
+
+    Jobs come from the outbox items `update_event` writes in the same
+    transaction as the flag. The worker always propagates the flag it reads
+    from the canonical item, so jobs can be retried or run late safely.
+
+    City rows written before the worker existed have no membership row, so
+    no job reaches them; `request_backfill` makes the worker sweep them once.
+    """
+
+    def __init__(
+        self,
+        outbox_repo: OutboxRepository,
+        event_repo: EventRepository,
+        batch_size: int = 100,
+        poll_interval: float = 5.0,
+        lease_seconds: int = 60,
+        max_attempts: int = 5,
+        cdn_purger: Optional[CDNPurger] = None,
+    ):
+        self.outbox_repo = outbox_repo
+        self.event_repo = event_repo
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.cdn_purger = cdn_purger
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._backfill = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wake(self):
+        """Called after a flip so this instance picks it up without waiting
+        for the next poll."""
+        self._wake.set()
+
+    def request_backfill(self):
+        self._backfill.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._backfill.is_set():
+                self._backfill.clear()
+                try:
+                    self.backfill()
+                except Exception:
+                    logger.exception("event city row backfill failed")
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("event fan-out poll failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def run_once(self) -> int:
+        """Claims and processes every runnable job; returns how many finished."""
+        finished = 0
+        for job in self.outbox_repo.list_jobs(include_done=False):
+            claimed = self.outbox_repo.claim(job, self.worker_id, self.lease_seconds)
+            if claimed is None:
+                continue
+            try:
+                if self.process(claimed):
+                    finished += 1
+            except Exception as err:
+                logger.exception("event fan-out for %s failed", claimed["event_id"])
+                self.outbox_repo.release(
+                    claimed,
+                    error=f"{type(err).__name__}: {err}",
+                    give_up=int(claimed["attempts"]) >= self.max_attempts,
+                )
+        return finished
+
+    def backfill(self) -> int:
+        """Sweeps the table for city rows without membership rows; returns
+        how many were backfilled. Safe to repeat and to stop halfway."""
+        backfilled = 0
+        start_key = None
+        while not self._stop.is_set():
+            done, start_key = self.event_repo.backfill_city_rows(self.batch_size, start_key)
+            backfilled += done
+            if start_key is None:
+                break
+        logger.info("backfilled %d event city rows", backfilled)
+        return backfilled
+
+    def process(self, job: dict) -> bool:
+        event = self.event_repo.get_by_id(job["event_id"])
+        if event is None:
+            return self.outbox_repo.complete(job)
+        cities = self.event_repo.list_event_cities(event.id)
+        rows_done = int(job.get("rows_done", 0))
+        # "names" covers the EVENTS and CITY# rows, "shows" pages through the
+        # show rows; progress is saved per batch so a retry resumes
+        phase = job.get("phase", "names")
+        cursor = job.get("cursor") or {}
+
+        if phase == "names":
+            rows_done += self.event_repo.set_projection_flag(
+                self.event_repo.projection_keys(event, cities),
+                event.is_blocked,
+                event.version,
+            )
+            phase, cursor = "shows", {}
+            if not self.outbox_repo.save_progress(
+                job, phase, None, rows_done, self.lease_seconds
+            ):
+                return False
+
+        city_index = int(cursor.get("city", 0))
+        start_key = cursor.get("start_key")
+        while city_index < len(cities):
+            keys, start_key = self.event_repo.list_city_show_keys(
+                event.id, cities[city_index], self.batch_size, start_key
+            )
+            rows_done += self.event_repo.set_projection_flag(
+                keys, event.is_blocked, event.version
+            )
+            if start_key is None:
+                city_index += 1
+            next_cursor = {"city": city_index}
+            if start_key is not None:
+                next_cursor["start_key"] = start_key
+            # a False here means the event was flipped again or the lease was
+            # lost; the newer job takes over from the start
+            if not self.outbox_repo.save_progress(
+                job, phase, next_cursor, rows_done, self.lease_seconds
+            ):
+                return False
+
+        if not self.outbox_repo.complete(job):
+            return False
+        logger.info(
+            "propagated is_blocked=%s for event %s to %d rows",
+            event.is_blocked,
+            event.id,
+            rows_done,
+        )
+        if self.cdn_purger:
+            self.cdn_purger.purge(
+                ["events", f"event-shows:{event.id}"]
+                + [f"city:{city}" for city in cities]
+            )
+        return True
@@ -0,0 +1,68 @@
+import logging
+import threading
+from typing import Optional
+
+from app.repository.analytics_repository import AnalyticsRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SalesAggregationWorker:
+    """Folds the sale items bookings leave in the `OUTBOX#SALES#..` shards
+    into the host analytics counters, off the booking path.
+
+    A poll reads up to `batch_size` sales per shard and applies them summed
+    per counter, so a burst of bookings for one host costs a handful of
+    counter writes instead of six per booking. Applying and deleting a sale
+    happen in one transaction, so several instances may poll at once.
+    """
+
+    def __init__(
+        self,
+        analytics_repo: AnalyticsRepository,
+        outbox_shards: int = 8,
+        batch_size: int = 200,
+        poll_interval: float = 5.0,
+    ):
+        self.analytics_repo = analytics_repo
+        self.outbox_shards = max(1, outbox_shards)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("sales aggregation poll failed")
+            self._stop.wait(self.poll_interval)
+
+    def run_once(self) -> int:
+        """Drains every shard; returns how many sales were applied."""
+        applied = 0
+        for shard in range(self.outbox_shards):
+            while not self._stop.is_set():
+                sales = self.analytics_repo.list_sales(shard, self.batch_size)
+                if not sales:
+                    break
+                done = self.analytics_repo.apply_sales(sales, shard)
+                applied += done
+                # lost to another instance; leave the rest to the next poll
+                if done < len(sales):
+                    break
+        return applied
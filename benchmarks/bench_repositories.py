@@ -0,0 +1,574 @@
+"""Benchmarks every repository method against the in-memory DynamoDB stand-in.
+
+The table is seeded through the repositories themselves, so items have the
+production layout. `--scale 1` seeds production-like volumes (10k events,
+100k shows, 1M bookings); smaller scales keep local runs quick.
+
+Each method reports ops/sec, p50/p99 latency and the peak memory allocated
+per call. Results are written as JSON (by default under benchmarks/results/,
+named after the current commit) and can be compared with an earlier run:
+
+    python -m benchmarks.bench_repositories --scale 0.1
+    python -m benchmarks.bench_repositories --scale 0.1 \\
+        --compare benchmarks/results/<older-commit>.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+from uuid import UUID
+
+from app.models.artists import Artist
+from app.models.booking import Booking
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.users import Role, User
+from app.models.venue import Venue
+from app.repository.artist_repository import ArtistRepository
+from app.repository.booking_repository import BookingRepository
+from app.repository.event_repository import EventRepository
+from app.repository.show_repository import ShowRepository
+from app.repository.user_repository import UserRepository
+from app.repository.venue_repository import VenueRepository
+from app.repository.memory_table import MemoryTable
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+CITIES = [
+    ("delhi", "delhi"),
+    ("mumbai", "maharashtra"),
+    ("pune", "maharashtra"),
+    ("bengaluru", "karnataka"),
+    ("mysuru", "karnataka"),
+    ("chennai", "tamil nadu"),
+    ("coimbatore", "tamil nadu"),
+    ("hyderabad", "telangana"),
+    ("kolkata", "west bengal"),
+    ("ahmedabad", "gujarat"),
+    ("jaipur", "rajasthan"),
+    ("lucknow", "uttar pradesh"),
+    ("kochi", "kerala"),
+    ("chandigarh", "punjab"),
+    ("indore", "madhya pradesh"),
+    ("bhopal", "madhya pradesh"),
+    ("nagpur", "maharashtra"),
+    ("surat", "gujarat"),
+    ("patna", "bihar"),
+    ("guwahati", "assam"),
+]
+CATEGORIES = ["movie", "workshop", "party"]
+SHOW_TIMES = ["10:00", "13:30", "17:00", "20:30"]
+SEAT_ROWS = "ABCDEFGHIJ"
+
+
+def new_id(rng: random.Random) -> str:
+    # ids come from the seeded rng so every run builds the same dataset
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+@dataclass
+class Dataset:
+    events: List[Event] = field(default_factory=list)
+    venues: List[Venue] = field(default_factory=list)
+    shows: List[Show] = field(default_factory=list)
+    users: List[User] = field(default_factory=list)
+    artists: List[Artist] = field(default_factory=list)
+    venues_by_id: Dict[str, Venue] = field(default_factory=dict)
+    events_by_id: Dict[str, Event] = field(default_factory=dict)
+    show_cities: Dict[str, str] = field(default_factory=dict)
+    host_ids: List[str] = field(default_factory=list)
+    # show id -> seats not booked yet; bookings are conditioned on their
+    # seats being free, so every booking takes its seats from here
+    free_seats: Dict[str, List[str]] = field(default_factory=dict)
+    seat_blocks: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class Repositories:
+    table: MemoryTable
+    events: EventRepository
+    venues: VenueRepository
+    shows: ShowRepository
+    users: UserRepository
+    artists: ArtistRepository
+    bookings: BookingRepository
+
+
+def build_repositories() -> Repositories:
+    table = MemoryTable("eventro_table")
+    return Repositories(
+        table=table,
+        events=EventRepository(table=table),
+        venues=VenueRepository(table=table),
+        shows=ShowRepository(table=table),
+        users=UserRepository(table=table),
+        artists=ArtistRepository(table=table),
+        bookings=BookingRepository(table=table),
+    )
+
+
+def make_event(rng: random.Random, index: int, artists: List[Artist]) -> Event:
+    cast = rng.sample(artists, k=min(3, len(artists)))
+    return Event(
+        id=new_id(rng),
+        name=f"Event {index:06d}",
+        description="an evening of music, comedy and stories " * 3,
+        duration=Decimal(rng.choice([90, 120, 150, 180])),
+        category=rng.choice(CATEGORIES),
+        is_blocked=False,
+        artist_ids=[artist.id for artist in cast],
+        artist_names=[artist.name for artist in cast],
+    )
+
+
+def make_venue(rng: random.Random, index: int, host_id: str) -> Venue:
+    city, state = rng.choice(CITIES)
+    return Venue(
+        id=new_id(rng),
+        name=f"Venue {index}",
+        host_id=host_id,
+        city=city,
+        state=state,
+        is_blocked=False,
+        is_seat_layout_required=True,
+    )
+
+
+def make_user(rng: random.Random, index: int) -> User:
+    return User(
+        user_id=new_id(rng),
+        username=f"user{index}",
+        email=f"user{index}@example.com",
+        phone_number=f"9{index:09d}",
+        password="$2b$12$" + "x" * 53,
+        role=Role.CUSTOMER,
+        is_blocked=False,
+    )
+
+
+def make_show(rng: random.Random, event: Event, venue: Venue, start: date) -> Show:
+    return Show(
+        id=new_id(rng),
+        venue_id=venue.id,
+        event_id=event.id,
+        is_blocked=False,
+        price=Decimal(rng.choice([199, 249, 299, 399, 499])),
+        show_date=(start + timedelta(days=rng.randrange(1, 60))).isoformat(),
+        show_time=rng.choice(SHOW_TIMES),
+        booked_seats=[],
+    )
+
+
+def take_seats(rng: random.Random, data: Dataset, show: Show, count: int) -> List[str]:
+    free = data.free_seats.setdefault(show.id, [])
+    seats = []
+    while len(seats) < count:
+        if not free:
+            # a full house gets another 20 seats per row
+            block = data.seat_blocks.get(show.id, 0)
+            data.seat_blocks[show.id] = block + 1
+            free.extend(
+                f"{row}{n}" for row in SEAT_ROWS for n in range(20 * block + 1, 20 * block + 21)
+            )
+            rng.shuffle(free)
+        seats.append(free.pop())
+    return seats
+
+
+def seed(repos: Repositories, scale: float, rng: random.Random) -> Dataset:
+    counts = {
+        "artists": max(10, int(2_000 * scale)),
+        "events": max(10, int(10_000 * scale)),
+        "venues": max(10, int(5_000 * scale)),
+        "shows": max(20, int(100_000 * scale)),
+        "users": max(10, int(100_000 * scale)),
+        "bookings": max(50, int(1_000_000 * scale)),
+    }
+    data = Dataset()
+    start = date.today()
+
+    for i in range(counts["artists"]):
+        artist = Artist(id=new_id(rng), name=f"Artist {i}", bio="bio " * 20)
+        repos.artists.add_artist(artist)
+        data.artists.append(artist)
+
+    for i in range(counts["events"]):
+        event = make_event(rng, i, data.artists)
+        repos.events.add_event(event)
+        data.events.append(event)
+        data.events_by_id[event.id] = event
+
+    data.host_ids = [new_id(rng) for _ in range(max(1, counts["venues"] // 2))]
+    for i in range(counts["venues"]):
+        venue = make_venue(rng, i, rng.choice(data.host_ids))
+        repos.venues.add_venue(venue)
+        data.venues.append(venue)
+        data.venues_by_id[venue.id] = venue
+
+    # each event plays in a handful of venues, several dates per venue
+    for _ in range(counts["shows"]):
+        event = rng.choice(data.events)
+        slot = f"{event.id}#{rng.randrange(3)}".encode()
+        venue = data.venues[zlib.crc32(slot) % len(data.venues)]
+        show = make_show(rng, event, venue, start)
+        repos.shows.create_show(show=show, venue=venue, event=event)
+        data.shows.append(show)
+        data.show_cities[show.id] = venue.city
+
+    for i in range(counts["users"]):
+        user = make_user(rng, i)
+        repos.users.add_user(user)
+        data.users.append(user)
+
+    for _ in range(counts["bookings"]):
+        show = rng.choice(data.shows)
+        repos.bookings.add_booking(
+            booking=make_booking(rng, data, rng.choice(data.users), show),
+            show=show,
+            event=data.events_by_id[show.event_id],
+            venue=data.venues_by_id[show.venue_id],
+        )
+    return data
+
+
+def make_booking(rng: random.Random, data: Dataset, user: User, show: Show) -> Booking:
+    seats = take_seats(rng, data, show, rng.randint(1, 4))
+    return Booking(
+        booking_id=new_id(rng),
+        user_id=user.user_id,
+        show_id=show.id,
+        time_booked=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        total_booking_price=show.price * len(seats),
+        seats=seats,
+    )
+
+
+@dataclass
+class Bench:
+    name: str
+    call: Callable[[], object]
+
+
+def benches(repos: Repositories, data: Dataset, rng: random.Random) -> List[Bench]:
+    pick = rng.choice
+
+    def random_show_args():
+        show = pick(data.shows)
+        return show, data.show_cities[show.id]
+
+    def list_by_event_city():
+        show, city = random_show_args()
+        return repos.shows.list_by_event_city(show.event_id, city)
+
+    def list_by_event_date():
+        show, city = random_show_args()
+        return repos.shows.list_by_event_date(show.event_id, city, show.show_date)
+
+    def create_show():
+        event = pick(data.events)
+        venue = pick(data.venues)
+        return repos.shows.create_show(
+            show=make_show(rng, event, venue, date.today()), venue=venue, event=event
+        )
+
+    def update_show():
+        show = pick(data.shows)
+        return repos.shows.update_show(
+            show.id, False, data.venues_by_id[show.venue_id], show
+        )
+
+    def add_booking():
+        show = pick(data.shows)
+        return repos.bookings.add_booking(
+            booking=make_booking(rng, data, pick(data.users), show),
+            show=show,
+            event=data.events_by_id[show.event_id],
+            venue=data.venues_by_id[show.venue_id],
+        )
+
+    def add_venue():
+        return repos.venues.add_venue(
+            make_venue(rng, rng.randrange(10**6), pick(data.host_ids))
+        )
+
+    def delete_venue():
+        # delete what we add, so the dataset keeps its size
+        venue = make_venue(rng, rng.randrange(10**6), pick(data.host_ids))
+        repos.venues.add_venue(venue)
+        return repos.venues.delete_venue(venue.id, venue.host_id)
+
+    def search_prefix():
+        # what a user has typed so far: matches ~10 events
+        return pick(data.events).name[:-1]
+
+    def city_and_name():
+        show, city = random_show_args()
+        return repos.events.get_events_by_city_and_name(
+            city, data.events_by_id[show.event_id].name[:-1]
+        )
+
+    return [
+        Bench("artist.get_by_id", lambda: repos.artists.get_by_id(pick(data.artists).id)),
+        Bench(
+            "artist.batch_get_by_ids",
+            lambda: repos.artists.batch_get_by_ids(
+                [a.id for a in rng.sample(data.artists, 10)]
+            ),
+        ),
+        Bench(
+            "artist.add_artist",
+            lambda: repos.artists.add_artist(
+                Artist(id=new_id(rng), name="new artist", bio="bio")
+            ),
+        ),
+        Bench(
+            "event.add_event",
+            lambda: repos.events.add_event(
+                make_event(rng, rng.randrange(10**6), data.artists)
+            ),
+        ),
+        Bench("event.get_by_id", lambda: repos.events.get_by_id(pick(data.events).id)),
+        Bench(
+            "event.get_version", lambda: repos.events.get_version(pick(data.events).id)
+        ),
+        Bench(
+            "event.get_events_by_name",
+            lambda: repos.events.get_events_by_name(search_prefix()),
+        ),
+        Bench(
+            "event.get_events_of_host",
+            lambda: repos.events.get_events_of_host(pick(data.host_ids)),
+        ),
+        Bench("event.get_events_by_city_and_name", city_and_name),
+        Bench(
+            "event.update_event",
+            lambda: repos.events.update_event(pick(data.events).id, False),
+        ),
+        Bench("venue.add_venue", add_venue),
+        Bench(
+            "venue.get_venue_by_id",
+            lambda: repos.venues.get_venue_by_id(pick(data.venues).id),
+        ),
+        Bench(
+            "venue.get_version", lambda: repos.venues.get_version(pick(data.venues).id)
+        ),
+        Bench(
+            "venue.get_host_venues",
+            lambda: repos.venues.get_host_venues(pick(data.host_ids)),
+        ),
+        Bench(
+            "venue.batch_get_venues",
+            lambda: repos.venues.batch_get_venues(
+                [v.id for v in rng.sample(data.venues, 10)]
+            ),
+        ),
+        Bench(
+            "venue.update_venue",
+            lambda: (lambda v: repos.venues.update_venue(v.id, v.host_id, False))(
+                pick(data.venues)
+            ),
+        ),
+        Bench("venue.add_and_delete_venue", delete_venue),
+        Bench("show.create_show", create_show),
+        Bench(
+            "show.get_show_by_id",
+            lambda: repos.shows.get_show_by_id(pick(data.shows).id),
+        ),
+        Bench("show.get_version", lambda: repos.shows.get_version(pick(data.shows).id)),
+        Bench(
+            "show.batch_get_shows_by_ids",
+            lambda: repos.shows.batch_get_shows_by_ids(
+                [s.id for s in rng.sample(data.shows, 20)]
+            ),
+        ),
+        Bench("show.list_by_event_city", list_by_event_city),
+        Bench("show.list_by_event_date", list_by_event_date),
+        Bench("show.update_show", update_show),
+        Bench(
+            "user.add_user",
+            lambda: repos.users.add_user(make_user(rng, rng.randrange(10**9))),
+        ),
+        Bench("user.get_by_mail", lambda: repos.users.get_by_mail(pick(data.users).email)),
+        Bench("user.get_by_id", lambda: repos.users.get_by_id(pick(data.users).user_id)),
+        Bench("booking.add_booking", add_booking),
+        Bench(
+            "booking.get_bookings",
+            lambda: repos.bookings.get_bookings(pick(data.users).user_id),
+        ),
+    ]
+
+
+def run_bench(bench: Bench, rounds: int, alloc_rounds: int) -> dict:
+    samples = []
+    errors = 0
+    last_error = None
+    # like timeit: a full collection over a seeded table takes longer than
+    # most calls, so keep it out of the samples
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            try:
+                bench.call()
+            except Exception as err:
+                errors += 1
+                last_error = f"{type(err).__name__}: {err}"
+            samples.append(time.perf_counter_ns() - start)
+    finally:
+        gc.enable()
+    samples.sort()
+
+    # allocations are measured in a separate pass, tracemalloc skews timings
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_rounds):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            try:
+                bench.call()
+            except Exception:
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+
+    total_seconds = sum(samples) / 1e9
+    return {
+        "ops_per_sec": round(rounds / total_seconds, 1) if total_seconds else None,
+        "p50_us": round(statistics.median(samples) / 1000, 2),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000, 2),
+        "alloc_peak_kib": round(statistics.median(peaks) / 1024, 2) if peaks else None,
+        "errors": errors,
+        "last_error": last_error,
+    }
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Prints per-method changes and returns the methods whose p50 got slower
+    by more than `threshold` percent."""
+    regressions = []
+    print(
+        f"\ncompared with {baseline['meta'].get('commit')} "
+        f"(scale {baseline['meta'].get('scale')})"
+    )
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before.get("p50_us"):
+            print(f"{name:<40} new")
+            continue
+        change = (result["p50_us"] - before["p50_us"]) / before["p50_us"] * 100
+        alloc_change = ""
+        if before.get("alloc_peak_kib") and result.get("alloc_peak_kib") is not None:
+            alloc_change = (
+                f" alloc {result['alloc_peak_kib'] - before['alloc_peak_kib']:+.2f}KiB"
+            )
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<40} p50 {change:+7.1f}%{alloc_change}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=0.1,
+        help="fraction of production volumes to seed (1 = 10k events, 100k shows, 1M bookings)",
+    )
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--alloc-rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="run only benchmarks whose name contains this")
+    parser.add_argument("--output", help="where to write results JSON")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="p50 slowdown in percent that counts as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    repos = build_repositories()
+    started = time.perf_counter()
+    data = seed(repos, args.scale, rng)
+    print(
+        f"seeded {len(repos.table)} items (scale {args.scale}) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+    results = {}
+    for bench in benches(repos, data, rng):
+        if args.only and args.only not in bench.name:
+            continue
+        result = run_bench(bench, args.rounds, args.alloc_rounds)
+        results[bench.name] = result
+        print(
+            f"{bench.name:<40} ops/s={result['ops_per_sec']:>10} "
+            f"p50={result['p50_us']:>9}us p99={result['p99_us']:>9}us "
+            f"alloc={result['alloc_peak_kib']:>8}KiB"
+            + (f" errors={result['errors']} ({result['last_error']})" if result["errors"] else "")
+        )
+
+    commit = current_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scale": args.scale,
+            "rounds": args.rounds,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "items": len(repos.table),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"repositories-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != args.scale:
+            print("warning: baseline was seeded at a different scale")
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Serialization benchmarks for the `/events` and `/shows` list endpoints.
+
+Compares FastAPI's default path (`jsonable_encoder` + `json.dumps`) against
+`FastJSONResponse`, both for the encoder alone and end to end through the app
+with the services stubbed out.
+
+    python -m benchmarks.bench_responses --items 500 --rounds 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_current_user, get_event_service, get_show_service
+from app.main import app
+from app.models.events import Event
+from app.schemas.response import APIResponse
+from app.schemas.shows import ShowResponse, VenuDTO
+from app.utils.json_response import dumps
+
+
+def make_events(n: int):
+    return [
+        Event(
+            id=f"event-{i}",
+            name=f"event name {i}",
+            description="a long enough description " * 4,
+            duration=Decimal(120),
+            category="movie",
+            is_blocked=False,
+            artist_ids=[f"artist-{j}" for j in range(5)],
+            artist_names=[f"Artist {j}" for j in range(5)],
+        )
+        for i in range(n)
+    ]
+
+
+def make_shows(n: int, validated: bool = False):
+    # the pre-FastJSONResponse service validated every ShowResponse
+    build = ShowResponse if validated else ShowResponse.model_construct
+    return [
+        build(
+            id=f"show-{i}",
+            event_id="event-1",
+            price=Decimal(300),
+            show_date="2026-01-28",
+            show_time="18:00",
+            booked_seats=[f"{row}{seat}" for row in "ABCDE" for seat in range(1, 21)],
+            venue=VenuDTO(
+                venue_id="venue-1", venue_name="PVR", city="delhi", state="delhi"
+            ),
+            is_blocked=False,
+            host_id="host-1",
+        )
+        for i in range(n)
+    ]
+
+
+def envelope(data) -> APIResponse:
+    return APIResponse(status_code=200, message="ok", data=data)
+
+
+def default_encode(payload) -> bytes:
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def timeit(fn, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "ops_per_sec": rounds / (sum(samples) / 1000),
+    }
+
+
+def report(name: str, result: dict):
+    print(
+        f"{name:<40} p50={result['p50_ms']:8.3f}ms "
+        f"p99={result['p99_ms']:8.3f}ms ops/s={result['ops_per_sec']:10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    events = make_events(args.items)
+    shows = make_shows(args.items)
+
+    report(
+        "encode events jsonable_encoder",
+        timeit(lambda: default_encode(envelope(events)), args.rounds),
+    )
+    report(
+        "encode events FastJSONResponse",
+        timeit(lambda: dumps(envelope(events)), args.rounds),
+    )
+    report(
+        "build+encode shows jsonable_encoder",
+        timeit(
+            lambda: default_encode(envelope(make_shows(args.items, validated=True))),
+            args.rounds,
+        ),
+    )
+    report(
+        "build+encode shows FastJSONResponse",
+        timeit(lambda: dumps(envelope(make_shows(args.items))), args.rounds),
+    )
+
+    event_service = MagicMock()
+    event_service.browse_events_by_city.return_value = events
+    show_service = MagicMock()
+    show_service.get_event_shows.return_value = shows
+    app.dependency_overrides[get_event_service] = lambda: event_service
+    app.dependency_overrides[get_show_service] = lambda: show_service
+    app.dependency_overrides[get_current_user] = lambda: {
+        "user_id": "u1",
+        "role": "customer",
+    }
+    try:
+        client = TestClient(app)
+        events_params = {"city": "delhi"}
+        shows_params = {"event_id": "e1", "city": "delhi"}
+        report(
+            "GET /events?city=",
+            timeit(lambda: client.get("/events", params=events_params), args.rounds),
+        )
+        report(
+            "GET /shows",
+            timeit(lambda: client.get("/shows", params=shows_params), args.rounds),
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
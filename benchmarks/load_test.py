@@ -0,0 +1,445 @@
+"""On-sale load test: drives the real FastAPI app against the in-memory table.
+
+Every virtual user logs in, browses the city, lists the shows of the hot
+event and then tries to book seats on one of the hot shows, retrying with
+other seats when theirs were taken. Users arrive as a Poisson process at
+`--arrival-rate` per second, so a Friday on-sale spike is a high rate and a
+small seat pool.
+
+Requests go through the full middleware and router stack in-process (httpx's
+ASGI transport), so there is no network in the numbers. Sync endpoints run on
+the same threadpool as under uvicorn, so races between requests are real.
+
+    python -m benchmarks.load_test --users 2000 --arrival-rate 400 --seats 150
+
+After the run every booking item is read back, and seats sold more than once
+are reported as double bookings.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import random
+import re
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+
+import bcrypt
+import httpx
+from boto3.dynamodb.conditions import Attr
+
+from app.main import app, build_services
+from app.models.artists import Artist
+from app.models.users import Role, User
+from app.repository.event_repository import EventRepository
+from app.repository.show_repository import ShowRepository
+from app.repository.user_repository import UserRepository
+from app.repository.venue_repository import VenueRepository
+from benchmarks.bench_repositories import make_event, make_show, make_venue, new_id
+from app.repository.memory_table import MemoryTable
+
+CITY = "delhi"
+PASSWORD = "on-sale-password"
+# seat sets and ids vary per request; drop them so errors group by kind
+VARIABLE_PARTS = re.compile(r"\{[^}]*\}|[0-9a-f]{8}-[0-9a-f-]{27}")
+
+
+@dataclass
+class Scenario:
+    users: int
+    arrival_rate: float
+    events: int
+    hot_shows: int
+    seats: int
+    seats_per_booking: int
+    retries: int
+    dynamodb_latency_ms: float
+    timeout: float
+    seed: int
+
+
+@dataclass
+class Seeded:
+    table: MemoryTable
+    emails: List[str]
+    hot_event_id: str
+    hot_show_ids: List[str]
+    seat_pool: List[str]
+
+
+@dataclass
+class Results:
+    samples: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    booked: Counter = field(default_factory=Counter)
+    sold_out: int = 0
+    users_done: int = 0
+
+
+def seed(scenario: Scenario, rng: random.Random) -> Seeded:
+    table = MemoryTable("eventro_table")
+    events_repo = EventRepository(table=table)
+    venues_repo = VenueRepository(table=table)
+    shows_repo = ShowRepository(table=table)
+    users_repo = UserRepository(table=table)
+
+    artists = [Artist(id=new_id(rng), name=f"Artist {i}") for i in range(10)]
+    events = [make_event(rng, i, artists) for i in range(scenario.events)]
+    for event in events:
+        events_repo.add_event(event)
+    host_id = new_id(rng)
+    venues = []
+    for i in range(max(1, scenario.hot_shows)):
+        venue = make_venue(rng, i, host_id)
+        venue.city = CITY
+        venues_repo.add_venue(venue)
+        venues.append(venue)
+
+    # the hot event plays at every venue; the rest get a show each so the
+    # city listing is realistic
+    hot_event = events[0]
+    hot_show_ids = []
+    for i in range(scenario.hot_shows):
+        show = make_show(rng, hot_event, venues[i % len(venues)], date.today())
+        show.capacity = scenario.seats
+        shows_repo.create_show(show=show, venue=venues[i % len(venues)], event=hot_event)
+        hot_show_ids.append(show.id)
+    for event in events[1:]:
+        venue = rng.choice(venues)
+        shows_repo.create_show(
+            show=make_show(rng, event, venue, date.today()), venue=venue, event=event
+        )
+
+    # cheap bcrypt cost: login stays on the path without dominating it
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode()
+    emails = []
+    for i in range(scenario.users):
+        email = f"fan{i}@example.com"
+        users_repo.add_user(
+            User(
+                user_id=new_id(rng),
+                username=f"fan{i}",
+                email=email,
+                phone_number=f"9{i:09d}",
+                password=password_hash,
+                role=Role.CUSTOMER,
+                is_blocked=False,
+            )
+        )
+        emails.append(email)
+
+    # rows of 20: R1-1 .. R1-20, R2-1 ..
+    seat_pool = [f"R{i // 20 + 1}-{i % 20 + 1}" for i in range(scenario.seats)]
+    return Seeded(table, emails, hot_event.id, hot_show_ids, seat_pool)
+
+
+def add_latency(table: MemoryTable, seconds: float):
+    """Sleeps before every table and client call, standing in for the round
+    trip to DynamoDB. Without it the read-check-write window in a booking is
+    microseconds wide and races that happen in production rarely show up."""
+
+    def delayed(call):
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            time.sleep(seconds)
+            return call(*args, **kwargs)
+
+        return wrapper
+
+    for target, names in (
+        (table, ("get_item", "put_item", "update_item", "delete_item", "query", "scan")),
+        (
+            table.meta.client,
+            (
+                "get_item",
+                "put_item",
+                "update_item",
+                "delete_item",
+                "query",
+                "scan",
+                "batch_get_item",
+                "batch_write_item",
+                "transact_get_items",
+                "transact_write_items",
+            ),
+        ),
+    ):
+        for name in names:
+            setattr(target, name, delayed(getattr(target, name)))
+
+
+async def timed(
+    results: Results, step: str, client: httpx.AsyncClient, method: str, url: str, **kwargs
+) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except Exception as err:
+        results.samples[step].append((time.perf_counter() - start) * 1000)
+        results.errors[(step, "exception", type(err).__name__)] += 1
+        return None
+    results.samples[step].append((time.perf_counter() - start) * 1000)
+    results.statuses[(step, response.status_code)] += 1
+    if response.status_code >= 400:
+        try:
+            message = str(response.json().get("message", ""))
+        except ValueError:
+            message = response.text
+        message = VARIABLE_PARTS.sub("*", message)[:60]
+        results.errors[(step, response.status_code, message)] += 1
+    return response
+
+
+async def virtual_user(
+    index: int,
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    seeded: Seeded,
+    results: Results,
+    rng: random.Random,
+):
+    # a distinct client address per user, or the per-IP login limit trips
+    headers = {"X-Forwarded-For": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"}
+    response = await timed(
+        results,
+        "login",
+        client,
+        "POST",
+        "/login",
+        json={"email": seeded.emails[index], "password": PASSWORD},
+        headers=headers,
+    )
+    if response is None or response.status_code != 200:
+        return
+    headers["Authorization"] = f"Bearer {response.json()['data']}"
+
+    await timed(results, "browse_city", client, "GET", "/events", params={"city": CITY}, headers=headers)
+    await timed(
+        results,
+        "list_shows",
+        client,
+        "GET",
+        "/shows",
+        params={"event_id": seeded.hot_event_id, "city": CITY},
+        headers=headers,
+    )
+
+    show_id = rng.choice(seeded.hot_show_ids)
+    for _ in range(scenario.retries + 1):
+        seats = rng.sample(seeded.seat_pool, scenario.seats_per_booking)
+        response = await timed(
+            results,
+            "book",
+            client,
+            "POST",
+            "/bookings",
+            json={"show_id": show_id, "seats": seats},
+            headers=headers,
+        )
+        # waiting room: come back with the queue token when told to
+        while response is not None and response.status_code == 429:
+            queue_token = (response.json().get("data") or {}).get("queue_token")
+            if not queue_token:
+                break
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+            response = await timed(
+                results,
+                "book",
+                client,
+                "POST",
+                "/bookings",
+                json={"show_id": show_id, "seats": seats},
+                headers={**headers, "X-Queue-Token": queue_token},
+            )
+        if response is None:
+            break
+        if response.status_code == 201:
+            for seat in seats:
+                results.booked[(show_id, seat)] += 1
+            break
+        if response.status_code != 400:
+            break
+    else:
+        results.sold_out += 1
+    results.users_done += 1
+
+
+async def run(scenario: Scenario, seeded: Seeded) -> tuple:
+    rng = random.Random(scenario.seed + 1)
+    results = Results()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://load-test", timeout=scenario.timeout
+    ) as client:
+        tasks = []
+        started = time.perf_counter()
+        arrival = 0.0
+        for index in range(scenario.users):
+            # Poisson arrivals: exponential gaps at the requested rate
+            arrival += rng.expovariate(scenario.arrival_rate)
+            delay = arrival - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(
+                asyncio.create_task(
+                    virtual_user(index, client, scenario, seeded, results, rng)
+                )
+            )
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+
+def double_bookings(seeded: Seeded) -> dict:
+    """Reads every booking back from the table and counts seats sold more
+    than once, per hot show."""
+    sold: Counter = Counter()
+    # sale outbox items carry a show_id too; only booking items hold seats
+    kwargs = {
+        "FilterExpression": Attr("show_id").is_in(seeded.hot_show_ids)
+        & Attr("sk").begins_with("SHOW_DATE#")
+    }
+    while True:
+        page = seeded.table.scan(**kwargs)
+        for item in page["Items"]:
+            for seat in item["seats"]:
+                sold[(item["show_id"], seat)] += 1
+        if "LastEvaluatedKey" not in page:
+            break
+        kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+    oversold = {key: count for key, count in sold.items() if count > 1}
+    return {
+        "seats_sold": len(sold),
+        "seat_sales": sum(sold.values()),
+        "double_booked_seats": len(oversold),
+        "extra_sales": sum(count - 1 for count in oversold.values()),
+    }
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(scenario: Scenario, results: Results, elapsed: float, integrity: dict) -> dict:
+    requests = sum(len(samples) for samples in results.samples.values())
+    successful_bookings = results.statuses.get(("book", 201), 0)
+    return {
+        "scenario": scenario.__dict__,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "bookings_per_second": round(successful_bookings / elapsed, 1),
+        "users_completed": results.users_done,
+        "users_sold_out": results.sold_out,
+        "latency_ms": {
+            step: {
+                "count": len(samples),
+                "p50": round(statistics.median(samples), 2),
+                "p95": round(percentile(samples, 0.95), 2),
+                "p99": round(percentile(samples, 0.99), 2),
+                "max": round(max(samples), 2),
+            }
+            for step, samples in results.samples.items()
+        },
+        "statuses": {f"{step} {status}": n for (step, status), n in sorted(results.statuses.items())},
+        "errors": {
+            f"{step} {status} {message}".strip(): n
+            for (step, status, message), n in results.errors.most_common()
+        },
+        "integrity": integrity,
+    }
+
+
+def print_report(report: dict):
+    print(
+        f"\n{report['requests']} requests in {report['elapsed_seconds']}s "
+        f"({report['throughput_rps']} req/s, {report['bookings_per_second']} bookings/s)"
+    )
+    print(f"{'step':<14}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for step, stats in report["latency_ms"].items():
+        print(
+            f"{step:<14}{stats['count']:>8}{stats['p50']:>10}{stats['p95']:>10}"
+            f"{stats['p99']:>10}{stats['max']:>10}"
+        )
+    print("\nstatuses")
+    for key, count in report["statuses"].items():
+        print(f"  {key:<40}{count:>8}")
+    if report["errors"]:
+        print("\nerrors")
+        for key, count in report["errors"].items():
+            print(f"  {key:<70}{count:>8}")
+    integrity = report["integrity"]
+    print(
+        f"\nseats sold {integrity['seats_sold']}, seat sales "
+        f"{integrity['seat_sales']}, double-booked seats "
+        f"{integrity['double_booked_seats']} ({integrity['extra_sales']} extra sales)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument(
+        "--arrival-rate", type=float, default=200.0, help="new users per second"
+    )
+    parser.add_argument("--events", type=int, default=20, help="events in the city")
+    parser.add_argument("--hot-shows", type=int, default=1)
+    parser.add_argument("--seats", type=int, default=200, help="seats per hot show")
+    parser.add_argument("--seats-per-booking", type=int, default=2)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument(
+        "--dynamodb-latency-ms",
+        type=float,
+        default=5.0,
+        help="simulated round trip added to every table call",
+    )
+    parser.add_argument(
+        "--log-slow-requests",
+        action="store_true",
+        help="keep the slow-request log lines (noisy once the app saturates)",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    scenario = Scenario(
+        users=args.users,
+        arrival_rate=args.arrival_rate,
+        events=args.events,
+        hot_shows=args.hot_shows,
+        seats=args.seats,
+        seats_per_booking=args.seats_per_booking,
+        retries=args.retries,
+        dynamodb_latency_ms=args.dynamodb_latency_ms,
+        timeout=args.timeout,
+        seed=args.seed,
+    )
+    if not args.log_slow_requests:
+        logging.getLogger("app.utils.profiling").setLevel(logging.ERROR)
+
+    seeded = seed(scenario, random.Random(args.seed))
+    if scenario.dynamodb_latency_ms > 0:
+        add_latency(seeded.table, scenario.dynamodb_latency_ms / 1000)
+    build_services(app, seeded.table)
+
+    results, elapsed = asyncio.run(run(scenario, seeded))
+    report = summarize(scenario, results, elapsed, double_bookings(seeded))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.booking import Booking
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.venue import Venue
+from app.repository.analytics_repository import AnalyticsRepository, sale_outbox_put
+from app.repository.memory_table import MemoryTable
+
+
+@pytest.fixture
+def table():
+    return MemoryTable("eventro_table")
+
+
+def sample_event(event_id="e1"):
+    return Event(
+        id=event_id,
+        name=f"Concert {event_id}",
+        description="Live",
+        duration=Decimal(120),
+        category="music",
+        is_blocked=False,
+        artist_ids=["a1"],
+        artist_names=["Artist"],
+    )
+
+
+def sample_venue():
+    return Venue(
+        id="v1",
+        name="Hall",
+        host_id="h1",
+        city="delhi",
+        state="delhi",
+        is_blocked=False,
+        is_seat_layout_required=True,
+    )
+
+
+def sample_show(show_id="s1", event_id="e1"):
+    return Show(
+        id=show_id,
+        venue_id="v1",
+        event_id=event_id,
+        is_blocked=False,
+        price=Decimal(150),
+        show_date="2030-01-05",
+        show_time="18:00",
+        booked_seats=[],
+    )
+
+
+def sample_booking(booking_id, seats, price):
+    return Booking(
+        user_id="u1",
+        booking_id=booking_id,
+        show_id="s1",
+        time_booked="",
+        total_booking_price=price,
+        seats=seats,
+    )
+
+
+def record_sale(table, booking_id, tickets, day, show_id="s1", event_id="e1", shard=0):
+    """Puts the outbox item a booking transaction would, on `shard`."""
+    booking = sample_booking(booking_id, [f"A{i}" for i in range(tickets)], 150 * tickets)
+    show, event = sample_show(show_id, event_id), sample_event(event_id)
+    put = sale_outbox_put(table.name, show, event, sample_venue(), [booking], day, 1)
+    item = dict(put["Put"]["Item"], pk=f"OUTBOX#SALES#{shard}")
+    table.put_item(Item=item)
+
+
+def apply_all(repo, shards=2):
+    return sum(repo.apply_sales(repo.list_sales(s, 100), s) for s in range(shards))
+
+
+def test_sales_add_up_per_host_event_show_and_day(table):
+    repo = AnalyticsRepository(table=table, counter_shards=2)
+    record_sale(table, "b1", 2, "2030-01-01")
+    record_sale(table, "b2", 1, "2030-01-02", shard=1)
+    record_sale(table, "b3", 4, "2030-01-02", show_id="s2", event_id="e2")
+
+    assert apply_all(repo) == 3
+
+    total = repo.get_total("h1")
+    assert (total["tickets"], total["revenue"], total["bookings"]) == (7, 1050, 3)
+    daily = repo.list_daily("h1", "2030-01-01", "2030-01-02")
+    assert [(d["day"], d["tickets"]) for d in daily] == [("2030-01-01", 2), ("2030-01-02", 5)]
+    event_daily = repo.list_daily("h1", "2030-01-02", "2030-01-02", event_id="e2")
+    assert [d["tickets"] for d in event_daily] == [4]
+    show_daily = repo.list_daily("h1", "2030-01-01", "2030-01-31", show_id="s1")
+    assert [d["tickets"] for d in show_daily] == [2, 1]
+    events = repo.list_totals("h1", "EVENT")
+    assert [(e["event_name"], e["revenue"]) for e in events] == [
+        ("Concert e1", 450),
+        ("Concert e2", 600),
+    ]
+    shows = repo.list_totals("h1", "SHOW")
+    assert [(s["show_id"], s["bookings"]) for s in shows] == [("s1", 2), ("s2", 1)]
+    assert repo.get_total("h2") is None
+    # the sales went to different counter shards and are gone from the outbox
+    assert {item["pk"] for item in table.scan()["Items"] if item["sk"] == "TOTAL"} == {
+        "ANALYTICS#HOST#h1#0",
+        "ANALYTICS#HOST#h1#1",
+    }
+    assert repo.list_sales(0, 100) == [] and repo.list_sales(1, 100) == []
+
+
+def test_sales_of_one_batch_share_counter_updates(table):
+    repo = AnalyticsRepository(table=table, counter_shards=1)
+    for i in range(40):
+        record_sale(table, f"b{i:02}", 1, "2030-01-01")
+    calls = []
+    transact = table.meta.client.transact_write_items
+
+    def spy(**kwargs):
+        calls.append(len(kwargs["TransactItems"]))
+        return transact(**kwargs)
+
+    table.meta.client.transact_write_items = spy
+
+    assert repo.apply_sales(repo.list_sales(0, 100), 0) == 40
+
+    # six counters and forty deletes
+    assert calls == [46]
+    assert repo.get_total("h1")["tickets"] == 40
+
+
+def test_a_sale_applied_elsewhere_is_not_counted_twice(table):
+    repo = AnalyticsRepository(table=table, counter_shards=1)
+    record_sale(table, "b1", 1, "2030-01-01")
+    sales = repo.list_sales(0, 100)
+    assert repo.apply_sales(sales, 0) == 1
+
+    assert repo.apply_sales(sales, 0) == 0
+
+    assert repo.get_total("h1")["tickets"] == 1
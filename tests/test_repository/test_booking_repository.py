@@ -3,11 +3,12 @@ import pytest
 from botocore.exceptions import ClientError
 
 from app.repository.booking_repository import BookingRepository
-from app.models.booking import Booking
+from app.models.booking import Booking, CartLine
 from app.models.shows import Show
 from app.models.events import Event
 from app.models.venue import Venue
 from app.schemas.booking import BookingResponse
+from app.custom_exceptions.booking_exceptions import SeatAlreadyBookedException
 
 
 def make_table_mock():
@@ -38,6 +39,8 @@ def sample_show():
         show_date="2025-01-05",
         show_time="18:00",
         booked_seats=["B1"],
+        capacity=100,
+        seats_booked=1,
     )
 
 
@@ -79,18 +82,145 @@ def test_add_booking_calls_transact_write_items():
     table.meta.client.transact_write_items.assert_called_once()
     _, kwargs = table.meta.client.transact_write_items.call_args
     transact = kwargs["TransactItems"]
-    assert len(transact) == 2
+    assert len(transact) == 5
     update = transact[0]["Update"]
     assert update["Key"] == {"pk": f"SHOW#{show.id}", "sk": "DETAILS"}
     assert update["ExpressionAttributeValues"] == {
         ":empty_list": [],
         ":vals": booking.seats,
+        ":zero": 0,
+        ":one": 1,
+        ":count": 2,
+        ":max_booked": show.capacity - 2,
+        ":seat0": "A1",
+        ":seat1": "A2",
     }
+    assert update["ConditionExpression"].endswith(
+        "AND NOT contains(#l, :seat0) AND NOT contains(#l, :seat1)"
+    )
+    assert "#version = if_not_exists(#version, :zero) + :one" in update["UpdateExpression"]
+    assert "ADD #booked :count" in update["UpdateExpression"]
     put_item = transact[1]["Put"]["Item"]
     assert put_item["pk"] == f"USER#{booking.user_id}"
     assert put_item["sk"].startswith("SHOW_DATE#")
     assert put_item["event_id"] == event.id
     assert put_item["venue_id"] == venue.id
+    assert [item["Update"]["Key"] for item in transact[2:4]] == [
+        {"pk": "EVENT#e1#CITY#NYC", "sk": "DATE#2025-01-05#VENUE#v1#SHOW#s1"},
+        {"pk": "EVENT#e1#CITY#NYC", "sk": "VENUE#v1#SHOW#s1"},
+    ]
+    assert all(
+        item["Update"]["ExpressionAttributeValues"] == {":count": 2}
+        for item in transact[2:4]
+    )
+    sale = transact[4]["Put"]["Item"]
+    assert sale["pk"].startswith("OUTBOX#SALES#")
+    assert (sale["host_id"], sale["show_id"], sale["tickets"]) == ("h1", "s1", 2)
+
+
+def test_add_booking_raises_when_show_is_sold_out():
+    table = make_table_mock()
+    error = ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+            "CancellationReasons": [
+                {
+                    "Code": "ConditionalCheckFailed",
+                    "Item": {
+                        "booked_seats": {"L": [{"S": "B1"}]},
+                        "capacity": {"N": "10"},
+                        "seats_booked": {"N": "9"},
+                    },
+                },
+                {"Code": "None"},
+                {"Code": "None"},
+                {"Code": "None"},
+                {"Code": "None"},
+            ],
+        },
+        "TransactWriteItems",
+    )
+    table.meta.client.transact_write_items.side_effect = error
+    repo = BookingRepository(table=table)
+    show = sample_show()
+    show.capacity, show.seats_booked = 10, 1
+
+    with pytest.raises(SeatAlreadyBookedException, match="only 1 seats left"):
+        repo.add_booking(sample_booking(), show, sample_event(), sample_venue())
+
+
+def test_add_cart_writes_every_show_in_one_transaction():
+	table = make_table_mock()
+	repo = BookingRepository(table=table)
+	other = sample_show()
+	other.id, other.seat_sections = "s2", ["A", "B"]
+	booking = sample_booking()
+	sectioned_booking = sample_booking()
+	sectioned_booking.booking_id, sectioned_booking.seats = "b2", ["A-1", "B-1"]
+
+	repo.add_cart(
+		[
+			CartLine(sample_show(), sample_event(), sample_venue(), [booking]),
+			CartLine(other, sample_event(), sample_venue(), [sectioned_booking]),
+		]
+	)
+
+	table.meta.client.transact_write_items.assert_called_once()
+	transact = table.meta.client.transact_write_items.call_args.kwargs["TransactItems"]
+	# details, put, two listing rows and a sale for s1; two sections, a put
+	# and a sale for s2
+	assert len(transact) == 9
+	assert [item["Update"]["Key"]["sk"] for item in transact[5:7]] == ["SEATS#A", "SEATS#B"]
+	assert transact[7]["Put"]["Item"]["show_id"] == "s2"
+	assert transact[8]["Put"]["Item"]["pk"].startswith("OUTBOX#SALES#")
+	# the sectioned show's counters are bumped after the commit
+	assert table.update_item.call_count == 3
+
+
+def test_add_cart_names_the_show_whose_seats_are_taken():
+	table = make_table_mock()
+	error = ClientError(
+		{
+			"Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+			"CancellationReasons": [{"Code": "None"}] * 5
+			+ [
+				{
+					"Code": "ConditionalCheckFailed",
+					"Item": {"booked_seats": {"L": [{"S": "A-1"}]}},
+				},
+				{"Code": "None"},
+			],
+		},
+		"TransactWriteItems",
+	)
+	table.meta.client.transact_write_items.side_effect = error
+	repo = BookingRepository(table=table)
+	other = sample_show()
+	other.id, other.seat_sections = "s2", ["A"]
+	other_booking = sample_booking()
+	other_booking.seats = ["A-1"]
+
+	with pytest.raises(SeatAlreadyBookedException, match="for show s2"):
+		repo.add_cart(
+			[
+				CartLine(sample_show(), sample_event(), sample_venue(), [sample_booking()]),
+				CartLine(other, sample_event(), sample_venue(), [other_booking]),
+			]
+		)
+	table.update_item.assert_not_called()
+
+
+def test_add_cart_rejects_carts_over_the_transaction_limit():
+	table = make_table_mock()
+	repo = BookingRepository(table=table)
+	lines = [
+		CartLine(sample_show(), sample_event(), sample_venue(), [sample_booking()])
+		for _ in range(21)
+	]
+
+	with pytest.raises(ValueError):
+		repo.add_cart(lines)
+	table.meta.client.transact_write_items.assert_not_called()
 
 
 def test_add_booking_raises_client_error():
@@ -1,3 +1,4 @@
+from dataclasses import replace
 from unittest.mock import MagicMock
 import pytest
 from botocore.exceptions import ClientError
@@ -111,16 +112,19 @@ def test_get_events_by_name_returns_events():
 				"is_event_blocked": False,
 				"artist_ids": ["a1"],
 				"artist_names": ["Alice"],
+				"event_version": 2,
 			}
 		]
 	}
 	repo = EventRepository(table=table)
-	repo._batch_get_events = MagicMock(return_value=[sample_event()])
+	repo.batch_get_events = MagicMock()
 
 	events = repo.get_events_by_name("Concert")
 
-	assert len(events) == 1
-	repo._batch_get_events.assert_called_once_with(event_ids=["e1"])
+	assert [(e.id, e.name, e.artist_names, e.version) for e in events] == [
+		("e1", "Concert", ["Alice"], 2)
+	]
+	repo.batch_get_events.assert_not_called()
 	table.query.assert_called_once()
 
 
@@ -128,10 +132,10 @@ def test_get_events_by_name_empty_returns_empty_list():
 	table = make_table_mock()
 	table.query.return_value = {"Items": []}
 	repo = EventRepository(table=table)
-	repo._batch_get_events = MagicMock(return_value=[])
+	repo.batch_get_events = MagicMock(return_value=[])
 
 	assert repo.get_events_by_name("Missing") == []
-	repo._batch_get_events.assert_called_once_with(event_ids=[])
+	repo.batch_get_events.assert_not_called()
 	table.query.assert_called_once()
 
 
@@ -144,14 +148,14 @@ def test_get_events_of_host_returns_events():
 		]
 	}
 	repo = EventRepository(table=table)
-	repo._batch_get_events = MagicMock(
+	repo.batch_get_events = MagicMock(
 		return_value=[sample_event(), sample_event()]
 	)
 
 	events = repo.get_events_of_host("h1")
 
 	assert len(events) == 2
-	repo._batch_get_events.assert_called_once_with(event_ids=["e1", "e2"])
+	repo.batch_get_events.assert_called_once_with(event_ids=["e1", "e2"])
 	table.query.assert_called_once()
 
 
@@ -159,16 +163,16 @@ def test_get_events_of_host_empty_returns_empty_list():
 	table = make_table_mock()
 	table.query.return_value = {"Items": []}
 	repo = EventRepository(table=table)
-	repo._batch_get_events = MagicMock()
+	repo.batch_get_events = MagicMock()
 
 	events = repo.get_events_of_host("h1")
 
 	assert events == []
-	repo._batch_get_events.assert_not_called()
+	repo.batch_get_events.assert_not_called()
 	table.query.assert_called_once()
 
 
-def test_batch_get_events_handles_unprocessed_keys():
+def testbatch_get_events_handles_unprocessed_keys():
 	table = make_table_mock()
 	first_resp = {
 		"Responses": {
@@ -209,7 +213,7 @@ def test_batch_get_events_handles_unprocessed_keys():
 	table.meta.client.batch_get_item.side_effect = [first_resp, second_resp]
 	repo = EventRepository(table=table)
 
-	events = repo._batch_get_events(["e1", "e2"])
+	events = repo.batch_get_events(["e1", "e2"])
 
 	assert {e.id for e in events} == {"e1", "e2"}
 	assert table.meta.client.batch_get_item.call_count == 2
@@ -228,37 +232,56 @@ def test_get_events_by_city_and_name_returns_events():
 				"is_event_blocked": False,
 				"artist_ids": ["a1"],
 				"artist_names": ["Alice"],
+				"event_version": 1,
 			}
 		]
 	}
 	repo = EventRepository(table=table)
-	repo._batch_get_events = MagicMock(return_value=[sample_event()])
+	repo.batch_get_events = MagicMock()
 
 	events = repo.get_events_by_city_and_name(city="NYC", name="Concert")
 
-	assert len(events) == 1
-	repo._batch_get_events.assert_called_once_with(event_ids=["e1"])
+	assert [(e.id, e.name, e.is_blocked) for e in events] == [("e1", "Concert", False)]
+	repo.batch_get_events.assert_not_called()
 	table.query.assert_called_once()
 
 
+def test_city_rows_without_a_version_are_read_from_the_event():
+	table = make_table_mock()
+	table.query.return_value = {
+		"Items": [
+			{"pk": "CITY#NYC", "sk": "NAME#Concert#ID#e1", "is_event_blocked": False},
+			{"pk": "CITY#NYC", "sk": "NAME#Concert#ID#e2", "is_event_blocked": False},
+		]
+	}
+	repo = EventRepository(table=table)
+	repo.batch_get_events = MagicMock(return_value=[replace(sample_event(), is_blocked=True)])
+
+	events = repo.get_events_by_city_and_name(city="NYC")
+
+	# e2 no longer exists
+	assert [(e.id, e.is_blocked) for e in events] == [("e1", True)]
+	repo.batch_get_events.assert_called_once_with(["e1", "e2"])
+
+
 def test_get_events_by_city_and_name_empty_returns_empty_list():
 	table = make_table_mock()
 	table.query.return_value = {"Items": []}
 	repo = EventRepository(table=table)
-	repo._batch_get_events = MagicMock()
+	repo.batch_get_events = MagicMock()
 
 	events = repo.get_events_by_city_and_name(city="NYC", name="Missing")
 
 	assert events == []
-	repo._batch_get_events.assert_not_called()
+	repo.batch_get_events.assert_not_called()
 	table.query.assert_called_once()
 
 
-def test_batch_get_events_empty_list_returns_empty_and_skips_client_call():
+def testbatch_get_events_empty_list_returns_empty_and_skips_client_call():
 	table = make_table_mock()
 	repo = EventRepository(table=table)
 
-	result = repo._batch_get_events([])
+	result = repo.batch_get_events([])
 
 	assert result == []
 	table.meta.client.batch_get_item.assert_not_called()
@@ -273,13 +296,43 @@ def test_update_event_calls_transact_write_items():
 	table.meta.client.transact_write_items.assert_called_once()
 	_, kwargs = table.meta.client.transact_write_items.call_args
 	transact = kwargs["TransactItems"]
-	assert len(transact) == 1
+	assert len(transact) == 2
 	update = transact[0]["Update"]
+	outbox = transact[1]["Update"]
+	assert outbox["Key"] == {"pk": "OUTBOX", "sk": "EVENT_FLAG#e1"}
+	assert outbox["ExpressionAttributeValues"][":is_blocked"] is True
 	assert update["Key"] == {"pk": "EVENT#e1", "sk": "DETAILS"}
-	assert update["ExpressionAttributeValues"] == {":new_value": True}
+	assert update["ExpressionAttributeValues"] == {":new_value": True, ":zero": 0, ":one": 1}
+	assert "#version = if_not_exists(#version, :zero) + :one" in update["UpdateExpression"]
 	assert update["ConditionExpression"] == "attribute_exists(pk)"
 
 
+def test_set_projection_flag_falls_back_to_single_updates():
+	table = make_table_mock()
+	client = table.meta.client
+	client.transact_write_items.side_effect = ClientError(
+		{"Error": {"Code": "TransactionCanceledException", "Message": "x"}},
+		"TransactWriteItems",
+	)
+	client.update_item.side_effect = [
+		{},
+		ClientError(
+			{"Error": {"Code": "ConditionalCheckFailedException", "Message": "x"}},
+			"UpdateItem",
+		),
+	]
+	repo = EventRepository(table=table)
+
+	written = repo.set_projection_flag(
+		[{"pk": "CITY#NYC", "sk": "NAME#Concert#ID#e1"}, {"pk": "EVENTS", "sk": "gone"}],
+		True,
+		3,
+	)
+
+	assert written == 1
+	assert client.update_item.call_count == 2
+
+
 def test_update_event_raises_client_error():
 	table = make_table_mock()
 	error = ClientError({"Error": {"Code": "Boom", "Message": "fail"}}, "TransactWriteItems")
@@ -289,3 +342,24 @@ def test_update_event_raises_client_error():
 	with pytest.raises(ClientError):
 		repo.update_event(event_id="e1", is_blocked=False)
 
+
+
+def test_get_version_uses_projection():
+	table = make_table_mock()
+	table.get_item.return_value = {
+		"Item": {"pk": "EVENT#e1", "version": 3, "is_event_blocked": True}
+	}
+	repo = EventRepository(table=table)
+
+	assert repo.get_version("e1") == (3, True)
+	_, kwargs = table.get_item.call_args
+	assert kwargs["Key"] == {"pk": "EVENT#e1", "sk": "DETAILS"}
+	assert kwargs["ProjectionExpression"] == "#pk, #version, #is_blocked"
+
+
+def test_get_version_missing_item_returns_none():
+	table = make_table_mock()
+	table.get_item.return_value = {}
+	repo = EventRepository(table=table)
+
+	assert repo.get_version("e1") is None
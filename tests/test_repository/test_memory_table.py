@@ -0,0 +1,278 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from app.custom_exceptions.booking_exceptions import SeatAlreadyBookedException
+from app.models.booking import Booking
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.users import Role, User
+from app.models.venue import Venue
+from app.repository.booking_repository import BookingRepository
+from app.repository.event_repository import EventRepository
+from app.repository.memory_table import MemoryTable
+from app.repository.show_repository import ShowRepository
+from app.repository.user_repository import UserRepository
+from app.repository.venue_repository import VenueRepository
+from app.schemas.booking import CartCheckoutReq, CartItem
+from app.services.booking_service import BookingService
+
+
+@pytest.fixture
+def table():
+    return MemoryTable("eventro_table")
+
+
+def sample_event():
+    return Event(
+        id="e1",
+        name="Concert",
+        description="Live",
+        duration=Decimal(120),
+        category="music",
+        is_blocked=False,
+        artist_ids=["a1"],
+        artist_names=["Artist"],
+    )
+
+
+def sample_venue():
+    return Venue(
+        id="v1",
+        name="Hall",
+        host_id="h1",
+        city="delhi",
+        state="delhi",
+        is_blocked=False,
+        is_seat_layout_required=True,
+    )
+
+
+def sample_show():
+    return Show(
+        id="s1",
+        venue_id="v1",
+        event_id="e1",
+        is_blocked=False,
+        price=Decimal(150),
+        show_date="2030-01-05",
+        show_time="18:00",
+        booked_seats=[],
+    )
+
+
+def test_query_key_conditions_use_sort_key_order(table):
+    for sk in ["SHOW#3", "SHOW#1", "VENUE#1", "SHOW#2"]:
+        table.put_item(Item={"pk": "EVENT#e1", "sk": sk})
+
+    shows = table.query(
+        KeyConditionExpression=Key("pk").eq("EVENT#e1") & Key("sk").begins_with("SHOW#")
+    )["Items"]
+    assert [item["sk"] for item in shows] == ["SHOW#1", "SHOW#2", "SHOW#3"]
+
+    page = table.query(
+        KeyConditionExpression="pk = :pk AND sk BETWEEN :lo AND :hi",
+        ExpressionAttributeValues={":pk": "EVENT#e1", ":lo": "SHOW#2", ":hi": "SHOW#9"},
+        ScanIndexForward=False,
+        Limit=1,
+    )
+    assert [item["sk"] for item in page["Items"]] == ["SHOW#3"]
+    assert page["LastEvaluatedKey"] == {"pk": "EVENT#e1", "sk": "SHOW#3"}
+
+
+def test_conditional_put_and_update_expressions(table):
+    table.put_item(
+        Item={"pk": "SHOW#s1", "sk": "DETAILS", "price": 100},
+        ConditionExpression="attribute_not_exists(pk)",
+    )
+    with pytest.raises(ClientError) as err:
+        table.put_item(
+            Item={"pk": "SHOW#s1", "sk": "DETAILS"},
+            ConditionExpression=Attr("pk").not_exists(),
+        )
+    assert err.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+    updated = table.update_item(
+        Key={"pk": "SHOW#s1", "sk": "DETAILS"},
+        UpdateExpression="SET #l = list_append(if_not_exists(#l, :empty), :seats), "
+        "#v = if_not_exists(#v, :zero) + :one",
+        ConditionExpression="attribute_exists(pk)",
+        ExpressionAttributeNames={"#l": "booked_seats", "#v": "version"},
+        ExpressionAttributeValues={":empty": [], ":seats": ["A1"], ":zero": 0, ":one": 1},
+        ReturnValues="ALL_NEW",
+    )["Attributes"]
+    assert updated["booked_seats"] == ["A1"]
+    assert updated["version"] == Decimal(1)
+    assert updated["price"] == Decimal(100)
+
+
+def test_transaction_is_all_or_nothing(table):
+    client = table.meta.client
+    table.put_item(Item={"pk": "EMAIL#a@b.c", "sk": "USER#u1"})
+
+    with pytest.raises(client.exceptions.TransactionCanceledException) as err:
+        client.transact_write_items(
+            TransactItems=[
+                {"Put": {"TableName": table.name, "Item": {"pk": "USER#u2", "sk": "DETAILS"}}},
+                {
+                    "Put": {
+                        "TableName": table.name,
+                        "Item": {"pk": "EMAIL#a@b.c", "sk": "USER#u1"},
+                        "ConditionExpression": "attribute_not_exists(pk)",
+                    }
+                },
+            ]
+        )
+    reasons = err.value.response["CancellationReasons"]
+    assert [reason["Code"] for reason in reasons] == ["None", "ConditionalCheckFailed"]
+    assert "Item" not in table.get_item(Key={"pk": "USER#u2", "sk": "DETAILS"})
+
+
+def test_repositories_round_trip(table):
+    users = UserRepository(table=table)
+    user = User(
+        user_id="u1",
+        username="fan",
+        email="fan@example.com",
+        phone_number="9000000000",
+        password="hash",
+        role=Role.CUSTOMER,
+        is_blocked=False,
+    )
+    users.add_user(user)
+    assert users.get_by_mail("fan@example.com").user_id == "u1"
+    with pytest.raises(ClientError):
+        users.add_user(user)
+
+    event, venue, show = sample_event(), sample_venue(), sample_show()
+    EventRepository(table=table).add_event(event)
+    VenueRepository(table=table).add_venue(venue)
+    shows = ShowRepository(table=table)
+    shows.create_show(show=show, venue=venue, event=event)
+    assert [s.id for s in shows.list_by_event_city(event_id="e1", city="delhi")] == ["s1"]
+
+    bookings = BookingRepository(table=table)
+    bookings.add_booking(
+        booking=Booking(
+            booking_id="b1",
+            user_id="u1",
+            show_id="s1",
+            time_booked=date.today().isoformat(),
+            total_booking_price=Decimal(300),
+            seats=["A1", "A2"],
+        ),
+        show=show,
+        event=event,
+        venue=venue,
+    )
+    assert shows.get_show_by_id("s1").booked_seats == ["A1", "A2"]
+    assert [b.booking_id for b in bookings.get_bookings(user_id="u1")] == ["b1"]
+
+
+def test_booking_counters_reach_the_listing_rows(table):
+    event, venue, show = sample_event(), sample_venue(), sample_show()
+    show.capacity = 3
+    shows = ShowRepository(table=table)
+    shows.create_show(show=show, venue=venue, event=event)
+    bookings = BookingRepository(table=table)
+
+    def book(booking_id, seats):
+        bookings.add_booking(
+            booking=Booking(
+                booking_id=booking_id,
+                user_id="u1",
+                show_id="s1",
+                time_booked="",
+                total_booking_price=Decimal(150 * len(seats)),
+                seats=seats,
+            ),
+            show=shows.get_show_by_id("s1"),
+            event=event,
+            venue=venue,
+        )
+
+    book("b1", ["A1", "A2"])
+    (listed,) = shows.list_by_event_city(event_id="e1", city="delhi")
+    assert (listed.capacity, listed.seats_booked, listed.booked_seats) == (3, 2, None)
+    (listed,) = shows.list_by_event_date(event_id="e1", city="delhi", date="2030-01-05")
+    assert listed.seats_booked == 2
+
+    with pytest.raises(SeatAlreadyBookedException):
+        book("b2", ["A3", "A4"])
+    book("b3", ["A3"])
+    assert shows.get_show_by_id("s1").seats_booked == 3
+
+
+def test_sectioned_show_books_per_section(table):
+    event, venue, show = sample_event(), sample_venue(), sample_show()
+    show.capacity = 1000
+    show.seat_sections = [f"S{i}" for i in range(150)]
+    shows = ShowRepository(table=table)
+    shows.create_show(show=show, venue=venue, event=event)
+    bookings = BookingRepository(table=table)
+
+    def book(booking_id, seats):
+        bookings.add_booking(
+            booking=Booking(
+                booking_id=booking_id,
+                user_id="u1",
+                show_id="s1",
+                time_booked="",
+                total_booking_price=Decimal(150 * len(seats)),
+                seats=seats,
+            ),
+            show=shows.get_show_by_id("s1", include_seats=False),
+            event=event,
+            venue=venue,
+        )
+
+    book("b1", ["S0-1", "S149-1", "S149-2"])
+    with pytest.raises(SeatAlreadyBookedException, match="S149-2"):
+        book("b2", ["S3-1", "S149-2"])
+
+    section = table.get_item(Key={"pk": "SHOW#s1", "sk": "SEATS#S149"})["Item"]
+    assert section["booked_seats"] == ["S149-1", "S149-2"]
+    stored = shows.get_show_by_id("s1")
+    assert stored.booked_seats == ["S0-1", "S149-1", "S149-2"]
+    assert stored.seats_booked == 3
+    assert stored.version == 2
+    assert shows.get_show_by_id("s1", include_seats=False).booked_seats is None
+    (listed,) = shows.list_by_event_city(event_id="e1", city="delhi")
+    assert listed.seats_booked == 3
+
+
+def test_cart_checkout_is_all_or_nothing(table):
+    event, venue = sample_event(), sample_venue()
+    EventRepository(table=table).add_event(event)
+    VenueRepository(table=table).add_venue(venue)
+    shows = ShowRepository(table=table)
+    plain, sectioned = sample_show(), sample_show()
+    plain.capacity = 10
+    sectioned.id, sectioned.capacity, sectioned.seat_sections = "s2", 100, ["A", "B"]
+    shows.create_show(show=plain, venue=venue, event=event)
+    shows.create_show(show=sectioned, venue=venue, event=event)
+    service = BookingService(
+        booking_repo=BookingRepository(table=table),
+        show_repo=shows,
+        event_repo=EventRepository(table=table),
+        venue_repo=VenueRepository(table=table),
+    )
+
+    def cart(*items):
+        return CartCheckoutReq(
+            items=[CartItem(show_id=show_id, seats=seats) for show_id, seats in items]
+        )
+
+    checkout = service.checkout(cart(("s1", ["A1", "A2"]), ("s2", ["A-1"])), "u1")
+    assert checkout.total_price == 450
+    with pytest.raises(SeatAlreadyBookedException, match="for show s2"):
+        service.checkout(cart(("s1", ["A3"]), ("s2", ["A-1", "B-1"])), "u1")
+
+    # the failed cart left nothing behind on either show
+    assert shows.get_show_by_id("s1").booked_seats == ["A1", "A2"]
+    assert shows.get_show_by_id("s2").booked_seats == ["A-1"]
+    assert shows.get_show_by_id("s2").seats_booked == 1
+    assert len(service.get_user_bookings("u1").bookings) == 2
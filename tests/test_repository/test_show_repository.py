@@ -3,6 +3,7 @@ import pytest
 from botocore.exceptions import ClientError
 
 from app.repository.show_repository import ShowRepository
+from app.utils.cache import TTLCache
 from app.models.shows import Show
 from app.models.venue import Venue
 from app.models.events import Event
@@ -74,16 +75,159 @@ def test_create_show_calls_transact_write_items():
 	table.meta.client.transact_write_items.assert_called_once()
 	_, kwargs = table.meta.client.transact_write_items.call_args
 	transact = kwargs["TransactItems"]
-	assert len(transact) == 5
+	assert len(transact) == 3
 	show_put = transact[0]["Put"]["Item"]
 	assert show_put["pk"] == f"SHOW#{show.id}"
 	assert show_put["expires_at"] == ShowRepository._to_ddb_ttl(
 		show.show_date, show.show_time
 	)
-	host_event = transact[4]["Put"]["Item"]
-	assert host_event["pk"] == f"HOST#{venue.host_id}"
+	upserted = [call.kwargs["Key"]["pk"] for call in table.update_item.call_args_list]
+	assert upserted == [f"CITY#{venue.city}", f"HOST#{venue.host_id}"]
 
 
+def test_create_show_skips_listing_rows_already_written():
+	table = make_table_mock()
+	repo = ShowRepository(table=table, index_cache=TTLCache(ttl_seconds=60))
+	later = sample_show()
+	later.show_date = "2025-02-01"
+
+	repo.create_show(show=later, venue=sample_venue(), event=sample_event())
+	repo.create_show(show=sample_show(), venue=sample_venue(), event=sample_event())
+
+	# the second show ends before the rows already expire, so no index writes
+	assert table.update_item.call_count == 2
+	assert table.meta.client.transact_write_items.call_count == 2
+
+
+def test_create_show_tolerates_newer_listing_rows():
+	table = make_table_mock()
+	table.update_item.side_effect = ClientError(
+		{"Error": {"Code": "ConditionalCheckFailedException", "Message": "x"}},
+		"UpdateItem",
+	)
+	repo = ShowRepository(table=table)
+
+	repo.create_show(show=sample_show(), venue=sample_venue(), event=sample_event())
+
+	condition = table.update_item.call_args.kwargs["ConditionExpression"]
+	assert "#expires_at < :expires_at" in condition
+	table.meta.client.transact_write_items.assert_called_once()
+	table.put_item.assert_not_called()
+
+
+def test_create_show_points_the_event_only_at_new_city_rows():
+	table = make_table_mock()
+	repo = ShowRepository(table=table)
+	# a new city row has no old values, the existing host row has
+	table.update_item.side_effect = [{}, {"Attributes": {"expires_at": 1}}]
+
+	repo.create_show(show=sample_show(), venue=sample_venue(), event=sample_event())
+	table.put_item.assert_called_once_with(Item={"pk": "EVENT#e1", "sk": "CITY#NYC"})
+
+	table.put_item.reset_mock()
+	table.update_item.side_effect = [{"Attributes": {"expires_at": 1}}] * 2
+	repo.create_show(show=sample_show(), venue=sample_venue(), event=sample_event())
+	table.put_item.assert_not_called()
+
+
+def test_create_shows_chunks_per_venue_and_upserts_listings_once():
+	table = make_table_mock()
+	repo = ShowRepository(table=table)
+	shows = [
+		Show(
+			id=f"s{i}",
+			venue_id="v1",
+			event_id="e1",
+			is_blocked=False,
+			price=150,
+			show_date=f"2030-01-{i % 28 + 1:02d}",
+			show_time="18:00",
+			booked_seats=[],
+		)
+		for i in range(40)
+	]
+
+	failures = repo.create_shows(
+		shows=shows, venues={"v1": sample_venue()}, event=sample_event()
+	)
+
+	assert failures == []
+	calls = table.meta.client.transact_write_items.call_args_list
+	assert [len(call.kwargs["TransactItems"]) for call in calls] == [99, 21]
+	assert table.update_item.call_count == 2
+
+
+def test_create_shows_upserts_shared_listing_rows_once_with_the_latest_ttl():
+	table = make_table_mock()
+	repo = ShowRepository(table=table)
+	other = sample_venue()
+	other.id = "v2"
+	shows = [
+		sample_show(),
+		Show(
+			id="s2",
+			venue_id="v2",
+			event_id="e1",
+			is_blocked=False,
+			price=150,
+			show_date="2030-01-01",
+			show_time="18:00",
+			booked_seats=[],
+		),
+	]
+
+	failures = repo.create_shows(
+		shows=shows, venues={"v1": sample_venue(), "v2": other}, event=sample_event()
+	)
+
+	assert failures == []
+	# one city row and one host row for both venues
+	assert table.update_item.call_count == 2
+	ttls = {
+		call.kwargs["ExpressionAttributeValues"][":expires_at"]
+		for call in table.update_item.call_args_list
+	}
+	assert ttls == {repo._to_ddb_ttl("2030-01-01", "18:00")}
+
+
+def test_create_shows_fails_every_venue_sharing_a_failed_listing_row():
+	table = make_table_mock()
+	table.update_item.side_effect = ClientError(
+		{"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow"}},
+		"UpdateItem",
+	)
+	repo = ShowRepository(table=table)
+	other = sample_venue()
+	other.id = "v2"
+	second = sample_show()
+	second.id, second.venue_id = "s2", "v2"
+
+	failures = repo.create_shows(
+		shows=[sample_show(), second],
+		venues={"v1": sample_venue(), "v2": other},
+		event=sample_event(),
+	)
+
+	assert sorted(show.id for show, _ in failures) == ["s1", "s2"]
+	table.meta.client.transact_write_items.assert_not_called()
+
+
+def test_create_shows_reports_failed_transactions():
+	table = make_table_mock()
+	table.meta.client.transact_write_items.side_effect = ClientError(
+		{"Error": {"Code": "TransactionCanceledException", "Message": "conflict"}},
+		"TransactWriteItems",
+	)
+	repo = ShowRepository(table=table)
+
+	failures = repo.create_shows(
+		shows=[sample_show()], venues={"v1": sample_venue()}, event=sample_event()
+	)
+
+	assert [(show.id, reason) for show, reason in failures] == [
+		("s1", "TransactionCanceledException")
+	]
+
 def test_create_show_raises_when_event_blocked():
 	table = make_table_mock()
 	repo = ShowRepository(table=table)
@@ -243,9 +387,11 @@ def test_list_by_event_date_returns_shows_skipping_blocked():
 				"is_show_blocked": False,
 				"is_event_blocked": False,
 				"price": 150.0,
-				"booked_seats": ["A1"],
 				"show_date": "2025-01-01",
 				"show_time": "18:00",
+				"capacity": 100,
+				"seats_booked": 98,
+				"seats_held": 0,
 			},
 			{
 				"pk": "EVENT#e1#CITY#NYC",
@@ -253,9 +399,11 @@ def test_list_by_event_date_returns_shows_skipping_blocked():
 				"is_show_blocked": True,
 				"is_event_blocked": False,
 				"price": 200.0,
-				"booked_seats": ["B1"],
 				"show_date": "2025-01-01",
 				"show_time": "20:00",
+				"capacity": 100,
+				"seats_booked": 1,
+				"seats_held": 0,
 			},
 		]
 	}
@@ -265,7 +413,14 @@ def test_list_by_event_date_returns_shows_skipping_blocked():
 
 	assert len(shows) == 1
 	assert shows[0].id == "s1"
+	assert shows[0].venue_id == "v1"
+	assert (shows[0].capacity, shows[0].seats_booked) == (100, 98)
+	assert shows[0].booked_seats is None
 	table.query.assert_called_once()
+	assert table.query.call_args.kwargs["KeyConditionExpression"].get_expression()[
+		"values"
+	][1].get_expression()["values"][1] == "DATE#2025-01-01#"
+	table.meta.client.batch_get_item.assert_not_called()
 
 
 def test_list_by_event_date_returns_empty_when_event_blocked():
@@ -317,13 +472,15 @@ def test_update_show_calls_transact_write_items():
 	table.meta.client.transact_write_items.assert_called_once()
 	_, kwargs = table.meta.client.transact_write_items.call_args
 	transact = kwargs["TransactItems"]
-	assert len(transact) == 2
+	assert len(transact) == 3
 	first_update = transact[0]["Update"]
 	assert first_update["Key"] == {"pk": "SHOW#s1", "sk": "DETAILS"}
-	assert first_update["ExpressionAttributeValues"] == {":new_value": True}
+	assert first_update["ExpressionAttributeValues"] == {":new_value": True, ":zero": 0, ":one": 1}
+	assert "#version" in first_update["UpdateExpression"]
 	second_update = transact[1]["Update"]
 	assert second_update["Key"]["pk"] == f"EVENT#{show.event_id}#CITY#{venue.city}"
 	assert second_update["ConditionExpression"] == "attribute_exists(pk)"
+	assert transact[2]["Update"]["Key"]["sk"] == "VENUE#v1#SHOW#s1"
 
 
 def test_update_show_raises_client_error():
@@ -345,3 +502,13 @@ def test_create_show_raises_client_error_on_write_failure():
 	with pytest.raises(ClientError):
 		repo.create_show(show=sample_show(), venue=sample_venue(), event=sample_event())
 
+
+
+def test_get_version_returns_version_and_venue():
+	table = make_table_mock()
+	table.get_item.return_value = {"Item": {"version": 4, "venue_id": "v1"}}
+	repo = ShowRepository(table=table)
+
+	assert repo.get_version("s1") == (4, "v1", False)
+	_, kwargs = table.get_item.call_args
+	assert "booked_seats" not in kwargs["ProjectionExpression"]
@@ -0,0 +1,113 @@
+import unittest
+from collections import Counter
+from fastapi.testclient import TestClient
+from app.main import app
+from app.dependencies import (
+    get_current_user,
+    get_event_fanout_worker,
+    get_outbox_repo,
+    get_profiler,
+)
+from unittest.mock import MagicMock
+
+
+class TestAdminRouter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        self.mock_profiler = MagicMock()
+        self.mock_profiler.running = False
+        self.mock_profiler.summary.return_value = {"running": True, "samples": 0}
+        app.dependency_overrides[get_profiler] = lambda: self.mock_profiler
+        app.dependency_overrides[get_current_user] = lambda: {
+            "user_id": "a1",
+            "role": "admin",
+        }
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def test_start_profiler_for_n_seconds(self):
+        res = self.client.post("/admin/profiler/start", params={"seconds": 10})
+        assert res.status_code == 200
+        self.mock_profiler.start.assert_called_once_with(duration=10)
+
+    def test_start_profiler_twice_returns_409(self):
+        self.mock_profiler.start.side_effect = RuntimeError(
+            "profiler is already running"
+        )
+        res = self.client.post("/admin/profiler/start")
+        assert res.status_code == 409
+
+    def test_start_profiler_rejects_long_durations(self):
+        res = self.client.post("/admin/profiler/start", params={"seconds": 100000})
+        assert res.status_code == 422
+
+    def test_stop_profiler(self):
+        res = self.client.post("/admin/profiler/stop")
+        assert res.status_code == 200
+        self.mock_profiler.stop.assert_called_once()
+
+    def test_download_profile(self):
+        self.mock_profiler.samples = Counter({"main;handler": 3})
+        self.mock_profiler.started_at = 1700000000.5
+        self.mock_profiler.folded.return_value = "main;handler 3\n"
+
+        res = self.client.get("/admin/profiler/profile")
+        assert res.status_code == 200
+        assert res.text == "main;handler 3\n"
+        assert "profile-1700000000.folded" in res.headers["content-disposition"]
+
+    def test_download_without_profile_returns_404(self):
+        self.mock_profiler.samples = Counter()
+        res = self.client.get("/admin/profiler/profile")
+        assert res.status_code == 404
+
+    def test_non_admin_is_forbidden(self):
+        app.dependency_overrides[get_current_user] = lambda: {
+            "user_id": "h1",
+            "role": "host",
+        }
+        res = self.client.post("/admin/profiler/start")
+        assert res.status_code == 403
+        self.mock_profiler.start.assert_not_called()
+
+    def test_outbox_lists_job_progress(self):
+        outbox = MagicMock()
+        outbox.list_jobs.return_value = [
+            {
+                "pk": "OUTBOX",
+                "sk": "EVENT_FLAG#e1",
+                "event_id": "e1",
+                "status": "running",
+                "phase": "shows",
+                "rows_done": 40,
+                "cursor": {"city": 1},
+            }
+        ]
+        app.dependency_overrides[get_outbox_repo] = lambda: outbox
+
+        res = self.client.get("/admin/outbox")
+
+        assert res.status_code == 200
+        assert res.json()["data"] == [
+            {
+                "sk": "EVENT_FLAG#e1",
+                "event_id": "e1",
+                "status": "running",
+                "phase": "shows",
+                "rows_done": 40,
+            }
+        ]
+        outbox.list_jobs.assert_called_once_with(include_done=False)
+
+    def test_backfill_is_handed_to_the_fanout_worker(self):
+        worker = MagicMock()
+        app.dependency_overrides[get_event_fanout_worker] = lambda: worker
+
+        res = self.client.post("/admin/outbox/backfill")
+
+        assert res.status_code == 202
+        worker.request_backfill.assert_called_once_with()
@@ -3,7 +3,7 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.dependencies import get_user_service
 from unittest.mock import MagicMock
-from app.custom_exceptions.generic import NotFoundException
+from app.custom_exceptions.generic import NotFoundException, TooManyRequests
 from app.custom_exceptions.user_exceptions import (
     UserAlreadyExists,
     IncorrectCredentials,
@@ -93,3 +93,19 @@ class TestAuthRouter(unittest.TestCase):
 
         assert resp.status_code == 404
         assert "user a@b.com not found" in resp.text
+
+    def test_login_throttled_returns_429_with_retry_after(self):
+        self.mock_get_user_service.login.side_effect = TooManyRequests(
+            "too many login attempts, try again later", retry_after=42
+        )
+
+        resp = self.client.post(
+            "/login",
+            json={"email": "a@b.com", "password": "any"},
+            headers={"X-Forwarded-For": "10.0.0.1, 203.0.113.7"},
+        )
+
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"] == "42"
+        _, kwargs = self.mock_get_user_service.login.call_args
+        assert kwargs["client_ip"] == "203.0.113.7"
@@ -8,8 +8,9 @@ from app.dependencies import (
     get_current_user,
     get_user_service,
 )
+from app.custom_exceptions.booking_exceptions import QueuedForAdmission
 from app.custom_exceptions.generic import NotFoundException
-from app.schemas.booking import BookingReq
+from app.schemas.booking import BookingReq, CartCheckoutReq, CartItem
 from app.models.users import Role
 
 
@@ -59,6 +60,7 @@ class TestBookingsRouter(unittest.TestCase):
         self.mock_booking_service.create_booking.assert_called_once_with(
             BookingReq(show_id="s1", seats=["A1", "A2"]),
             "u1",
+            queue_token=None,
         )
 
         self.mock_user_service.get_user_by_mail.assert_not_called()
@@ -97,6 +99,7 @@ class TestBookingsRouter(unittest.TestCase):
         self.mock_booking_service.create_booking.assert_called_once_with(
             BookingReq(show_id="s1", seats=["A1"], user_id="user@mail.com"),
             "u99",
+            queue_token=None,
         )
 
     def test_create_booking_propagates_not_found(self):
@@ -120,3 +123,53 @@ class TestBookingsRouter(unittest.TestCase):
 
         assert resp.status_code == 404
         assert "missing" in resp.text
+
+    def test_create_booking_queued_returns_token(self):
+        app.dependency_overrides[get_current_user] = lambda: {
+            "user_id": "u1",
+            "role": Role.CUSTOMER.value,
+        }
+        self.mock_booking_service.create_booking.side_effect = QueuedForAdmission(
+            "queued", retry_after=4, queue_token="tok", position=200
+        )
+
+        resp = self.client.post(
+            "/bookings",
+            json={"show_id": "s1", "seats": ["A1"]},
+            headers={"X-Queue-Token": "earlier"},
+        )
+
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"] == "4"
+        assert resp.json()["data"] == {
+            "queue_token": "tok",
+            "position": 200,
+            "estimated_wait_seconds": 4,
+        }
+        assert self.mock_booking_service.create_booking.call_args.kwargs == {
+            "queue_token": "earlier"
+        }
+
+    def test_checkout_cart_customer(self):
+        app.dependency_overrides[get_current_user] = lambda: {
+            "user_id": "u1",
+            "role": Role.CUSTOMER.value,
+        }
+        self.mock_booking_service.checkout.return_value = {
+            "bookings": [],
+            "total_price": 900,
+        }
+
+        resp = self.client.post(
+            "/bookings/checkout",
+            json={"items": [{"show_id": "s1", "seats": ["A1"]}]},
+            headers={"X-Queue-Token": "t1"},
+        )
+
+        assert resp.status_code == 201
+        assert resp.json()["data"]["total_price"] == 900
+        self.mock_booking_service.checkout.assert_called_once_with(
+            CartCheckoutReq(items=[CartItem(show_id="s1", seats=["A1"])]),
+            "u1",
+            queue_token="t1",
+        )
@@ -69,6 +69,30 @@ class TestEventsRouter(unittest.TestCase):
 
         assert resp.status_code == 200
         assert resp.json()["data"]["name"] == "e"
+        assert resp.headers["ETag"] == '"event-e1-v0"'
+
+    def test_get_event_by_id_not_modified_skips_full_fetch(self):
+        self.mock_get_event_service.get_event_version.return_value = 2
+
+        resp = self.client.get("/events/e1", headers={"If-None-Match": '"event-e1-v2"'})
+
+        assert resp.status_code == 304
+        assert resp.headers["ETag"] == '"event-e1-v2"'
+        self.mock_get_event_service.get_event_by_id.assert_not_called()
+        self.mock_get_event_service.get_event_version.assert_called_once_with(
+            "e1", "admin"
+        )
+
+    def test_get_event_by_id_any_tag_is_not_modified_only_when_visible(self):
+        # get_event_version hides blocked events from non-admins
+        self.mock_get_event_service.get_event_version.return_value = None
+        self.mock_get_event_service.get_event_by_id.side_effect = NotFoundException(
+            "event", "e1", status_code=404
+        )
+
+        resp = self.client.get("/events/e1", headers={"If-None-Match": "*"})
+
+        assert resp.status_code == 404
 
     def test_browse_events_requires_name_or_city(self):
 
@@ -1,9 +1,11 @@
 import unittest
+from datetime import date
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock
 
 from app.main import app
 from app.dependencies import (
+    get_analytics_service,
     get_venue_service,
     get_event_service,
     get_current_user,
@@ -22,6 +24,10 @@ class TestHostsRouter(unittest.TestCase):
 
         app.dependency_overrides[get_venue_service] = lambda: self.mock_venue_service
         app.dependency_overrides[get_event_service] = lambda: self.mock_event_service
+        self.mock_analytics_service = MagicMock()
+        app.dependency_overrides[get_analytics_service] = (
+            lambda: self.mock_analytics_service
+        )
 
         app.dependency_overrides[get_current_user] = lambda: {
             "user_id": "host1",
@@ -118,3 +124,29 @@ class TestHostsRouter(unittest.TestCase):
 
         assert resp.status_code == 401
         assert "not authorised" in resp.text.lower()
+
+    def test_get_host_analytics(self):
+        self.mock_analytics_service.get_host_analytics.return_value = {
+            "host_id": "host1",
+            "totals": {"tickets": 3, "revenue": 450, "bookings": 2},
+        }
+
+        resp = self.client.get(
+            "/hosts/host1/analytics", params={"from_date": "2030-01-01", "event_id": "e1"}
+        )
+
+        assert resp.status_code == 200
+        assert resp.json()["data"]["totals"]["revenue"] == 450
+        self.mock_analytics_service.get_host_analytics.assert_called_once_with(
+            host_id="host1",
+            from_date=date(2030, 1, 1),
+            to_date=None,
+            event_id="e1",
+            show_id=None,
+        )
+
+    def test_get_host_analytics_of_another_host(self):
+        resp = self.client.get("/hosts/host2/analytics")
+
+        assert resp.status_code == 401
+        self.mock_analytics_service.get_host_analytics.assert_not_called()
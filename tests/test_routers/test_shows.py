@@ -4,10 +4,29 @@ from unittest.mock import MagicMock
 
 from app.main import app
 from app.dependencies import (
+    ANONYMOUS_USER,
+    get_catalog_user,
+    get_seat_stream,
     get_show_service,
     get_current_user,
 )
 from app.custom_exceptions.generic import NotFoundException
+from app.schemas.shows import ScheduledShow, ShowResponse, ShowScheduleResponse, VenuDTO
+from app.utils.seat_stream import SeatStreamHub
+
+
+def sample_show_response(show_id="s1", venue_id="v1"):
+    return ShowResponse(
+        id=show_id,
+        event_id="e1",
+        price=100,
+        show_date="2030-01-01",
+        show_time="18:00",
+        booked_seats=[],
+        venue=VenuDTO(venue_id=venue_id, venue_name="Hall", city="delhi", state="delhi"),
+        is_blocked=False,
+        host_id="host1",
+    )
 
 
 class TestShowsRouter(unittest.TestCase):
@@ -44,6 +63,56 @@ class TestShowsRouter(unittest.TestCase):
         assert resp.status_code == 201
         self.mock_show_service.create_show.assert_called_once()
 
+    def test_schedule_shows_partial_failure_is_multi_status(self):
+        self.mock_show_service.schedule_shows.return_value = ShowScheduleResponse(
+            created=[
+                ScheduledShow(
+                    id="s1", venue_id="v1", show_date="2030-01-06", show_time="18:00"
+                )
+            ],
+            failed=[
+                ScheduledShow(
+                    venue_id="v2",
+                    show_date="2030-01-06",
+                    show_time="18:00",
+                    reason="venue is blocked",
+                )
+            ],
+        )
+
+        resp = self.client.post(
+            "/shows/schedule",
+            json={
+                "event_id": "e1",
+                "venue_ids": ["v1", "v2"],
+                "price": 300,
+                "start_date": "2030-01-06",
+                "end_date": "2030-01-06",
+                "show_times": ["18:00"],
+            },
+        )
+
+        assert resp.status_code == 207
+        assert resp.json()["data"]["failed"][0]["reason"] == "venue is blocked"
+        kwargs = self.mock_show_service.schedule_shows.call_args.kwargs
+        assert kwargs["host_id"] == "host1"
+
+    def test_schedule_shows_rejects_oversized_schedule(self):
+        resp = self.client.post(
+            "/shows/schedule",
+            json={
+                "event_id": "e1",
+                "venue_ids": [f"v{i}" for i in range(10)],
+                "price": 300,
+                "start_date": "2030-01-01",
+                "end_date": "2030-12-31",
+                "show_times": ["10:00", "18:00"],
+            },
+        )
+
+        assert resp.status_code == 422
+        self.mock_show_service.schedule_shows.assert_not_called()
+
     def test_create_show_forbidden_for_non_host(self):
         app.dependency_overrides[get_current_user] = lambda: {
             "user_id": "u1",
@@ -66,10 +135,10 @@ class TestShowsRouter(unittest.TestCase):
         assert "unauthorised" in resp.text.lower()
 
     def test_get_show_by_id_calls_service(self):
-        self.mock_show_service.get_show_by_id.return_value = {
-            "id": "s1",
-            "event_id": "e1",
-        }
+        self.mock_show_service.get_show_by_id.return_value = (
+            sample_show_response(),
+            "3.1",
+        )
 
         resp = self.client.get("/shows/s1")
 
@@ -89,6 +158,15 @@ class TestShowsRouter(unittest.TestCase):
         assert resp.status_code == 404
         assert "missing" in resp.text
 
+    def test_stream_seats_unknown_show_is_404(self):
+        app.dependency_overrides[get_seat_stream] = lambda: SeatStreamHub(
+            lambda show_id: None
+        )
+
+        resp = self.client.get("/shows/missing/seats/stream")
+
+        assert resp.status_code == 404
+
     def test_event_shows_basic(self):
         self.mock_show_service.get_event_shows.return_value = []
 
@@ -162,3 +240,62 @@ class TestShowsRouter(unittest.TestCase):
         )
 
         assert resp.status_code == 403
+
+    def test_get_show_by_id_not_modified_skips_full_fetch(self):
+        self.mock_show_service.get_show_version.return_value = "3.1"
+
+        resp = self.client.get("/shows/s1", headers={"If-None-Match": '"show-s1-v3.1"'})
+
+        assert resp.status_code == 304
+        self.mock_show_service.get_show_by_id.assert_not_called()
+
+    def test_get_show_by_id_stale_etag_returns_body(self):
+        self.mock_show_service.get_show_version.return_value = "4.1"
+        # the show changed again between the version check and the read
+        self.mock_show_service.get_show_by_id.return_value = (
+            sample_show_response(),
+            "5.1",
+        )
+
+        resp = self.client.get("/shows/s1", headers={"If-None-Match": '"show-s1-v3.1"'})
+
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] == '"show-s1-v5.1"'
+
+    def test_event_shows_for_authenticated_user_are_private(self):
+        self.mock_show_service.get_event_shows.return_value = []
+
+        resp = self.client.get("/shows", params={"event_id": "e1", "city": "Delhi"})
+
+        assert resp.headers["Cache-Control"] == "private, no-cache"
+        assert "Surrogate-Key" not in resp.headers
+
+    def test_anonymous_event_shows_are_tagged_with_their_venues(self):
+        app.dependency_overrides[get_catalog_user] = lambda: ANONYMOUS_USER
+        self.mock_show_service.get_event_shows.return_value = [
+            sample_show_response("s1", "v2"),
+            sample_show_response("s2", "v1"),
+            sample_show_response("s3", "v2"),
+        ]
+
+        resp = self.client.get("/shows", params={"event_id": "e1", "city": "Delhi"})
+
+        assert resp.headers["Surrogate-Key"] == "event-shows:e1 city:delhi venue:v1 venue:v2"
+        assert "Authorization" in resp.headers["Vary"]
+
+    def test_event_shows_tolerates_shows_without_a_visible_venue(self):
+        app.dependency_overrides[get_catalog_user] = lambda: {
+            "user_id": "a1",
+            "role": "admin",
+        }
+        hidden = sample_show_response("s2")
+        hidden.venue = None
+        self.mock_show_service.get_event_shows.return_value = [
+            sample_show_response("s1", "v1"),
+            hidden,
+        ]
+
+        resp = self.client.get("/shows", params={"event_id": "e1", "city": "Delhi"})
+
+        assert resp.status_code == 200
+        assert [show["venue"] for show in resp.json()["data"]][1] is None
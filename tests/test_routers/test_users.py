@@ -1,4 +1,5 @@
 import unittest
+from datetime import date
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock
 
@@ -68,18 +69,47 @@ class TestUsersRouter(unittest.TestCase):
         assert "u1" in resp.text
 
     def test_get_user_bookings_success(self):
-        self.mock_booking_service.get_user_bookings.return_value = [
-            {"booking_id": "b1"},
-            {"booking_id": "b2"},
-        ]
+        self.mock_booking_service.get_user_bookings.return_value = {
+            "bookings": [{"booking_id": "b1"}, {"booking_id": "b2"}],
+            "next_page": None,
+        }
 
         resp = self.client.get("/users/u1/bookings")
 
         assert resp.status_code == 200
         body = resp.json()
 
-        assert len(body["data"]) == 2
-        self.mock_booking_service.get_user_bookings.assert_called_once_with("u1")
+        assert len(body["data"]["bookings"]) == 2
+        self.mock_booking_service.get_user_bookings.assert_called_once_with(
+            "u1",
+            when=None,
+            from_date=None,
+            to_date=None,
+            order=None,
+            limit=50,
+            page=None,
+        )
+
+    def test_get_user_bookings_date_range(self):
+        self.mock_booking_service.get_user_bookings.return_value = {"bookings": []}
+
+        resp = self.client.get(
+            "/users/u1/bookings?from_date=2030-01-01&to_date=2030-01-31&order=desc&limit=10"
+        )
+
+        assert resp.status_code == 200
+        kwargs = self.mock_booking_service.get_user_bookings.call_args.kwargs
+        assert (kwargs["from_date"], kwargs["to_date"]) == (
+            date(2030, 1, 1),
+            date(2030, 1, 31),
+        )
+        assert (kwargs["order"], kwargs["limit"]) == ("desc", 10)
+
+    def test_get_user_bookings_rejects_unknown_when(self):
+        resp = self.client.get("/users/u1/bookings?when=someday")
+
+        assert resp.status_code == 422
+        self.mock_booking_service.get_user_bookings.assert_not_called()
 
     def test_get_user_bookings_forbidden(self):
         resp = self.client.get("/users/u2/bookings")
@@ -90,12 +120,26 @@ class TestUsersRouter(unittest.TestCase):
         self.mock_booking_service.get_user_bookings.assert_not_called()
 
     def test_get_user_bookings_empty(self):
-        self.mock_booking_service.get_user_bookings.return_value = []
+        self.mock_booking_service.get_user_bookings.return_value = {"bookings": []}
 
         resp = self.client.get("/users/u1/bookings")
 
         assert resp.status_code == 200
-        assert resp.json()["data"] == []
+        assert resp.json()["data"]["bookings"] == []
+
+    def test_get_booking_history_pages(self):
+        self.mock_booking_service.get_user_bookings.return_value = {
+            "bookings": [{"booking_id": "b1"}],
+            "next_page": "abc",
+        }
+
+        resp = self.client.get("/users/u1/bookings/history?page=xyz")
+
+        assert resp.status_code == 200
+        assert resp.json()["data"]["next_page"] == "abc"
+        self.mock_booking_service.get_user_bookings.assert_called_once_with(
+            "u1", when="past", page="xyz"
+        )
 
     def test_get_user_by_mail_admin(self):
         app.dependency_overrides[get_current_user] = lambda: {
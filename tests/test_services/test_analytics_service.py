@@ -0,0 +1,70 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+
+from app.services.analytics_service import AnalyticsService
+
+
+class TestAnalyticsService(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_analytics_repo = MagicMock()
+        self.analytics_service = AnalyticsService(self.mock_analytics_repo)
+
+    def test_get_host_analytics(self):
+        self.mock_analytics_repo.get_total.return_value = {
+            "tickets": 3,
+            "revenue": 450,
+            "bookings": 2,
+        }
+        self.mock_analytics_repo.list_daily.return_value = [
+            {"day": "2030-01-01", "tickets": 3, "revenue": 450, "bookings": 2}
+        ]
+        self.mock_analytics_repo.list_totals.side_effect = lambda host_id, kind: (
+            [{"event_id": "e1", "event_name": "Concert", "tickets": 3}]
+            if kind == "EVENT"
+            else [
+                {
+                    "show_id": "s1",
+                    "event_id": "e1",
+                    "show_date": "2030-01-05",
+                    "show_time": "18:00",
+                    "revenue": 450,
+                }
+            ]
+        )
+
+        result = self.analytics_service.get_host_analytics(
+            "h1", from_date=date(2030, 1, 1), to_date=date(2030, 1, 31), show_id="s1"
+        )
+
+        assert result.totals.revenue == 450
+        assert result.daily[0].day == "2030-01-01"
+        assert result.events[0].tickets == 3
+        assert (result.shows[0].revenue, result.shows[0].bookings) == (450, 0)
+        self.mock_analytics_repo.list_daily.assert_called_once_with(
+            "h1", "2030-01-01", "2030-01-31", event_id=None, show_id="s1"
+        )
+
+    def test_get_host_analytics_without_sales(self):
+        self.mock_analytics_repo.get_total.return_value = None
+        self.mock_analytics_repo.list_daily.return_value = []
+        self.mock_analytics_repo.list_totals.return_value = []
+
+        result = self.analytics_service.get_host_analytics("h1")
+
+        assert result.totals.tickets == 0
+        _, from_day, to_day = self.mock_analytics_repo.list_daily.call_args.args
+        assert to_day == date.today().isoformat()
+        assert (date.fromisoformat(to_day) - date.fromisoformat(from_day)).days == 29
+
+    def test_get_host_analytics_rejects_bad_ranges(self):
+        with self.assertRaises(ValueError):
+            self.analytics_service.get_host_analytics(
+                "h1", from_date=date(2030, 2, 1), to_date=date(2030, 1, 1)
+            )
+        with self.assertRaises(ValueError):
+            self.analytics_service.get_host_analytics(
+                "h1", from_date=date(2020, 1, 1), to_date=date(2030, 1, 1)
+            )
+        self.mock_analytics_repo.list_daily.assert_not_called()
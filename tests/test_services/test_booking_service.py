@@ -1,12 +1,13 @@
 import unittest
+from datetime import date, timedelta
 from unittest.mock import MagicMock
 
 from app.services.booking_service import BookingService
-from app.schemas.booking import BookingReq
+from app.schemas.booking import BookingReq, CartCheckoutReq, CartItem
 from app.models.shows import Show
 from app.models.venue import Venue
 from app.models.events import Event
-from app.custom_exceptions.generic import BlockedResource
+from app.custom_exceptions.generic import BlockedResource, NotFoundException
 
 
 class TestBookingService(unittest.TestCase):
@@ -74,6 +75,32 @@ class TestBookingService(unittest.TestCase):
 
         self.mock_booking_repo.add_booking.assert_called_once()
 
+    def test_create_booking_publishes_seats_to_stream(self):
+        seat_stream = MagicMock()
+        self.booking_service.seat_stream = seat_stream
+        self.mock_show_repo.get_show_by_id.return_value = self._valid_show()
+        self.mock_event_repo.get_by_id.return_value = self._valid_event()
+        self.mock_venue_repo.get_venue_by_id.return_value = self._valid_venue()
+
+        self.booking_service.create_booking(
+            BookingReq(show_id="s1", seats=["A1", "A2"]), user_id="u1"
+        )
+
+        seat_stream.publish_booked.assert_called_once_with("s1", ["A1", "A2"])
+
+    def test_create_booking_purges_the_show_from_the_cdn(self):
+        purger = MagicMock()
+        self.booking_service.cdn_purger = purger
+        self.mock_show_repo.get_show_by_id.return_value = self._valid_show()
+        self.mock_event_repo.get_by_id.return_value = self._valid_event()
+        self.mock_venue_repo.get_venue_by_id.return_value = self._valid_venue()
+
+        self.booking_service.create_booking(
+            BookingReq(show_id="s1", seats=["A1", "A2"]), user_id="u1"
+        )
+
+        purger.purge.assert_called_once_with(["show:s1", "event-shows:e1"])
+
     def test_create_booking_blocked_show(self):
         req = BookingReq(show_id="s1", seats=["A1"])
 
@@ -113,11 +140,115 @@ class TestBookingService(unittest.TestCase):
         with self.assertRaises(Exception):
             self.booking_service.create_booking(req, user_id="u1")
 
-    def test_get_user_bookings(self):
-        bookings = [MagicMock(), MagicMock()]
-        self.mock_booking_repo.get_bookings.return_value = bookings
+    def test_create_booking_rejects_seats_outside_sections(self):
+        show = self._valid_show()
+        show.seat_sections = ["A", "B"]
+        show.booked_seats = None
+        self.mock_show_repo.get_show_by_id.return_value = show
+
+        with self.assertRaises(ValueError):
+            self.booking_service.create_booking(
+                BookingReq(show_id="s1", seats=["A-1", "C-1"]), user_id="u1"
+            )
+        self.mock_show_repo.get_show_by_id.assert_called_once_with(
+            show_id="s1", include_seats=False
+        )
+        self.mock_booking_repo.add_booking.assert_not_called()
+
+    def test_checkout_writes_the_cart_at_once(self):
+        other = self._valid_show()
+        other.id, other.price = "s2", 500
+        self.mock_show_repo.batch_get_shows_by_ids.return_value = [
+            self._valid_show(),
+            other,
+        ]
+        self.mock_event_repo.batch_get_events.return_value = [self._valid_event()]
+        self.mock_venue_repo.batch_get_venues.return_value = [self._valid_venue()]
+        req = CartCheckoutReq(
+            items=[
+                CartItem(show_id="s1", seats=["A1", "A2"]),
+                CartItem(show_id="s2", seats=["B1"]),
+            ]
+        )
+
+        cart = self.booking_service.checkout(req, user_id="u1")
+
+        assert cart.total_price == 1100
+        assert [b.show_id for b in cart.bookings] == ["s1", "s2"]
+        self.mock_event_repo.batch_get_events.assert_called_once_with(event_ids=["e1"])
+        (lines,), _ = self.mock_booking_repo.add_cart.call_args
+        assert [line.bookings[0].seats for line in lines] == [["A1", "A2"], ["B1"]]
+        self.mock_show_repo.get_show_by_id.assert_not_called()
+
+    def test_checkout_missing_show(self):
+        self.mock_show_repo.batch_get_shows_by_ids.return_value = [self._valid_show()]
+        req = CartCheckoutReq(
+            items=[
+                CartItem(show_id="s1", seats=["A1"]),
+                CartItem(show_id="s9", seats=["A1"]),
+            ]
+        )
+
+        with self.assertRaises(NotFoundException):
+            self.booking_service.checkout(req, user_id="u1")
+        self.mock_booking_repo.add_cart.assert_not_called()
+
+    def test_checkout_rejects_repeated_shows(self):
+        with self.assertRaises(ValueError):
+            CartCheckoutReq(
+                items=[
+                    CartItem(show_id="s1", seats=["A1"]),
+                    CartItem(show_id="s1", seats=["A2"]),
+                ]
+            )
+
+    def test_get_user_bookings_defaults_to_upcoming(self):
+        self.mock_booking_repo.query_bookings.return_value = ([], None)
 
         result = self.booking_service.get_user_bookings("u1")
 
-        assert result == bookings
-        self.mock_booking_repo.get_bookings.assert_called_once_with(user_id="u1")
+        assert (result.bookings, result.next_page) == ([], None)
+        self.mock_booking_repo.query_bookings.assert_called_once_with(
+            user_id="u1",
+            from_date=date.today().isoformat(),
+            to_date=None,
+            descending=False,
+            limit=50,
+            page=None,
+        )
+
+    def test_get_user_bookings_past_ends_yesterday_latest_first(self):
+        self.mock_booking_repo.query_bookings.return_value = ([], "next")
+
+        page = self.booking_service.get_user_bookings(
+            "u1", when="past", from_date=date(2020, 1, 1), page="p1"
+        )
+
+        assert page.next_page == "next"
+        kwargs = self.mock_booking_repo.query_bookings.call_args.kwargs
+        assert kwargs["from_date"] == "2020-01-01"
+        assert kwargs["to_date"] == (date.today() - timedelta(days=1)).isoformat()
+        assert (kwargs["descending"], kwargs["page"]) == (True, "p1")
+
+    def test_get_user_bookings_date_range(self):
+        self.mock_booking_repo.query_bookings.return_value = ([], None)
+
+        self.booking_service.get_user_bookings(
+            "u1", from_date=date(2020, 1, 1), to_date=date(2020, 2, 1), order="desc"
+        )
+
+        kwargs = self.mock_booking_repo.query_bookings.call_args.kwargs
+        assert (kwargs["from_date"], kwargs["to_date"]) == ("2020-01-01", "2020-02-01")
+        assert kwargs["descending"] is True
+        with self.assertRaises(ValueError):
+            self.booking_service.get_user_bookings(
+                "u1", from_date=date(2020, 2, 1), to_date=date(2020, 1, 1)
+            )
+
+    def test_get_user_bookings_empty_range_skips_the_read(self):
+        page = self.booking_service.get_user_bookings(
+            "u1", when="upcoming", to_date=date(2020, 1, 1)
+        )
+
+        assert page.bookings == []
+        self.mock_booking_repo.query_bookings.assert_not_called()
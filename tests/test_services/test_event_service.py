@@ -4,6 +4,7 @@ from unittest.mock import MagicMock
 from app.services.event_service import EventService
 from app.models.events import Event, Category
 from app.models.users import Role
+from app.utils.cache import TTLCache
 from app.custom_exceptions.generic import NotFoundException
 from app.schemas.event import UpdateEventRequest
 
@@ -185,3 +186,25 @@ class TestEventService(unittest.TestCase):
             event_id="e1",
             is_blocked=True,
         )
+
+    def test_get_event_version_hides_blocked_events_from_customers(self):
+        self.mock_event_repo.get_version.return_value = (4, True)
+
+        assert self.event_service.get_event_version("e1", Role.CUSTOMER.value) is None
+        assert self.event_service.get_event_version("e1", Role.ADMIN.value) == 4
+
+    def test_update_event_purges_cdn_and_version_cache(self):
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("event:e1", 1)
+        purger = MagicMock()
+        service = EventService(
+            event_repo=self.mock_event_repo,
+            artist_service=self.mock_artist_service,
+            version_cache=cache,
+            cdn_purger=purger,
+        )
+
+        service.update_event("e1", UpdateEventRequest(is_blocked=True))
+
+        assert cache.get("event:e1") is None
+        purger.purge.assert_called_once_with(["event:e1", "events"])
@@ -5,9 +5,10 @@ from app.services.show_service import ShowService
 from app.models.shows import Show
 from app.models.venue import Venue
 from app.models.events import Event
-from app.schemas.shows import ShowCreateReq, ShowUpdateReq
+from app.schemas.shows import ShowCreateReq, ShowScheduleReq, ShowUpdateReq
 from app.custom_exceptions.generic import NotFoundException
 from app.models.users import Role
+from app.utils.cache import TTLCache
 
 
 class TestShowService(unittest.TestCase):
@@ -66,6 +67,82 @@ class TestShowService(unittest.TestCase):
         assert show.event_id == "e1"
         assert show.is_blocked is False
 
+    def test_schedule_shows_expands_and_reports_failures(self):
+        own = Venue(
+            id="v1",
+            name="PVR",
+            city="delhi",
+            state="delhi",
+            host_id="host1",
+            is_blocked=False,
+            is_seat_layout_required=True,
+        )
+        other = Venue(
+            id="v2",
+            name="INOX",
+            city="delhi",
+            state="delhi",
+            host_id="host2",
+            is_blocked=False,
+            is_seat_layout_required=True,
+        )
+        event = Event(
+            id="e1",
+            name="movie",
+            description="d",
+            duration="120",
+            category="movie",
+            is_blocked=False,
+            artist_ids=[],
+            artist_names=[],
+        )
+        self.mock_event_repo.get_by_id.return_value = event
+        self.mock_venue_repo.batch_get_venues.return_value = [own, other]
+        self.mock_show_repo.create_shows.side_effect = lambda shows, **kwargs: [
+            (shows[0], "TransactionCanceledException")
+        ]
+        req = ShowScheduleReq(
+            event_id="e1",
+            venue_ids=["v1", "v2"],
+            price=300,
+            start_date="2030-01-06",
+            end_date="2030-01-12",
+            weekdays=[5, 6],
+            show_times=["10:00", "18:00"],
+        )
+
+        result = self.show_service.schedule_shows(req, host_id="host1")
+
+        self.mock_event_repo.get_by_id.assert_called_once_with("e1")
+        self.mock_venue_repo.batch_get_venues.assert_called_once()
+        written = self.mock_show_repo.create_shows.call_args.kwargs["shows"]
+        assert {(s.show_date, s.show_time) for s in written} == {
+            ("2030-01-06", "10:00"),
+            ("2030-01-06", "18:00"),
+            ("2030-01-12", "10:00"),
+            ("2030-01-12", "18:00"),
+        }
+        assert len(result.created) == 3
+        reasons = sorted(f.reason for f in result.failed)
+        assert reasons == ["TransactionCanceledException"] + [
+            "venue belongs to another host"
+        ] * 4
+
+    def test_schedule_shows_event_not_found(self):
+        self.mock_event_repo.get_by_id.return_value = None
+        req = ShowScheduleReq(
+            event_id="e1",
+            venue_ids=["v1"],
+            price=300,
+            start_date="2030-01-06",
+            end_date="2030-01-06",
+            show_times=["10:00"],
+        )
+
+        with self.assertRaises(NotFoundException):
+            self.show_service.schedule_shows(req, host_id="host1")
+        self.mock_show_repo.create_shows.assert_not_called()
+
     def test_get_show_by_id_success(self):
         show = Show(
             id="s1",
@@ -91,10 +168,13 @@ class TestShowService(unittest.TestCase):
         self.mock_show_repo.get_show_by_id.return_value = show
         self.mock_venue_repo.get_venue_by_id.return_value = venue
 
-        resp = self.show_service.get_show_by_id("s1")
+        show.version, venue.version = 3, 2
+
+        resp, version = self.show_service.get_show_by_id("s1")
 
         assert resp.id == "s1"
         assert resp.venue.venue_name == "PVR"
+        assert version == "3.2"
 
     def test_get_show_by_id_not_found(self):
         self.mock_show_repo.get_show_by_id.return_value = None
@@ -184,3 +264,114 @@ class TestShowService(unittest.TestCase):
 
         assert len(result) == 1
         assert result[0].id == "s1"
+        assert result[0].availability is None
+
+    def test_get_event_shows_customer_skips_shows_at_blocked_venues(self):
+        self.mock_show_repo.list_by_event_city.return_value = [
+            Show("s1", "v1", "e1", False, "300", "2026-01-28", "18:00", []),
+            Show("s2", "v2", "e1", False, "300", "2026-01-28", "18:00", []),
+        ]
+        self.mock_venue_repo.batch_get_venues.return_value = [
+            Venue(
+                id="v1",
+                name="PVR",
+                city="delhi",
+                state="delhi",
+                host_id="host1",
+                is_blocked=False,
+                is_seat_layout_required=True,
+            ),
+            Venue(
+                id="v2",
+                name="INOX",
+                city="delhi",
+                state="delhi",
+                host_id="host1",
+                is_blocked=True,
+                is_seat_layout_required=True,
+            ),
+        ]
+
+        customer = self.show_service.get_event_shows(
+            event_id="e1", city="delhi", user={"user_id": "u1", "role": Role.CUSTOMER.value}
+        )
+        admin = self.show_service.get_event_shows(
+            event_id="e1", city="delhi", user={"user_id": "a1", "role": Role.ADMIN.value}
+        )
+
+        assert [show.id for show in customer] == ["s1"]
+        assert [(show.id, show.venue is None) for show in admin] == [
+            ("s1", False),
+            ("s2", True),
+        ]
+
+    def test_get_event_shows_reports_availability_from_counters(self):
+        def show(show_id, seats_booked, seats_held=0):
+            return Show(
+                show_id, "v1", "e1", False, "300", "2026-01-28", "18:00", None,
+                capacity=100, seats_booked=seats_booked, seats_held=seats_held,
+            )
+
+        self.mock_show_repo.list_by_event_city.return_value = [
+            show("s1", 10), show("s2", 85, seats_held=10), show("s3", 100)
+        ]
+        self.mock_venue_repo.batch_get_venues.return_value = [
+            Venue(
+                id="v1",
+                name="PVR",
+                city="delhi",
+                state="delhi",
+                host_id="host1",
+                is_blocked=False,
+                is_seat_layout_required=True,
+            )
+        ]
+
+        result = self.show_service.get_event_shows(
+            event_id="e1", city="delhi", user={"user_id": "u1", "role": Role.CUSTOMER.value}
+        )
+
+        assert [(r.availability.available, r.availability.status) for r in result] == [
+            (90, "available"),
+            (5, "few_left"),
+            (0, "sold_out"),
+        ]
+        self.mock_show_repo.get_show_by_id.assert_not_called()
+
+    # -------------------- get_show_version --------------------
+
+    def test_get_show_version_combines_show_and_venue_versions(self):
+        self.show_service.version_cache = TTLCache(ttl_seconds=60)
+        self.mock_show_repo.get_version.return_value = (3, "v1", False)
+        self.mock_venue_repo.get_version.return_value = (2, False)
+
+        assert self.show_service.get_show_version("s1") == "3.2"
+        assert self.show_service.get_show_version("s1") == "3.2"
+        self.mock_show_repo.get_version.assert_called_once_with("s1")
+        self.mock_venue_repo.get_version.assert_called_once_with("v1")
+
+    def test_get_show_version_missing_show(self):
+        self.mock_show_repo.get_version.return_value = None
+
+        assert self.show_service.get_show_version("missing") is None
+
+    def test_get_show_version_hides_blocked_shows_and_venues(self):
+        self.mock_show_repo.get_version.return_value = (3, "v1", True)
+        self.mock_venue_repo.get_version.return_value = (2, False)
+        assert self.show_service.get_show_version("s1") is None
+
+        self.mock_show_repo.get_version.return_value = (3, "v1", False)
+        self.mock_venue_repo.get_version.return_value = (2, True)
+        assert self.show_service.get_show_version("s1") is None
+
+    def test_update_show_invalidates_cached_version(self):
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("show:s1", (1, "v1"))
+        self.show_service.version_cache = cache
+        self.mock_show_repo.get_show_by_id.return_value = Show(
+            "s1", "v1", "e1", False, 300, "2026-01-28", "18:00", []
+        )
+
+        self.show_service.update_show("s1", ShowUpdateReq(is_blocked=True))
+
+        assert cache.get("show:s1") is None
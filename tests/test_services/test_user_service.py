@@ -5,7 +5,7 @@ import bcrypt
 
 from app.services.user_service import UserService
 from app.models.users import User, Role
-from app.custom_exceptions.generic import NotFoundException
+from app.custom_exceptions.generic import NotFoundException, TooManyRequests
 from app.custom_exceptions.user_exceptions import (
     IncorrectCredentials,
     UserAlreadyExists,
@@ -187,3 +187,34 @@ class TestUserService(unittest.TestCase):
 
         with self.assertRaises(UserBlocked):
             self.user_service.login("a@b.com", password)
+
+    def test_login_throttled_before_lookup(self):
+        throttler = MagicMock()
+        throttler.check.side_effect = TooManyRequests("slow down", retry_after=30)
+        service = UserService(self.mock_user_repo, login_throttler=throttler)
+
+        with self.assertRaises(TooManyRequests):
+            service.login("a@b.com", "whatever", client_ip="1.2.3.4")
+
+        throttler.check.assert_called_once_with(email="a@b.com", client_ip="1.2.3.4")
+        self.mock_user_repo.get_by_mail.assert_not_called()
+
+    @patch("app.services.user_service.create_jwt")
+    def test_login_success_resets_email_throttle(self, mock_create_jwt):
+        password = "StrongPassword!123"
+        user = User(
+            user_id="u1",
+            username="test",
+            email="a@b.com",
+            phone_number="9999999999",
+            password=bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode(),
+            role=Role.CUSTOMER,
+            is_blocked=False,
+        )
+        self.mock_user_repo.get_by_mail.return_value = user
+        throttler = MagicMock()
+        service = UserService(self.mock_user_repo, login_throttler=throttler)
+
+        service.login("a@b.com", password)
+
+        throttler.reset.assert_called_once_with("a@b.com")
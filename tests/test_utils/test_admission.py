@@ -0,0 +1,150 @@
+import pytest
+
+from app.custom_exceptions.booking_exceptions import QueuedForAdmission
+from app.custom_exceptions.generic import TooManyRequests
+from app.repository.memory_table import MemoryTable
+from app.utils.jwt_service import create_jwt
+from app.utils.admission import (
+    AdmissionController,
+    DynamoDBAdmissionBackend,
+    InMemoryAdmissionBackend,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def controller(backend, clock):
+    return AdmissionController(
+        backend=backend,
+        rate_per_second=10,
+        burst=2,
+        max_wait_seconds=1,
+        token_grace_seconds=5,
+        clock=clock,
+    )
+
+
+@pytest.mark.parametrize("backend_type", ["memory", "dynamodb"])
+def test_backends_space_slots_after_the_burst(backend_type):
+    clock = FakeClock()
+    if backend_type == "memory":
+        backend = InMemoryAdmissionBackend(clock=clock)
+    else:
+        backend = DynamoDBAdmissionBackend(MemoryTable("eventro_table"), clock=clock)
+
+    waits = [backend.reserve("SHOW#s1", 0.1, 2, 0.25) for _ in range(6)]
+
+    assert waits == [0, 0, pytest.approx(0.1), pytest.approx(0.2), None, None]
+    assert backend.reserve("SHOW#s2", 0.1, 2, 0.25) == 0
+    clock.now += 10
+    # an idle queue starts over with a fresh burst
+    assert backend.reserve("SHOW#s1", 0.1, 2, 0.25) == 0
+
+
+def test_queue_token_admits_once_its_slot_comes_up():
+    clock = FakeClock()
+    admission = controller(InMemoryAdmissionBackend(clock=clock), clock)
+    admission.admit("s1", "u1")
+    admission.admit("s1", "u2")
+
+    with pytest.raises(QueuedForAdmission) as queued:
+        admission.admit("s1", "u3")
+    assert (queued.value.retry_after, queued.value.position) == (1, 1)
+    token = queued.value.queue_token
+
+    # too early: same token back, no new slot taken
+    clock.now += 0.05
+    with pytest.raises(QueuedForAdmission) as again:
+        admission.admit("s1", "u3", token)
+    assert again.value.queue_token == token
+
+    clock.now += 0.05
+    admission.admit("s1", "u3", token)
+    # a token is bound to its user and show
+    with pytest.raises(QueuedForAdmission):
+        admission.admit("s1", "u4", token)
+
+
+def test_full_waiting_room_turns_callers_away():
+    clock = FakeClock()
+    admission = controller(InMemoryAdmissionBackend(clock=clock), clock)
+    for user in range(12):
+        try:
+            admission.admit("s1", f"u{user}")
+        except QueuedForAdmission:
+            pass
+
+    with pytest.raises(TooManyRequests) as rejected:
+        admission.admit("s1", "late")
+    assert not isinstance(rejected.value, QueuedForAdmission)
+    assert rejected.value.retry_after == 1
+
+
+def test_cart_waits_for_its_busiest_show():
+    clock = FakeClock()
+    admission = controller(InMemoryAdmissionBackend(clock=clock), clock)
+    admission.admit("s1", "u1")
+    admission.admit("s1", "u2")
+
+    with pytest.raises(QueuedForAdmission) as queued:
+        admission.admit_cart(["s2", "s1"], "u3")
+    # s2 had a free slot, s1 did not
+    assert queued.value.retry_after == 1
+    token = queued.value.queue_token
+
+    clock.now += 0.1
+    admission.admit_cart(["s1", "s2"], "u3", token)
+
+
+@pytest.mark.parametrize("backend_type", ["memory", "dynamodb"])
+def test_queue_token_admits_only_once(backend_type):
+    clock = FakeClock()
+    if backend_type == "memory":
+        backend = InMemoryAdmissionBackend(clock=clock)
+    else:
+        backend = DynamoDBAdmissionBackend(MemoryTable("eventro_table"), clock=clock)
+    admission = controller(backend, clock)
+    admission.admit("s1", "u1")
+    admission.admit("s1", "u2")
+    with pytest.raises(QueuedForAdmission) as queued:
+        admission.admit("s1", "u3")
+    token = queued.value.queue_token
+
+    clock.now += 0.1
+    admission.admit("s1", "u3", token)
+
+    # a replay within the grace period joins the back of the queue
+    with pytest.raises(QueuedForAdmission) as replayed:
+        admission.admit("s1", "u3", token)
+    assert replayed.value.queue_token != token
+
+
+def test_tokens_other_than_queue_tokens_are_ignored():
+    clock = FakeClock()
+    admission = controller(InMemoryAdmissionBackend(clock=clock), clock)
+    admission.admit("s1", "u1")
+    admission.admit("s1", "u2")
+
+    with pytest.raises(QueuedForAdmission):
+        admission.admit("s1", "u1", create_jwt("u1", "a@b.com", "customer"))
+
+
+def test_expired_queue_token_joins_the_back_again():
+    clock = FakeClock()
+    admission = controller(InMemoryAdmissionBackend(clock=clock), clock)
+    admission.admit("s1", "u1")
+    admission.admit("s1", "u2")
+    with pytest.raises(QueuedForAdmission) as queued:
+        admission.admit("s1", "u3")
+
+    clock.now += 10
+    admission.admit("s1", "u4")
+    admission.admit("s1", "u5")
+    with pytest.raises(QueuedForAdmission):
+        admission.admit("s1", "u3", queued.value.queue_token)
@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from app.custom_exceptions.booking_exceptions import SeatAlreadyBookedException
+from app.models.booking import Booking
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.venue import Venue
+from app.repository.booking_repository import BookingRepository
+from app.repository.memory_table import MemoryTable
+from app.repository.show_repository import ShowRepository
+from app.utils.booking_coalescer import BookingCoalescer
+
+EVENT = Event(
+    id="e1",
+    name="Concert",
+    description="Live",
+    duration=Decimal(120),
+    category="music",
+    is_blocked=False,
+    artist_ids=["a1"],
+    artist_names=["Artist"],
+)
+VENUE = Venue(
+    id="v1",
+    name="Hall",
+    host_id="h1",
+    city="delhi",
+    state="delhi",
+    is_blocked=False,
+    is_seat_layout_required=True,
+)
+
+
+def booking(booking_id, seats):
+    return Booking(
+        booking_id=booking_id,
+        user_id=f"u{booking_id}",
+        show_id="s1",
+        time_booked="",
+        total_booking_price=Decimal(150 * len(seats)),
+        seats=seats,
+    )
+
+
+@pytest.fixture
+def setup():
+    table = MemoryTable("eventro_table")
+    shows = ShowRepository(table=table)
+    show = Show(
+        id="s1",
+        venue_id="v1",
+        event_id="e1",
+        is_blocked=False,
+        price=Decimal(150),
+        show_date="2030-01-05",
+        show_time="18:00",
+        booked_seats=[],
+        capacity=50,
+    )
+    shows.create_show(show=show, venue=VENUE, event=EVENT)
+    repo = BookingRepository(table=table)
+    writes = []
+    transact = table.meta.client.transact_write_items
+
+    def counting(**kwargs):
+        writes.append(len(kwargs["TransactItems"]))
+        return transact(**kwargs)
+
+    table.meta.client.transact_write_items = counting
+    return shows, repo, writes
+
+
+def test_concurrent_bookings_share_transactions(setup):
+    shows, repo, writes = setup
+    coalescer = BookingCoalescer(repo, window_seconds=0.05)
+    show = shows.get_show_by_id("s1")
+    # 20 bookings, two per seat pair
+    requests = [booking(str(i), [f"A{i % 10}", f"B{i % 10}"]) for i in range(20)]
+
+    def book(request):
+        try:
+            coalescer.add_booking(request, show, EVENT, VENUE)
+            return True
+        except SeatAlreadyBookedException:
+            return False
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(book, requests))
+
+    assert results.count(True) == 10
+    stored = shows.get_show_by_id("s1")
+    assert len(stored.booked_seats) == len(set(stored.booked_seats)) == 20
+    assert stored.seats_booked == 20
+    # 10 bookings in far fewer transactions than bookings
+    assert len(writes) < 10
+
+
+def test_stale_batch_falls_back_to_single_writes(setup):
+    shows, repo, writes = setup
+    stale = shows.get_show_by_id("s1")
+    repo.add_booking(booking("0", ["A1"]), stale, EVENT, VENUE)
+    coalescer = BookingCoalescer(repo, window_seconds=0.05)
+
+    def book(request):
+        try:
+            coalescer.add_booking(request, stale, EVENT, VENUE)
+            return None
+        except SeatAlreadyBookedException as err:
+            return str(err)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(book, [booking("1", ["A1"]), booking("2", ["A2"])]))
+
+    assert results == [" {'A1'} seats already booked", None]
+    assert shows.get_show_by_id("s1").booked_seats == ["A1", "A2"]
+    # one write for the setup, one failed batch, then two single writes
+    assert len(writes) == 4
@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock
+
+from app.utils.cache import TTLCache, cached
+from app.utils.etag import etag_matches, make_etag
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=5, clock=clock)
+    cache.set("k", 1)
+
+    assert cache.get("k") == 1
+    clock.now = 5
+    assert cache.get("k") is None
+
+
+def test_ttl_cache_evicts_oldest_when_full():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+
+def test_cached_loads_once_and_skips_none():
+    cache = TTLCache(ttl_seconds=60)
+    loader = MagicMock(return_value=7)
+
+    assert cached(cache, "k", loader) == 7
+    assert cached(cache, "k", loader) == 7
+    loader.assert_called_once()
+
+    missing = MagicMock(return_value=None)
+    cached(cache, "gone", missing)
+    cached(cache, "gone", missing)
+    assert missing.call_count == 2
+
+
+def test_etag_matching():
+    etag = make_etag("event", "e1", 3)
+
+    assert etag == '"event-e1-v3"'
+    assert etag_matches('"event-e1-v3"', etag)
+    assert etag_matches('W/"event-e1-v3"', etag)
+    assert etag_matches('"other", "event-e1-v3"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"event-e1-v2"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,123 @@
+import boto3
+from botocore.stub import Stubber
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.capacity import (
+    CapacityAccumulator,
+    ConsumedCapacityMiddleware,
+    _current,
+    current_capacity,
+    register_capacity_hooks,
+)
+from app.utils.metrics import REGISTRY, MetricsMiddleware
+
+
+def make_client(enabled=True):
+    client = boto3.client(
+        "dynamodb",
+        region_name="ap-south-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+    )
+    register_capacity_hooks(client, enabled=enabled)
+    return client
+
+
+def test_hooks_request_and_record_capacity():
+    client = make_client()
+    stubber = Stubber(client)
+    stubber.add_response(
+        "query",
+        {"Items": [], "ConsumedCapacity": {"TableName": "t", "CapacityUnits": 1.5}},
+        {
+            "TableName": "t",
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": "EVENTS"}},
+            "ReturnConsumedCapacity": "TOTAL",
+        },
+    )
+    stubber.add_response(
+        "transact_write_items",
+        {
+            "ConsumedCapacity": [
+                {"TableName": "t", "CapacityUnits": 4.0, "WriteCapacityUnits": 4.0},
+                {"TableName": "u", "CapacityUnits": 2.0, "WriteCapacityUnits": 2.0},
+            ]
+        },
+    )
+    accumulator = CapacityAccumulator()
+    token = _current.set(accumulator)
+    try:
+        with stubber:
+            client.query(
+                TableName="t",
+                KeyConditionExpression="pk = :pk",
+                ExpressionAttributeValues={":pk": {"S": "EVENTS"}},
+            )
+            client.transact_write_items(
+                TransactItems=[
+                    {"Put": {"TableName": "t", "Item": {"pk": {"S": "a"}}}}
+                ]
+            )
+    finally:
+        _current.reset(token)
+
+    assert accumulator.read_units == 1.5
+    assert accumulator.write_units == 6.0
+    assert accumulator.calls == 2
+    assert accumulator.by_operation == {"Query": 1.5, "TransactWriteItems": 6.0}
+
+
+def test_disabled_hooks_leave_params_alone():
+    client = make_client(enabled=False)
+    stubber = Stubber(client)
+    stubber.add_response(
+        "get_item",
+        {},
+        {"TableName": "t", "Key": {"pk": {"S": "a"}}},
+    )
+    with stubber:
+        client.get_item(TableName="t", Key={"pk": {"S": "a"}})
+    stubber.assert_no_pending_responses()
+
+
+def test_calls_outside_a_request_are_ignored():
+    client = make_client()
+    stubber = Stubber(client)
+    stubber.add_response(
+        "get_item", {"ConsumedCapacity": {"TableName": "t", "CapacityUnits": 0.5}}
+    )
+    with stubber:
+        client.get_item(TableName="t", Key={"pk": {"S": "a"}})
+    assert current_capacity() is None
+
+
+def test_middleware_emits_header_and_metrics():
+    app = FastAPI()
+    app.add_middleware(ConsumedCapacityMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/things/{thing_id}")
+    def read_thing(thing_id: str):
+        current_capacity().add("Query", {"CapacityUnits": 2.5})
+        current_capacity().add("UpdateItem", {"CapacityUnits": 1.0})
+        return {"id": thing_id}
+
+    @app.get("/free")
+    def free():
+        return {}
+
+    labels = {"route": "/things/{thing_id}", "kind": "read"}
+    before = REGISTRY.get_sample_value(
+        "dynamodb_consumed_capacity_units_total", labels
+    ) or 0
+    client = TestClient(app)
+
+    resp = client.get("/things/abc")
+    assert resp.headers["x-dynamodb-consumed-capacity"] == "read=2.5, write=1, calls=2"
+    assert REGISTRY.get_sample_value(
+        "dynamodb_consumed_capacity_units_total", labels
+    ) == before + 2.5
+
+    assert "x-dynamodb-consumed-capacity" not in client.get("/free").headers
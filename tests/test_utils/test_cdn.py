@@ -0,0 +1,81 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.dependencies import ANONYMOUS_USER, get_public_catalog_user
+from app.utils.cdn import NoopPurger, WebhookPurger, build_purger, catalog_cache_headers
+from app.utils.jwt_service import create_jwt
+
+
+def test_anonymous_catalog_responses_are_publicly_cacheable():
+    headers = catalog_cache_headers(ANONYMOUS_USER, ["event:e1", "events"])
+
+    assert headers["Cache-Control"].startswith("public, max-age=")
+    assert "s-maxage=" in headers["Cache-Control"]
+    assert headers["Surrogate-Key"] == "event:e1 events"
+    assert headers["Vary"] == "Authorization"
+
+
+def test_authenticated_catalog_responses_stay_private():
+    headers = catalog_cache_headers({"user_id": "u1", "role": "admin"}, ["event:e1"])
+
+    assert headers == {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+def test_public_catalog_user_without_token_is_anonymous_customer():
+    user = get_public_catalog_user(token=None)
+
+    assert user["anonymous"] is True
+    assert user["role"] == "customer"
+
+
+def test_public_catalog_user_with_token_is_decoded():
+    token = create_jwt("u1", "a@b.com", "host")
+
+    user = get_public_catalog_user(token=token)
+
+    assert user["user_id"] == "u1"
+    assert user["role"] == "host"
+
+
+def test_public_catalog_user_with_bad_token_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        get_public_catalog_user(token="garbage")
+
+    assert exc.value.status_code == 401
+
+
+def test_build_purger_picks_webhook_only_with_url():
+    assert isinstance(build_purger(""), NoopPurger)
+    assert isinstance(build_purger("http://cdn/purge"), WebhookPurger)
+
+
+def test_webhook_purger_batches_keys_purged_together():
+    purger = WebhookPurger(url="http://cdn/purge", batch_seconds=0.01)
+    sent = threading.Event()
+    batches = []
+
+    def send(keys):
+        batches.append(keys)
+        sent.set()
+
+    purger._send = send
+    purger.purge(["show:s1", "event-shows:e1"])
+    purger.purge(["show:s1"])
+
+    assert sent.wait(1)
+    assert batches == [["event-shows:e1", "show:s1"]]
+
+
+def test_webhook_purger_posts_surrogate_keys():
+    purger = WebhookPurger(url="http://cdn/purge", token="t")
+
+    with patch("app.utils.cdn.urllib.request.urlopen") as urlopen:
+        purger._send(["show:s1"])
+
+    req = urlopen.call_args.args[0]
+    assert req.full_url == "http://cdn/purge"
+    assert req.data == b'{"surrogate_keys": ["show:s1"]}'
+    assert req.get_header("Authorization") == "Bearer t"
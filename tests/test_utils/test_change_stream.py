@@ -0,0 +1,209 @@
+from datetime import datetime, timezone
+
+import boto3
+from botocore.stub import Stubber
+
+from app.models.venue import Venue
+from app.repository.memory_table import MemoryTable
+from app.repository.venue_repository import VenueRepository
+from app.utils.cache import TTLCache
+from app.utils.change_stream import (
+    ChangeRecord,
+    ChangeStreamConsumer,
+    DynamoDBStreamSource,
+    InvalidationBus,
+    MemoryStreamSource,
+    invalidation_keys,
+)
+from app.utils.metrics import REGISTRY
+
+ARN = "arn:aws:dynamodb:ap-south-1:123456789012:table/eventro_table/stream/x"
+OLD_SHARD = "shardId-00000000000000000000-00000001"
+SHARD = "shardId-00000000000000000000-00000002"
+
+
+def record(pk, sk="DETAILS", event_name="MODIFY"):
+    return ChangeRecord(
+        event_name=event_name,
+        keys={"pk": pk, "sk": sk},
+        old_image=None,
+        new_image=None,
+        created_at=0.0,
+    )
+
+
+def test_invalidation_keys_by_pk_prefix():
+    assert invalidation_keys(record("VENUE#v1")) == ["venue:v1"]
+    assert invalidation_keys(record("SHOW#s1")) == ["show:s1"]
+    assert invalidation_keys(record("USER#u1")) == ["user:u1"]
+    assert invalidation_keys(record("EVENT#e1")) == ["event:e1"]
+    # show projections and bookings are not cached entities
+    assert invalidation_keys(record("EVENT#e1#CITY#delhi", "VENUE#v1#SHOW#s1")) == []
+    assert invalidation_keys(record("USER#u1", "SHOW_DATE#2030-01-01#BOOKING#b1")) == []
+    assert invalidation_keys(record("CITY#delhi", "NAME#x#ID#e1")) == []
+    assert invalidation_keys(record("CITY#delhi", "NAME#x#ID#e1", "REMOVE")) == [
+        ("CITY#delhi", "NAME#x#ID#e1")
+    ]
+
+
+def test_write_on_one_instance_invalidates_another():
+    table = MemoryTable("eventro_table")
+    venue = Venue(
+        id="v1",
+        name="Hall",
+        host_id="h1",
+        city="delhi",
+        state="delhi",
+        is_blocked=False,
+        is_seat_layout_required=True,
+    )
+    VenueRepository(table=table).add_venue(venue)
+    # another instance with its own cache, following the same table
+    other_cache = TTLCache(ttl_seconds=300)
+    other_cache.set("venue:v1", 1)
+    other_cache.set("venue:v2", 1)
+    bus = InvalidationBus()
+    bus.register_cache(other_cache)
+    consumer = ChangeStreamConsumer(MemoryStreamSource(table.meta.client), bus)
+
+    VenueRepository(table=table).update_venue(venue_id="v1", host_id="h1", is_blocked=True)
+    assert consumer.apply(consumer.source.read(timeout=0.1)) == 1
+
+    assert other_cache.get("venue:v1") is None
+    assert other_cache.get("venue:v2") == 1
+    assert REGISTRY.get_sample_value("change_stream_records_total", {"event": "MODIFY"}) >= 1
+    assert REGISTRY.get_sample_value("change_stream_lag_seconds") < 5
+
+
+def test_dynamodb_stream_source_decodes_records():
+    streams = boto3.client(
+        "dynamodbstreams",
+        region_name="ap-south-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+    )
+    stubber = Stubber(streams)
+    stubber.add_response(
+        "describe_stream",
+        {
+            "StreamDescription": {
+                "Shards": [
+                    {
+                        "ShardId": OLD_SHARD,
+                        "SequenceNumberRange": {
+                            "StartingSequenceNumber": "1" * 21,
+                            "EndingSequenceNumber": "2" * 21,
+                        },
+                    },
+                    {
+                        "ShardId": SHARD,
+                        "SequenceNumberRange": {"StartingSequenceNumber": "3" * 21},
+                    },
+                ]
+            }
+        },
+        {"StreamArn": ARN},
+    )
+    stubber.add_response(
+        "get_shard_iterator",
+        {"ShardIterator": "i" * 10},
+        {"StreamArn": ARN, "ShardId": SHARD, "ShardIteratorType": "LATEST"},
+    )
+    stubber.add_response(
+        "get_records",
+        {
+            "Records": [
+                {
+                    "eventName": "MODIFY",
+                    "dynamodb": {
+                        "ApproximateCreationDateTime": datetime(
+                            2030, 1, 1, tzinfo=timezone.utc
+                        ),
+                        "Keys": {"pk": {"S": "SHOW#s1"}, "sk": {"S": "DETAILS"}},
+                        "SequenceNumber": "4" * 21,
+                    },
+                }
+            ],
+            "NextShardIterator": "j" * 10,
+        },
+        {"ShardIterator": "i" * 10, "Limit": 1000},
+    )
+
+    with stubber:
+        source = DynamoDBStreamSource(streams, ARN)
+        records = source.read(timeout=0)
+
+    assert [invalidation_keys(r) for r in records] == [["show:s1"]]
+    assert records[0].created_at == datetime(2030, 1, 1, tzinfo=timezone.utc).timestamp()
+    assert source._iterators == {OLD_SHARD: None, SHARD: "j" * 10}
+
+
+def test_dynamodb_stream_source_resumes_after_the_last_record_read():
+    streams = boto3.client(
+        "dynamodbstreams",
+        region_name="ap-south-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+    )
+    stubber = Stubber(streams)
+    stubber.add_response(
+        "describe_stream",
+        {
+            "StreamDescription": {
+                "Shards": [
+                    {
+                        "ShardId": SHARD,
+                        "SequenceNumberRange": {"StartingSequenceNumber": "3" * 21},
+                    }
+                ]
+            }
+        },
+        {"StreamArn": ARN},
+    )
+    stubber.add_response(
+        "get_shard_iterator",
+        {"ShardIterator": "i" * 10},
+        {"StreamArn": ARN, "ShardId": SHARD, "ShardIteratorType": "LATEST"},
+    )
+    stubber.add_response(
+        "get_records",
+        {
+            "Records": [
+                {
+                    "eventName": "MODIFY",
+                    "dynamodb": {
+                        "ApproximateCreationDateTime": datetime(
+                            2030, 1, 1, tzinfo=timezone.utc
+                        ),
+                        "Keys": {"pk": {"S": "SHOW#s1"}, "sk": {"S": "DETAILS"}},
+                        "SequenceNumber": "4" * 21,
+                    },
+                }
+            ],
+            "NextShardIterator": "j" * 10,
+        },
+        {"ShardIterator": "i" * 10, "Limit": 1000},
+    )
+    stubber.add_client_error(
+        "get_records",
+        service_error_code="ExpiredIteratorException",
+        expected_params={"ShardIterator": "j" * 10, "Limit": 1000},
+    )
+    stubber.add_response(
+        "get_shard_iterator",
+        {"ShardIterator": "k" * 10},
+        {
+            "StreamArn": ARN,
+            "ShardId": SHARD,
+            "ShardIteratorType": "AFTER_SEQUENCE_NUMBER",
+            "SequenceNumber": "4" * 21,
+        },
+    )
+
+    with stubber:
+        source = DynamoDBStreamSource(streams, ARN)
+        source.read(timeout=0)
+        assert source.read(timeout=0) == []
+        stubber.assert_no_pending_responses()
+
+    assert source._iterators == {SHARD: "k" * 10}
@@ -0,0 +1,71 @@
+import gzip
+
+import brotli
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.compression import compressed_route, negotiate_encoding
+
+router = APIRouter(route_class=compressed_route(minimum_size=100))
+
+
+@router.get("/big")
+def big():
+    return {"seats": [f"A{i}" for i in range(200)]}
+
+
+@router.get("/small")
+def small():
+    return {"ok": True}
+
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+
+def raw_get(path, accept_encoding):
+    # httpx decodes bodies transparently, so read the raw stream instead
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as resp:
+        return resp, b"".join(resp.iter_raw())
+
+
+def test_negotiate_prefers_brotli_and_honours_q_values():
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0, gzip") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("") is None
+
+
+def test_large_body_is_brotli_compressed():
+    resp, raw = raw_get("/big", "br")
+
+    assert resp.headers["content-encoding"] == "br"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert int(resp.headers["content-length"]) == len(raw)
+    assert b'"A199"' in brotli.decompress(raw)
+
+
+def test_large_body_is_gzip_compressed():
+    resp, raw = raw_get("/big", "gzip")
+
+    assert resp.headers["content-encoding"] == "gzip"
+    assert b'"A199"' in gzip.decompress(raw)
+
+
+def test_small_body_is_left_alone():
+    resp, raw = raw_get("/small", "gzip, br")
+
+    assert "content-encoding" not in resp.headers
+    assert raw == b'{"ok":true}'
+    # a cache must not hand this to a caller that gets the route compressed
+    assert resp.headers["vary"] == "Accept-Encoding"
+
+
+def test_no_accepted_encoding_leaves_body_alone():
+    resp, _ = raw_get("/big", "identity")
+
+    assert "content-encoding" not in resp.headers
+    assert resp.headers["vary"] == "Accept-Encoding"
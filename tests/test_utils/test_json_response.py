@@ -0,0 +1,80 @@
+import json
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.events import Event
+from app.models.users import Role
+from app.schemas.response import APIResponse
+from app.schemas.shows import ShowResponse, VenuDTO
+from app.schemas.users import UserProfile
+from app.utils.json_response import FastJSONResponse, dumps
+
+
+def sample_event():
+    return Event(
+        id="e1",
+        name="rock",
+        description="live",
+        duration=Decimal("120"),
+        category="music",
+        is_blocked=False,
+        artist_ids=["a1"],
+        artist_names=["Alice"],
+    )
+
+
+def sample_show():
+    return ShowResponse.model_construct(
+        id="s1",
+        event_id="e1",
+        price=Decimal("299.5"),
+        show_date="2026-01-28",
+        show_time="18:00",
+        booked_seats=["A1"],
+        venue=VenuDTO(venue_id="v1", venue_name="PVR", city="delhi", state="dl"),
+        is_blocked=False,
+        host_id="h1",
+    )
+
+
+def test_dumps_matches_jsonable_encoder_for_dataclasses():
+    event = sample_event()
+    event.duration = 120
+    payload = APIResponse(status_code=200, message="ok", data=[event])
+
+    assert json.loads(dumps(payload)) == jsonable_encoder(payload)
+
+
+def test_dumps_converts_decimals():
+    body = json.loads(dumps(APIResponse(status_code=200, message="ok", data=sample_show())))
+
+    assert body["data"]["price"] == 299.5
+    assert body["data"]["venue"]["venue_name"] == "PVR"
+    event = json.loads(dumps(sample_event()))
+    assert event["duration"] == 120
+
+
+def test_dumps_uses_serialization_aliases_and_enum_values():
+    profile = UserProfile(
+        user_id="u1",
+        username="alice",
+        email="a@b.com",
+        phone_number="9999999999",
+        role="Customer",
+        is_blocked=False,
+    )
+
+    body = json.loads(dumps({"profile": profile, "role": Role.ADMIN}))
+
+    assert body["profile"]["UserID"] == "u1"
+    assert body["role"] == "admin"
+
+
+def test_fast_json_response_renders_status_and_body():
+    resp = FastJSONResponse(
+        APIResponse(status_code=201, message="created", data=None), status_code=201
+    )
+
+    assert resp.status_code == 201
+    assert json.loads(resp.body) == {"status_code": 201, "message": "created", "data": None}
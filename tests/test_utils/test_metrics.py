@@ -0,0 +1,65 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dependencies import get_current_user, get_show_service
+from app.main import app
+from app.utils.metrics import REGISTRY, instrument_repository
+
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_labels_requests_by_route_template():
+    show_service = MagicMock()
+    show_service.get_show_by_id.return_value = (MagicMock(), "1.1")
+    app.dependency_overrides[get_show_service] = lambda: show_service
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "u1", "role": "customer"}
+    labels = {"method": "GET", "route": "/shows/{show_id}", "status": "200"}
+    before = sample("http_requests_total", labels)
+    try:
+        client = TestClient(app)
+        client.get("/shows/s1")
+        client.get("/shows/s2")
+        resp = client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert sample("http_requests_total", labels) == before + 2
+    assert sample("http_request_duration_seconds_count", labels) == before + 2
+    assert 'route="/shows/{show_id}"' in resp.text
+    assert "/shows/s1" not in resp.text
+
+
+def test_unknown_paths_share_one_label():
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = sample("http_requests_total", labels)
+
+    TestClient(app).get("/no/such/path")
+
+    assert sample("http_requests_total", labels) == before + 1
+
+
+def test_instrument_repository_counts_success_and_errors():
+    @instrument_repository("fake")
+    class FakeRepository:
+        def get(self):
+            return 1
+
+        def boom(self):
+            raise RuntimeError("boom")
+
+        def _private(self):
+            return 2
+
+    repo = FakeRepository()
+    assert repo.get() == 1
+    with pytest.raises(RuntimeError):
+        repo.boom()
+    repo._private()
+
+    assert sample("repository_calls_total", {"repository": "fake", "method": "get", "outcome": "success"}) == 1
+    assert sample("repository_calls_total", {"repository": "fake", "method": "boom", "outcome": "error"}) == 1
+    assert sample("repository_call_duration_seconds_count", {"repository": "fake", "method": "_private"}) == 0
@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import (
+    SamplingProfiler,
+    SlowRequestMiddleware,
+    request_breakdown,
+)
+from app.utils.tracing import Span, trace_methods, traced
+
+
+def span(name, layer, start_ms, end_ms, span_id, parent_id=None, **attributes):
+    return Span(
+        name=name,
+        trace_id="t",
+        span_id=span_id,
+        parent_id=parent_id,
+        start_ns=int(start_ms * 1_000_000),
+        end_ns=int(end_ms * 1_000_000),
+        attributes={"layer": layer, **attributes},
+    )
+
+
+def test_breakdown_counts_top_level_service_time_only():
+    spans = [
+        span("auth.get_current_user", "auth", 0, 2, "a"),
+        span("DynamoDB.Query", "dynamodb", 3, 13, "d1", "s2", **{"db.operation": "Query", "db.dynamodb.key_prefix": "EVENT#"}),
+        span("ShowService.inner", "service", 3, 14, "s2", "s1"),
+        span("DynamoDB.BatchGetItem", "dynamodb", 14, 40, "d2", "s1", **{"db.operation": "BatchGetItem"}),
+        span("ShowService.outer", "service", 2, 41, "s1"),
+        span("serialize", "serialization", 41, 44, "z"),
+    ]
+
+    breakdown = request_breakdown(spans, total_ms=45)
+
+    assert breakdown["auth_ms"] == 2
+    assert breakdown["service_ms"] == 39
+    assert breakdown["dynamodb_ms"] == 36
+    assert breakdown["serialization_ms"] == 3
+    assert [call["operation"] for call in breakdown["dynamodb_calls"]] == [
+        "BatchGetItem",
+        "Query",
+    ]
+
+
+def test_sampling_profiler_collects_folded_stacks():
+    done = threading.Event()
+
+    def busy_wait_for_profiler():
+        while not done.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_wait_for_profiler)
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start(duration=5)
+    time.sleep(0.05)
+    profiler.stop()
+    done.set()
+    worker.join()
+
+    assert not profiler.running
+    assert "busy_wait_for_profiler" in profiler.folded()
+    assert profiler.summary()["samples"] > 0
+
+
+def test_sampling_profiler_can_be_limited_to_some_threads():
+    done = threading.Event()
+
+    def watched():
+        while not done.is_set():
+            sum(range(1000))
+
+    def ignored():
+        while not done.is_set():
+            sum(range(1000))
+
+    threads = [threading.Thread(target=watched), threading.Thread(target=ignored)]
+    for thread in threads:
+        thread.start()
+    profiler = SamplingProfiler(interval=0.001, thread_ids={threads[0].ident})
+    profiler.start(duration=5)
+    time.sleep(0.05)
+    profiler.stop()
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    assert "watched" in profiler.folded()
+    assert "ignored" not in profiler.folded()
+
+
+def test_profiler_cannot_start_twice():
+    profiler = SamplingProfiler(interval=0.01)
+    profiler.start()
+    try:
+        try:
+            profiler.start()
+            assert False, "expected RuntimeError"
+        except RuntimeError:
+            pass
+    finally:
+        profiler.stop()
+
+
+@trace_methods("SlowService")
+class SlowService:
+    def work(self, seconds):
+        time.sleep(seconds)
+        return {"ok": True}
+
+
+def build_app(**options):
+    app = FastAPI()
+    app.add_middleware(SlowRequestMiddleware, **options)
+    app.add_middleware(MetricsMiddleware)
+
+    @traced("auth.fake", layer="auth")
+    def fake_auth():
+        return "u1"
+
+    @app.get("/work/{seconds}")
+    def work(seconds: float):
+        fake_auth()
+        return SlowService().work(seconds)
+
+    return app
+
+
+def slow_records(caplog):
+    return [
+        json.loads(record.getMessage().split(" ", 2)[2])
+        for record in caplog.records
+        if record.getMessage().startswith("slow request")
+    ]
+
+
+def test_slow_requests_log_a_breakdown(caplog):
+    client = TestClient(build_app(threshold_ms=20))
+    with caplog.at_level(logging.WARNING, logger="app.utils.profiling"):
+        client.get("/work/0")
+        client.get("/work/0.05")
+
+    (record,) = slow_records(caplog)
+    assert record["route"] == "/work/{seconds}"
+    assert record["status"] == 200
+    assert record["service_ms"] >= 50
+    assert record["auth_ms"] >= 0
+    assert "profile" not in record
+
+
+def test_slow_requests_can_attach_a_profile(caplog):
+    client = TestClient(
+        build_app(threshold_ms=10, profile=True, profile_interval=0.001)
+    )
+    with caplog.at_level(logging.WARNING, logger="app.utils.profiling"):
+        client.get("/work/0.1")
+
+    (record,) = slow_records(caplog)
+    assert any("work" in entry["stack"] for entry in record["profile"])
+
+
+def test_threshold_zero_disables_logging(caplog):
+    client = TestClient(build_app(threshold_ms=0))
+    with caplog.at_level(logging.WARNING, logger="app.utils.profiling"):
+        client.get("/work/0.01")
+
+    assert slow_records(caplog) == []
@@ -0,0 +1,100 @@
+from unittest.mock import MagicMock
+import pytest
+
+from app.custom_exceptions.generic import TooManyRequests
+from app.utils.rate_limiter import (
+    DynamoDBRateLimitBackend,
+    InMemoryRateLimitBackend,
+    LoginThrottler,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_in_memory_backend_allows_up_to_limit_then_blocks():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+
+    for _ in range(3):
+        assert backend.hit("k", limit=3, window_seconds=60) == 0
+
+    retry_after = backend.hit("k", limit=3, window_seconds=60)
+    assert retry_after == pytest.approx(20.0)
+
+
+def test_in_memory_backend_refills_over_time():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+    for _ in range(3):
+        backend.hit("k", limit=3, window_seconds=60)
+
+    clock.now += 20
+    assert backend.hit("k", limit=3, window_seconds=60) == 0
+    assert backend.hit("k", limit=3, window_seconds=60) > 0
+
+
+def test_in_memory_backend_reset_clears_bucket():
+    backend = InMemoryRateLimitBackend(clock=FakeClock())
+    backend.hit("k", limit=1, window_seconds=60)
+
+    backend.reset("k", window_seconds=60)
+
+    assert backend.hit("k", limit=1, window_seconds=60) == 0
+
+
+def test_in_memory_backend_evicts_refilled_buckets():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock, max_keys=2)
+    backend.hit("a", limit=1, window_seconds=10)
+    backend.hit("b", limit=1, window_seconds=10)
+    clock.now += 10
+
+    backend.hit("c", limit=1, window_seconds=10)
+
+    assert set(backend._buckets) == {"c"}
+
+
+def test_dynamodb_backend_weights_previous_window():
+    table = MagicMock()
+    table.update_item.return_value = {"Attributes": {"hits": 2}}
+    table.get_item.return_value = {"Item": {"hits": 10}}
+    backend = DynamoDBRateLimitBackend(table=table, clock=FakeClock(1230.0))
+
+    # 30s into a 60s window: 10 * 0.5 + 2 = 7
+    assert backend.hit("k", limit=7, window_seconds=60) == 0
+    assert backend.hit("k", limit=6, window_seconds=60) == 30
+
+    _, kwargs = table.update_item.call_args
+    assert kwargs["Key"] == {"pk": "RATE_LIMIT#k", "sk": "WINDOW#1200"}
+    _, kwargs = table.get_item.call_args
+    assert kwargs["Key"] == {"pk": "RATE_LIMIT#k", "sk": "WINDOW#1140"}
+
+
+def test_throttler_raises_with_retry_after():
+    backend = MagicMock()
+    backend.hit.side_effect = [0.0, 12.3]
+    throttler = LoginThrottler(backend, 5, 50, 300)
+
+    with pytest.raises(TooManyRequests) as exc:
+        throttler.check("A@b.com ", client_ip="1.2.3.4")
+
+    assert exc.value.retry_after == 13
+    keys = [call.args[0] for call in backend.hit.call_args_list]
+    assert keys == ["LOGIN_IP#1.2.3.4", "LOGIN_EMAIL#a@b.com"]
+
+
+def test_throttler_skips_email_bucket_when_ip_is_blocked():
+    backend = MagicMock()
+    backend.hit.return_value = 4.0
+    throttler = LoginThrottler(backend, 5, 50, 300)
+
+    with pytest.raises(TooManyRequests):
+        throttler.check("a@b.com", client_ip="1.2.3.4")
+
+    backend.hit.assert_called_once()
@@ -0,0 +1,111 @@
+import asyncio
+
+from app.utils.change_stream import ChangeRecord
+from app.utils.seat_stream import SeatStreamHub
+
+
+def change(show_id, new_image=None):
+    return ChangeRecord(
+        event_name="MODIFY",
+        keys={"pk": f"SHOW#{show_id}", "sk": "DETAILS"},
+        old_image=None,
+        new_image=new_image,
+        created_at=0.0,
+    )
+
+
+async def drain(hub, show_id, listener, count):
+    async def connected():
+        return False
+
+    stream = hub.events(show_id, listener, connected)
+    messages = [await stream.__anext__() for _ in range(count)]
+    await stream.aclose()
+    return messages
+
+
+def test_listeners_share_one_load_and_see_each_seat_once():
+    loads = []
+    booked = ["A1"]
+
+    def load(show_id):
+        loads.append(show_id)
+        return list(booked) if show_id == "s1" else None
+
+    hub = SeatStreamHub(load, keepalive_seconds=0.01)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        first = hub.subscribe("s1", loop)
+        second = hub.subscribe("s1", loop)
+        assert hub.subscribe("missing", loop) is None
+        hub.publish_booked("s1", ["A1", "A2"])
+        # the same booking arriving again through the change stream
+        hub.on_change(change("s1", {"booked_seats": ["A1", "A2"]}))
+        # a keys-only record from another instance
+        booked.extend(["A2", "B7"])
+        hub.on_change(change("s1"))
+        return (
+            await drain(hub, "s1", first, 4),
+            await drain(hub, "s1", second, 3),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert first == [
+        'event: snapshot\ndata: {"show_id":"s1","booked_seats":["A1"]}\n\n',
+        'event: booked\ndata: {"show_id":"s1","seats":["A2"]}\n\n',
+        'event: booked\ndata: {"show_id":"s1","seats":["B7"]}\n\n',
+        ": keepalive\n\n",
+    ]
+    assert second == first[:3]
+    assert loads == ["s1", "missing", "s1"]
+    assert not hub.watching("s1")
+
+
+def test_slow_listener_is_closed():
+    hub = SeatStreamHub(lambda show_id: [], max_queue=2)
+
+    async def run():
+        listener = hub.subscribe("s1", asyncio.get_running_loop())
+        for seat in ["A1", "A2", "A3"]:
+            hub.publish_booked("s1", [seat])
+        await asyncio.sleep(0)
+
+        async def connected():
+            return False
+
+        return [message async for message in hub.events("s1", listener, connected)]
+
+    assert asyncio.run(run()) == []
+    assert not hub.watching("s1")
+
+
+def test_subscriber_never_joins_a_topic_its_last_listener_just_left():
+    hub = SeatStreamHub(lambda show_id: ["A1"])
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        leaving = hub.subscribe("s1", loop)
+        lock = hub._lock
+
+        class RacingLock:
+            # the last listener leaves right after the next lookup
+            raced = False
+
+            def __enter__(self):
+                return lock.__enter__()
+
+            def __exit__(self, *exc):
+                lock.__exit__(*exc)
+                if not RacingLock.raced:
+                    RacingLock.raced = True
+                    hub.unsubscribe("s1", leaving)
+
+        hub._lock = RacingLock()
+        listener = hub.subscribe("s1", loop)
+        hub._lock = lock
+        hub.publish_booked("s1", ["A2"])
+        return await drain(hub, "s1", listener, 2)
+
+    assert asyncio.run(run())[1] == 'event: booked\ndata: {"show_id":"s1","seats":["A2"]}\n\n'
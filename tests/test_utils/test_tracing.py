@@ -0,0 +1,174 @@
+import json
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.metrics import MetricsMiddleware
+from app.utils.tracing import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    TracingMiddleware,
+    otlp_payload,
+    register_tracing_hooks,
+    trace_methods,
+    tracer,
+)
+
+
+@pytest.fixture
+def spans():
+    exporter = InMemorySpanExporter()
+    tracer.set_exporter(exporter)
+    yield exporter.spans
+    tracer.set_exporter(None)
+
+
+@trace_methods("FakeService")
+class FakeService:
+    def __init__(self, client=None):
+        self.client = client
+
+    def outer(self):
+        return self.inner()
+
+    def inner(self):
+        return "done"
+
+    def fail(self):
+        raise ValueError("bad input")
+
+    def read(self):
+        return self.client.get_item(TableName="t", Key={"pk": {"S": "SHOW#1"}})
+
+
+def make_client():
+    client = boto3.client(
+        "dynamodb",
+        region_name="ap-south-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+    )
+    register_tracing_hooks(client)
+    return client
+
+
+def test_service_spans_nest(spans):
+    assert FakeService().outer() == "done"
+
+    inner, outer = spans
+    assert (outer.name, inner.name) == ("FakeService.outer", "FakeService.inner")
+    assert inner.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id
+
+
+def test_service_errors_are_recorded(spans):
+    with pytest.raises(ValueError):
+        FakeService().fail()
+
+    assert spans[0].status == "error"
+    assert spans[0].error == "ValueError: bad input"
+
+
+def test_disabled_tracer_exports_nothing():
+    assert not tracer.enabled
+    assert FakeService().outer() == "done"
+
+
+def test_dynamodb_spans_carry_table_prefix_and_counts(spans):
+    client = make_client()
+    stubber = Stubber(client)
+    stubber.add_response(
+        "get_item", {"Item": {"pk": {"S": "SHOW#1"}}, "ConsumedCapacity": {"CapacityUnits": 0.5}}
+    )
+    stubber.add_response(
+        "query",
+        {"Items": [{"pk": {"S": "EVENTS"}}] * 3, "Count": 3, "ScannedCount": 3},
+    )
+    stubber.add_client_error("put_item", "ConditionalCheckFailedException")
+    with stubber:
+        FakeService(client).read()
+        client.query(
+            TableName="t",
+            KeyConditionExpression="pk = :pk",
+            ExpressionAttributeValues={":pk": {"S": "EVENTS"}},
+        )
+        with pytest.raises(Exception):
+            client.put_item(TableName="t", Item={"pk": {"S": "BOOKING#u1"}})
+
+    get_span, service_span, query_span, put_span = spans
+    assert get_span.name == "DynamoDB.GetItem"
+    assert get_span.parent_id == service_span.span_id
+    assert get_span.attributes["aws.dynamodb.table_names"] == ["t"]
+    assert get_span.attributes["db.dynamodb.key_prefix"] == "SHOW#"
+    assert get_span.attributes["aws.dynamodb.consumed_capacity"] == 0.5
+    assert query_span.parent_id is None
+    assert query_span.attributes["db.dynamodb.key_prefix"] == "EVENTS"
+    assert query_span.attributes["aws.dynamodb.count"] == 3
+    assert put_span.status == "error"
+    assert put_span.error == "ConditionalCheckFailedException"
+
+
+def test_transaction_spans_count_items(spans):
+    client = make_client()
+    stubber = Stubber(client)
+    stubber.add_response("transact_write_items", {})
+    with stubber:
+        client.transact_write_items(
+            TransactItems=[
+                {"Put": {"TableName": "t", "Item": {"pk": {"S": "a"}}}},
+                {"Update": {"TableName": "t", "Key": {"pk": {"S": "b"}}, "UpdateExpression": "SET x = :x", "ExpressionAttributeValues": {":x": {"N": "1"}}}},
+            ]
+        )
+
+    assert spans[0].attributes["db.dynamodb.request_items"] == 2
+    assert spans[0].attributes["aws.dynamodb.table_names"] == ["t"]
+
+
+def test_middleware_opens_root_span_per_route(spans):
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/things/{thing_id}")
+    def read_thing(thing_id: str):
+        return FakeService().inner()
+
+    TestClient(app).get(
+        "/things/abc",
+        headers={
+            "traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        },
+    )
+
+    service_span, root = spans
+    assert root.name == "GET /things/{thing_id}"
+    assert root.attributes["http.status_code"] == 200
+    assert root.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert root.parent_id == "b7ad6b7169203331"
+    assert service_span.parent_id == root.span_id
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer.set_exporter(FileSpanExporter(str(path)))
+    try:
+        FakeService().outer()
+    finally:
+        tracer.set_exporter(None)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["FakeService.inner", "FakeService.outer"]
+    assert lines[0]["parent_id"] == lines[1]["span_id"]
+
+
+def test_otlp_payload_shape(spans):
+    FakeService().outer()
+
+    payload = otlp_payload(spans)
+    exported = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [span["name"] for span in exported] == ["FakeService.inner", "FakeService.outer"]
+    assert exported[0]["parentSpanId"] == exported[1]["spanId"]
+    assert exported[0]["status"] == {"code": 1}
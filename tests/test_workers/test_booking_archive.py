@@ -0,0 +1,194 @@
+from datetime import date
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.repository.booking_repository import BookingRepository
+from app.repository.memory_table import MemoryTable
+from app.workers.booking_archive import BookingArchiveWorker
+
+TODAY = date(2030, 6, 1)
+
+
+@pytest.fixture
+def table():
+    return MemoryTable("eventro_table")
+
+
+def booking_item(booking_id, show_date):
+    return {
+        "pk": "USER#u1",
+        "sk": f"SHOW_DATE#{show_date}#BOOKING#{booking_id}",
+        "show_id": "s1",
+        "time_booked": "",
+        "total_price": 100,
+        "seats": ["A1"],
+        "venue_city": "delhi",
+        "venue_name": "Hall",
+        "venue_state": "delhi",
+        "event_name": "concert",
+        "event_duration": 120,
+        "event_id": "e1",
+    }
+
+
+def seed(table, show_dates):
+    for i, show_date in enumerate(show_dates):
+        table.put_item(Item=booking_item(f"b{i}", show_date))
+    return BookingRepository(table=table)
+
+
+def worker(bookings, today=TODAY):
+    return BookingArchiveWorker(
+        booking_repo=bookings, archive_after_days=30, page_size=2, today=lambda: today
+    )
+
+
+def test_sweep_moves_old_bookings_into_yearly_archives(table):
+    bookings = seed(
+        table, ["2029-03-01", "2029-12-31", "2030-01-15", "2030-05-20", "2030-07-01"]
+    )
+
+    assert worker(bookings).run_once() == 3
+    assert worker(bookings).run_once() == 0
+
+    sort_keys = [
+        item["sk"]
+        for item in table.query(
+            KeyConditionExpression="pk = :pk",
+            ExpressionAttributeValues={":pk": "USER#u1"},
+        )["Items"]
+    ]
+    assert sort_keys == [
+        "SHOW_ARCHIVE#2029#000",
+        "SHOW_ARCHIVE#2030#000",
+        "SHOW_DATE#2030-05-20#BOOKING#b3",
+        "SHOW_DATE#2030-07-01#BOOKING#b4",
+    ]
+    upcoming = bookings.get_bookings("u1", from_date=TODAY.isoformat())
+    assert [b.booking_id for b in upcoming] == ["b4"]
+
+
+def test_past_bookings_page_from_hot_items_into_the_archive(table):
+    bookings = seed(
+        table, ["2029-03-01", "2029-12-31", "2030-01-15", "2030-05-20", "2030-07-01"]
+    )
+    worker(bookings).run_once()
+
+    pages = []
+    page = None
+    while True:
+        found, page = bookings.query_bookings(
+            "u1", to_date="2030-05-31", descending=True, limit=1, page=page
+        )
+        pages.append([b.booking_id for b in found])
+        if page is None:
+            break
+
+    assert [b for found in pages for b in found] == ["b3", "b2", "b1", "b0"]
+    # the newest bookings come from a single query, before any archive is read
+    assert pages[0] == ["b3"]
+    # an archive part holding both 2029 bookings is split across pages
+    assert all(len(found) <= 1 for found in pages)
+    with pytest.raises(ValueError):
+        bookings.query_bookings("u1", page="bm90LWEta2V5")
+
+
+def test_archiving_again_merges_with_the_existing_archive(table):
+    bookings = seed(table, ["2029-03-01"])
+    worker(bookings).run_once()
+    table.put_item(Item=booking_item("late", "2029-04-01"))
+
+    assert worker(bookings).run_once() == 1
+    found, page = bookings.query_bookings("u1", to_date="2029-12-31", descending=True)
+    # nothing is left in the hot range, the archive comes on the next page
+    assert found == []
+    found, _ = bookings.query_bookings(
+        "u1", to_date="2029-12-31", descending=True, page=page
+    )
+    assert [b.booking_id for b in found] == ["late", "b0"]
+
+
+def test_archive_moves_bookings_in_batches_without_copies(table):
+    bookings = seed(table, [f"2029-01-{day:02d}" for day in range(1, 29)] * 5)
+    items, _ = bookings.list_archivable("2030-01-01", 1000)
+    transact = bookings.client.transact_write_items
+    calls = []
+
+    def fail_second(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 2:
+            raise ClientError(
+                {"Error": {"Code": "TransactionCanceledException", "Message": "race"}},
+                "TransactWriteItems",
+            )
+        return transact(**kwargs)
+
+    bookings.client.transact_write_items = fail_second
+
+    # one part leaves room for 99 deletes next to it
+    assert bookings.archive_bookings("u1", "2029", items) == 99
+    found, page = bookings.query_bookings("u1", to_date="2029-12-31", limit=1000)
+    while page:
+        more, page = bookings.query_bookings(
+            "u1", to_date="2029-12-31", limit=1000, page=page
+        )
+        found += more
+    assert sorted(b.booking_id for b in found) == sorted(f"b{i}" for i in range(140))
+
+
+def test_pages_resume_inside_an_archive_part(table):
+    bookings = seed(
+        table, ["2029-01-01", "2029-02-01", "2029-03-01", "2029-04-01", "2029-05-01"]
+    )
+    worker(bookings).run_once()
+
+    ascending = ["b0", "b1", "b2", "b3", "b4"]
+    for descending, expected in ((False, ascending), (True, ascending[::-1])):
+        pages = []
+        page = None
+        while True:
+            found, page = bookings.query_bookings(
+                "u1", to_date="2029-12-31", descending=descending, limit=2, page=page
+            )
+            pages.append([b.booking_id for b in found])
+            if page is None:
+                break
+        assert [b for found in pages for b in found] == expected
+        assert all(len(found) <= 2 for found in pages)
+
+
+def test_date_range_reads_archive_then_hot_items_in_order(table):
+    # archived and live bookings both from before the real today, so the
+    # range has to read the archive
+    bookings = seed(
+        table, ["2019-03-01", "2019-12-31", "2020-01-15", "2020-05-20", "2020-07-01"]
+    )
+    worker(bookings, today=date(2020, 6, 1)).run_once()
+
+    found, page = bookings.query_bookings("u1", from_date="2019-06-01", to_date="2020-06-30")
+    while page:
+        more, page = bookings.query_bookings(
+            "u1", from_date="2019-06-01", to_date="2020-06-30", page=page
+        )
+        found += more
+
+    assert [b.booking_id for b in found] == ["b1", "b2", "b3"]
+
+
+def test_upcoming_range_skips_the_archive(table):
+    bookings = seed(table, ["2020-01-01", "2099-01-01"])
+    worker(bookings).run_once()
+    calls = []
+    query = table.query
+
+    def counting_query(**kwargs):
+        calls.append(kwargs)
+        return query(**kwargs)
+
+    table.query = counting_query
+
+    found, page = bookings.query_bookings("u1", from_date=date.today().isoformat())
+
+    assert ([b.booking_id for b in found], page) == (["b1"], None)
+    assert len(calls) == 1
@@ -0,0 +1,200 @@
+from dataclasses import replace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.venue import Venue
+from app.repository.event_repository import EventRepository
+from app.repository.memory_table import MemoryTable
+from app.repository.outbox_repository import OutboxRepository
+from app.repository.show_repository import ShowRepository
+from app.repository.venue_repository import VenueRepository
+from app.workers.event_fanout import EventFanoutWorker
+
+
+@pytest.fixture
+def table():
+    return MemoryTable("eventro_table")
+
+
+def seed(table, shows_per_city=3):
+    event = Event(
+        id="e1",
+        name="concert",
+        description="live",
+        duration=120,
+        category="music",
+        is_blocked=False,
+        artist_ids=["a1"],
+        artist_names=["Artist"],
+    )
+    EventRepository(table=table).add_event(event)
+    shows = ShowRepository(table=table)
+    for city in ("delhi", "pune"):
+        venue = Venue(
+            id=f"v-{city}",
+            name="Hall",
+            host_id="h1",
+            city=city,
+            state=city,
+            is_blocked=False,
+            is_seat_layout_required=True,
+        )
+        VenueRepository(table=table).add_venue(venue)
+        for i in range(shows_per_city):
+            show = Show(
+                id=f"s-{city}-{i}",
+                venue_id=venue.id,
+                event_id=event.id,
+                is_blocked=False,
+                price=100,
+                show_date=f"2030-01-0{i + 1}",
+                show_time="18:00",
+                booked_seats=[],
+            )
+            shows.create_show(show=show, venue=venue, event=event)
+    return event
+
+
+def projection_flags(table):
+    flags = []
+    for pk in ("EVENTS", "CITY#delhi", "CITY#pune", "EVENT#e1#CITY#delhi", "EVENT#e1#CITY#pune"):
+        items = table.query(
+            KeyConditionExpression="pk = :pk", ExpressionAttributeValues={":pk": pk}
+        )["Items"]
+        flags.extend(item["is_event_blocked"] for item in items)
+    return flags
+
+
+def make_worker(table, **kwargs):
+    return EventFanoutWorker(
+        outbox_repo=OutboxRepository(table=table),
+        event_repo=EventRepository(table=table),
+        **kwargs,
+    )
+
+
+def test_block_propagates_to_every_projection(table):
+    seed(table)
+    EventRepository(table=table).update_event(event_id="e1", is_blocked=True)
+    purger = MagicMock()
+    worker = make_worker(table, batch_size=2, cdn_purger=purger)
+
+    assert worker.run_once() == 1
+
+    flags = projection_flags(table)
+    # name index, two city rows and two rows per show
+    assert len(flags) == 1 + 2 + 2 * 6
+    assert all(flags)
+    (job,) = OutboxRepository(table=table).list_jobs()
+    assert job["status"] == "done"
+    assert job["rows_done"] == len(flags)
+    assert "city:pune" in purger.purge.call_args.args[0]
+    blocked = EventRepository(table=table).get_events_by_city_and_name(city="delhi")
+    assert [event.is_blocked for event in blocked] == [True]
+
+
+def test_stale_show_write_does_not_unblock_a_city_row(table):
+    event = seed(table)
+    EventRepository(table=table).update_event(event_id="e1", is_blocked=True)
+    make_worker(table).run_once()
+    venue = VenueRepository(table=table).get_venue_by_id("v-delhi")
+    later = Show(
+        id="s-late",
+        venue_id=venue.id,
+        event_id=event.id,
+        is_blocked=False,
+        price=100,
+        show_date="2031-01-01",
+        show_time="18:00",
+        booked_seats=[],
+    )
+
+    # scheduled from an event read before the block
+    ShowRepository(table=table).create_show(show=later, venue=venue, event=event)
+
+    (row,) = table.query(
+        KeyConditionExpression="pk = :pk",
+        ExpressionAttributeValues={":pk": "CITY#delhi"},
+    )["Items"]
+    assert row["is_event_blocked"] is True
+    assert row["expires_at"] == ShowRepository._to_ddb_ttl("2031-01-01", "18:00")
+
+
+def test_failed_job_resumes_from_saved_progress(table):
+    seed(table)
+    events = EventRepository(table=table)
+    events.update_event(event_id="e1", is_blocked=True)
+    worker = make_worker(table, batch_size=2)
+    real_list = events.list_city_show_keys
+    calls = []
+
+    def flaky(*args):
+        calls.append(args)
+        if len(calls) == 3:
+            raise RuntimeError("throttled")
+        return real_list(*args)
+
+    worker.event_repo.list_city_show_keys = flaky
+
+    assert worker.run_once() == 0
+    (job,) = OutboxRepository(table=table).list_jobs()
+    assert job["status"] == "pending"
+    assert job["phase"] == "shows"
+    assert job["last_error"] == "RuntimeError: throttled"
+
+    assert worker.run_once() == 1
+    # the retry started from the third page instead of the first
+    assert calls[3][2:] == calls[2][2:]
+    assert all(projection_flags(table))
+
+
+def test_flip_during_run_restarts_with_latest_value(table):
+    seed(table)
+    events = EventRepository(table=table)
+    events.update_event(event_id="e1", is_blocked=True)
+    worker = make_worker(table, batch_size=2)
+    real_flag = events.set_projection_flag
+    flipped = []
+
+    def flip_once(keys, is_blocked, version):
+        if not flipped:
+            flipped.append(True)
+            events.update_event(event_id="e1", is_blocked=False)
+        return real_flag(keys, is_blocked, version)
+
+    worker.event_repo.set_projection_flag = flip_once
+
+    assert worker.run_once() == 0
+    assert worker.run_once() == 1
+    assert not any(projection_flags(table))
+
+
+def test_backfill_brings_legacy_city_rows_under_the_worker(table):
+    seed(table)
+    # rows written before the worker existed: no membership, no version
+    for city in ("delhi", "pune"):
+        table.delete_item(Key={"pk": "EVENT#e1", "sk": f"CITY#{city}"})
+        table.update_item(
+            Key={"pk": f"CITY#{city}", "sk": "NAME#concert#ID#e1"},
+            UpdateExpression="REMOVE event_version",
+        )
+    events = EventRepository(table=table)
+    events.update_event(event_id="e1", is_blocked=True)
+    worker = make_worker(table, batch_size=1)
+    worker.run_once()
+
+    # the stale rows are not trusted
+    assert [e.is_blocked for e in events.get_events_by_city_and_name(city="delhi")] == [True]
+
+    assert worker.backfill() == 2
+    assert worker.backfill() == 0
+
+    assert events.list_event_cities("e1") == ["delhi", "pune"]
+    events.update_event(event_id="e1", is_blocked=False)
+    worker.run_once()
+    assert not any(projection_flags(table))
+    listed = events.get_events_by_city_and_name(city="pune")
+    assert [(e.is_blocked, e.version) for e in listed] == [(False, 3)]
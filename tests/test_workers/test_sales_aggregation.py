@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.booking import Booking, CartLine
+from app.models.events import Event
+from app.models.shows import Show
+from app.models.venue import Venue
+from app.repository.analytics_repository import AnalyticsRepository
+from app.repository.booking_repository import BookingRepository
+from app.repository.memory_table import MemoryTable
+from app.repository.show_repository import ShowRepository
+from app.workers.sales_aggregation import SalesAggregationWorker
+
+
+@pytest.fixture
+def table():
+    return MemoryTable("eventro_table")
+
+
+def seed_show(table, show_id):
+    show = Show(
+        id=show_id,
+        venue_id="v1",
+        event_id="e1",
+        is_blocked=False,
+        price=Decimal(150),
+        show_date="2030-01-05",
+        show_time="18:00",
+        booked_seats=[],
+        capacity=100,
+    )
+    venue = Venue(
+        id="v1",
+        name="Hall",
+        host_id="h1",
+        city="delhi",
+        state="delhi",
+        is_blocked=False,
+        is_seat_layout_required=True,
+    )
+    table.put_item(
+        Item={"pk": f"SHOW#{show_id}", "sk": "DETAILS", "booked_seats": [], "seats_booked": 0}
+    )
+    for key in ShowRepository.listing_keys(show, venue.city):
+        table.put_item(Item=dict(key, seats_booked=0))
+    return show, venue
+
+
+def test_bookings_reach_the_counters_through_the_outbox(table):
+    event = Event(
+        id="e1",
+        name="Concert",
+        description="Live",
+        duration=Decimal(120),
+        category="music",
+        is_blocked=False,
+        artist_ids=["a1"],
+        artist_names=["Artist"],
+    )
+    bookings = BookingRepository(table=table, sales_outbox_shards=4)
+    analytics = AnalyticsRepository(table=table, counter_shards=2)
+    shows = {show_id: seed_show(table, show_id) for show_id in ("s1", "s2")}
+    for i, show_id in enumerate(["s1", "s2", "s1"]):
+        show, venue = shows[show_id]
+        booking = Booking(
+            booking_id=f"b{i}",
+            user_id="u1",
+            show_id=show_id,
+            time_booked="",
+            total_booking_price=300,
+            seats=[f"A{i}", f"B{i}"],
+        )
+        bookings.add_cart([CartLine(show, event, venue, [booking])])
+
+    # nothing is counted on the booking path
+    assert analytics.get_total("h1") is None
+
+    worker = SalesAggregationWorker(analytics, outbox_shards=4, batch_size=2)
+    assert worker.run_once() == 3
+    assert worker.run_once() == 0
+
+    total = analytics.get_total("h1")
+    assert (total["tickets"], total["revenue"], total["bookings"]) == (6, 900, 3)
+    shows = analytics.list_totals("h1", "SHOW")
+    assert [(s["show_id"], s["tickets"]) for s in shows] == [("s1", 4), ("s2", 2)]